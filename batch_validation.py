@@ -0,0 +1,278 @@
+"""
+Modo lote: valida várias pastas/arquivos de diálogo de uma vez.
+
+Os arquivos são distribuídos num ProcessPoolExecutor (um processo por núcleo),
+e os resultados voltam na mesma ordem da entrada, arquivo por arquivo,
+sem esperar o lote inteiro terminar.
+"""
+import glob
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from dialogue_validator import VALIDATOR_VERSION, validate_file
+
+
+LEVEL_ORDER = {"ERROR": 0, "WARNING": 1, "INFO": 2}
+ICONS = {"ERROR": "❌", "WARNING": "⚠️", "INFO": "ℹ️"}
+
+
+def available_cpus():
+    """Núcleos que este processo pode usar (respeita affinity/cgroups quando dá)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def _is_glob(target):
+    return any(ch in target for ch in "*?[")
+
+
+def is_batch_request(targets):
+    """Mais de um alvo, uma pasta ou um glob -> modo lote."""
+    if len(targets) != 1:
+        return True
+    target = targets[0]
+    return _is_glob(target) or Path(target).is_dir()
+
+
+def expand_targets(targets):
+    """
+    Transforma pastas e globs em uma lista de arquivos .json (sem repetir).
+    Pastas são percorridas recursivamente e em ordem alfabética.
+    """
+    files = []
+    seen = set()
+
+    def add(path):
+        key = os.path.normpath(path)
+        if key not in seen:
+            seen.add(key)
+            files.append(path)
+
+    for target in targets:
+        if _is_glob(target):
+            for match in sorted(glob.glob(target, recursive=True)):
+                if os.path.isfile(match):
+                    add(match)
+        elif os.path.isdir(target):
+            for match in sorted(Path(target).rglob("*.json")):
+                if match.is_file():
+                    add(str(match))
+        else:
+            # Arquivo direto (mesmo se não existir: o erro aparece no relatório)
+            add(target)
+
+    return files
+
+
+def map_files(func, file_paths, jobs=None):
+    """
+    Aplica func em cada arquivo usando o pool de processos e devolve os
+    resultados na ordem da entrada, conforme vão ficando prontos.
+    Com jobs=1 (ou um arquivo só) roda no próprio processo.
+    """
+    if jobs is None:
+        jobs = available_cpus()
+    jobs = max(1, min(jobs, len(file_paths)))
+
+    if jobs == 1:
+        for file_path in file_paths:
+            yield func(file_path)
+        return
+
+    # Lotes pequenos por worker diminuem o custo de IPC sem atrasar muito o streaming
+    chunksize = max(1, min(16, len(file_paths) // (jobs * 4)))
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(func, file_paths, chunksize=chunksize)
+
+
+def validate_files(file_paths, jobs=None, cache=None, streaming=False, rules=None):
+    """
+    Gera o resultado de validate_file para cada arquivo, na ordem da entrada.
+    Com cache (ResultCache), só os arquivos alterados vão para os workers.
+    """
+    func = partial(validate_file, streaming=streaming, rules=rules)
+    if cache is None:
+        yield from map_files(func, file_paths, jobs)
+        return
+
+    lookups = [cache.lookup(file_path) for file_path in file_paths]
+    misses = [file_path for file_path, (_, cached) in zip(file_paths, lookups) if cached is None]
+    fresh_results = map_files(func, misses, jobs)
+
+    for file_path, (content_hash, cached) in zip(file_paths, lookups):
+        if cached is not None:
+            yield {"file": str(file_path), "issues": cached["issues"], "error": cached["error"]}
+            continue
+
+        result = next(fresh_results)
+        if content_hash is not None:
+            cache.put(content_hash, result)
+        yield result
+
+
+def open_cache(cache_dir, streaming=False, rules=None):
+    """Abre o cache; se não der (pasta sem permissão etc.), segue sem cache."""
+    from result_cache import ResultCache
+    # No streaming algumas linhas apontam para o nó, então os resultados ficam separados
+    version = f"{VALIDATOR_VERSION}-stream" if streaming else VALIDATOR_VERSION
+    # Cada seleção de regras (e versão dos plugins) tem os seus resultados
+    if rules is not None and not rules.is_default:
+        version += f"-rules-{rules.fingerprint()}"
+    try:
+        return ResultCache(cache_dir, version=version)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ Cache desativado ({e}).", file=sys.stderr)
+        return None
+
+
+def count_levels(issues):
+    counts = {"ERROR": 0, "WARNING": 0, "INFO": 0}
+    for issue in issues:
+        if issue["level"] in counts:
+            counts[issue["level"]] += 1
+    return counts
+
+
+def print_file_result(result):
+    """Relatório compacto de um arquivo (uma linha por issue)."""
+    if result["error"]:
+        print(f"📄 {result['file']}")
+        print(f"   ❌ {result['error']}")
+        return
+
+    issues = result["issues"]
+    if not issues:
+        print(f"📄 {result['file']} — ✅ Nenhum problema encontrado.")
+        return
+
+    counts = count_levels(issues)
+    print(
+        f"📄 {result['file']} — Erros: {counts['ERROR']} | "
+        f"Avisos: {counts['WARNING']} | Info: {counts['INFO']}"
+    )
+
+    issues.sort(key=lambda x: (LEVEL_ORDER.get(x["level"], 99), x["code"], x["path"]))
+    for issue in issues:
+        icon = ICONS.get(issue["level"], "•")
+        location = issue["path"]
+        if "line" in issue:
+            location += f" (Linha {issue['line']})"
+        print(f"   {icon} [{issue['level']}] {issue['code']} {location}: {issue['message']}")
+
+
+class ResultPrinter:
+    """Saída "text": relatório compacto por arquivo + resumo do lote no final."""
+
+    def __init__(self):
+        self.summary = BatchSummary()
+
+    def add(self, result):
+        print_file_result(result)
+        self.summary.add(result)
+
+    def close(self):
+        return self.summary.finish()
+
+
+class FormattedOutput:
+    """Saída para máquina (report_formats): só o formato no stdout, o exit code é o mesmo."""
+
+    def __init__(self, output_format):
+        from report_formats import open_writer
+        self.writer = open_writer(output_format)
+        self.summary = BatchSummary()
+
+    def add(self, result):
+        self.writer.add(result)
+        self.summary.add(result)
+
+    def close(self):
+        self.writer.close()
+        return self.summary.exit_code()
+
+
+def open_output(output_format="text"):
+    """Destino dos resultados: add(result) para cada arquivo e close() -> exit code."""
+    if output_format == "text":
+        return ResultPrinter()
+    return FormattedOutput(output_format)
+
+
+def report_no_files(output_format="text"):
+    if output_format == "text":
+        print("❌ Nenhum arquivo .json encontrado.")
+        return 1
+    # Documento vazio, mas válido, para quem lê a saída
+    open_output(output_format).close()
+    print("❌ Nenhum arquivo .json encontrado.", file=sys.stderr)
+    return 1
+
+
+def run_batch(targets, jobs=None, cache_dir=None, streaming=False, output_format="text", rules=None):
+    """
+    Valida tudo e vai escrevendo arquivo por arquivo (no texto, com o resumo
+    geral no final). Retorna o exit code: 1 se teve algum ERROR ou arquivo
+    ilegível, senão 0.
+    """
+    file_paths = expand_targets(targets)
+    if not file_paths:
+        return report_no_files(output_format)
+
+    cache = open_cache(cache_dir, streaming, rules) if cache_dir else None
+    try:
+        return _run_batch(file_paths, jobs, cache, streaming, output_format, rules)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _run_batch(file_paths, jobs, cache, streaming=False, output_format="text", rules=None):
+    output = open_output(output_format)
+
+    for result in validate_files(file_paths, jobs=jobs, cache=cache, streaming=streaming, rules=rules):
+        output.add(result)
+
+    return output.close()
+
+
+class BatchSummary:
+    """Acumula os totais do lote enquanto os resultados vão chegando."""
+
+    def __init__(self):
+        self.totals = {"ERROR": 0, "WARNING": 0, "INFO": 0}
+        self.file_count = 0
+        self.failed_files = 0
+        self.files_with_issues = 0
+
+    def add(self, result):
+        self.file_count += 1
+
+        if result["error"]:
+            self.failed_files += 1
+            return
+
+        if result["issues"]:
+            self.files_with_issues += 1
+        for level, count in count_levels(result["issues"]).items():
+            self.totals[level] += count
+
+    def exit_code(self):
+        return 1 if self.totals["ERROR"] or self.failed_files else 0
+
+    def finish(self):
+        """Imprime o resumo geral e retorna o exit code."""
+        totals = self.totals
+        print("\n=== RESUMO DO LOTE ===")
+        print(
+            f"Arquivos: {self.file_count} | Com problemas: {self.files_with_issues} | "
+            f"Ilegíveis: {self.failed_files}"
+        )
+        print(f"Erros: {totals['ERROR']} | Avisos: {totals['WARNING']} | Info: {totals['INFO']}")
+
+        return self.exit_code()
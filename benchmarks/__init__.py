@@ -0,0 +1,17 @@
+"""
+Benchmarks do validador.
+
+- generator.py: gera grafos de diálogo sintéticos (com seed), no tamanho e
+  no formato que precisar
+- bench_validator.py: os benchmarks, no estilo do asv (classes com params,
+  setup e métodos time_*), então também rodam com `asv run` se quiser
+- runner.py: roda os benchmarks sem dependência nenhuma, guarda uma
+  baseline por máquina e aponta regressões
+
+Uso (da raiz do projeto):
+
+    python -m benchmarks                      # 1k e 10k nós, compara com a baseline
+    python -m benchmarks --sizes 1000,100000,1000000
+    python -m benchmarks --save-baseline      # grava o resultado atual como baseline
+    python -m benchmarks -k validate          # só os benchmarks com "validate" no nome
+"""
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+
+from benchmarks import generator, runner
+from benchmarks.generator import DEFAULT_DATA_DIR
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Roda os benchmarks do validador e compara com a baseline desta máquina.",
+    )
+    parser.add_argument(
+        "--sizes",
+        default=None,
+        help="Tamanhos em nós, separados por vírgula (ex: 1000,100000,1000000). Padrão: 1000,10000.",
+    )
+    parser.add_argument("-k", dest="pattern", default=None, help="Só os benchmarks com esse trecho no nome.")
+    parser.add_argument("--repeat", type=int, default=runner.DEFAULT_REPEAT, help="Rodadas por benchmark.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=runner.DEFAULT_THRESHOLD,
+        help="Quanto mais lento conta como regressão (0.15 = 15%%).",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=DEFAULT_DATA_DIR,
+        help="Pasta dos arquivos gerados, resultados e baseline (padrão: .nfc_bench).",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="Grava este resultado como a nova baseline.")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    sizes = [int(size.replace("_", "")) for size in args.sizes.split(",")] if args.sizes else None
+
+    # Os benchmarks pegam os arquivos gerados pelo dataset_path, que usa essa pasta
+    generator.DEFAULT_DATA_DIR = args.data_dir
+
+    current = runner.run_benchmarks(sizes=sizes, pattern=args.pattern, repeat=args.repeat)
+    runner.save_results(current, os.path.join(args.data_dir, "ultimo.json"))
+
+    if args.save_baseline:
+        path = runner.baseline_path(args.data_dir)
+        runner.save_results(current, path)
+        print(f"\n💾 Baseline gravada em {path}")
+        return 0
+
+    baseline = runner.load_baseline(args.data_dir)
+    if baseline is None:
+        print("\nSem baseline para comparar. Rode com --save-baseline para criar uma.")
+        return 0
+
+    rows = runner.compare(baseline, current, args.threshold)
+    return 1 if runner.print_comparison(rows, baseline) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
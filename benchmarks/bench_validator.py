@@ -0,0 +1,110 @@
+"""
+Benchmarks das funções principais do validador.
+
+Estilo asv: cada classe tem params (tamanhos em nós), setup(nós) e métodos
+time_*. O runner.py roda isso sem precisar do asv; os tamanhos podem ser
+trocados pela linha de comando (--sizes). As classes com dois parâmetros
+rodam também em cada estilo de formatação do gerador (STYLES): o parser com
+spans e o mapeamento de linhas dependem de como o arquivo está formatado.
+"""
+from benchmarks.generator import STYLES, dataset_path
+from compiled_graph import compile_dialogue
+from dialogue_validator import (
+    attach_line_numbers_to_issues,
+    load_json_file,
+    load_json_text,
+    load_json_with_spans,
+    validate_dialogue,
+    validate_json_text,
+)
+
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+class LoadJsonFile:
+    params = SIZES
+    param_names = ["nodes"]
+
+    def setup(self, nodes):
+        self.path = dataset_path(nodes)
+
+    def time_load_json_file(self, nodes):
+        load_json_file(self.path)
+
+
+class LoadStyles:
+    params = [SIZES, list(STYLES)]
+    param_names = ["nodes", "style"]
+
+    def setup(self, nodes, style):
+        self.path = dataset_path(nodes, style=style)
+
+    def time_load_json_file(self, nodes, style):
+        load_json_file(self.path)
+
+    def time_load_json_text(self, nodes, style):
+        load_json_text(self.path)
+
+    def time_load_json_with_spans(self, nodes, style):
+        load_json_with_spans(self.path)
+
+
+class ValidateDialogue:
+    params = SIZES
+    param_names = ["nodes"]
+
+    def setup(self, nodes):
+        self.data = load_json_file(dataset_path(nodes))
+
+    def time_validate_dialogue(self, nodes):
+        validate_dialogue(self.data)
+
+
+class ValidateWithPositions:
+    """Os dois jeitos de sair com line/column: spans do parser ou line_mapping no texto."""
+
+    params = [SIZES, list(STYLES)]
+    param_names = ["nodes", "style"]
+
+    def setup(self, nodes, style):
+        path = dataset_path(nodes, style=style)
+        self.data, self.text = load_json_text(path)
+        _, self.spans = load_json_with_spans(path)
+
+    def time_validate_dialogue_with_spans(self, nodes, style):
+        validate_dialogue(self.data, spans=self.spans)
+
+    def time_validate_json_text(self, nodes, style):
+        validate_json_text(self.data, self.text)
+
+
+class GraphPasses:
+    """Alcance a partir do start e SCCs no CompiledGraph, como nas checagens de grafo."""
+
+    params = SIZES
+    param_names = ["nodes"]
+
+    def setup(self, nodes):
+        data = load_json_file(dataset_path(nodes))
+        self.graph = compile_dialogue(data["nodes"])
+        self.start = self.graph.index[data["start"]]
+
+    def time_reachable_from(self, nodes):
+        self.graph.reachable_from([self.start])
+
+    def time_strongly_connected_components(self, nodes):
+        self.graph.strongly_connected_components()
+
+
+class AttachLineNumbers:
+    params = SIZES
+    param_names = ["nodes"]
+
+    def setup(self, nodes):
+        self.path = dataset_path(nodes)
+        self.issues = validate_dialogue(load_json_file(self.path))
+
+    def time_attach_line_numbers_to_issues(self, nodes):
+        # A função escreve line/column nas issues; cópias rasas para cada rodada começar igual
+        attach_line_numbers_to_issues([dict(issue) for issue in self.issues], self.path)
@@ -0,0 +1,161 @@
+"""
+Gerador de diálogos sintéticos para benchmark.
+
+A mesma seed gera sempre o mesmo documento. O grafo imita um diálogo de
+verdade: a história anda para frente (cada nó aponta para os próximos),
+com algumas voltas (ciclos), alguns nós soltos (órfãos), alguns destinos
+errados, choices com requires e nós que setam flags.
+"""
+import json
+import os
+import random
+from bisect import bisect_left
+
+
+WORDS = (
+    "olá você vamos mercado porta noite chave guarda taverna estrada "
+    "rei espada carta segredo amanhã cuidado ouro ponte floresta silêncio"
+).split()
+
+SPEAKERS = ["Ana", "Bruno", "Narrador", "Guarda", "Rei", "Mercador"]
+
+# Formatação do arquivo gerado
+STYLES = ("pretty", "wide", "minified", "lines")
+
+DEFAULT_DATA_DIR = os.environ.get("NFC_BENCH_DIR", ".nfc_bench")
+
+
+def generate_dialogue(
+    node_count,
+    seed=0,
+    branching=2.0,
+    flag_count=8,
+    cycle_ratio=0.05,
+    orphan_ratio=0.01,
+    broken_ratio=0.005,
+    end_ratio=0.02,
+):
+    """
+    Gera o documento ({"start", "flags", "nodes"}).
+
+    branching: média de saídas por nó (1 = só "next")
+    cycle_ratio: fração das conexões que voltam para um nó anterior
+    orphan_ratio: fração dos nós que ninguém aponta
+    broken_ratio: fração das conexões para um nó que não existe
+    end_ratio: fração dos nós com "end: true" (o último sempre é final)
+
+    Todo nó que não é órfão é alcançável a partir do start: a linha
+    principal sempre leva ao nó seguinte, e as outras saídas são sorteadas.
+    """
+    rng = random.Random(seed)
+    ids = [f"cena_{i:07d}" for i in range(node_count)]
+    flags = [f"flag_{i:02d}" for i in range(flag_count)]
+
+    orphan_count = int(max(node_count - 1, 0) * orphan_ratio)
+    orphans = set(rng.sample(range(1, node_count), orphan_count)) if orphan_count else set()
+    linked = [i for i in range(node_count) if i not in orphans]
+    position = {node: p for p, node in enumerate(linked)}
+    max_exits = max(1, round(2 * branching - 1))
+
+    # Finais decididos antes, para a linha principal poder pular por cima deles
+    # (nunca dois seguidos, senão o que vem depois ficaria órfão sem querer)
+    is_end = [False] * len(linked)
+    for p in range(1, len(linked) - 1):
+        is_end[p] = not is_end[p - 1] and rng.random() < end_ratio
+    if linked:
+        is_end[-1] = True
+
+    def pick_target(p):
+        roll = rng.random()
+        if roll < broken_ratio:
+            return f"cena_inexistente_{rng.randrange(node_count)}"
+        if roll < broken_ratio + cycle_ratio:
+            return ids[linked[rng.randint(max(0, p - 20), p)]]
+        return ids[linked[min(len(linked) - 1, p + rng.randint(1, 3))]]
+
+    nodes = {}
+    for i, node_id in enumerate(ids):
+        node = {
+            "speaker": rng.choice(SPEAKERS),
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30))),
+        }
+        # Órfão aponta para a frente a partir do nó ligado anterior a ele
+        p = position[i] if i in position else bisect_left(linked, i) - 1
+
+        if i in position and is_end[p]:
+            node["end"] = True
+        else:
+            # Linha principal: sempre para o próximo nó (e o seguinte, se o próximo for final).
+            # Órfão depois do último nó ligado aponta para ele (que é um final)
+            targets = [ids[linked[min(p + 1, len(linked) - 1)]]]
+            if p + 2 < len(linked) and is_end[p + 1]:
+                targets.append(ids[linked[p + 2]])
+            for _ in range(rng.randint(1, max_exits) - 1):
+                targets.append(pick_target(p))
+
+            if len(targets) == 1 and rng.random() < 0.5:
+                node["next"] = targets[0]
+            else:
+                choices = []
+                for target in targets:
+                    choice = {
+                        "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))),
+                        "next": target,
+                    }
+                    if flags and rng.random() < 0.15:
+                        choice["requires"] = rng.sample(flags, 1)
+                    choices.append(choice)
+                node["choices"] = choices
+
+        if flags and rng.random() < 0.1:
+            node["set_flags"] = rng.sample(flags, min(len(flags), rng.randint(1, 2)))
+        nodes[node_id] = node
+
+    return {"start": ids[0] if ids else "", "flags": flags, "nodes": nodes}
+
+
+def dump_dialogue(data, style="pretty"):
+    """
+    Texto JSON no estilo pedido:
+    pretty (indent 2), wide (indent 4), minified (sem espaços) ou
+    lines (um nó por linha, como alguns editores de diálogo exportam).
+    """
+    if style == "pretty":
+        return json.dumps(data, ensure_ascii=False, indent=2)
+    if style == "wide":
+        return json.dumps(data, ensure_ascii=False, indent=4)
+    if style == "minified":
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    if style == "lines":
+        lines = ["{"]
+        for key, value in data.items():
+            if key != "nodes":
+                lines.append(f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},")
+        node_lines = [
+            f"    {json.dumps(node_id, ensure_ascii=False)}: {json.dumps(node, ensure_ascii=False)}"
+            for node_id, node in data.get("nodes", {}).items()
+        ]
+        lines.append('  "nodes": {')
+        lines.append(",\n".join(node_lines))
+        lines.append("  }")
+        lines.append("}")
+        return "\n".join(lines)
+    raise ValueError(f"Estilo desconhecido: {style} (use {', '.join(STYLES)})")
+
+
+def dataset_path(node_count, seed=0, style="pretty", data_dir=None):
+    """
+    Arquivo gerado para o benchmark (fica em cache na pasta de dados, já que
+    gerar 1M de nós leva mais tempo que o próprio benchmark).
+    """
+    data_dir = data_dir or DEFAULT_DATA_DIR
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"dialogo-{node_count}-s{seed}-{style}.json")
+    if not os.path.exists(path):
+        text = dump_dialogue(generate_dialogue(node_count, seed), style)
+        # Grava num temporário e renomeia: um benchmark interrompido não deixa arquivo pela metade
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temp_path, path)
+    return path
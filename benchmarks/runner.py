@@ -0,0 +1,193 @@
+"""
+Roda os benchmarks (classes no estilo asv dos módulos bench_*.py), guarda
+o resultado e compara com a baseline desta máquina.
+
+Cada medida é o menor tempo entre as rodadas (o mínimo varia bem menos que
+a média com o resto do sistema competindo pela CPU). Uma regressão é um
+benchmark que ficou mais de --threshold (padrão 15%) mais lento que a baseline.
+"""
+import gc
+import importlib
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import statistics
+import subprocess
+import time
+
+import benchmarks
+from benchmarks.generator import DEFAULT_DATA_DIR
+from dialogue_validator import VALIDATOR_VERSION
+
+
+DEFAULT_SIZES = [1_000, 10_000]
+DEFAULT_REPEAT = 5
+DEFAULT_MAX_TIME = 10.0   # segundos por benchmark (para de repetir depois disso, com no mínimo 2 rodadas)
+DEFAULT_THRESHOLD = 0.15
+
+
+def discover():
+    """(nome da classe, classe, nome do método) de cada time_* dos módulos bench_*."""
+    found = []
+    for module_info in pkgutil.iter_modules(benchmarks.__path__):
+        if not module_info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{module_info.name}")
+        for class_name, cls in sorted(vars(module).items()):
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            for method_name in sorted(vars(cls)):
+                if method_name.startswith("time_"):
+                    found.append((class_name, cls, method_name))
+    return found
+
+
+def parameter_sets(cls, sizes=None):
+    """
+    Combinações de parâmetros de uma classe. Como no asv, com mais de um
+    param_names os params são uma lista por parâmetro; o primeiro é sempre o
+    tamanho em nós (é ele que o --sizes troca). sizes=None usa DEFAULT_SIZES.
+    """
+    params = getattr(cls, "params", [None])
+    if len(getattr(cls, "param_names", [])) > 1:
+        size_params, other_params = params[0], params[1:]
+    else:
+        size_params, other_params = params, []
+    run_sizes = sizes if sizes is not None else [size for size in DEFAULT_SIZES if size in size_params]
+    return [(size,) + rest for size in run_sizes for rest in itertools.product(*other_params)]
+
+
+def time_benchmark(cls, method_name, size, repeat=DEFAULT_REPEAT, max_time=DEFAULT_MAX_TIME):
+    """
+    Roda setup + uma rodada de aquecimento e mede. Retorna {"min", "median", "runs"}.
+    size pode ser uma tupla (um valor por parâmetro, veja parameter_sets).
+    """
+    args = size if isinstance(size, tuple) else (size,)
+    instance = cls()
+    if hasattr(instance, "setup"):
+        instance.setup(*args)
+    method = getattr(instance, method_name)
+
+    try:
+        method(*args)
+        times = []
+        started = time.perf_counter()
+        while len(times) < repeat:
+            gc.collect()
+            t0 = time.perf_counter()
+            method(*args)
+            times.append(time.perf_counter() - t0)
+            if len(times) >= 2 and time.perf_counter() - started > max_time:
+                break
+    finally:
+        if hasattr(instance, "teardown"):
+            instance.teardown(*args)
+
+    return {"min": min(times), "median": statistics.median(times), "runs": len(times)}
+
+
+def _git_commit():
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def run_benchmarks(sizes=None, pattern=None, repeat=DEFAULT_REPEAT, max_time=DEFAULT_MAX_TIME, report=print):
+    """
+    Roda tudo que bate com pattern (substring do nome, sem diferenciar maiúsculas).
+    sizes=None usa DEFAULT_SIZES (só os que a classe aceita).
+    Retorna o documento de resultados (o mesmo formato da baseline).
+    """
+    results = {}
+    for class_name, cls, method_name in discover():
+        name = f"{class_name}.{method_name}"
+        if pattern and pattern.lower() not in name.lower():
+            continue
+
+        for args in parameter_sets(cls, sizes):
+            key = f"{name}[{', '.join(map(str, args))}]"
+            result = time_benchmark(cls, method_name, args, repeat, max_time)
+            results[key] = result
+            report(f"{key:<72} {_format_time(result['min']):>10}  (mediana {_format_time(result['median'])}, {result['runs']} rodadas)")
+
+    return {
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "commit": _git_commit(),
+        "validator_version": VALIDATOR_VERSION,
+        "results": results,
+    }
+
+
+def _format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+# ============================================================
+# Baseline e comparação
+# ============================================================
+
+def baseline_path(data_dir=None):
+    """Uma baseline por máquina (tempos de máquinas diferentes não se comparam)."""
+    machine = platform.node() or "local"
+    return os.path.join(data_dir or DEFAULT_DATA_DIR, f"baseline-{machine}.json")
+
+
+def load_baseline(data_dir=None):
+    try:
+        with open(baseline_path(data_dir), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def save_results(document, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file, ensure_ascii=False, indent=2)
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compara os mínimos. Retorna [(nome, tempo_base, tempo_atual, razão, status)],
+    com status "regressão", "melhora" ou "igual". Só entram benchmarks presentes nos dois.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["min"] / base["min"] if base["min"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "regressão"
+        elif ratio < 1 - threshold:
+            status = "melhora"
+        else:
+            status = "igual"
+        rows.append((name, base["min"], result["min"], ratio, status))
+    return rows
+
+
+def print_comparison(rows, baseline):
+    icons = {"regressão": "❌", "melhora": "🚀", "igual": "✅"}
+    print(f"\n=== COMPARAÇÃO COM A BASELINE (commit {baseline.get('commit') or '?'}) ===")
+    for name, base_time, current_time, ratio, status in rows:
+        print(
+            f"{icons[status]} {name:<70} {_format_time(base_time):>10} -> {_format_time(current_time):>10}"
+            f"  ({ratio:.2f}x) {status}"
+        )
+    regressions = sum(1 for row in rows if row[4] == "regressão")
+    print(f"\nRegressões: {regressions} de {len(rows)} benchmarks comparados.")
+    return regressions
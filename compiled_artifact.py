@@ -0,0 +1,640 @@
+"""
+Diálogo compilado em binário (.nfcb), para recarregar sem ler o JSON de novo.
+
+O compile_file valida o arquivo (validate_dialogue, com spans) e grava:
+
+- cabeçalho versionado: formato do artefato, VALIDATOR_VERSION, regras usadas,
+  ordem dos bytes e hash/tamanho/mtime do JSON de origem (artefato que não
+  bate com o JSON atual é recompilado pelo load_compiled)
+- tabela de strings: ids, speakers, textos, flags, issues e paths, cada
+  string guardada uma vez só
+- registros dos nós (id, speaker, text, bits de fim, quantidade de choices)
+  e os índices dos nós ordenados pelo id, para achar um nó por busca binária
+- o grafo em CSR (offsets/targets, igual ao CompiledGraph), as bitmasks de
+  flags (set_flags por nó, requires por aresta e por choice) e as saídas
+- as issues da validação e a tabela de spans (path -> linha/coluna da chave,
+  ou do valor). Cada path vira (nó, resto do path): "$.nodes.sala.choices[0].next"
+  guarda o índice de "sala" e ".choices[0].next", que é a mesma string em
+  todos os nós. Paths fora dos nós ficam com nó -1 e o path inteiro.
+
+O DialogueArtifact abre o arquivo com mmap e cria só memoryviews sobre as
+seções: nada é copiado nem decodificado até ser usado. graph() devolve um
+CompiledGraph montado em cima dessas views, então as passadas de grafo
+(reachable_from, strongly_connected_components, playthrough...) rodam direto
+no artefato.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from compiled_graph import compile_dialogue
+from dialogue_validator import VALIDATOR_VERSION, load_json_with_spans, node_id_from_path, validate_dialogue
+from json_positions import parent_path
+from result_cache import hash_file
+
+
+# Mude sempre que o layout abaixo mudar (artefatos antigos são recompilados)
+ARTIFACT_FORMAT = 1
+ARTIFACT_SUFFIX = ".nfcb"
+
+_MAGIC = b"NFCB"
+_BYTE_ORDER = {"little": 1, "big": 2}[sys.byteorder]
+
+# magic, formato, ordem dos bytes, VALIDATOR_VERSION, regras, hash, tamanho e mtime do JSON,
+# e as contagens: nós, arestas, flags, strings, issues, spans, choices com requires, start
+_HEADER = struct.Struct("<4sHH16s16s20sqq8i")
+
+_SECTIONS = (
+    "string_offsets",  # int64, strings + 1 (início de cada string no blob)
+    "strings",         # bytes UTF-8
+    "nodes",           # int32 x _NODE_FIELDS por nó
+    "id_order",        # int32: índices dos nós ordenados pelo id (bytes UTF-8)
+    "offsets",         # int32, nós + 1
+    "targets",         # int32, arestas
+    "exits",           # 1 byte por nó (o exits do CompiledGraph)
+    "flag_names",      # int32: string de cada bit
+    "set_masks",       # mask_bytes por nó (little endian)
+    "edge_requires",   # mask_bytes por aresta
+    "gated",           # int32 x 2 (nó, índice da choice) por choice com requires
+    "gated_masks",     # mask_bytes por choice com requires
+    "issues",          # int32 x _ISSUE_FIELDS
+    "spans",           # int32 x 4 (nó, resto do path, linha, coluna), ordenado por (nó, resto)
+)
+_TABLE = struct.Struct(f"<{len(_SECTIONS)}q")
+
+# Registro de nó: id, speaker, text (strings; -1 = ausente), bits, quantidade de choices (-1 = sem lista)
+_NODE_FIELDS = 5
+NODE_END = 1        # "end": true
+NODE_INVALID = 2    # o nó não é um objeto
+
+# Registro de issue: level, code, message, path (strings), linha, coluna (-1 = sem posição)
+_ISSUE_FIELDS = 6
+
+
+class StaleArtifact(ValueError):
+    """O arquivo não é um artefato que esta versão consegue ler."""
+
+
+def artifact_path_for(source_path):
+    return os.path.splitext(source_path)[0] + ARTIFACT_SUFFIX
+
+
+def _rules_key(rules):
+    return "default" if rules is None or rules.is_default else rules.fingerprint()
+
+
+def _fixed(text, size):
+    data = text.encode("ascii")
+    if len(data) > size:
+        raise ValueError(f"'{text}' não cabe no cabeçalho")
+    return data.ljust(size, b"\0")
+
+
+# ============================================================
+# Escrita
+# ============================================================
+
+def compile_file(source_path, artifact_path=None, rules=None):
+    """
+    Valida o JSON e grava o artefato (por padrão ao lado dele, com .nfcb).
+    Retorna o caminho gravado. JSON inválido levanta json.JSONDecodeError.
+    """
+    artifact_path = artifact_path or artifact_path_for(source_path)
+    stat = os.stat(source_path)
+    source_hash = bytes.fromhex(hash_file(source_path))
+
+    data, spans = load_json_with_spans(source_path)
+    issues = validate_dialogue(data, spans=spans, rules=rules)
+
+    header_info = (
+        _fixed(VALIDATOR_VERSION, 16), _fixed(_rules_key(rules), 16),
+        source_hash, stat.st_size, stat.st_mtime_ns,
+    )
+    write_artifact(artifact_path, data, spans, issues, header_info)
+    return artifact_path
+
+
+def write_artifact(artifact_path, data, spans, issues, header_info):
+    strings = {}
+    string_list = []
+
+    def intern(value):
+        if not isinstance(value, str):
+            return -1
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(string_list)
+            string_list.append(value)
+        return index
+
+    nodes = data.get("nodes") if isinstance(data, dict) else None
+    if not isinstance(nodes, dict):
+        nodes = {}
+    graph = compile_dialogue(nodes)
+    mask_bytes = (len(graph.flag_names) + 7) // 8
+
+    def masks(values):
+        return b"".join(mask.to_bytes(mask_bytes, "little") for mask in values) if mask_bytes else b""
+
+    node_records = array("i")
+    for node_id in graph.node_ids:
+        node_data = nodes[node_id]
+        if not isinstance(node_data, dict):
+            node_records.extend((intern(node_id), -1, -1, NODE_INVALID, -1))
+            continue
+        choices = node_data.get("choices")
+        node_records.extend((
+            intern(node_id),
+            intern(node_data.get("speaker")),
+            intern(node_data.get("text")),
+            NODE_END if node_data.get("end") is True else 0,
+            len(choices) if isinstance(choices, list) else -1,
+        ))
+
+    encoded_ids = [node_id.encode("utf-8") for node_id in graph.node_ids]
+    id_order = array("i", sorted(range(len(encoded_ids)), key=encoded_ids.__getitem__))
+
+    gated = array("i")
+    for node, choice_path, _ in graph.gated:
+        gated.extend((node, int(choice_path[choice_path.rfind("[") + 1:-1])))
+
+    issue_records = array("i")
+    for issue in issues:
+        issue_records.extend((
+            intern(issue.get("level")), intern(issue.get("code")),
+            intern(issue.get("message")), intern(issue.get("path")),
+            issue.get("line", -1), issue.get("column", -1),
+        ))
+
+    span_keys = []
+    for path, path_span in (spans or {}).items():
+        node_id = node_id_from_path(path, graph.index)
+        if node_id is None:
+            node, rest = -1, path
+        else:
+            node, rest = graph.index[node_id], path[len("$.nodes.") + len(node_id):]
+        span = path_span.key or path_span.value
+        span_keys.append((node, rest.encode("utf-8"), intern(rest), span.line, span.column))
+    span_keys.sort()
+    span_records = array("i")
+    for node, _, rest, line, column in span_keys:
+        span_records.extend((node, rest, line, column))
+
+    # Strings por último: todo mundo acima já internou as suas
+    flag_names = array("i", (intern(name) for name in graph.flag_names))
+    start = data.get("start") if isinstance(data, dict) else None
+    encoded = [text.encode("utf-8") for text in string_list]
+    string_offsets = array("q", [0])
+    for item in encoded:
+        string_offsets.append(string_offsets[-1] + len(item))
+
+    sections = {
+        "string_offsets": string_offsets.tobytes(),
+        "strings": b"".join(encoded),
+        "nodes": node_records.tobytes(),
+        "id_order": id_order.tobytes(),
+        "offsets": graph.offsets.tobytes(),
+        "targets": graph.targets.tobytes(),
+        "exits": bytes(graph.exits),
+        "flag_names": flag_names.tobytes(),
+        "set_masks": masks(graph.set_masks),
+        "edge_requires": masks(graph.edge_requires),
+        "gated": gated.tobytes(),
+        "gated_masks": masks(required for _, _, required in graph.gated),
+        "issues": issue_records.tobytes(),
+        "spans": span_records.tobytes(),
+    }
+
+    counts = (
+        graph.node_count, graph.edge_count, len(graph.flag_names), len(string_list),
+        len(issues), len(span_keys), len(graph.gated),
+        graph.index.get(start, -1) if isinstance(start, str) else -1,
+    )
+    header = _HEADER.pack(_MAGIC, ARTIFACT_FORMAT, _BYTE_ORDER, *header_info, *counts)
+
+    # Cada seção começa alinhada em 8 bytes (para os casts das memoryviews)
+    position = _HEADER.size + _TABLE.size
+    starts = []
+    for name in _SECTIONS:
+        position += -position % 8
+        starts.append(position)
+        position += len(sections[name])
+
+    # Grava num temporário e troca: quem estiver lendo o artefato antigo não vê um pela metade
+    temp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(header)
+        file.write(_TABLE.pack(*starts))
+        for name, section_start in zip(_SECTIONS, starts):
+            file.write(b"\0" * (section_start - file.tell()))
+            file.write(sections[name])
+    os.replace(temp_path, artifact_path)
+
+
+# ============================================================
+# Leitura
+# ============================================================
+
+class DialogueArtifact:
+    """
+    Artefato aberto com mmap. Use com "with" (ou chame close()); views
+    obtidas dele (graph(), successors...) não valem depois do close().
+    """
+
+    def __init__(self, artifact_path):
+        self.path = artifact_path
+        self._views = []
+        with open(artifact_path, "rb") as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:   # arquivo vazio (gravação interrompida por fora)
+                raise StaleArtifact("artefato vazio") from None
+        try:
+            self._open_views()
+        except Exception:
+            self.close()
+            raise
+
+    def _open_views(self):
+        buffer = memoryview(self._mmap)
+        self._views = [buffer]
+        if len(buffer) < _HEADER.size + _TABLE.size:
+            raise StaleArtifact("artefato truncado")
+
+        (magic, artifact_format, byte_order, validator_version, rules_key, source_hash,
+         source_size, source_mtime_ns, *counts) = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC:
+            raise StaleArtifact("não é um artefato .nfcb")
+        if artifact_format != ARTIFACT_FORMAT or byte_order != _BYTE_ORDER:
+            raise StaleArtifact(f"formato {artifact_format} (esperado {ARTIFACT_FORMAT}) ou ordem dos bytes diferente")
+
+        self.validator_version = validator_version.rstrip(b"\0").decode("ascii")
+        self.rules_key = rules_key.rstrip(b"\0").decode("ascii")
+        self.source_hash = source_hash.hex()
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+        (self.node_count, self.edge_count, self.flag_count, string_count,
+         self.issue_count, self.span_count, self.gated_count, self.start_index) = counts
+        self.mask_bytes = (self.flag_count + 7) // 8
+
+        starts = _TABLE.unpack_from(buffer, _HEADER.size)
+        sizes = {
+            "string_offsets": 8 * (string_count + 1),
+            "strings": None,
+            "nodes": 4 * _NODE_FIELDS * self.node_count,
+            "id_order": 4 * self.node_count,
+            "offsets": 4 * (self.node_count + 1),
+            "targets": 4 * self.edge_count,
+            "exits": self.node_count,
+            "flag_names": 4 * self.flag_count,
+            "set_masks": self.mask_bytes * self.node_count,
+            "edge_requires": self.mask_bytes * self.edge_count,
+            "gated": 8 * self.gated_count,
+            "gated_masks": self.mask_bytes * self.gated_count,
+            "issues": 4 * _ISSUE_FIELDS * self.issue_count,
+            "spans": 16 * self.span_count,
+        }
+        views = {}
+        for name, section_start in zip(_SECTIONS, starts):
+            size = sizes[name]
+            if size is None:   # o blob de strings vai até o fim que o string_offsets indicar
+                with views["string_offsets"].cast("q") as string_offsets:
+                    size = string_offsets[-1]
+            if section_start + size > len(buffer):
+                raise StaleArtifact(f"seção '{name}' fora do arquivo")
+            views[name] = buffer[section_start:section_start + size]
+
+        self._string_offsets = views["string_offsets"].cast("q")
+        self._strings = views["strings"]
+        self._nodes = views["nodes"].cast("i")
+        self._id_order = views["id_order"].cast("i")
+        self.offsets = views["offsets"].cast("i")
+        self.targets = views["targets"].cast("i")
+        self.exits = views["exits"]
+        self._flag_names = views["flag_names"].cast("i")
+        self._set_masks = views["set_masks"]
+        self._edge_requires = views["edge_requires"]
+        self._gated = views["gated"].cast("i")
+        self._gated_masks = views["gated_masks"]
+        self._issues = views["issues"].cast("i")
+        self._spans = views["spans"].cast("i")
+        self._views += list(views.values()) + [
+            self._string_offsets, self._nodes, self._id_order, self.offsets, self.targets,
+            self._flag_names, self._gated, self._issues, self._spans,
+        ]
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Ainda tem view exportada (ex: um successors() guardado); fecha quando ela for coletada
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def is_fresh(self, source_path, rules=None):
+        """O artefato corresponde ao JSON atual (e à versão/regras do validador)?"""
+        if self.validator_version != VALIDATOR_VERSION or self.rules_key != _rules_key(rules):
+            return False
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return False
+        if stat.st_size != self.source_size:
+            return False
+        if stat.st_mtime_ns == self.source_mtime_ns:
+            return True
+        # Salvo de novo sem mudar o conteúdo
+        return hash_file(source_path) == self.source_hash
+
+    # ---------------------------------------------------------
+    # Strings e nós
+    # ---------------------------------------------------------
+    def _string_bytes(self, index):
+        return self._strings[self._string_offsets[index]:self._string_offsets[index + 1]]
+
+    def string(self, index):
+        if index < 0:
+            return None
+        return str(self._string_bytes(index), "utf-8")
+
+    def node_id(self, node):
+        return self.string(self._nodes[node * _NODE_FIELDS])
+
+    def node(self, node):
+        """Registro do nó: {"id", "speaker", "text", "end", "choices"} (choices = quantidade ou None)."""
+        base = node * _NODE_FIELDS
+        node_id, speaker, text, bits, choice_count = self._nodes[base:base + _NODE_FIELDS]
+        return {
+            "id": self.string(node_id),
+            "speaker": self.string(speaker),
+            "text": self.string(text),
+            "end": bool(bits & NODE_END),
+            "invalid": bool(bits & NODE_INVALID),
+            "choices": choice_count if choice_count >= 0 else None,
+        }
+
+    def find_node(self, node_id):
+        """Índice do nó com esse id (busca binária no id_order) ou None."""
+        key = node_id.encode("utf-8")
+        nodes = self._nodes
+        order = self._id_order
+        low, high = 0, self.node_count
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(self._string_bytes(nodes[order[middle] * _NODE_FIELDS])) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.node_count:
+            node = order[low]
+            if bytes(self._string_bytes(nodes[node * _NODE_FIELDS])) == key:
+                return node
+        return None
+
+    @property
+    def start(self):
+        """Índice do nó inicial (None se o start não existe)."""
+        return self.start_index if self.start_index >= 0 else None
+
+    def successors(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    @property
+    def flag_names(self):
+        return [self.string(index) for index in self._flag_names]
+
+    def set_mask(self, node):
+        return _read_mask(self._set_masks, self.mask_bytes, node)
+
+    def edge_requires(self, edge):
+        return _read_mask(self._edge_requires, self.mask_bytes, edge)
+
+    # ---------------------------------------------------------
+    # Issues e linhas
+    # ---------------------------------------------------------
+    def issues(self):
+        """As issues da validação que gerou o artefato (mesmo formato do validate_dialogue)."""
+        result = []
+        records = self._issues
+        for base in range(0, len(records), _ISSUE_FIELDS):
+            level, code, message, path, line, column = records[base:base + _ISSUE_FIELDS]
+            issue = {
+                "level": self.string(level),
+                "code": self.string(code),
+                "message": self.string(message),
+                "path": self.string(path),
+            }
+            if line >= 0:
+                issue["line"] = line
+                issue["column"] = column
+            result.append(issue)
+        return result
+
+    def _find_span(self, node, key):
+        spans = self._spans
+        low, high = 0, self.span_count
+        while low < high:
+            middle = (low + high) // 2
+            middle_node = spans[middle * 4]
+            if middle_node < node or (
+                middle_node == node and bytes(self._string_bytes(spans[middle * 4 + 1])) < key
+            ):
+                low = middle + 1
+            else:
+                high = middle
+        if (
+            low < self.span_count and spans[low * 4] == node
+            and bytes(self._string_bytes(spans[low * 4 + 1])) == key
+        ):
+            return (spans[low * 4 + 2], spans[low * 4 + 3])
+        return None
+
+    def lookup_position(self, path):
+        """(linha, coluna) do path no JSON de origem, subindo para o pai como o json_positions."""
+        node_id = node_id_from_path(path, _NodeIndex(self))
+        if node_id is not None:
+            # Sobe dentro do nó ("$" + resto, para o parent_path) até o próprio nó
+            node = self.find_node(node_id)
+            rest = "$" + path[len("$.nodes.") + len(node_id):]
+            while rest:
+                position = self._find_span(node, rest[1:].encode("utf-8"))
+                if position is not None:
+                    return position
+                rest = parent_path(rest)
+            path = "$.nodes"
+
+        while path:
+            position = self._find_span(-1, path.encode("utf-8"))
+            if position is not None:
+                return position
+            path = parent_path(path)
+        return None
+
+    # ---------------------------------------------------------
+    # Grafo
+    # ---------------------------------------------------------
+    def graph(self):
+        """CompiledGraph sobre as views do artefato (offsets/targets sem cópia)."""
+        from compiled_graph import CompiledGraph
+
+        gated = []
+        for g in range(self.gated_count):
+            node, choice = self._gated[2 * g], self._gated[2 * g + 1]
+            gated.append((
+                node,
+                f"$.nodes.{self.node_id(node)}.choices[{choice}]",
+                _read_mask(self._gated_masks, self.mask_bytes, g),
+            ))
+
+        return CompiledGraph(
+            _NodeIds(self),
+            _NodeIndex(self),
+            self.offsets,
+            self.targets,
+            _MaskColumn(self._edge_requires, self.mask_bytes, self.edge_count),
+            _MaskColumn(self._set_masks, self.mask_bytes, self.node_count),
+            self.flag_names,
+            gated,
+            self.exits,
+        )
+
+
+def _read_mask(view, mask_bytes, i):
+    if not mask_bytes:
+        return 0
+    return int.from_bytes(view[i * mask_bytes:(i + 1) * mask_bytes], "little")
+
+
+class _MaskColumn:
+    """Lista de bitmasks (int) lida direto da seção do artefato."""
+
+    def __init__(self, view, mask_bytes, count):
+        self._view = view
+        self._mask_bytes = mask_bytes
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return _read_mask(self._view, self._mask_bytes, i)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield _read_mask(self._view, self._mask_bytes, i)
+
+
+class _NodeIds:
+    """node_ids do CompiledGraph: índice -> id, decodificado sob demanda."""
+
+    def __init__(self, artifact):
+        self._artifact = artifact
+
+    def __len__(self):
+        return self._artifact.node_count
+
+    def __getitem__(self, node):
+        if node < 0:
+            node += self._artifact.node_count
+        if not 0 <= node < self._artifact.node_count:
+            raise IndexError(node)
+        return self._artifact.node_id(node)
+
+    def __iter__(self):
+        for node in range(self._artifact.node_count):
+            yield self._artifact.node_id(node)
+
+
+class _NodeIndex:
+    """index do CompiledGraph: id -> índice, por busca binária (sem montar o dict)."""
+
+    def __init__(self, artifact):
+        self._artifact = artifact
+
+    def __len__(self):
+        return self._artifact.node_count
+
+    def get(self, node_id, default=None):
+        node = self._artifact.find_node(node_id) if isinstance(node_id, str) else None
+        return default if node is None else node
+
+    def __contains__(self, node_id):
+        return self.get(node_id) is not None
+
+    def __getitem__(self, node_id):
+        node = self.get(node_id)
+        if node is None:
+            raise KeyError(node_id)
+        return node
+
+
+def load_compiled(source_path, artifact_path=None, rules=None):
+    """
+    Abre o artefato do JSON, recompilando antes se ele não existe ou está
+    velho (JSON mudou, outra versão do validador ou do formato, outras regras).
+    Retorna (DialogueArtifact, recompilado).
+    """
+    artifact_path = artifact_path or artifact_path_for(source_path)
+    try:
+        artifact = DialogueArtifact(artifact_path)
+    except (OSError, ValueError):
+        artifact = None
+
+    if artifact is not None:
+        if artifact.is_fresh(source_path, rules):
+            return artifact, False
+        artifact.close()
+
+    compile_file(source_path, artifact_path, rules)
+    return DialogueArtifact(artifact_path), True
+
+
+def run_compile(file_path, artifact_path=None, output_format="text", rules=None):
+    """Versão de linha de comando (--compile): compila se precisar e mostra as issues do artefato."""
+    import json
+
+    from dialogue_validator import print_report
+
+    result = {"file": str(file_path), "issues": [], "error": None}
+    try:
+        artifact, rebuilt = load_compiled(file_path, artifact_path, rules)
+    except FileNotFoundError:
+        result["error"] = f"Arquivo não encontrado: {file_path}"
+    except json.JSONDecodeError as e:
+        result["error"] = f"JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}"
+    else:
+        with artifact:
+            result["issues"] = artifact.issues()
+            status = "compilado" if rebuilt else "em dia, JSON não foi lido"
+            print(
+                f"📦 {artifact.path} ({status}): {artifact.node_count} nós, {artifact.edge_count} arestas",
+                file=sys.stderr,
+            )
+
+    if output_format != "text":
+        from report_formats import open_writer
+        writer = open_writer(output_format)
+        writer.add(result)
+        writer.close()
+    elif result["error"]:
+        print(f"❌ {result['error']}")
+    else:
+        print_report(result["issues"])
+
+    if result["error"]:
+        return 1
+    return 1 if any(issue["level"] == "ERROR" for issue in result["issues"]) else 0
@@ -0,0 +1,345 @@
+"""
+Forma compacta do grafo de diálogo, usada pelas passadas de grafo.
+
+- Cada id de nó vira um inteiro (posição em node_ids)
+- As conexões ficam em CSR: offsets[i]..offsets[i + 1] indexa targets
+  (dois array('i'), sem uma lista Python por nó)
+- Cada flag vira um bit; set_masks[i] e edge_requires[e] são ints
+
+Assim a DFS, os órfãos e a análise de flags trabalham só com inteiros, sem
+hashear string a cada passo.
+"""
+from array import array
+
+
+def is_external_target(target):
+    """
+    Destino em outro arquivo, no formato "arquivo.json#id_do_no".
+    Só é checado de verdade no modo projeto (project_graph.py).
+    """
+    file_part, sep, node_id = target.partition("#")
+    return bool(sep and file_part and node_id)
+
+
+def clean_flag_list(flags):
+    """Flags válidas (strings não vazias, sem espaços nas pontas)."""
+    if not isinstance(flags, list):
+        return []
+    return [flag.strip() for flag in flags if isinstance(flag, str) and flag.strip()]
+
+
+class CompiledGraph:
+    def __init__(self, node_ids, index, offsets, targets, edge_requires, set_masks, flag_names, gated, exits):
+        self.node_ids = node_ids            # int -> id do nó
+        self.index = index                  # id do nó -> int
+        self.offsets = offsets              # array('i'), len = nós + 1
+        self.targets = targets              # array('i'), len = arestas
+        self.edge_requires = edge_requires  # flags exigidas por aresta (bitmask)
+        self.set_masks = set_masks          # flags setadas por nó (bitmask)
+        self.flag_names = flag_names        # bit -> nome da flag
+        self.gated = gated                  # (nó, path_da_choice, bitmask) de cada choice com requires
+        self.exits = exits                  # bytearray: 1 = "end: true" ou saída para outro arquivo
+
+    @classmethod
+    def from_node_edges(cls, node_ids, index, node_targets, node_requires, set_masks, flag_names, gated, exits):
+        """
+        Monta o CSR a partir das arestas de cada nó em separado
+        (node_targets[i]: índices dos destinos do nó i; node_requires[i]: as bitmasks).
+        """
+        offsets = array("i", [0])
+        targets = array("i")
+        edge_requires = []
+        for node_edges, requires in zip(node_targets, node_requires):
+            targets.extend(node_edges)
+            edge_requires.extend(requires)
+            offsets.append(len(targets))
+
+        return cls(node_ids, index, offsets, targets, edge_requires, set_masks, flag_names, gated, exits)
+
+    @property
+    def node_count(self):
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def successors(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def flag_names_of(self, mask):
+        names = []
+        bit = 0
+        while mask:
+            if mask & 1:
+                names.append(self.flag_names[bit])
+            mask >>= 1
+            bit += 1
+        return names
+
+    def reachable_from(self, roots, visited=None):
+        """
+        DFS iterativa. Retorna um bytearray com 1 nos nós alcançados.
+        Com visited, continua marcando nele (os nós já marcados não são expandidos de novo).
+        """
+        offsets = self.offsets
+        targets = self.targets
+        if visited is None:
+            visited = bytearray(len(self.node_ids))
+        stack = list(roots)
+
+        while stack:
+            current = stack.pop()
+            if visited[current]:
+                continue
+            visited[current] = 1
+            stack.extend(targets[offsets[current]:offsets[current + 1]])
+
+        return visited
+
+    def reversed(self):
+        """Mesmo grafo com as arestas invertidas (só offsets/targets)."""
+        node_count = len(self.node_ids)
+        offsets = self.offsets
+        targets = self.targets
+
+        reverse_offsets = array("i", bytes(4 * (node_count + 1)))
+        for target in targets:
+            reverse_offsets[target + 1] += 1
+        for i in range(node_count):
+            reverse_offsets[i + 1] += reverse_offsets[i]
+
+        cursor = array("i", reverse_offsets[:node_count])
+        reverse_targets = array("i", bytes(4 * len(targets)))
+        for source in range(node_count):
+            for e in range(offsets[source], offsets[source + 1]):
+                target = targets[e]
+                reverse_targets[cursor[target]] = source
+                cursor[target] += 1
+
+        return CompiledGraph(
+            self.node_ids, self.index, reverse_offsets, reverse_targets,
+            [0] * len(targets), [0] * node_count, self.flag_names, [], self.exits,
+        )
+
+    def has_self_loop(self, node):
+        return node in self.successors(node)
+
+    def strongly_connected_components(self, include=None):
+        """
+        Tarjan iterativo (sem recursão, então não estoura com 100k+ nós).
+        include: bytearray opcional para restringir aos nós marcados com 1.
+        Retorna as componentes em ordem topológica reversa (sumidouros primeiro).
+        """
+        node_count = len(self.node_ids)
+        offsets = self.offsets
+        targets = self.targets
+
+        order = array("i", [-1]) * node_count
+        lowlink = array("i", bytes(4 * node_count))
+        on_stack = bytearray(node_count)
+        stack = []
+        components = []
+        counter = 0
+
+        for root in range(node_count):
+            if order[root] != -1 or (include is not None and not include[root]):
+                continue
+
+            order[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, offsets[root])]
+
+            while work:
+                node, e = work[-1]
+                end = offsets[node + 1]
+
+                while e < end:
+                    neighbor = targets[e]
+                    e += 1
+                    if include is not None and not include[neighbor]:
+                        continue
+                    if order[neighbor] == -1:
+                        # Desce para o vizinho; volta para a aresta seguinte depois
+                        work[-1] = (node, e)
+                        order[neighbor] = lowlink[neighbor] = counter
+                        counter += 1
+                        stack.append(neighbor)
+                        on_stack[neighbor] = 1
+                        work.append((neighbor, offsets[neighbor]))
+                        break
+                    if on_stack[neighbor] and order[neighbor] < lowlink[node]:
+                        lowlink[node] = order[neighbor]
+                else:
+                    # Terminou os vizinhos de node
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        if lowlink[node] < lowlink[parent]:
+                            lowlink[parent] = lowlink[node]
+
+                    if lowlink[node] == order[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = 0
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+
+        return components
+
+
+class GraphBuilder:
+    """
+    Junta as conexões enquanto o validador percorre os nós e no final
+    gera o CompiledGraph (ordenando as arestas por origem, em O(n + e)).
+
+    Com deferred=True os nós podem ir chegando aos poucos (add_node), e
+    destinos que ainda não apareceram só são resolvidos no build().
+    """
+
+    def __init__(self, node_ids=(), deferred=False):
+        self.node_ids = list(node_ids)
+        self.deferred = deferred
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.flag_bits = {}
+        self.flag_names = []
+        self.set_masks = [0] * len(self.node_ids)
+        self.gated = []
+        self.exits = bytearray(len(self.node_ids))
+
+        self._sources = array("i")
+        self._targets = array("i")
+        self._requires = []
+        self._pending = []
+
+    def add_node(self, node_id):
+        """Registra um nó novo (modo deferred) e retorna o índice dele."""
+        index = self.index.get(node_id)
+        if index is None:
+            index = self.index[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+            self.set_masks.append(0)
+            self.exits.append(0)
+        return index
+
+    def flag_mask(self, flags):
+        mask = 0
+        for flag in flags:
+            bit = self.flag_bits.get(flag)
+            if bit is None:
+                bit = self.flag_bits[flag] = len(self.flag_names)
+                self.flag_names.append(flag)
+            mask |= 1 << bit
+        return mask
+
+    def add_edge(self, source, target_id, required=0):
+        """Só guarda destinos que existem no documento."""
+        target = self.index.get(target_id)
+        if target is not None:
+            self._sources.append(source)
+            self._targets.append(target)
+            self._requires.append(required)
+
+    def add_target(self, source, target_id, required=0):
+        """
+        Igual ao add_edge, mas trata "arquivo.json#nó" (que não existe neste
+        documento) como saída do arquivo.
+        """
+        if target_id in self.index:
+            self.add_edge(source, target_id, required)
+        elif self.deferred:
+            self._pending.append((source, target_id, required))
+        elif is_external_target(target_id):
+            self.mark_exit(source)
+
+    def add_set_flags(self, source, mask):
+        self.set_masks[source] |= mask
+
+    def mark_exit(self, node):
+        """Nó que encerra o diálogo neste arquivo (end: true ou destino em outro arquivo)."""
+        self.exits[node] = 1
+
+    def add_gated_choice(self, source, choice_path, required):
+        if required:
+            self.gated.append((source, choice_path, required))
+
+    def build(self):
+        # Destinos que só apareceram depois de quem apontava para eles
+        pending, self._pending = self._pending, []
+        self.deferred = False
+        for source, target_id, required in pending:
+            self.add_target(source, target_id, required)
+
+        node_count = len(self.node_ids)
+        edge_count = len(self._targets)
+
+        # Counting sort das arestas por nó de origem (mantém a ordem original)
+        offsets = array("i", bytes(4 * (node_count + 1)))
+        for source in self._sources:
+            offsets[source + 1] += 1
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        cursor = array("i", offsets[:node_count])
+        targets = array("i", bytes(4 * edge_count))
+        edge_requires = [0] * edge_count
+        for e in range(edge_count):
+            source = self._sources[e]
+            slot = cursor[source]
+            cursor[source] = slot + 1
+            targets[slot] = self._targets[e]
+            edge_requires[slot] = self._requires[e]
+
+        return CompiledGraph(
+            self.node_ids,
+            self.index,
+            offsets,
+            targets,
+            edge_requires,
+            self.set_masks,
+            self.flag_names,
+            self.gated,
+            self.exits,
+        )
+
+
+def compile_dialogue(nodes):
+    """
+    Monta o CompiledGraph direto do dict "nodes" (sem validar nada).
+    Útil para ferramentas que só precisam do grafo.
+    """
+    builder = GraphBuilder(nodes)
+
+    for i, node_id in enumerate(builder.node_ids):
+        node_data = nodes[node_id]
+        if not isinstance(node_data, dict):
+            continue
+
+        builder.add_set_flags(i, builder.flag_mask(clean_flag_list(node_data.get("set_flags", []))))
+        if node_data.get("end") is True:
+            builder.mark_exit(i)
+
+        next_node = node_data.get("next")
+        if isinstance(next_node, str):
+            builder.add_target(i, next_node)
+
+        choices = node_data.get("choices")
+        if not isinstance(choices, list):
+            continue
+
+        for c, choice in enumerate(choices):
+            if not isinstance(choice, dict):
+                continue
+            required = builder.flag_mask(clean_flag_list(choice.get("requires", [])))
+            builder.add_gated_choice(i, f"$.nodes.{node_id}.choices[{c}]", required)
+
+            choice_next = choice.get("next")
+            if isinstance(choice_next, str):
+                builder.add_target(i, choice_next, required)
+
+    return builder.build()
@@ -1,6 +1,28 @@
+import argparse
 import json
 import sys
-import re
+
+from compiled_graph import GraphBuilder, clean_flag_list, is_external_target
+from flag_analysis import ALWAYS, UNREACHABLE, analyze_compiled_flags
+from json_positions import lookup_span, parse_with_spans
+from profiling import profile_phase
+from rules import (
+    ALL_RULES,
+    GRAPH,
+    NODE,
+    REGISTRY,
+    GraphContext,
+    Rule,
+    RuleSelection,
+    load_plugins,
+    register,
+    run_graph_rules,
+    run_node_rules,
+)
+
+
+# Mude sempre que as regras ou o formato das issues mudarem (invalida o cache em disco)
+VALIDATOR_VERSION = "6"
 
 
 def add_issue(issues, level, code, message, path):
@@ -19,48 +41,69 @@ def load_json_file(file_path):
         return json.load(file)
 
 
-def dfs(start_node, edges):
+def load_json_with_spans(file_path):
     """
-    DFS = busca em profundidade.
-    Serve para descobrir quais nós são alcançáveis a partir do start.
+    Abre e lê o JSON guardando a posição (linha/coluna) de cada chave e valor.
+    Retorna (data, spans). Os spans podem ser passados para validate_dialogue.
+    O parser é em Python (~20x o json.load): só para quem precisa da posição
+    de todos os paths (o artefato compilado). Para validar, use load_json_text.
     """
-    visited = set()
-    stack = [start_node]
-
-    while stack:
-        current = stack.pop()
-
-        if current in visited:
-            continue
-
-        visited.add(current)
-
-        for neighbor in edges.get(current, []):
-            if neighbor not in visited:
-                stack.append(neighbor)
+    with open(file_path, "r", encoding="utf-8") as file:
+        return parse_with_spans(file.read())
 
-    return visited
 
+def load_json_text(file_path):
+    """
+    Abre e lê o JSON com o json.loads (em C). Retorna (data, text); o texto
+    vai para o validate_json_text, que só mapeia as linhas dos paths com issue.
+    """
+    text = _read_text(file_path)
+    return json.loads(text), text
 
-def validate_dialogue(data):
-    issues = []
 
-    # 1) Validar estrutura básica do JSON
-    if not isinstance(data, dict):
-        add_issue(issues, "ERROR", "ROOT_TYPE", "O JSON raiz precisa ser um objeto.", "$")
-        return issues
+def node_id_from_path(path, node_index):
+    """
+    Id do nó de um path "$.nodes.<id>..." (ou None se não for de nenhum nó).
+    Ids podem ter ponto, então confere cada corte no índice de nós.
+    """
+    if not path.startswith("$.nodes."):
+        return None
+    rest = path[len("$.nodes."):]
+    cut = len(rest)
+    while cut >= 0:
+        if rest[:cut] in node_index:
+            return rest[:cut]
+        if cut == 0:
+            return None
+        cut = max(rest.rfind(".", 0, cut), rest.rfind("[", 0, cut))
+    return None
 
-    start = data.get("start")
-    nodes = data.get("nodes")
-    flags = data.get("flags", [])
 
-    if not isinstance(start, str) or not start.strip():
-        add_issue(issues, "ERROR", "MISSING_START", "Campo 'start' ausente ou inválido.", "$.start")
+class ValidationState:
+    """
+    O que a validação vai acumulando enquanto percorre os nós.
 
-    if not isinstance(nodes, dict) or len(nodes) == 0:
-        add_issue(issues, "ERROR", "NODES_INVALID", "Campo 'nodes' ausente, vazio ou inválido.", "$.nodes")
-        return issues
+    Com complete=False (modo streaming) nem todos os nós foram vistos ainda:
+    destinos desconhecidos e flags ainda não declaradas ficam pendentes e só
+    são checados em finish_validation.
+    rules: RuleSelection (rules.py) com as regras ligadas; None = todas.
+    """
 
+    def __init__(self, graph_builder, issues, declared_flags=None, complete=True, rules=None):
+        self.graph_builder = graph_builder
+        self.issues = issues
+        self.declared_flags = declared_flags   # None = "flags" ainda não apareceu
+        self.complete = complete
+        self.rules = (rules or ALL_RULES).enabled()
+        self.node_rules = self.rules.node_rules
+        self.set_flags_used = set()
+        self.requires_flags_used = set()
+        self.pending_targets = []   # (índice do nó, índice da choice ou -1, destino)
+        self.pending_flags = []     # (flag, path, "requires" | "set_flags")
+
+
+def check_declared_flags(flags, issues):
+    """Valida o campo "flags" e retorna o conjunto de flags declaradas."""
     if not isinstance(flags, list):
         add_issue(issues, "ERROR", "FLAGS_TYPE", "Campo 'flags' deve ser uma lista.", "$.flags")
         flags = []
@@ -72,160 +115,246 @@ def validate_dialogue(data):
         else:
             add_issue(issues, "ERROR", "FLAG_INVALID", "Flag inválida em $.flags", f"$.flags[{i}]")
 
-    # 2) Verificar se start existe em nodes
-    if isinstance(start, str) and start not in nodes:
-        add_issue(issues, "ERROR", "START_NOT_FOUND", f"O nó inicial '{start}' não existe.", "$.start")
+    return declared_flags
 
-    # 3) Preparar grafo (conexões entre nós)
-    edges = {}
-    set_flags_used = set()
-    requires_flags_used = set()
 
-    for node_id in nodes:
-        edges[node_id] = []
+def _report_target(issues, node_id, choice_index, target):
+    """Destino que não existe no documento: outro arquivo (INFO) ou nó inexistente (ERROR)."""
+    if choice_index < 0:
+        path = f"$.nodes.{node_id}.next"
+        subject = "'next'"
+    else:
+        path = f"$.nodes.{node_id}.choices[{choice_index}].next"
+        subject = "Choice"
 
-    # 4) Validar cada nó
-    for node_id, node_data in nodes.items():
-        path = f"$.nodes.{node_id}"
+    if is_external_target(target):
+        add_issue(
+            issues,
+            "INFO",
+            "EXTERNAL_TARGET",
+            f"{subject} aponta para outro arquivo: '{target}' (use --project para verificar).",
+            path
+        )
+    else:
+        add_issue(
+            issues,
+            "ERROR",
+            "TARGET_NOT_FOUND",
+            f"{subject} aponta para nó inexistente: '{target}'.",
+            path
+        )
 
-        if not isinstance(node_data, dict):
-            add_issue(issues, "ERROR", "NODE_TYPE", "Cada nó precisa ser um objeto.", path)
-            continue
 
-        # --- next ---
-        next_node = node_data.get("next")
-        if next_node is not None:
-            if not isinstance(next_node, str):
-                add_issue(issues, "ERROR", "NEXT_TYPE", "'next' deve ser string.", f"{path}.next")
-            else:
-                edges[node_id].append(next_node)
-                if next_node not in nodes:
-                    add_issue(
-                        issues,
-                        "ERROR",
-                        "TARGET_NOT_FOUND",
-                        f"'next' aponta para nó inexistente: '{next_node}'.",
-                        f"{path}.next"
-                    )
+def _check_target(state, node_index, choice_index, target):
+    if target in state.graph_builder.index:
+        return
+    if not state.complete:
+        state.pending_targets.append((node_index, choice_index, target))
+        return
+    _report_target(state.issues, state.graph_builder.node_ids[node_index], choice_index, target)
 
-        # --- choices ---
-        choices = node_data.get("choices")
-        if choices is not None:
-            if not isinstance(choices, list):
-                add_issue(issues, "ERROR", "CHOICES_TYPE", "'choices' deve ser lista.", f"{path}.choices")
-            else:
-                for i, choice in enumerate(choices):
-                    choice_path = f"{path}.choices[{i}]"
-
-                    if not isinstance(choice, dict):
-                        add_issue(issues, "ERROR", "CHOICE_TYPE", "Cada choice deve ser objeto.", choice_path)
-                        continue
-
-                    # Texto da escolha
-                    if not isinstance(choice.get("text"), str):
-                        add_issue(issues, "ERROR", "CHOICE_TEXT", "Choice sem 'text' válido.", f"{choice_path}.text")
-
-                    # Destino da escolha
-                    choice_next = choice.get("next")
-                    if not isinstance(choice_next, str):
-                        add_issue(issues, "ERROR", "CHOICE_NEXT", "Choice sem 'next' válido.", f"{choice_path}.next")
-                    else:
-                        edges[node_id].append(choice_next)
-                        if choice_next not in nodes:
-                            add_issue(
-                                issues,
-                                "ERROR",
-                                "TARGET_NOT_FOUND",
-                                f"Choice aponta para nó inexistente: '{choice_next}'.",
-                                f"{choice_path}.next"
-                            )
 
-                    # Flags requeridas
-                    requires = choice.get("requires", [])
-                    if not isinstance(requires, list):
-                        add_issue(issues, "ERROR", "REQUIRES_TYPE", "'requires' deve ser lista.", f"{choice_path}.requires")
-                    else:
-                        for j, flag in enumerate(requires):
-                            if not isinstance(flag, str) or not flag.strip():
-                                add_issue(
-                                    issues,
-                                    "ERROR",
-                                    "FLAG_INVALID",
-                                    "Flag inválida em 'requires'.",
-                                    f"{choice_path}.requires[{j}]"
-                                )
-                            else:
-                                clean_flag = flag.strip()
-                                requires_flags_used.add(clean_flag)
-
-                                # Se o arquivo declarou flags, valida se essa existe
-                                if len(declared_flags) > 0 and clean_flag not in declared_flags:
-                                    add_issue(
-                                        issues,
-                                        "ERROR",
-                                        "FLAG_NOT_DECLARED",
-                                        f"Flag '{clean_flag}' usada em 'requires' mas não foi declarada.",
-                                        f"{choice_path}.requires[{j}]"
-                                    )
-
-        # --- set_flags ---
-        set_flags = node_data.get("set_flags", [])
-        if set_flags is not None:
-            if not isinstance(set_flags, list):
-                add_issue(issues, "ERROR", "SET_FLAGS_TYPE", "'set_flags' deve ser lista.", f"{path}.set_flags")
-            else:
-                for i, flag in enumerate(set_flags):
-                    if not isinstance(flag, str) or not flag.strip():
-                        add_issue(
-                            issues,
-                            "ERROR",
-                            "FLAG_INVALID",
-                            "Flag inválida em 'set_flags'.",
-                            f"{path}.set_flags[{i}]"
-                        )
-                    else:
-                        clean_flag = flag.strip()
-                        set_flags_used.add(clean_flag)
-
-                        if len(declared_flags) > 0 and clean_flag not in declared_flags:
+def _check_flag_declared(state, flag, path, where):
+    if state.declared_flags is None:
+        state.pending_flags.append((flag, path, where))
+        return
+
+    # Se o arquivo declarou flags, valida se essa existe
+    if len(state.declared_flags) > 0 and flag not in state.declared_flags:
+        add_issue(
+            state.issues,
+            "ERROR",
+            "FLAG_NOT_DECLARED",
+            f"Flag '{flag}' usada em '{where}' mas não foi declarada.",
+            path
+        )
+
+
+def check_node(state, node_index, node_id, node_data):
+    """Checagens de um nó só (tipos, destinos, flags) + registro no grafo."""
+    issues = state.issues
+    graph_builder = state.graph_builder
+    path = f"$.nodes.{node_id}"
+
+    if not isinstance(node_data, dict):
+        add_issue(issues, "ERROR", "NODE_TYPE", "Cada nó precisa ser um objeto.", path)
+        return
+
+    # --- next ---
+    next_node = node_data.get("next")
+    if next_node is not None:
+        if not isinstance(next_node, str):
+            add_issue(issues, "ERROR", "NEXT_TYPE", "'next' deve ser string.", f"{path}.next")
+        else:
+            graph_builder.add_target(node_index, next_node)
+            _check_target(state, node_index, -1, next_node)
+
+    # --- choices ---
+    choices = node_data.get("choices")
+    if choices is not None:
+        if not isinstance(choices, list):
+            add_issue(issues, "ERROR", "CHOICES_TYPE", "'choices' deve ser lista.", f"{path}.choices")
+        else:
+            for i, choice in enumerate(choices):
+                choice_path = f"{path}.choices[{i}]"
+
+                if not isinstance(choice, dict):
+                    add_issue(issues, "ERROR", "CHOICE_TYPE", "Cada choice deve ser objeto.", choice_path)
+                    continue
+
+                # Texto da escolha
+                if not isinstance(choice.get("text"), str):
+                    add_issue(issues, "ERROR", "CHOICE_TEXT", "Choice sem 'text' válido.", f"{choice_path}.text")
+
+                # Destino da escolha
+                choice_next = choice.get("next")
+                if not isinstance(choice_next, str):
+                    add_issue(issues, "ERROR", "CHOICE_NEXT", "Choice sem 'next' válido.", f"{choice_path}.next")
+                else:
+                    _check_target(state, node_index, i, choice_next)
+
+                # Flags requeridas
+                requires = choice.get("requires", [])
+                if not isinstance(requires, list):
+                    add_issue(issues, "ERROR", "REQUIRES_TYPE", "'requires' deve ser lista.", f"{choice_path}.requires")
+                else:
+                    for j, flag in enumerate(requires):
+                        if not isinstance(flag, str) or not flag.strip():
                             add_issue(
                                 issues,
                                 "ERROR",
-                                "FLAG_NOT_DECLARED",
-                                f"Flag '{clean_flag}' usada em 'set_flags' mas não foi declarada.",
-                                f"{path}.set_flags[{i}]"
+                                "FLAG_INVALID",
+                                "Flag inválida em 'requires'.",
+                                f"{choice_path}.requires[{j}]"
                             )
+                        else:
+                            clean_flag = flag.strip()
+                            state.requires_flags_used.add(clean_flag)
+                            _check_flag_declared(state, clean_flag, f"{choice_path}.requires[{j}]", "requires")
+
+                # Conexão da choice, com as flags exigidas (para a análise de fluxo)
+                required_mask = graph_builder.flag_mask(clean_flag_list(requires))
+                graph_builder.add_gated_choice(node_index, choice_path, required_mask)
+                if isinstance(choice_next, str):
+                    graph_builder.add_target(node_index, choice_next, required_mask)
+
+    # --- set_flags ---
+    set_flags = node_data.get("set_flags", [])
+    if set_flags is not None:
+        if not isinstance(set_flags, list):
+            add_issue(issues, "ERROR", "SET_FLAGS_TYPE", "'set_flags' deve ser lista.", f"{path}.set_flags")
+        else:
+            for i, flag in enumerate(set_flags):
+                if not isinstance(flag, str) or not flag.strip():
+                    add_issue(
+                        issues,
+                        "ERROR",
+                        "FLAG_INVALID",
+                        "Flag inválida em 'set_flags'.",
+                        f"{path}.set_flags[{i}]"
+                    )
+                else:
+                    clean_flag = flag.strip()
+                    state.set_flags_used.add(clean_flag)
+                    _check_flag_declared(state, clean_flag, f"{path}.set_flags[{i}]", "set_flags")
+
+            graph_builder.add_set_flags(node_index, graph_builder.flag_mask(clean_flag_list(set_flags)))
+
+    # --- Nó terminal sem end ---
+    has_next = isinstance(next_node, str)
+    has_choices = isinstance(choices, list) and len(choices) > 0
+    is_end = node_data.get("end") is True
+    if is_end:
+        graph_builder.mark_exit(node_index)
+
+    if not has_next and not has_choices and not is_end:
+        add_issue(
+            issues,
+            "WARNING",
+            "TERMINAL_NO_END",
+            "Nó terminal sem 'end: true'.",
+            path
+        )
+
+    # --- Regras de nó registradas (plugins), na mesma passada ---
+    if state.node_rules:
+        run_node_rules(state, state.node_rules, node_id, node_data, path)
+
+
+def resolve_pending(state):
+    """
+    Checa os destinos e flags que ficaram pendentes (modo streaming/incremental).
+    Só usa graph_builder.index e graph_builder.node_ids, então serve também
+    um CompiledGraph já montado.
+    """
+    graph_builder = state.graph_builder
 
-        # --- Nó terminal sem end ---
-        has_next = isinstance(next_node, str)
-        has_choices = isinstance(choices, list) and len(choices) > 0
-        is_end = node_data.get("end") is True
+    for node_index, choice_index, target in state.pending_targets:
+        if target not in graph_builder.index:
+            _report_target(state.issues, graph_builder.node_ids[node_index], choice_index, target)
+    state.pending_targets = []
 
-        if not has_next and not has_choices and not is_end:
+    if state.declared_flags is None:
+        state.declared_flags = set()
+    for flag, path, where in state.pending_flags:
+        _check_flag_declared(state, flag, path, where)
+    state.pending_flags = []
+
+
+def finish_validation(state, start, profiler=None):
+    """
+    Depois de passar por todos os nós: resolve o que ficou pendente e roda
+    as checagens de grafo (órfãos, flags, loops). Retorna o CompiledGraph.
+    """
+    with profile_phase(profiler, "pendentes", state.issues):
+        resolve_pending(state)
+    with profile_phase(profiler, "montar grafo") as record:
+        graph = state.graph_builder.build()
+        record["nodes"] = graph.node_count
+        record["edges"] = graph.edge_count
+    check_graph(state, graph, start, profiler)
+    return graph
+
+
+def drop_disabled_issues(state):
+    """
+    Tira as issues das regras embutidas de nó que foram desligadas
+    (elas rodam de qualquer jeito no check_node). Chamar no fim da validação.
+    """
+    disabled_codes = state.rules.disabled_codes
+    if disabled_codes:
+        state.issues[:] = [issue for issue in state.issues if issue["code"] not in disabled_codes]
+
+
+def check_graph(state, graph, start, profiler=None, reachable=None, reverse=None):
+    """
+    Passos 5 a 8 (as regras de grafo ligadas) sobre o CompiledGraph já montado.
+    reachable/reverse: alcance a partir do start e grafo invertido, se já calculados.
+    """
+    context = GraphContext(state, graph, start, reachable, reverse)
+    run_graph_rules(context, state.rules, state.issues, profiler)
+
+
+# 5) Nós órfãos (não alcançáveis a partir do start)
+def check_orphans(context, issues):
+    if context.start_index is None:
+        return
+    reachable = context.reachable
+    for node_index, node_id in enumerate(context.graph.node_ids):
+        if not reachable[node_index]:
             add_issue(
                 issues,
                 "WARNING",
-                "TERMINAL_NO_END",
-                "Nó terminal sem 'end: true'.",
-                path
+                "ORPHAN_NODE",
+                f"Nó órfão (não alcançável a partir de '{context.start}').",
+                f"$.nodes.{node_id}"
             )
 
-    # 5) Nós órfãos (não alcançáveis a partir do start)
-    if isinstance(start, str) and start in nodes:
-        reachable_nodes = dfs(start, edges)
 
-        for node_id in nodes:
-            if node_id not in reachable_nodes:
-                add_issue(
-                    issues,
-                    "WARNING",
-                    "ORPHAN_NODE",
-                    f"Nó órfão (não alcançável a partir de '{start}').",
-                    f"$.nodes.{node_id}"
-                )
-
-    # 6) Flags requeridas mas nunca setadas
-    never_set = requires_flags_used - set_flags_used
+# 6) Flags requeridas mas nunca setadas
+def check_flags_never_set(context, issues):
+    state = context.state
+    never_set = state.requires_flags_used - state.set_flags_used
     for flag in sorted(never_set):
         add_issue(
             issues,
@@ -235,221 +364,358 @@ def validate_dialogue(data):
             "$.nodes"
         )
 
-    return issues
 
+# 7) Choices condicionadas que nunca/sempre ficam disponíveis (fluxo das flags)
+def check_gated_choices_rule(context, issues):
+    state = context.state
+    if state.requires_flags_used and context.start_index is not None:
+        check_gated_choices(context.graph, context.start_index, context.reachable, state.set_flags_used, issues)
 
-# ============================================================
-# Mapeamento de Path -> Linha (para mostrar no relatório)
-# ============================================================
 
-def _read_lines(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        return f.readlines()
+# 8) Loops sem saída e nós que nunca chegam a um final
+def check_dead_ends_rule(context, issues):
+    if context.start_index is not None:
+        check_dead_ends(context.graph, context.reachable, issues, context.reverse)
 
 
-def _find_line_index(lines, pattern, start=0, end=None):
-    """Retorna índice 0-based da primeira linha que bater com o regex."""
-    if end is None:
-        end = len(lines)
-    rx = re.compile(pattern)
-    for i in range(start, end):
-        if rx.search(lines[i]):
-            return i
-    return None
+def check_gated_choices(graph, start_index, reachable, set_flags_used, issues):
+    """Choices com requires que nunca/sempre ficam disponíveis a partir do start."""
+    gated_choices = analyze_compiled_flags(graph, start_index)
 
+    for choice_path, info in gated_choices.items():
+        # Nó não alcançado já vira ORPHAN_NODE
+        if not reachable[graph.index[info["node"]]]:
+            continue
+
+        if info["status"] == UNREACHABLE:
+            # Flags que nunca são setadas já saem em FLAG_REQUIRED_NEVER_SET
+            set_elsewhere = [flag for flag in info["missing"] if flag in set_flags_used]
+            if set_elsewhere:
+                names = ", ".join(f"'{flag}'" for flag in set_elsewhere)
+                add_issue(
+                    issues,
+                    "WARNING",
+                    "CHOICE_NEVER_AVAILABLE",
+                    f"Choice nunca fica disponível: {names} só é setada em caminhos que não passam por aqui.",
+                    f"{choice_path}.requires"
+                )
+        elif info["status"] == ALWAYS:
+            add_issue(
+                issues,
+                "INFO",
+                "CHOICE_ALWAYS_AVAILABLE",
+                "Condição sempre satisfeita: as flags exigidas já estão setadas em todo caminho até aqui.",
+                f"{choice_path}.requires"
+            )
 
-def _find_first_line(lines, pattern, start=0, end=None):
-    """Retorna número da linha (1-based) da primeira ocorrência."""
-    idx = _find_line_index(lines, pattern, start, end)
-    return (idx + 1) if idx is not None else None
 
+PROGRESS_INTERVAL = 1024
 
-def _find_object_block(lines, key_name, start=0, end=None):
+
+def validate_dialogue(data, spans=None, progress=None, profiler=None, rules=None):
     """
-    Encontra bloco { ... } de uma chave de objeto, ex: "room": { ... }
-    Retorna (start_idx, end_idx) em 0-based.
+    Valida a estrutura e o fluxo do diálogo.
+    Se receber os spans de load_json_with_spans, cada issue já sai com line/column.
+    progress(feitos, total) é chamado a cada PROGRESS_INTERVAL nós; se ele
+    levantar uma exceção, a validação para ali (é assim que a GUI cancela).
+    Com um PhaseProfiler (profiling.py), cada passo numerado é medido.
+    rules: RuleSelection (rules.py) para ligar/desligar regras; None = todas.
     """
-    if end is None:
-        end = len(lines)
+    issues = []
 
-    key_pattern = rf'"\s*{re.escape(key_name)}\s*"\s*:\s*\{{'
-    start_idx = _find_line_index(lines, key_pattern, start, end)
-    if start_idx is None:
-        return None
+    # 1) Validar estrutura básica do JSON
+    with profile_phase(profiler, "1 estrutura", issues):
+        if not isinstance(data, dict):
+            add_issue(issues, "ERROR", "ROOT_TYPE", "O JSON raiz precisa ser um objeto.", "$")
+            return _attach_spans(issues, spans, profiler)
 
-    brace_count = 0
-    started = False
+        start = data.get("start")
+        nodes = data.get("nodes")
+        flags = data.get("flags", [])
 
-    for i in range(start_idx, end):
-        for ch in lines[i]:
-            if ch == "{":
-                brace_count += 1
-                started = True
-            elif ch == "}":
-                brace_count -= 1
+        if not isinstance(start, str) or not start.strip():
+            add_issue(issues, "ERROR", "MISSING_START", "Campo 'start' ausente ou inválido.", "$.start")
 
-        if started and brace_count == 0:
-            return (start_idx, i)
+        if not isinstance(nodes, dict) or len(nodes) == 0:
+            add_issue(issues, "ERROR", "NODES_INVALID", "Campo 'nodes' ausente, vazio ou inválido.", "$.nodes")
+            return _attach_spans(issues, spans, profiler)
 
-    return (start_idx, end - 1)
+        declared_flags = check_declared_flags(flags, issues)
 
+    # 2) Verificar se start existe em nodes
+    with profile_phase(profiler, "2 start", issues):
+        if isinstance(start, str) and start not in nodes:
+            add_issue(issues, "ERROR", "START_NOT_FOUND", f"O nó inicial '{start}' não existe.", "$.start")
 
-def _find_array_block(lines, key_name, start=0, end=None):
-    """
-    Encontra bloco [ ... ] de uma chave, ex: "choices": [ ... ]
-    Retorna (start_idx, end_idx) em 0-based.
-    """
-    if end is None:
-        end = len(lines)
+    # 3) Preparar grafo (conexões entre nós, já com ids inteiros)
+    with profile_phase(profiler, "3 preparar grafo"):
+        state = ValidationState(GraphBuilder(nodes), issues, declared_flags, rules=rules)
 
-    key_pattern = rf'"\s*{re.escape(key_name)}\s*"\s*:\s*\['
-    start_idx = _find_line_index(lines, key_pattern, start, end)
-    if start_idx is None:
-        return None
+    # 4) Validar cada nó
+    node_count = len(nodes)
+    with profile_phase(profiler, "4 validar nós", issues) as record:
+        for node_index, (node_id, node_data) in enumerate(nodes.items()):
+            if progress is not None and node_index % PROGRESS_INTERVAL == 0:
+                progress(node_index, node_count)
+            check_node(state, node_index, node_id, node_data)
+        record["nodes"] = node_count
+
+    if progress is not None:
+        progress(node_count, node_count)
+
+    # 5) a 8) Checagens de grafo
+    finish_validation(state, start, profiler)
+    drop_disabled_issues(state)
 
-    bracket_count = 0
-    started = False
+    return _attach_spans(issues, spans, profiler)
 
-    for i in range(start_idx, end):
-        for ch in lines[i]:
-            if ch == "[":
-                bracket_count += 1
-                started = True
-            elif ch == "]":
-                bracket_count -= 1
 
-        if started and bracket_count == 0:
-            return (start_idx, i)
+def _attach_spans(issues, spans, profiler):
+    if not spans:
+        return issues
+    with profile_phase(profiler, "linhas (spans)") as record:
+        attach_spans_to_issues(issues, spans)
+        record["paths"] = len(issues)
+    return issues
+
 
-    return (start_idx, end - 1)
+def _node_list(graph, members, limit=20):
+    names = ", ".join(f"'{graph.node_ids[m]}'" for m in members[:limit])
+    if len(members) > limit:
+        names += f" e mais {len(members) - limit}"
+    return names
 
 
-def _find_choice_object_blocks(lines, choices_start, choices_end):
+def check_dead_ends(graph, reachable, issues, reverse=None):
     """
-    Dentro de um array 'choices', encontra cada objeto choice { ... }.
-    Retorna lista de tuplas (start_idx, end_idx).
+    Acha nós alcançáveis que não conseguem chegar em nenhum final
+    ("end: true" ou saída para outro arquivo).
+
+    - Ciclos (componentes fortemente conexas) presos viram TRAPPED_LOOP,
+      com os nós do ciclo listados
+    - Os outros nós presos (que só levam para esses ciclos) viram NO_PATH_TO_END
+    Nós terminais sem end já saem como TERMINAL_NO_END e não são repetidos.
+    Sem nenhum final no arquivo, todo nó alcançável está preso (um diálogo
+    que é só um ciclo fechado não tem nó terminal, então só sai aqui).
+    reverse: graph.reversed(), se quem chama já tiver.
     """
-    blocks = []
-    brace_count = 0
-    obj_start = None
+    can_finish = (reverse if reverse is not None else graph.reversed()).reachable_from(
+        node for node in range(graph.node_count) if graph.exits[node]
+    )
+
+    stuck = bytearray(graph.node_count)
+    for node in range(graph.node_count):
+        if reachable[node] and not can_finish[node]:
+            stuck[node] = 1
+    if not any(stuck):
+        return
 
-    for i in range(choices_start, choices_end + 1):
-        line = lines[i]
+    # Quem não chega no final só aponta para quem também não chega, então
+    # as componentes dá para calcular só dentro do subgrafo preso.
+    in_loop = bytearray(graph.node_count)
+    loops = []
+    for component in graph.strongly_connected_components(include=stuck):
+        if len(component) > 1 or graph.has_self_loop(component[0]):
+            component.sort()
+            loops.append(component)
+            for member in component:
+                in_loop[member] = 1
+
+    for component in sorted(loops):
+        if len(component) == 1:
+            message = (
+                f"Loop sem saída: {_node_list(graph, component)} só leva a ele mesmo "
+                "e nunca chega a um nó com 'end: true'."
+            )
+        else:
+            message = (
+                f"Loop sem saída: {_node_list(graph, component)} só levam uns aos outros "
+                "e nunca chegam a um nó com 'end: true'."
+            )
+        add_issue(
+            issues,
+            "WARNING",
+            "TRAPPED_LOOP",
+            message,
+            f"$.nodes.{graph.node_ids[component[0]]}"
+        )
 
-        for ch in line:
-            if ch == "{":
-                if brace_count == 0:
-                    obj_start = i
-                brace_count += 1
-            elif ch == "}":
-                brace_count -= 1
-                if brace_count == 0 and obj_start is not None:
-                    blocks.append((obj_start, i))
-                    obj_start = None
+    for node in range(graph.node_count):
+        if stuck[node] and not in_loop[node] and graph.offsets[node] != graph.offsets[node + 1]:
+            add_issue(
+                issues,
+                "WARNING",
+                "NO_PATH_TO_END",
+                "Nenhum caminho a partir deste nó chega a um nó com 'end: true'.",
+                f"$.nodes.{graph.node_ids[node]}"
+            )
 
-    return blocks
 
+# ============================================================
+# Regras embutidas (rules.py), na ordem em que as issues saem
+# ============================================================
 
-def _line_for_issue_path(path, file_path):
+def register_builtin_rules():
     """
-    Tenta mapear o path lógico (ex: $.nodes.room.choices[0].next)
-    para uma linha do arquivo JSON.
+    Registra as regras embutidas uma vez só (rodando como script este módulo
+    é carregado duas vezes: como __main__ e como dialogue_validator).
     """
-    try:
-        lines = _read_lines(file_path)
-    except Exception:
-        return None
+    if "structure" in REGISTRY:
+        return
 
-    # Casos raiz
-    if path == "$":
-        return 1
-    if path == "$.start":
-        return _find_first_line(lines, r'"\s*start\s*"\s*:')
-    if path == "$.flags":
-        return _find_first_line(lines, r'"\s*flags\s*"\s*:')
-    if path.startswith("$.flags["):
-        return _find_first_line(lines, r'"\s*flags\s*"\s*:')
-    if path == "$.nodes":
-        return _find_first_line(lines, r'"\s*nodes\s*"\s*:')
-
-    # Precisa começar com $.nodes.
-    if not path.startswith("$.nodes."):
-        return None
+    # De nó: rodam dentro do check_node (montam o grafo junto); desligar só filtra os codes
+    register(Rule(
+        "structure", NODE,
+        codes=["NODE_TYPE", "NEXT_TYPE", "CHOICES_TYPE", "CHOICE_TYPE", "CHOICE_TEXT", "CHOICE_NEXT",
+               "REQUIRES_TYPE", "SET_FLAGS_TYPE"],
+        reads=["next", "choices", "set_flags"], tags=["fast"],
+        description="Tipos dos campos de cada nó e de cada choice.",
+    ))
+    register(Rule(
+        "targets", NODE, codes=["TARGET_NOT_FOUND", "EXTERNAL_TARGET"],
+        reads=["next", "choices"], tags=["fast"],
+        description="'next' e choices apontando para nós que existem.",
+    ))
+    register(Rule(
+        "flags", NODE, codes=["FLAGS_TYPE", "FLAG_INVALID", "FLAG_NOT_DECLARED"],
+        reads=["choices", "set_flags"], tags=["fast"],
+        description="Flags válidas e declaradas em 'flags'.",
+    ))
+    register(Rule(
+        "terminal-end", NODE, codes=["TERMINAL_NO_END"],
+        reads=["next", "choices", "end"], tags=["fast"],
+        description="Nó sem saída precisa de 'end: true'.",
+    ))
+
+    # De grafo
+    register(Rule(
+        "orphans", GRAPH, check_orphans, codes=["ORPHAN_NODE"],
+        reads=["reachable"], tags=["fast"],
+        description="Nós não alcançáveis a partir do start.",
+    ))
+    register(Rule(
+        "flags-never-set", GRAPH, check_flags_never_set, codes=["FLAG_REQUIRED_NEVER_SET"],
+        reads=["flags"], tags=["fast"],
+        description="Flags exigidas em requires que nenhum nó seta.",
+    ))
+    register(Rule(
+        "gated-choices", GRAPH, check_gated_choices_rule,
+        codes=["CHOICE_NEVER_AVAILABLE", "CHOICE_ALWAYS_AVAILABLE"],
+        reads=["reachable", "flags", "gated"], tags=["slow"],
+        description="Choices com requires que nunca/sempre ficam disponíveis (fluxo das flags).",
+    ))
+    register(Rule(
+        "dead-ends", GRAPH, check_dead_ends_rule, codes=["TRAPPED_LOOP", "NO_PATH_TO_END"],
+        reads=["reachable", "edges"], tags=["slow"],
+        description="Loops sem saída e nós que nunca chegam a um final.",
+    ))
+
+
+register_builtin_rules()
 
-    rest = path[len("$.nodes."):]  # ex: intro_01.choices[0].next
-    if "." in rest:
-        node_id, remainder = rest.split(".", 1)
-    else:
-        node_id, remainder = rest, ""
 
-    # acha linha do nó
-    node_block = _find_object_block(lines, node_id)
-    if node_block is None:
-        # fallback para a linha de "nodes"
-        return _find_first_line(lines, r'"\s*nodes\s*"\s*:')
+# ============================================================
+# Mapeamento de Path -> Linha (para mostrar no relatório)
+# ============================================================
 
-    node_start, node_end = node_block
+def _read_text(file_path):
+    # newline="": o texto fica igual aos bytes do arquivo (\r\n inclusive), então
+    # os offsets dele valem para o line_mapping ler o trecho direto do arquivo
+    with open(file_path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
 
-    if remainder == "":
-        return node_start + 1
 
-    # campo simples dentro do nó (speaker, text, next, end, set_flags, choices etc)
-    simple_field_match = re.fullmatch(r"([A-Za-z_][A-Za-z0-9_]*)", remainder)
-    if simple_field_match:
-        field = simple_field_match.group(1)
-        line = _find_first_line(lines, rf'"\s*{re.escape(field)}\s*"\s*:', node_start, node_end + 1)
-        return line if line is not None else (node_start + 1)
+def attach_spans_to_issues(issues, spans):
+    """
+    Adiciona issue["line"] e issue["column"] usando a tabela de spans do loader.
+    Aponta para a chave quando existir (ex: "next": ...), senão para o valor.
+    """
+    if not spans:
+        return issues
 
-    # set_flags[0]
-    if re.fullmatch(r"set_flags\[\d+\]", remainder):
-        line = _find_first_line(lines, r'"\s*set_flags\s*"\s*:', node_start, node_end + 1)
-        return line if line is not None else (node_start + 1)
+    for issue in issues:
+        path = issue.get("path")
+        if not path:
+            continue
+        path_span = lookup_span(spans, path)
+        if path_span is None:
+            continue
+        span = path_span.key or path_span.value
+        issue["line"] = span.line
+        issue["column"] = span.column
+    return issues
 
-    # next / text / speaker / end com subcaminho improvável (fallback)
-    if remainder.startswith(("speaker", "text", "next", "end")):
-        field = remainder.split(".")[0].split("[")[0]
-        line = _find_first_line(lines, rf'"\s*{re.escape(field)}\s*"\s*:', node_start, node_end + 1)
-        return line if line is not None else (node_start + 1)
 
-    # choices[n].campo ou choices[n].requires[m]
-    m_choice = re.fullmatch(r"choices\[(\d+)\]\.([A-Za-z_][A-Za-z0-9_]*)(?:\[(\d+)\])?", remainder)
-    if m_choice:
-        choice_index = int(m_choice.group(1))
-        field_name = m_choice.group(2)
+def validate_json_text(data, text, file_path=None, profiler=None, rules=None, jobs=1):
+    """
+    validate_dialogue + line/column das issues a partir do texto do arquivo
+    (line_mapping: só os nós com issue são indexados). Mesmo resultado de
+    validar com os spans de load_json_with_spans, sem o parser em Python.
+    """
+    issues = validate_dialogue(data, profiler=profiler, rules=rules)
+    if not any(issue.get("path") for issue in issues):
+        return issues
 
-        choices_block = _find_array_block(lines, "choices", node_start, node_end + 1)
-        if choices_block is None:
-            return node_start + 1
+    from line_mapping import attach_positions
 
-        choices_start, choices_end = choices_block
-        choice_blocks = _find_choice_object_blocks(lines, choices_start, choices_end)
+    with profile_phase(profiler, "linhas: mapear paths") as record:
+        attach_positions(issues, text, file_path, jobs)
+        record["paths"] = len(issues)
+    return issues
 
-        if 0 <= choice_index < len(choice_blocks):
-            c_start, c_end = choice_blocks[choice_index]
-            line = _find_first_line(lines, rf'"\s*{re.escape(field_name)}\s*"\s*:', c_start, c_end + 1)
-            return line if line is not None else (c_start + 1)
 
-        # fallback para linha de choices
-        return choices_start + 1
+def attach_line_numbers_to_issues(issues, file_path, profiler=None, jobs=1):
+    """
+    Adiciona issue["line"] (e issue["column"]) quando conseguir mapear o Path para linha.
+    O arquivo é lido uma vez e só os nós com issues são indexados (line_mapping);
+    com jobs > 1 (None = núcleos disponíveis) arquivos com muitos nós com issues
+    são mapeados em processos separados.
+    """
+    if not any(issue.get("path") for issue in issues):
+        return issues
 
-    # fallback: tenta achar primeiro campo citado
-    first_field = remainder.split(".")[0].split("[")[0]
-    line = _find_first_line(lines, rf'"\s*{re.escape(first_field)}\s*"\s*:', node_start, node_end + 1)
-    return line if line is not None else (node_start + 1)
+    from line_mapping import attach_positions
 
+    try:
+        with profile_phase(profiler, "linhas: ler arquivo"):
+            text = _read_text(file_path)
+    except Exception:
+        return issues
 
-def attach_line_numbers_to_issues(issues, file_path):
+    with profile_phase(profiler, "linhas: mapear paths") as record:
+        attach_positions(issues, text, file_path, jobs)
+        record["paths"] = len(issues)
+    return issues
+
+
+def validate_file(file_path, streaming=False, rules=None):
     """
-    Adiciona issue["line"] quando conseguir mapear o Path para linha.
+    Lê, valida e mapeia as linhas de um arquivo.
+    Retorna {"file", "issues", "error"}; "error" só vem preenchido quando
+    não deu nem para ler o JSON (arquivo ausente, sintaxe inválida...).
+    Com streaming=True usa o validate_file_streaming (memória limitada).
+    rules: RuleSelection (rules.py); None = todas as regras.
     """
-    for issue in issues:
-        path = issue.get("path")
-        if not path:
-            continue
-        line_number = _line_for_issue_path(path, file_path)
-        if line_number is not None:
-            issue["line"] = line_number
-    return issues
+    result = {"file": str(file_path), "issues": [], "error": None}
+
+    try:
+        if streaming:
+            from streaming_validation import validate_file_streaming
+            result["issues"] = validate_file_streaming(file_path, rules=rules)
+            return result
+        data, text = load_json_text(file_path)
+    except FileNotFoundError:
+        result["error"] = f"Arquivo não encontrado: {file_path}"
+        return result
+    except json.JSONDecodeError as e:
+        result["error"] = f"JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}"
+        return result
+    except (OSError, UnicodeDecodeError) as e:
+        result["error"] = f"Erro ao abrir o arquivo: {e}"
+        return result
+
+    result["issues"] = validate_json_text(data, text, rules=rules)
+    return result
 
 
 def print_report(issues):
@@ -480,16 +746,347 @@ def print_report(issues):
         print()
 
 
-def main():
-    # Se rodar sem argumento, tenta abrir "dialogues.json"
-    file_path = "dialogues.json"
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Valida arquivos de diálogo (JSON) de jogos narrativos."
+    )
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        default=["dialogues.json"],
+        help="Arquivos, pastas ou globs (ex: 'dialogos/**/*.json'). Padrão: dialogues.json",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Quantidade de processos no modo lote (padrão: núcleos disponíveis).",
+    )
+    parser.add_argument(
+        "--project",
+        action="store_true",
+        help="Valida todos os arquivos como um projeto só (referências 'arquivo.json#nó' entre arquivos).",
+    )
+    parser.add_argument(
+        "--entry",
+        action="append",
+        metavar="ARQUIVO#NÓ",
+        help="Ponto de entrada do projeto (pode repetir). Padrão: o 'start' de cada arquivo.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Não usa o cache de resultados em disco no modo lote.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=".nfc_cache",
+        help="Pasta do cache de resultados (padrão: .nfc_cache).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Lê os nós um por vez, sem carregar o arquivo inteiro (para arquivos muito grandes).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Fica observando os arquivos e revalida cada um assim que for salvo (Ctrl+C para sair).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "jsonl", "sarif", "junit"],
+        default="text",
+        help="Formato da saída: text (padrão), jsonl, sarif ou junit (escritos arquivo por arquivo, para CI).",
+    )
+    parser.add_argument(
+        "--lsp",
+        action="store_true",
+        help="Roda como servidor LSP pelo stdin/stdout (diagnósticos direto no editor).",
+    )
+    parser.add_argument(
+        "--rules",
+        metavar="LISTA",
+        help="Só estas regras ou tags, separadas por vírgula (ex: fast, ou targets,orphans). Veja --list-rules.",
+    )
+    parser.add_argument(
+        "--skip-rules",
+        metavar="LISTA",
+        help="Regras ou tags que não rodam (ex: slow, para um pre-commit rápido).",
+    )
+    parser.add_argument(
+        "--plugin",
+        action="append",
+        metavar="ARQUIVO.py",
+        help="Arquivo com regras do projeto (registradas com rules.node_rule/graph_rule). Pode repetir.",
+    )
+    parser.add_argument(
+        "--rule-threads",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Threads para as regras de grafo (padrão: 1, ou uma por regra no Python sem GIL).",
+    )
+    parser.add_argument(
+        "--list-rules",
+        action="store_true",
+        help="Lista as regras (com as dos --plugin) e sai.",
+    )
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="Simula os playthroughs: finais alcançáveis (com um caminho até cada um), quantidade e o mais longo.",
+    )
+    parser.add_argument(
+        "--simulate-output",
+        metavar="ARQUIVO",
+        default=None,
+        help="Com --simulate, grava o relatório em JSON (com os caminhos completos).",
+    )
+    parser.add_argument(
+        "--max-states",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Com --simulate, limite de estados (nó + flags) explorados (padrão: 2.000.000).",
+    )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Valida e grava o diálogo compilado (.nfcb, com mmap); se ele já estiver em dia, nem lê o JSON.",
+    )
+    parser.add_argument(
+        "--compile-output",
+        metavar="ARQUIVO",
+        default=None,
+        help="Com --compile, onde fica o artefato (padrão: ao lado do JSON, com a extensão .nfcb).",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REV",
+        default=None,
+        help=(
+            "Só as issues novas e as corrigidas desde REV (ou entre A..B), nos .json alterados (git). "
+            "Cada arquivo alterado é validado inteiro duas vezes (versão antiga e nova); só mudança "
+            "de formatação não valida nada. Issues de arquivos removidos contam como corrigidas."
+        ),
+    )
+    parser.add_argument(
+        "--text-stats",
+        action="store_true",
+        help="Estatísticas do texto de todos os arquivos: palavras por speaker, linhas repetidas e traduções faltando.",
+    )
+    parser.add_argument(
+        "--max-text-length",
+        metavar="N",
+        type=int,
+        default=None,
+        help="Com --text-stats, cada texto com mais de N caracteres vira um WARNING TEXT_TOO_LONG.",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Fica rodando e valida pelo socket Unix (use o validator_client.py nos hooks e no editor).",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="ARQUIVO",
+        default=None,
+        help="Com --daemon, o socket onde ouvir (padrão: .nfc_cache/daemon.sock).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Mede tempo e contagens de cada fase e mostra a tabela no stderr (só para um arquivo, sem --stream).",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="ARQUIVO",
+        default=None,
+        help="Com --profile, grava o perfil: .prof (cProfile), .speedscope.json (speedscope) ou JSON.",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Com --profile, mede também o pico de memória de cada fase (tracemalloc; os tempos ficam bem maiores).",
+    )
+    return parser
+
+
+def print_rules():
+    for rule in REGISTRY.values():
+        tags = f" [{', '.join(rule.tags)}]" if rule.tags else ""
+        print(f"{rule.name:<18} {rule.scope:<6}{tags}")
+        if rule.description:
+            print(f"    {rule.description}")
+        print(f"    codes: {', '.join(rule.codes) or '-'} | lê: {', '.join(rule.reads) or '-'}")
+
+
+def _split_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+
+def run_profile(file_path, output_path=None, output_format="text", memory=False, rules=None):
+    """Valida um arquivo com o PhaseProfiler ligado (--profile)."""
+    from profiling import PhaseProfiler
+
+    cprofile = bool(output_path) and output_path.endswith((".prof", ".pstats"))
+    profiler = PhaseProfiler(memory=memory, cprofile=cprofile)
+    result = {"file": str(file_path), "issues": [], "error": None}
+    try:
+        with profiler.phase("total"):
+            with profiler.phase("carregar JSON") as record:
+                data, text = load_json_text(file_path)
+                nodes = data.get("nodes") if isinstance(data, dict) else None
+                record["nodes"] = len(nodes) if isinstance(nodes, dict) else 0
+            result["issues"] = validate_json_text(data, text, file_path, profiler=profiler, rules=rules)
+    except FileNotFoundError:
+        result["error"] = f"Arquivo não encontrado: {file_path}"
+    except json.JSONDecodeError as e:
+        result["error"] = f"JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}"
+
+    # Mesmo exit code de validar sem --profile: no texto sempre 0 (como o
+    # modo de um arquivo), nos formatos para máquina o do modo lote
+    exit_code = None
+    if output_format != "text":
+        from batch_validation import open_output
+        output = open_output(output_format)
+        output.add(result)
+        exit_code = output.close()
+    elif result["error"]:
+        print(f"❌ {result['error']}")
+    else:
+        print_report(result["issues"])
+
+    print("\n=== PERFIL POR FASE ===", file=sys.stderr)
+    print(profiler.format_table(), file=sys.stderr)
+    if output_path:
+        profiler.write(output_path)
+        print(f"Perfil gravado em {output_path}", file=sys.stderr)
+
+    return exit_code
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+
+    if args.format != "text" and (args.lsp or args.watch or args.daemon):
+        parser.error("--format não pode ser usado com --lsp, --watch nem com --daemon")
+
+    if args.list_rules:
+        load_plugins(args.plugin or [])
+        print_rules()
+        return 0
+
+    rules = None
+    if args.rules or args.skip_rules or args.plugin or args.rule_threads:
+        if args.lsp or args.watch:
+            parser.error("--rules, --skip-rules, --plugin e --rule-threads não podem ser usados com --lsp nem com --watch")
+        rules = RuleSelection(
+            only=_split_list(args.rules),
+            skip=_split_list(args.skip_rules),
+            plugins=args.plugin,
+            threads=args.rule_threads,
+        )
+        try:
+            rules.enabled()
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    if (args.simulate_output or args.max_states) and not args.simulate:
+        parser.error("--simulate-output e --max-states só podem ser usados junto com --simulate")
+
+    if args.simulate:
+        from batch_validation import is_batch_request
+        if args.lsp or args.watch or args.project or args.stream or args.profile or is_batch_request(args.targets):
+            parser.error("--simulate só funciona com um arquivo (sem --lsp, --watch, --project, --stream, --profile ou lote)")
+        from playthrough import DEFAULT_MAX_STATES, run_simulation
+        return run_simulation(args.targets[0], args.max_states or DEFAULT_MAX_STATES, args.simulate_output)
+
+    if args.compile_output and not args.compile:
+        parser.error("--compile-output só pode ser usado junto com --compile")
+
+    if args.compile:
+        from batch_validation import is_batch_request
+        if args.lsp or args.watch or args.project or args.stream or args.profile or is_batch_request(args.targets):
+            parser.error("--compile só funciona com um arquivo (sem --lsp, --watch, --project, --stream, --profile ou lote)")
+        from compiled_artifact import run_compile
+        return run_compile(args.targets[0], args.compile_output, args.format, rules=rules)
+
+    if args.since:
+        if args.lsp or args.watch or args.project or args.stream or args.profile or args.daemon or args.text_stats or rules is not None:
+            parser.error("--since não pode ser usado com --lsp, --watch, --project, --stream, --profile, --daemon, --text-stats nem com regras")
+        from diff_validation import run_since
+        return run_since(args.since, args.targets, args.format)
+
+    if args.max_text_length is not None and not args.text_stats:
+        parser.error("--max-text-length só pode ser usado junto com --text-stats")
+
+    if args.text_stats:
+        if args.lsp or args.watch or args.project or args.stream or args.profile or args.daemon or rules is not None:
+            parser.error("--text-stats não pode ser usado com --lsp, --watch, --project, --stream, --profile, --daemon nem com regras")
+        if args.max_text_length is not None and args.max_text_length < 1:
+            parser.error("--max-text-length precisa ser maior que zero")
+        from text_analytics import run_text_stats
+        return run_text_stats(args.targets, args.max_text_length, args.format, jobs=args.jobs)
+
+    if args.socket and not args.daemon:
+        parser.error("--socket só pode ser usado junto com --daemon")
+
+    if args.daemon:
+        if args.lsp or args.watch or args.project or args.stream or args.profile or rules is not None:
+            parser.error("--daemon não pode ser usado com --lsp, --watch, --project, --stream, --profile nem com regras (elas vêm em cada pedido)")
+        from validation_daemon import DEFAULT_SOCKET, run_daemon
+        return run_daemon(args.socket or DEFAULT_SOCKET)
+
+    if (args.profile_memory or args.profile_output) and not args.profile:
+        parser.error("--profile-memory e --profile-output só podem ser usados junto com --profile")
+
+    if args.profile:
+        from batch_validation import is_batch_request
+        if args.lsp or args.watch or args.project or args.stream or is_batch_request(args.targets):
+            parser.error("--profile só funciona validando um arquivo (sem --lsp, --watch, --project, --stream ou lote)")
+        return run_profile(args.targets[0], args.profile_output, args.format, memory=args.profile_memory, rules=rules)
+
+    if args.lsp:
+        from lsp_server import run_lsp
+        return run_lsp()
+
+    if args.watch:
+        if args.project or args.stream:
+            parser.error("--watch não pode ser usado com --project nem com --stream")
+        from watch_mode import run_watch
+        return run_watch(args.targets)
+
+    if args.project:
+        from project_graph import run_project
+        return run_project(
+            args.targets, jobs=args.jobs, entry_points=args.entry, output_format=args.format, rules=rules
+        )
 
-    # Se passar arquivo no terminal, usa o arquivo passado
-    if len(sys.argv) > 1:
-        file_path = sys.argv[1]
+    # Pasta, glob ou vários arquivos -> modo lote (os formatos para máquina também passam por ele)
+    from batch_validation import is_batch_request, run_batch
+    if is_batch_request(args.targets) or args.format != "text":
+        cache_dir = None if args.no_cache else args.cache_dir
+        return run_batch(
+            args.targets,
+            jobs=args.jobs,
+            cache_dir=cache_dir,
+            streaming=args.stream,
+            output_format=args.format,
+            rules=rules,
+        )
+
+    file_path = args.targets[0]
 
     try:
-        data = load_json_file(file_path)
+        if args.stream:
+            from streaming_validation import validate_file_streaming
+            issues = validate_file_streaming(file_path, rules=rules)
+        else:
+            data, text = load_json_text(file_path)
+            issues = validate_json_text(data, text, file_path, rules=rules, jobs=args.jobs)
     except FileNotFoundError:
         print(f"❌ Arquivo não encontrado: {file_path}")
         return
@@ -497,10 +1094,8 @@ def main():
         print(f"❌ JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}")
         return
 
-    issues = validate_dialogue(data)
-    attach_line_numbers_to_issues(issues, file_path)
     print_report(issues)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+Modo --since: só as issues que uma mudança trouxe (e as que ela corrigiu).
+
+Num branch grande ninguém quer rever os milhares de avisos que já existiam.
+Com --since REV (contra a cópia de trabalho) ou --since A..B (entre duas
+revisões):
+
+1) git diff --name-only lista os .json alterados dentro dos alvos (na cópia
+   de trabalho entram também os arquivos novos ainda não versionados)
+2) o conteúdo antigo (e o novo, entre revisões) vem de um único
+   git cat-file --batch, sem checkout
+3) os nós são comparados por id (mais start e flags): se nada mudou (só
+   formatação ou ordem das chaves), o arquivo nem é validado
+4) senão as duas versões são validadas com json.loads + validate_dialogue
+   e as issues comparadas como multiconjunto (issue_delta). Ou seja, cada
+   arquivo alterado custa duas validações completas, por menor que seja a
+   mudança. Ainda assim é o caminho mais barato: montar um DialogueValidator
+   da versão antiga e aplicar os nós alterados como patches custa ~2,5x, e o
+   IncrementalValidator (versão antiga lida do zero, nova por diferença de
+   texto) ~1,3x (medido com 10k nós e 5 arestas trocadas)
+5) a linha/coluna é calculada só para as issues novas (line_mapping)
+
+Arquivo removido: a versão antiga é validada e todas as issues dela entram
+como corrigidas, para o total de corrigidas bater com o que sumiu.
+
+O relatório mostra as issues novas e as corrigidas; o exit code só olha as novas.
+"""
+import json
+import os
+import subprocess
+
+from dialogue_validator import validate_dialogue
+from incremental_validation import issue_delta
+from line_mapping import attach_positions
+
+
+LEVEL_ORDER = {"ERROR": 0, "WARNING": 1, "INFO": 2}
+ICONS = {"ERROR": "❌", "WARNING": "⚠️", "INFO": "ℹ️"}
+FIXED_ICON = "✔️"
+
+_MISSING = object()
+
+
+class GitError(Exception):
+    """Comando git falhou (revisão inexistente, fora de um repositório...)."""
+
+
+def _git(args, cwd=None):
+    try:
+        completed = subprocess.run(["git", *args], cwd=cwd, capture_output=True, check=False)
+    except OSError as e:
+        raise GitError(f"não foi possível rodar o git: {e}") from e
+    if completed.returncode != 0:
+        message = completed.stderr.decode("utf-8", "replace").strip()
+        raise GitError(message or f"git {' '.join(args)} falhou")
+    return completed.stdout
+
+
+def parse_range(since):
+    """'REV' -> (REV, None = cópia de trabalho); 'A..B' -> (A, B)."""
+    if ".." in since:
+        old, _, new = since.partition("..")
+        return old or "HEAD", new or "HEAD"
+    return since, None
+
+
+def changed_files(old_rev, new_rev, targets):
+    """(raiz do repositório, [paths relativos à raiz]) dos .json alterados dentro dos alvos."""
+    root = _git(["rev-parse", "--show-toplevel"]).decode("utf-8").strip()
+    revisions = [old_rev] if new_rev is None else [old_rev, new_rev]
+    # Os alvos são pathspecs do git (pastas e globs funcionam), relativos à pasta atual
+    output = _git(["diff", "--name-only", "--no-renames", "-z", *revisions, "--", *targets])
+    names = [name for name in output.decode("utf-8").split("\0") if name]
+    if new_rev is None:
+        untracked = _git(["ls-files", "--others", "--exclude-standard", "--full-name", "-z", "--", *targets])
+        names += [name for name in untracked.decode("utf-8").split("\0") if name]
+    return root, sorted({name for name in names if name.endswith(".json")})
+
+
+class BlobReader:
+    """Lê vários arquivos de revisões com um único 'git cat-file --batch'."""
+
+    def __init__(self, root):
+        try:
+            self.process = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=root,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            raise GitError(f"não foi possível rodar o git: {e}") from e
+
+    def read(self, revision, name):
+        """Conteúdo do arquivo na revisão (texto), ou None se ele não existia lá."""
+        self.process.stdin.write(f"{revision}:{name}\n".encode("utf-8"))
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            # "<objeto> missing" (ou ambiguous): o arquivo não existe nessa revisão
+            return None
+        data = self.process.stdout.read(int(header[2]))
+        self.process.stdout.read(1)   # \n depois do conteúdo
+        return data.decode("utf-8")
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
+
+
+def _load_old(text):
+    """Documento antigo decodificado, ou _MISSING se não existia ou não era JSON válido."""
+    if text is None:
+        return _MISSING
+    try:
+        return json.loads(text)
+    except ValueError:
+        return _MISSING
+
+
+def diff_documents(old_data, new_data):
+    """
+    (issues novas, issues corrigidas) de old_data para new_data (sem line/column).
+    Se nenhum nó (comparando por id), o start e as flags mudaram, as issues
+    também não mudam e nada é validado.
+    """
+    if isinstance(old_data, dict) and isinstance(new_data, dict):
+        roots_equal = all(old_data.get(key) == new_data.get(key) for key in ("start", "flags"))
+        old_nodes, new_nodes = old_data.get("nodes"), new_data.get("nodes")
+        if roots_equal and isinstance(old_nodes, dict) and isinstance(new_nodes, dict) and old_nodes == new_nodes:
+            # Só formatação, ordem das chaves ou campos que o validador não lê
+            return [], []
+    delta = issue_delta(validate_dialogue(old_data), validate_dialogue(new_data))
+    return delta.added, delta.removed
+
+
+def diff_file(display, old_text, new_text):
+    """
+    Compara as duas versões de um arquivo.
+    Retorna {"file", "issues" (novas), "fixed", "error", "status"}; status é
+    "added", "modified" ou "deleted".
+    """
+    status = "added" if old_text is None else "deleted" if new_text is None else "modified"
+    result = {"file": display, "issues": [], "fixed": [], "error": None, "status": status}
+    if new_text is None:
+        # Removido: tudo que a versão antiga tinha deixou de existir
+        old_data = _load_old(old_text)
+        if old_data is not _MISSING:
+            result["fixed"] = validate_dialogue(old_data)
+        return result
+
+    try:
+        new_data = json.loads(new_text)
+    except json.JSONDecodeError as e:
+        result["error"] = f"JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}"
+        return result
+
+    old_data = _load_old(old_text)
+    if old_data is _MISSING:
+        # Arquivo novo (ou antes era JSON inválido): tudo que ele tem é novo
+        new, fixed = validate_dialogue(new_data), []
+    else:
+        new, fixed = diff_documents(old_data, new_data)
+    # Linhas só das issues novas (indexa só os nós que têm issue)
+    result["issues"] = attach_positions(new, new_text)
+    result["fixed"] = fixed
+    return result
+
+
+def diff_since(since, targets):
+    """Gera o resultado de diff_file para cada .json alterado (pode levantar GitError)."""
+    old_rev, new_rev = parse_range(since)
+    # Valida as revisões antes (mensagem clara em vez de "arquivo não existe")
+    for revision in (old_rev, new_rev):
+        if revision is not None:
+            _git(["rev-parse", "--verify", "--quiet", f"{revision}^{{commit}}"])
+    root, names = changed_files(old_rev, new_rev, targets)
+
+    reader = BlobReader(root)
+    try:
+        for name in names:
+            display = os.path.relpath(os.path.join(root, name))
+            old_text = reader.read(old_rev, name)
+            if new_rev is not None:
+                new_text = reader.read(new_rev, name)
+            else:
+                try:
+                    with open(os.path.join(root, name), "r", encoding="utf-8") as file:
+                        new_text = file.read()
+                except FileNotFoundError:
+                    new_text = None
+            yield diff_file(display, old_text, new_text)
+    finally:
+        reader.close()
+
+
+# ============================================================
+# Relatório
+# ============================================================
+
+def _count(issues):
+    counts = {"ERROR": 0, "WARNING": 0, "INFO": 0}
+    for issue in issues:
+        if issue["level"] in counts:
+            counts[issue["level"]] += 1
+    return counts
+
+
+def _sorted(issues):
+    return sorted(issues, key=lambda x: (LEVEL_ORDER.get(x["level"], 99), x["code"], x["path"]))
+
+
+def _print_fixed(fixed):
+    for issue in _sorted(fixed):
+        print(f"   {FIXED_ICON} corrigida [{issue['level']}] {issue['code']} {issue['path']}: {issue['message']}")
+
+
+def print_diff_result(result):
+    if result["status"] == "deleted":
+        print(f"📄 {result['file']} — removido. Corrigidas: {len(result['fixed'])}")
+        _print_fixed(result["fixed"])
+        return
+    if result["error"]:
+        print(f"📄 {result['file']}")
+        print(f"   ❌ {result['error']}")
+        return
+
+    new, fixed = result["issues"], result["fixed"]
+    tag = " (novo)" if result["status"] == "added" else ""
+    if not new and not fixed:
+        print(f"📄 {result['file']}{tag} — ✅ Nada mudou nas issues.")
+        return
+
+    counts = _count(new)
+    print(
+        f"📄 {result['file']}{tag} — Novas: {len(new)} "
+        f"(Erros: {counts['ERROR']} | Avisos: {counts['WARNING']} | Info: {counts['INFO']}) | "
+        f"Corrigidas: {len(fixed)}"
+    )
+    for issue in _sorted(new):
+        icon = ICONS.get(issue["level"], "•")
+        location = issue["path"]
+        if "line" in issue:
+            location += f" (Linha {issue['line']})"
+        print(f"   {icon} [{issue['level']}] {issue['code']} {location}: {issue['message']}")
+    _print_fixed(fixed)
+
+
+def run_since(since, targets, output_format="text"):
+    """
+    Versão de linha de comando (--since). Formatos para máquina levam só as
+    issues novas. Exit code 1 se entrou algum ERROR ou um arquivo ficou ilegível.
+    """
+    from batch_validation import open_output
+
+    try:
+        results = diff_since(since, targets)
+        writer = open_output(output_format) if output_format != "text" else None
+        totals = {"ERROR": 0, "WARNING": 0, "INFO": 0}
+        files = fixed = failed = 0
+        for result in results:
+            files += 1
+            fixed += len(result["fixed"])
+            failed += bool(result["error"])
+            for level, count in _count(result["issues"]).items():
+                totals[level] += count
+            if writer is None:
+                print_diff_result(result)
+            elif result["status"] != "deleted":
+                writer.add(result)
+    except GitError as e:
+        print(f"❌ git: {e}")
+        return 1
+
+    if writer is not None:
+        writer.close()
+    else:
+        if not files:
+            print(f"✅ Nenhum arquivo .json alterado desde {since}.")
+        print(f"\n=== MUDANÇAS DESDE {since} ===")
+        print(f"Arquivos alterados: {files} | Ilegíveis: {failed}")
+        print(f"Novas — Erros: {totals['ERROR']} | Avisos: {totals['WARNING']} | Info: {totals['INFO']}")
+        print(f"Corrigidas: {fixed}")
+    return 1 if totals["ERROR"] or failed else 0
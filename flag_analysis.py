@@ -0,0 +1,109 @@
+"""
+Análise de fluxo das flags (quais flags podem/devem estar setadas em cada nó).
+
+A checagem FLAG_REQUIRED_NEVER_SET só compara conjuntos globais: se a flag
+é setada em qualquer lugar, tudo certo. Aqui a gente propaga as flags pelo
+grafo, a partir do start, até estabilizar (ponto fixo):
+
+- may (talvez setadas): união do que chega por qualquer caminho
+- must (com certeza setadas): interseção do que chega por todos os caminhos
+
+Uma choice com "requires" só é atravessada se as flags exigidas puderem estar
+setadas; e quem passa por ela tem essas flags com certeza. Roda sobre o
+CompiledGraph: cada flag é um bit de um int, então as operações são só | e &
+mesmo com centenas de flags.
+"""
+from collections import deque
+
+from compiled_graph import compile_dialogue
+
+
+ALWAYS = "always"              # flags exigidas sempre estão setadas ao chegar no nó
+CONDITIONAL = "conditional"    # depende do caminho que o jogador fez
+UNREACHABLE = "unreachable"    # nunca dá para escolher
+
+
+def analyze_flag_reachability(nodes, start):
+    """
+    Classifica cada choice com "requires" em ALWAYS, CONDITIONAL ou UNREACHABLE.
+
+    Retorna {path_da_choice: {"node", "status", "missing"}}, onde "missing"
+    são as flags exigidas que nunca podem estar setadas ali.
+    Choices em nós que não são alcançados vêm como UNREACHABLE com missing vazio.
+    """
+    graph = compile_dialogue(nodes)
+    return analyze_compiled_flags(graph, graph.index.get(start))
+
+
+def analyze_compiled_flags(graph, start_index):
+    """Mesma análise, direto sobre o CompiledGraph (start_index pode ser None)."""
+    node_count = graph.node_count
+    offsets = graph.offsets
+    targets = graph.targets
+    edge_requires = graph.edge_requires
+    set_masks = graph.set_masks
+
+    # Ponto fixo. must_in = None significa "ainda não alcançado" (topo do reticulado).
+    may_in = [0] * node_count
+    must_in = [None] * node_count
+
+    if start_index is not None:
+        must_in[start_index] = 0
+        worklist = deque([start_index])
+        queued = bytearray(node_count)
+        queued[start_index] = 1
+
+        while worklist:
+            current = worklist.popleft()
+            queued[current] = 0
+
+            may_out = may_in[current] | set_masks[current]
+            must_out = must_in[current] | set_masks[current]
+
+            for e in range(offsets[current], offsets[current + 1]):
+                required = edge_requires[e]
+                if required & ~may_out:
+                    # Alguma flag exigida nunca está setada aqui: aresta impossível
+                    continue
+
+                target = targets[e]
+
+                # Quem passou pela choice tem as flags exigidas com certeza
+                edge_must = must_out | required
+                new_may = may_in[target] | may_out
+                old_must = must_in[target]
+                new_must = edge_must if old_must is None else old_must & edge_must
+
+                if new_may != may_in[target] or new_must != old_must:
+                    may_in[target] = new_may
+                    must_in[target] = new_must
+                    if not queued[target]:
+                        queued[target] = 1
+                        worklist.append(target)
+
+    # Classificação
+    result = {}
+    for node, choice_path, required in graph.gated:
+        node_id = graph.node_ids[node]
+
+        if must_in[node] is None:
+            result[choice_path] = {"node": node_id, "status": UNREACHABLE, "missing": []}
+            continue
+
+        may_out = may_in[node] | set_masks[node]
+        must_out = must_in[node] | set_masks[node]
+
+        missing = required & ~may_out
+        if missing:
+            status = UNREACHABLE
+        elif required & ~must_out:
+            status = CONDITIONAL
+        else:
+            status = ALWAYS
+        result[choice_path] = {
+            "node": node_id,
+            "status": status,
+            "missing": graph.flag_names_of(missing),
+        }
+
+    return result
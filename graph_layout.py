@@ -0,0 +1,346 @@
+"""
+Layout do grafo para o explorador da GUI (gui_graph_view.py), sem Qt.
+
+1) Cada componente fortemente conexa (ciclo) vira um bloco só; o que sobra
+   entre os blocos é um DAG.
+2) Camadas (Sugiyama): cada bloco fica uma camada abaixo do predecessor mais
+   fundo (caminho mais longo a partir das fontes).
+3) Ordem dentro de cada camada: começa pela ordem topológica e melhora com
+   varreduras de baricentro (cada bloco vai para a média da posição dos
+   vizinhos da camada de cima, depois da de baixo), o que tira cruzamentos.
+4) Coordenadas: blocos lado a lado em cada camada, camadas de cima para
+   baixo; os nós de um ciclo ficam em grade dentro do bloco.
+
+layout_steps() é um gerador: devolve um GraphLayout já desenhável logo depois
+das camadas e outro melhor a cada varredura, para a GUI ir mostrando enquanto
+calcula (numa thread).
+
+O GraphLayout guarda um índice em grade (células de CELL_SIZE): a GUI só
+desenha as células que aparecem na tela. Os nós também são agrupados em
+capítulos (prefixo do id antes de ":" ou "/", ex: "cap1:intro"; sem isso,
+faixas de LAYERS_PER_CHAPTER camadas), desenhados como um bloco só quando o
+zoom está bem afastado.
+"""
+import math
+from array import array
+
+from dialogue_validator import node_id_from_path
+
+
+NODE_WIDTH = 150
+NODE_HEIGHT = 40
+H_GAP = 30          # entre blocos da mesma camada
+V_GAP = 90          # entre camadas
+CYCLE_GAP = 14      # entre nós dentro do bloco de um ciclo
+SWEEPS = 4          # varreduras de baricentro (desce, sobe, desce, sobe)
+CELL_SIZE = 1200
+LAYERS_PER_CHAPTER = 20
+
+# Nível de issue mais grave de cada nó (bytearray)
+NO_ISSUE = 0
+LEVELS = {"INFO": 1, "WARNING": 2, "ERROR": 3}
+
+
+def issue_levels(graph, issues):
+    """bytearray com o nível mais grave das issues de cada nó (0 = sem issue)."""
+    levels = bytearray(graph.node_count)
+    for issue in issues:
+        path = issue.get("path")
+        level = LEVELS.get(issue.get("level"), 0)
+        if not path or not level:
+            continue
+        node_id = node_id_from_path(path, graph.index)
+        if node_id is not None:
+            node = graph.index[node_id]
+            if level > levels[node]:
+                levels[node] = level
+    return levels
+
+
+def condense(graph):
+    """
+    Blocos (componentes fortemente conexas) em ordem topológica, o bloco de
+    cada nó e as arestas entre blocos (sem repetição).
+    """
+    components = graph.strongly_connected_components()
+    components.reverse()   # o Tarjan devolve os sumidouros primeiro
+
+    comp_of = array("i", bytes(4 * graph.node_count))
+    for c, members in enumerate(components):
+        for node in members:
+            comp_of[node] = c
+
+    offsets = graph.offsets
+    targets = graph.targets
+    successors = [[] for _ in components]
+    predecessors = [[] for _ in components]
+    seen = array("i", [-1]) * len(components)
+    for c, members in enumerate(components):
+        for node in members:
+            for e in range(offsets[node], offsets[node + 1]):
+                target = comp_of[targets[e]]
+                if target != c and seen[target] != c:
+                    seen[target] = c
+                    successors[c].append(target)
+                    predecessors[target].append(c)
+    return components, comp_of, successors, predecessors
+
+
+def _chapters(graph, layer_of_node):
+    """Nome do capítulo de cada nó."""
+    keys = []
+    explicit = 0
+    for node_id in graph.node_ids:
+        key = None
+        for separator in (":", "/"):
+            if separator in node_id:
+                key = node_id.split(separator, 1)[0]
+                break
+        keys.append(key)
+        explicit += key is not None
+
+    if explicit * 2 >= graph.node_count and len(set(keys)) > 1:
+        return [key if key is not None else "(sem capítulo)" for key in keys]
+
+    names = []
+    for layer in layer_of_node:
+        first = layer - layer % LAYERS_PER_CHAPTER
+        names.append(f"camadas {first}-{first + LAYERS_PER_CHAPTER - 1}")
+    return names
+
+
+class GraphLayout:
+    """Posições de um passo do layout + índices para desenhar só o que está na tela."""
+
+    def __init__(self, graph, components, comp_of, successors, layer_of, comp_x, comp_y, step, steps):
+        self.graph = graph
+        self.components = components
+        self.comp_of = comp_of
+        self.successors = successors
+        self.layer_of = layer_of
+        self.step = step
+        self.steps = steps
+
+        node_count = graph.node_count
+        self.x = array("d", bytes(8 * node_count))
+        self.y = array("d", bytes(8 * node_count))
+        self.comp_rects = []
+        for c, members in enumerate(components):
+            columns, rows = _block_shape(len(members))
+            for k, node in enumerate(sorted(members)):
+                self.x[node] = comp_x[c] + (k % columns) * (NODE_WIDTH + CYCLE_GAP)
+                self.y[node] = comp_y[c] + (k // columns) * (NODE_HEIGHT + CYCLE_GAP)
+            width, height = _block_size(len(members))
+            self.comp_rects.append((comp_x[c], comp_y[c], width, height))
+
+        if node_count:
+            self.bounds = (
+                min(self.x), min(self.y),
+                max(self.x) + NODE_WIDTH - min(self.x), max(self.y) + NODE_HEIGHT - min(self.y),
+            )
+        else:
+            self.bounds = (0.0, 0.0, 0.0, 0.0)
+
+        self._build_grid()
+        self.chapter_rects = {}   # nome -> [x0, y0, x1, y1, nós]
+        self.chapter_of = None
+
+    # ---------------------------------------------------------
+    # Índice em grade
+    # ---------------------------------------------------------
+    def _build_grid(self):
+        x, y = self.x, self.y
+        offsets = self.graph.offsets
+        targets = self.graph.targets
+
+        self.node_cells = {}
+        for node in range(self.graph.node_count):
+            self.node_cells.setdefault(_cell(x[node], y[node]), []).append(node)
+
+        # Arestas: em todas as células por onde a linha passa
+        self.edge_cells = {}
+        for source in range(self.graph.node_count):
+            for e in range(offsets[source], offsets[source + 1]):
+                target = targets[e]
+                if target == source:
+                    continue
+                self._add_segment(self.edge_cells, (source, target), *self.edge_line(source, target))
+
+        self.comp_cells = {}
+        self.comp_edge_cells = {}
+        for c, (cx, cy, width, height) in enumerate(self.comp_rects):
+            for cell in _cells_in(cx, cy, cx + width, cy + height):
+                self.comp_cells.setdefault(cell, []).append(c)
+            for target in self.successors[c]:
+                self._add_segment(self.comp_edge_cells, (c, target), *self.comp_edge_line(c, target))
+
+    @staticmethod
+    def _add_segment(cells, item, x1, y1, x2, y2):
+        """Põe o segmento em cada célula por onde a linha passa (linha de células por linha)."""
+        if y1 > y2:
+            x1, y1, x2, y2 = x2, y2, x1, y1
+        slope = (x2 - x1) / (y2 - y1) if y2 != y1 else 0.0
+        for row in range(math.floor(y1 / CELL_SIZE), math.floor(y2 / CELL_SIZE) + 1):
+            if y2 == y1:
+                xa, xb = x1, x2
+            else:
+                # Nas pontas usa o x exato (a conta com slope pode cair do outro lado da borda)
+                top = row * CELL_SIZE
+                bottom = top + CELL_SIZE
+                xa = x1 if top <= y1 else x1 + slope * (top - y1)
+                xb = x2 if bottom >= y2 else x1 + slope * (bottom - y1)
+            for column in range(math.floor(min(xa, xb) / CELL_SIZE), math.floor(max(xa, xb) / CELL_SIZE) + 1):
+                cells.setdefault((column, row), []).append(item)
+
+    def edge_line(self, source, target):
+        """Da base do nó de origem ao topo do destino (ou do lado, se o destino está acima)."""
+        x, y = self.x, self.y
+        x1 = x[source] + NODE_WIDTH / 2
+        x2 = x[target] + NODE_WIDTH / 2
+        if y[target] > y[source]:
+            return x1, y[source] + NODE_HEIGHT, x2, y[target]
+        if y[target] < y[source]:
+            return x1, y[source], x2, y[target] + NODE_HEIGHT
+        if x[target] > x[source]:
+            return x[source] + NODE_WIDTH, y[source] + NODE_HEIGHT / 2, x[target], y[target] + NODE_HEIGHT / 2
+        return x[source], y[source] + NODE_HEIGHT / 2, x[target] + NODE_WIDTH, y[target] + NODE_HEIGHT / 2
+
+    def comp_edge_line(self, source, target):
+        sx, sy, sw, sh = self.comp_rects[source]
+        tx, ty, tw, _ = self.comp_rects[target]
+        return sx + sw / 2, sy + sh, tx + tw / 2, ty
+
+    def cells_in(self, x0, y0, x1, y1):
+        return _cells_in(x0, y0, x1, y1)
+
+    def nodes_in(self, x0, y0, x1, y1):
+        """Nós cujo retângulo cruza a área (olhando só as células dela)."""
+        x, y = self.x, self.y
+        # O nó fica na célula do canto dele; pega uma célula a mais para trás
+        for cell in _cells_in(x0 - NODE_WIDTH, y0 - NODE_HEIGHT, x1, y1):
+            for node in self.node_cells.get(cell, ()):
+                if x[node] <= x1 and x[node] + NODE_WIDTH >= x0 and y[node] <= y1 and y[node] + NODE_HEIGHT >= y0:
+                    yield node
+
+    def node_at(self, px, py):
+        for node in self.nodes_in(px, py, px, py):
+            return node
+        return None
+
+    def comp_at(self, px, py):
+        for c in self.comp_cells.get(_cell(px, py), ()):
+            cx, cy, width, height = self.comp_rects[c]
+            if cx <= px <= cx + width and cy <= py <= cy + height:
+                return c
+        return None
+
+    # ---------------------------------------------------------
+    # Capítulos
+    # ---------------------------------------------------------
+    def set_chapters(self, chapter_of):
+        self.chapter_of = chapter_of
+        rects = {}
+        x, y = self.x, self.y
+        for node, name in enumerate(chapter_of):
+            rect = rects.get(name)
+            if rect is None:
+                rects[name] = [x[node], y[node], x[node] + NODE_WIDTH, y[node] + NODE_HEIGHT, 1]
+                continue
+            rect[0] = min(rect[0], x[node])
+            rect[1] = min(rect[1], y[node])
+            rect[2] = max(rect[2], x[node] + NODE_WIDTH)
+            rect[3] = max(rect[3], y[node] + NODE_HEIGHT)
+            rect[4] += 1
+        self.chapter_rects = rects
+
+
+def _cell(x, y):
+    return (math.floor(x / CELL_SIZE), math.floor(y / CELL_SIZE))
+
+
+def _cells_in(x0, y0, x1, y1):
+    cx0, cy0 = _cell(x0, y0)
+    cx1, cy1 = _cell(x1, y1)
+    for cx in range(cx0, cx1 + 1):
+        for cy in range(cy0, cy1 + 1):
+            yield (cx, cy)
+
+
+def _block_shape(size):
+    columns = math.ceil(math.sqrt(size))
+    return columns, math.ceil(size / columns)
+
+
+def _block_size(size):
+    columns, rows = _block_shape(size)
+    return (
+        columns * (NODE_WIDTH + CYCLE_GAP) - CYCLE_GAP,
+        rows * (NODE_HEIGHT + CYCLE_GAP) - CYCLE_GAP,
+    )
+
+
+def _place(layers, sizes):
+    """Coordenadas do canto de cada bloco: camadas de cima para baixo, centradas em x = 0."""
+    comp_x = array("d", bytes(8 * len(sizes)))
+    comp_y = array("d", bytes(8 * len(sizes)))
+    top = 0.0
+    for layer in layers:
+        _place_layer(layer, sizes, comp_x)
+        for c in layer:
+            comp_y[c] = top
+        top += max((sizes[c][1] for c in layer), default=0) + V_GAP
+    return comp_x, comp_y
+
+
+def _place_layer(layer, sizes, comp_x):
+    left = -(sum(sizes[c][0] for c in layer) + H_GAP * (len(layer) - 1)) / 2
+    for c in layer:
+        comp_x[c] = left
+        left += sizes[c][0] + H_GAP
+
+
+def _sweep(layers, neighbors, comp_x, sizes):
+    """Reordena cada camada pela média do centro dos vizinhos (já posicionados)."""
+    for layer in layers:
+        keys = {}
+        for c in layer:
+            linked = neighbors[c]
+            if linked:
+                keys[c] = sum(comp_x[n] + sizes[n][0] / 2 for n in linked) / len(linked)
+            else:
+                keys[c] = comp_x[c] + sizes[c][0] / 2
+        layer.sort(key=keys.__getitem__)
+        # A próxima camada já usa as posições novas desta
+        _place_layer(layer, sizes, comp_x)
+
+
+def layout_steps(graph, sweeps=SWEEPS):
+    """Gerador: um GraphLayout logo depois das camadas e um a cada varredura."""
+    components, comp_of, successors, predecessors = condense(graph)
+
+    layer_of = array("i", bytes(4 * len(components)))
+    for c in range(len(components)):   # ordem topológica: predecessores já têm camada
+        if predecessors[c]:
+            layer_of[c] = max(layer_of[p] for p in predecessors[c]) + 1
+    layers = [[] for _ in range(max(layer_of, default=-1) + 1)]
+    for c in range(len(components)):
+        layers[layer_of[c]].append(c)
+
+    sizes = [_block_size(len(members)) for members in components]
+    layer_of_node = [layer_of[comp_of[node]] for node in range(graph.node_count)]
+    chapter_of = _chapters(graph, layer_of_node)
+
+    def snapshot(step):
+        comp_x, comp_y = _place(layers, sizes)
+        result = GraphLayout(graph, components, comp_of, successors, layer_of, comp_x, comp_y, step, sweeps)
+        result.set_chapters(chapter_of)
+        return result
+
+    yield snapshot(0)
+    for step in range(1, sweeps + 1):
+        comp_x, _ = _place(layers, sizes)
+        if step % 2:
+            _sweep(layers[1:], predecessors, comp_x, sizes)
+        else:
+            _sweep(list(reversed(layers[:-1])), successors, comp_x, sizes)
+        yield snapshot(step)
@@ -3,6 +3,7 @@ import json
 import traceback
 from pathlib import Path
 
+from PySide6.QtCore import QFileSystemWatcher, QObject, QRunnable, QThreadPool, QTimer, Signal
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -14,13 +15,97 @@ from PySide6.QtWidgets import (
     QFileDialog,
     QMessageBox,
     QPlainTextEdit,
+    QProgressBar,
+    QCheckBox,
+    QStackedWidget,
+    QTabWidget,
 )
 
-from dialogue_validator import (
-    load_json_file,
-    validate_dialogue,
-    attach_line_numbers_to_issues,
-)
+from gui_graph_view import GraphExplorer
+from gui_issue_view import IssuePanel
+from incremental_validation import IncrementalValidator
+
+
+# Espera o arquivo parar de mudar antes de revalidar (editores salvam em mais de uma escrita)
+AUTO_VALIDATE_DELAY_MS = 30
+
+
+class ValidationCancelled(Exception):
+    pass
+
+
+class ValidationSignals(QObject):
+    """
+    Sinais da validação em segundo plano. O primeiro argumento é sempre o
+    run_id, para a janela descartar resultados de execuções antigas.
+    """
+    progress = Signal(int, str, int, int)    # run_id, etapa, feitos, total (total 0 = sem porcentagem)
+    finished = Signal(int, object)           # run_id, issues
+    failed = Signal(int, str, object)        # run_id, tipo do erro, detalhes
+
+
+class ValidationTask(QRunnable):
+    """
+    Lê e valida um arquivo fora da thread da interface.
+    O resultado volta pelos sinais; cancel() interrompe no próximo
+    checkpoint de progresso. O validator (IncrementalValidator) é o mesmo
+    entre execuções, então revalidar depois de salvar só refaz o que mudou.
+    """
+
+    def __init__(self, run_id, file_path, validator):
+        super().__init__()
+        self.run_id = run_id
+        self.file_path = file_path
+        self.validator = validator
+        self.signals = ValidationSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _check_cancelled(self):
+        if self.cancelled:
+            raise ValidationCancelled()
+
+    def _report_progress(self, done, total):
+        self._check_cancelled()
+        if done < total:
+            self.signals.progress.emit(self.run_id, "Validando...", done, total)
+        else:
+            self.signals.progress.emit(self.run_id, "Verificando o grafo...", 0, 0)
+
+    def run(self):
+        try:
+            # 1) Ler o arquivo
+            self.signals.progress.emit(self.run_id, "Lendo o arquivo...", 0, 0)
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as file:
+                    text = file.read()
+            except FileNotFoundError:
+                self.validator.reset()
+                self.signals.failed.emit(self.run_id, "not_found", None)
+                return
+            except Exception as e:
+                self.signals.failed.emit(self.run_id, "open", (e, traceback.format_exc()))
+                return
+
+            # 2) Validar JSON e lógica narrativa
+            self._check_cancelled()
+            try:
+                issues = self.validator.validate_text(text, progress=self._report_progress)
+            except json.JSONDecodeError as e:
+                self.signals.failed.emit(self.run_id, "json", e)
+                return
+            except ValidationCancelled:
+                raise
+            except Exception as e:
+                self.signals.failed.emit(self.run_id, "validation", (e, traceback.format_exc()))
+                return
+
+            self._check_cancelled()
+            self.signals.finished.emit(self.run_id, issues)
+        except ValidationCancelled:
+            pass
 
 
 class MainWindow(QMainWindow):
@@ -54,6 +139,32 @@ class MainWindow(QMainWindow):
         self.validate_button = QPushButton("Validar")
         self.validate_button.clicked.connect(self.validate_current_file)
 
+        self.cancel_button = QPushButton("Cancelar")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_validation)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+
+        self.auto_validate_box = QCheckBox("Revalidar ao salvar")
+        self.auto_validate_box.setChecked(True)
+        self.auto_validate_box.toggled.connect(self.watch_current_file)
+
+        # Validação em segundo plano
+        self.thread_pool = QThreadPool.globalInstance()
+        self.current_task = None
+        self.run_id = 0
+        self.show_dialogs = True
+        self.validator = IncrementalValidator()
+
+        # Revalidação automática: o watcher avisa, o timer espera o arquivo parar de mudar
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.on_file_changed)
+        self.auto_validate_timer = QTimer(self)
+        self.auto_validate_timer.setSingleShot(True)
+        self.auto_validate_timer.setInterval(AUTO_VALIDATE_DELAY_MS)
+        self.auto_validate_timer.timeout.connect(self.auto_validate)
+
         self.output_box = QPlainTextEdit()
         self.output_box.setReadOnly(True)
         self.output_box.setPlaceholderText("O relatório vai aparecer aqui...")
@@ -63,6 +174,19 @@ class MainWindow(QMainWindow):
                 f"Arquivo padrão encontrado: {self.current_file}\nClique em 'Validar' para analisar."
             )
 
+        # Mensagens (erros, instruções) no output_box; issues na tabela
+        self.issue_panel = IssuePanel()
+        self.report_stack = QStackedWidget()
+        self.report_stack.addWidget(self.output_box)
+        self.report_stack.addWidget(self.issue_panel)
+
+        # Aba do grafo: o layout só é calculado quando ela é aberta
+        self.graph_explorer = GraphExplorer()
+        self.issue_panel.issue_activated.connect(lambda issue: self.graph_explorer.focus_path(issue.get("path")))
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.report_stack, "Issues")
+        self.tabs.addTab(self.graph_explorer, "Grafo")
+
         # ---------- Layout ----------
         central = QWidget()
         self.setCentralWidget(central)
@@ -78,15 +202,25 @@ class MainWindow(QMainWindow):
         button_row = QHBoxLayout()
         button_row.addWidget(self.open_button)
         button_row.addWidget(self.validate_button)
+        button_row.addWidget(self.cancel_button)
         button_row.addStretch()
+        button_row.addWidget(self.auto_validate_box)
         main_layout.addLayout(button_row)
 
+        main_layout.addWidget(self.progress_bar)
+
         main_layout.addWidget(self.summary_label)
-        main_layout.addWidget(self.output_box)
+        main_layout.addWidget(self.tabs)
+
+        self.watch_current_file()
 
     # ---------------------------------------------------------
     # UI helpers
     # ---------------------------------------------------------
+    def show_message(self, text):
+        self.output_box.setPlainText(text)
+        self.report_stack.setCurrentWidget(self.output_box)
+
     def update_file_label(self):
         if self.current_file:
             self.file_label.setText(f"📄 Arquivo atual: {self.current_file}")
@@ -103,10 +237,12 @@ class MainWindow(QMainWindow):
 
         if file_path:
             self.current_file = Path(file_path)
+            self.validator = IncrementalValidator()
+            self.watch_current_file()
             self.update_file_label()
             self.summary_label.setText("Arquivo selecionado. Clique em 'Validar'.")
             self.summary_label.setStyleSheet("font-weight: bold;")
-            self.output_box.setPlainText(
+            self.show_message(
                 f"Arquivo selecionado: {self.current_file}\nClique em 'Validar' para analisar."
             )
 
@@ -117,43 +253,127 @@ class MainWindow(QMainWindow):
         if not self.current_file:
             QMessageBox.warning(self, "Aviso", "Selecione um arquivo JSON primeiro.")
             return
+        self.start_validation(show_dialogs=True)
+
+    def start_validation(self, show_dialogs):
+        # Clicou de novo no meio de uma validação: a anterior é descartada
+        if self.current_task is not None:
+            self.current_task.cancel()
+
+        self.run_id += 1
+        self.show_dialogs = show_dialogs
+        task = ValidationTask(self.run_id, self.current_file, self.validator)
+        task.signals.progress.connect(self.on_validation_progress)
+        task.signals.finished.connect(self.on_validation_finished)
+        task.signals.failed.connect(self.on_validation_failed)
+        self.current_task = task
+
+        self.summary_label.setText("⏳ Validando...")
+        self.summary_label.setStyleSheet("font-weight: bold;")
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.cancel_button.setEnabled(True)
 
-        # 1) Ler JSON
-        try:
-            data = load_json_file(self.current_file)
-        except FileNotFoundError:
-            QMessageBox.critical(self, "Erro", f"Arquivo não encontrado:\n{self.current_file}")
+        self.thread_pool.start(task)
+
+    def cancel_validation(self):
+        if self.current_task is None:
+            return
+
+        self.current_task.cancel()
+        self.run_id += 1
+        self.finish_run()
+        self.summary_label.setText("Validação cancelada.")
+        self.summary_label.setStyleSheet("font-weight: bold;")
+
+    def finish_run(self):
+        self.current_task = None
+        self.progress_bar.setVisible(False)
+        self.cancel_button.setEnabled(False)
+
+    # ---------------------------------------------------------
+    # Revalidação ao salvar
+    # ---------------------------------------------------------
+    def watch_current_file(self):
+        watched = self.file_watcher.files()
+        if watched:
+            self.file_watcher.removePaths(watched)
+        if self.current_file and self.auto_validate_box.isChecked() and self.current_file.exists():
+            self.file_watcher.addPath(str(self.current_file))
+
+    def on_file_changed(self, path):
+        # Editores que salvam gravando um temporário e renomeando fazem o
+        # watcher perder o arquivo: adiciona de novo se ele ainda existe
+        if path not in self.file_watcher.files() and Path(path).exists():
+            self.file_watcher.addPath(path)
+        self.issue_panel.invalidate_viewer()
+        self.auto_validate_timer.start()
+
+    def auto_validate(self):
+        if self.current_file and self.auto_validate_box.isChecked():
+            # Sem caixas de diálogo: o resultado aparece só no resumo e no relatório
+            self.start_validation(show_dialogs=False)
+
+    def closeEvent(self, event):
+        if self.current_task is not None:
+            self.current_task.cancel()
+        super().closeEvent(event)
+
+    def on_validation_progress(self, run_id, stage, done, total):
+        if run_id != self.run_id:
+            return
+
+        self.summary_label.setText(f"⏳ {stage}")
+        if total:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
+        else:
+            self.progress_bar.setRange(0, 0)
+
+    def on_validation_failed(self, run_id, kind, details):
+        if run_id != self.run_id:
             return
-        except json.JSONDecodeError as e:
+        self.finish_run()
+
+        if kind == "not_found":
+            if self.show_dialogs:
+                QMessageBox.critical(self, "Erro", f"Arquivo não encontrado:\n{self.current_file}")
+            self.summary_label.setText("❌ Arquivo não encontrado.")
+            self.summary_label.setStyleSheet("font-weight: bold; color: #b00020;")
+            return
+
+        if kind == "json":
             # Aqui mostra linha e coluna do erro de sintaxe JSON
-            QMessageBox.critical(
-                self,
-                "Erro de JSON",
-                f"JSON inválido:\n{e.msg}\nLinha: {e.lineno}, Coluna: {e.colno}"
-            )
+            e = details
+            if self.show_dialogs:
+                QMessageBox.critical(
+                    self,
+                    "Erro de JSON",
+                    f"JSON inválido:\n{e.msg}\nLinha: {e.lineno}, Coluna: {e.colno}"
+                )
             self.summary_label.setText("❌ JSON inválido.")
             self.summary_label.setStyleSheet("font-weight: bold; color: #b00020;")
-            self.output_box.setPlainText(
+            self.show_message(
                 f"Erro de sintaxe JSON\n\nMensagem: {e.msg}\nLinha: {e.lineno}\nColuna: {e.colno}"
             )
             return
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro inesperado ao abrir o arquivo:\n{e}")
-            self.summary_label.setText("❌ Erro ao abrir arquivo.")
-            self.summary_label.setStyleSheet("font-weight: bold; color: #b00020;")
-            self.output_box.setPlainText(traceback.format_exc())
-            return
 
-        # 2) Validar lógica narrativa
-        try:
-            issues = validate_dialogue(data)
-            attach_line_numbers_to_issues(issues, str(self.current_file))
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro durante a validação:\n{e}")
+        e, trace = details
+        if kind == "open":
+            if self.show_dialogs:
+                QMessageBox.critical(self, "Erro", f"Erro inesperado ao abrir o arquivo:\n{e}")
+            self.summary_label.setText("❌ Erro ao abrir arquivo.")
+        else:
+            if self.show_dialogs:
+                QMessageBox.critical(self, "Erro", f"Erro durante a validação:\n{e}")
             self.summary_label.setText("❌ Erro durante a validação.")
-            self.summary_label.setStyleSheet("font-weight: bold; color: #b00020;")
-            self.output_box.setPlainText(traceback.format_exc())
+        self.summary_label.setStyleSheet("font-weight: bold; color: #b00020;")
+        self.show_message(trace)
+
+    def on_validation_finished(self, run_id, issues):
+        if run_id != self.run_id:
             return
+        self.finish_run()
 
         # 3) Atualiza resumo
         error_count = sum(1 for i in issues if i["level"] == "ERROR")
@@ -175,39 +395,13 @@ class MainWindow(QMainWindow):
             else:
                 self.summary_label.setStyleSheet("font-weight: bold; color: #1565c0;")
 
-        # 4) Mostra relatório
-        report_text = self.format_report(issues)
-        self.output_box.setPlainText(report_text)
-
-    # ---------------------------------------------------------
-    # Formatação do relatório exibido na interface
-    # ---------------------------------------------------------
-    def format_report(self, issues):
-        if not issues:
-            return "✅ Nenhum problema encontrado."
-
-        order = {"ERROR": 0, "WARNING": 1, "INFO": 2}
-        issues_sorted = sorted(
-            issues,
-            key=lambda x: (order.get(x["level"], 99), x.get("code", ""), x.get("path", ""))
-        )
-
-        lines = []
-        lines.append("=== RELATÓRIO DE VALIDAÇÃO ===")
-        lines.append("")
-
-        icons = {"ERROR": "❌", "WARNING": "⚠️", "INFO": "ℹ️"}
-
-        for issue in issues_sorted:
-            icon = icons.get(issue["level"], "•")
-            lines.append(f"{icon} [{issue['level']}] {issue['code']}")
-            lines.append(f"   {issue['message']}")
-            lines.append(f"   Path: {issue['path']}")
-            if "line" in issue:
-                lines.append(f"   Linha: {issue['line']}")
-            lines.append("")
-
-        return "\n".join(lines)
+        # 4) Mostra as issues na tabela (e no grafo)
+        self.graph_explorer.set_source(self.current_file, issues)
+        if issues:
+            self.issue_panel.set_issues(issues, self.current_file)
+            self.report_stack.setCurrentWidget(self.issue_panel)
+        else:
+            self.show_message("✅ Nenhum problema encontrado.")
 
 
 def main():
@@ -218,4 +412,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
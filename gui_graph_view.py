@@ -0,0 +1,579 @@
+"""
+Aba "Grafo" da GUI: o diálogo desenhado com QGraphicsView.
+
+- O layout (graph_layout.py) roda num QRunnable e cada passo chega por
+  sinal: o grafo aparece logo com as camadas e vai se arrumando a cada
+  varredura de baricentro.
+- Tudo é desenhado por um único GraphItem, que só olha as células do índice
+  em grade que aparecem na tela (exposedRect). O desenho de cada célula vira
+  um QPainterPath guardado por nível de zoom, então arrastar a tela só
+  repinta caminhos prontos.
+- Nível de detalhe: bem afastado, cada capítulo é um retângulo com o nome e
+  a quantidade de nós; no meio, cada ciclo (componente fortemente conexa) é
+  um bloco só; de perto, os nós com o id e as setas.
+- Cor = issue mais grave do nó (ou do ciclo/capítulo). Clicar num nó mostra
+  as issues, quem aponta para ele (ou por que é órfão) e as flags; o combo de
+  flags destaca onde cada flag é setada e onde ela é exigida.
+"""
+import json
+
+from PySide6.QtCore import QObject, QRectF, QRunnable, Qt, QThreadPool, Signal
+from PySide6.QtGui import QBrush, QColor, QFont, QPainter, QPainterPath, QPen
+from PySide6.QtWidgets import (
+    QComboBox,
+    QGraphicsItem,
+    QGraphicsScene,
+    QGraphicsView,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPlainTextEdit,
+    QPushButton,
+    QSplitter,
+    QStyleOptionGraphicsItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from compiled_graph import compile_dialogue
+from dialogue_validator import node_id_from_path
+from graph_layout import NODE_HEIGHT, NODE_WIDTH, issue_levels, layout_steps
+
+
+# Abaixo deste zoom: só capítulos. Entre os dois: ciclos como um bloco. Acima: nós com nome.
+CHAPTER_LOD = 0.04
+DETAIL_LOD = 0.35
+MIN_SCALE = 0.002
+MAX_SCALE = 4.0
+
+# Nós listados no painel de detalhes (entradas/saídas)
+MAX_LISTED = 25
+
+LEVEL_FILL = {0: "#e8eaed", 1: "#bbdefb", 2: "#ffe0b2", 3: "#ffcdd2"}
+LEVEL_BORDER = {0: "#80868b", 1: "#1565c0", 2: "#b36b00", 3: "#b00020"}
+EDGE_COLOR = "#9aa0a6"
+SELECTED_COLOR = "#6a1b9a"
+FLAG_SET_COLOR = "#0a7a2f"
+FLAG_REQUIRED_COLOR = "#ef6c00"
+
+_MID = "mid"
+_DETAIL = "detail"
+
+
+class LayoutSignals(QObject):
+    loaded = Signal(int, object)   # run_id, GraphData (antes do primeiro passo)
+    step = Signal(int, object)     # run_id, GraphLayout
+    failed = Signal(int, str)      # run_id, mensagem
+
+
+class GraphData:
+    """O que não muda entre os passos do layout: grafo, inverso, alcance a partir do start e níveis."""
+
+    def __init__(self, graph, start, levels):
+        self.graph = graph
+        self.start = start              # índice do nó inicial (ou None)
+        self.levels = levels            # issue mais grave por nó (graph_layout.LEVELS)
+        self.reverse = graph.reversed()
+        self.reachable = graph.reachable_from([start]) if start is not None else None
+
+
+class LayoutTask(QRunnable):
+    """Lê o arquivo, monta o CompiledGraph e roda os passos do layout fora da thread da interface."""
+
+    def __init__(self, run_id, file_path, issues):
+        super().__init__()
+        self.run_id = run_id
+        self.file_path = file_path
+        self.issues = issues
+        self.signals = LayoutSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            self.signals.failed.emit(self.run_id, f"Não foi possível ler o arquivo: {e}")
+            return
+
+        nodes = data.get("nodes") if isinstance(data, dict) else None
+        if not isinstance(nodes, dict) or not nodes:
+            self.signals.failed.emit(self.run_id, "O arquivo não tem nós para desenhar.")
+            return
+
+        graph = compile_dialogue(nodes)
+        start = data.get("start")
+        start = graph.index.get(start) if isinstance(start, str) else None
+        self.signals.loaded.emit(self.run_id, GraphData(graph, start, issue_levels(graph, self.issues)))
+        for layout in layout_steps(graph):
+            if self.cancelled:
+                return
+            self.signals.step.emit(self.run_id, layout)
+
+
+class GraphItem(QGraphicsItem):
+    """O grafo inteiro como um item só, desenhando apenas as células visíveis."""
+
+    def __init__(self):
+        super().__init__()
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True)
+        self.layout = None
+        self.levels = bytearray()
+        self.comp_levels = []
+        self.chapter_levels = {}
+        self.selected = None
+        self.flag_set = []          # nós que setam a flag destacada
+        self.flag_required = []     # nós com choice que exige a flag destacada
+        self._cache = {}
+        self._fills = {level: QBrush(QColor(color)) for level, color in LEVEL_FILL.items()}
+        self._borders = {level: QPen(QColor(color), 2) for level, color in LEVEL_BORDER.items()}
+        self._edge_pen = QPen(QColor(EDGE_COLOR), 1.5)
+        self._font = QFont()
+        self._font.setPointSize(9)
+
+    def set_layout(self, layout, levels):
+        self.prepareGeometryChange()
+        self.layout = layout
+        self.levels = levels
+        self.comp_levels = [max((levels[node] for node in members), default=0) for members in layout.components]
+        self.chapter_levels = {}
+        for node, name in enumerate(layout.chapter_of):
+            if levels[node] > self.chapter_levels.get(name, 0):
+                self.chapter_levels[name] = levels[node]
+        self._cache.clear()
+        self.update()
+
+    def boundingRect(self):
+        if self.layout is None:
+            return QRectF()
+        x, y, width, height = self.layout.bounds
+        return QRectF(x - 50, y - 50, width + 100, height + 100)
+
+    # ---------------------------------------------------------
+    # Caminhos prontos por célula
+    # ---------------------------------------------------------
+    def _cell_paths(self, tier, cell):
+        key = (tier, cell)
+        paths = self._cache.get(key)
+        if paths is not None:
+            return paths
+
+        layout = self.layout
+        edges = QPainterPath()
+        boxes = {}
+        if tier == _DETAIL:
+            for source, target in layout.edge_cells.get(cell, ()):
+                x1, y1, x2, y2 = layout.edge_line(source, target)
+                edges.moveTo(x1, y1)
+                edges.lineTo(x2, y2)
+                _arrow_head(edges, x1, y1, x2, y2)
+            for node in layout.node_cells.get(cell, ()):
+                path = boxes.setdefault(self.levels[node], QPainterPath())
+                path.addRoundedRect(layout.x[node], layout.y[node], NODE_WIDTH, NODE_HEIGHT, 6, 6)
+        else:
+            for source, target in layout.comp_edge_cells.get(cell, ()):
+                x1, y1, x2, y2 = layout.comp_edge_line(source, target)
+                edges.moveTo(x1, y1)
+                edges.lineTo(x2, y2)
+            for c in layout.comp_cells.get(cell, ()):
+                # Bloco grande aparece em todas as células que cobre (repintar por cima não muda nada)
+                x, y, width, height = layout.comp_rects[c]
+                path = boxes.setdefault(self.comp_levels[c], QPainterPath())
+                path.addRect(x, y, width, height)
+
+        paths = self._cache[key] = (edges, boxes)
+        return paths
+
+    # ---------------------------------------------------------
+    # Desenho
+    # ---------------------------------------------------------
+    def paint(self, painter, option, widget=None):
+        if self.layout is None:
+            return
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        exposed = option.exposedRect
+        x0, y0, x1, y1 = exposed.left(), exposed.top(), exposed.right(), exposed.bottom()
+
+        if lod < CHAPTER_LOD:
+            self._paint_chapters(painter, lod, x0, y0, x1, y1)
+            return
+
+        tier = _DETAIL if lod >= DETAIL_LOD else _MID
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, tier == _DETAIL)
+        cells = list(self.layout.cells_in(x0 - NODE_WIDTH, y0 - NODE_HEIGHT, x1, y1))
+
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(self._edge_pen)
+        for cell in cells:
+            painter.drawPath(self._cell_paths(tier, cell)[0])
+        for cell in cells:
+            for level, path in self._cell_paths(tier, cell)[1].items():
+                painter.setBrush(self._fills[level])
+                painter.setPen(self._borders[level])
+                painter.drawPath(path)
+
+        if tier == _DETAIL:
+            self._paint_labels(painter, x0, y0, x1, y1)
+        self._paint_highlights(painter, lod, x0, y0, x1, y1)
+
+    def _paint_chapters(self, painter, lod, x0, y0, x1, y1):
+        font = QFont(self._font)
+        font.setPointSizeF(max(1.0, 11 / lod))
+        painter.setFont(font)
+        for name, (cx0, cy0, cx1, cy1, count) in self.layout.chapter_rects.items():
+            if cx1 < x0 or cx0 > x1 or cy1 < y0 or cy0 > y1:
+                continue
+            level = self.chapter_levels.get(name, 0)
+            painter.setBrush(self._fills[level])
+            painter.setPen(QPen(QColor(LEVEL_BORDER[level]), 2 / lod))
+            rect = QRectF(cx0, cy0, cx1 - cx0, cy1 - cy0)
+            painter.drawRect(rect)
+            painter.setPen(QColor("#202124"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, f"{name}\n{count} nós")
+
+    def _paint_labels(self, painter, x0, y0, x1, y1):
+        layout = self.layout
+        painter.setFont(self._font)
+        painter.setPen(QColor("#202124"))
+        metrics = painter.fontMetrics()
+        node_ids = layout.graph.node_ids
+        for node in layout.nodes_in(x0, y0, x1, y1):
+            rect = QRectF(layout.x[node] + 8, layout.y[node], NODE_WIDTH - 16, NODE_HEIGHT)
+            text = metrics.elidedText(node_ids[node], Qt.TextElideMode.ElideRight, int(rect.width()))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, text)
+
+    def _paint_highlights(self, painter, lod, x0, y0, x1, y1):
+        layout = self.layout
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        groups = [
+            (self.flag_required, FLAG_REQUIRED_COLOR),
+            (self.flag_set, FLAG_SET_COLOR),
+            ([self.selected] if self.selected is not None else [], SELECTED_COLOR),
+        ]
+        # Afastado, o destaque precisa de uma borda grossa para aparecer
+        margin = max(4.0, 3 / lod)
+        for nodes, color in groups:
+            painter.setPen(QPen(QColor(color), max(3.0, 3 / lod)))
+            for node in nodes:
+                x, y = layout.x[node], layout.y[node]
+                if x > x1 or x + NODE_WIDTH < x0 or y > y1 or y + NODE_HEIGHT < y0:
+                    continue
+                painter.drawRect(QRectF(x - margin, y - margin, NODE_WIDTH + 2 * margin, NODE_HEIGHT + 2 * margin))
+
+
+def _arrow_head(path, x1, y1, x2, y2, size=9):
+    dx, dy = x2 - x1, y2 - y1
+    length = (dx * dx + dy * dy) ** 0.5
+    if not length:
+        return
+    ux, uy = dx / length, dy / length
+    path.moveTo(x2 - ux * size - uy * size * 0.6, y2 - uy * size + ux * size * 0.6)
+    path.lineTo(x2, y2)
+    path.lineTo(x2 - ux * size + uy * size * 0.6, y2 - uy * size - ux * size * 0.6)
+
+
+class GraphView(QGraphicsView):
+    node_clicked = Signal(object)   # índice do nó (ou None, clique fora)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.graph_scene = QGraphicsScene(self)
+        self.graph_scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+        self.item = GraphItem()
+        self.graph_scene.addItem(self.item)
+        self.setScene(self.graph_scene)
+
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState, True)
+        self.setBackgroundBrush(QColor("#fafafa"))
+        self._press_pos = None
+
+    def set_layout(self, layout, levels):
+        self.item.set_layout(layout, levels)
+        self.graph_scene.setSceneRect(self.item.boundingRect())
+
+    def show_start(self, start):
+        """Começa pelo nó inicial (ou pelo topo), já com zoom de leitura."""
+        layout = self.item.layout
+        if layout is None:
+            return
+        self.resetTransform()
+        self.scale(0.6, 0.6)
+        if start is not None:
+            self.centerOn(layout.x[start] + NODE_WIDTH / 2, layout.y[start] + NODE_HEIGHT / 2)
+        else:
+            x, y, width, _ = layout.bounds
+            self.centerOn(x + width / 2, y)
+
+    def fit_all(self):
+        if self.item.layout is not None:
+            self.fitInView(self.item.boundingRect(), Qt.AspectRatioMode.KeepAspectRatio)
+
+    def focus_node(self, node):
+        layout = self.item.layout
+        if layout is None or node is None:
+            return
+        if self.transform().m11() < DETAIL_LOD:
+            self.resetTransform()
+            self.scale(0.8, 0.8)
+        self.centerOn(layout.x[node] + NODE_WIDTH / 2, layout.y[node] + NODE_HEIGHT / 2)
+
+    def wheelEvent(self, event):
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        scale = self.transform().m11() * factor
+        if MIN_SCALE <= scale <= MAX_SCALE:
+            self.scale(factor, factor)
+
+    def mousePressEvent(self, event):
+        self._press_pos = event.position()
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        if self._press_pos is None or (event.position() - self._press_pos).manhattanLength() > 4:
+            return
+        layout = self.item.layout
+        if layout is None:
+            return
+        point = self.mapToScene(event.position().toPoint())
+        node = layout.node_at(point.x(), point.y())
+        if node is None and self.transform().m11() < DETAIL_LOD:
+            # Afastado, clicar num ciclo seleciona o primeiro nó dele
+            c = layout.comp_at(point.x(), point.y())
+            node = min(layout.components[c]) if c is not None else None
+        self.node_clicked.emit(node)
+
+
+class GraphExplorer(QWidget):
+    """A aba inteira: barra de ferramentas, o GraphView e o painel do nó selecionado."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.file_path = None
+        self.issues = []
+        self.dirty = False
+        self.run_id = 0
+        self.current_task = None
+        self.data = None
+        self.layout = None
+        self.thread_pool = QThreadPool.globalInstance()
+
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Ir para o nó (id)...")
+        self.search_box.returnPressed.connect(self.go_to_search)
+        self.flag_box = QComboBox()
+        self.flag_box.currentIndexChanged.connect(self.highlight_flag)
+        self.fit_button = QPushButton("Ver tudo")
+        self.fit_button.clicked.connect(lambda: self.view.fit_all())
+        self.status_label = QLabel("Valide um arquivo para ver o grafo.")
+
+        self.view = GraphView()
+        self.view.node_clicked.connect(self.select_node)
+
+        self.details = QPlainTextEdit()
+        self.details.setReadOnly(True)
+        self.details.setPlaceholderText("Clique num nó para ver as issues, as conexões e as flags dele.")
+
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(self.search_box, 1)
+        toolbar.addWidget(QLabel("Flag:"))
+        toolbar.addWidget(self.flag_box)
+        toolbar.addWidget(self.fit_button)
+        toolbar.addWidget(self.status_label)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        splitter.addWidget(self.view)
+        splitter.addWidget(self.details)
+        splitter.setStretchFactor(0, 4)
+        splitter.setStretchFactor(1, 1)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(toolbar)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+    # ---------------------------------------------------------
+    # Layout em segundo plano
+    # ---------------------------------------------------------
+    def set_source(self, file_path, issues):
+        """Novo resultado de validação. O layout só é calculado quando a aba aparece."""
+        self.file_path = file_path
+        self.issues = issues
+        self.dirty = True
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.dirty:
+            self.refresh()
+
+    def refresh(self):
+        if self.file_path is None:
+            return
+        if self.current_task is not None:
+            self.current_task.cancel()
+        self.dirty = False
+        self.run_id += 1
+        task = LayoutTask(self.run_id, self.file_path, self.issues)
+        task.signals.loaded.connect(self.on_graph_loaded)
+        task.signals.step.connect(self.on_layout_step)
+        task.signals.failed.connect(self.on_layout_failed)
+        self.current_task = task
+        self.status_label.setText("⏳ Montando o grafo...")
+        self.thread_pool.start(task)
+
+    def on_graph_loaded(self, run_id, data):
+        if run_id != self.run_id:
+            return
+        self.data = data
+        self.layout = None
+        self._fill_flags(data.graph)
+        self.view.item.selected = None
+        self.details.clear()
+
+    def on_layout_step(self, run_id, layout):
+        if run_id != self.run_id:
+            return
+        first = self.layout is None
+        self.layout = layout
+        self.view.set_layout(layout, self.data.levels)
+        if first:
+            self.view.show_start(self.data.start)
+
+        if layout.step < layout.steps:
+            self.status_label.setText(f"⏳ Arrumando o layout ({layout.step}/{layout.steps})...")
+        else:
+            self.current_task = None
+            self.status_label.setText(
+                f"{layout.graph.node_count} nós, {layout.graph.edge_count} arestas, "
+                f"{len(layout.chapter_rects)} capítulos"
+            )
+
+    def on_layout_failed(self, run_id, message):
+        if run_id != self.run_id:
+            return
+        self.current_task = None
+        self.status_label.setText(f"❌ {message}")
+
+    # ---------------------------------------------------------
+    # Seleção e destaques
+    # ---------------------------------------------------------
+    def _fill_flags(self, graph):
+        self.flag_box.blockSignals(True)
+        self.flag_box.clear()
+        self.flag_box.addItem("(nenhuma)", None)
+        for bit, name in sorted(enumerate(graph.flag_names), key=lambda item: item[1]):
+            self.flag_box.addItem(name, bit)
+        self.flag_box.blockSignals(False)
+        self.view.item.flag_set = []
+        self.view.item.flag_required = []
+
+    def highlight_flag(self):
+        bit = self.flag_box.currentData()
+        item = self.view.item
+        if bit is None or self.layout is None:
+            item.flag_set = []
+            item.flag_required = []
+        else:
+            graph = self.layout.graph
+            mask = 1 << bit
+            item.flag_set = [node for node in range(graph.node_count) if graph.set_masks[node] & mask]
+            item.flag_required = sorted({
+                node for node in range(graph.node_count)
+                for e in range(graph.offsets[node], graph.offsets[node + 1])
+                if graph.edge_requires[e] & mask
+            })
+            self.details.setPlainText(
+                f"Flag '{graph.flag_names[bit]}'\n\n"
+                f"Setada em ({len(item.flag_set)}, verde):\n{self._list_nodes(item.flag_set)}\n\n"
+                f"Exigida por choices de ({len(item.flag_required)}, laranja):\n{self._list_nodes(item.flag_required)}"
+            )
+            if item.flag_set:
+                self.view.focus_node(item.flag_set[0])
+        item.update()
+
+    def go_to_search(self):
+        if self.layout is None:
+            return
+        node = self.layout.graph.index.get(self.search_box.text().strip())
+        if node is None:
+            self.status_label.setText("Nó não encontrado.")
+            return
+        self.select_node(node)
+        self.view.focus_node(node)
+
+    def focus_path(self, path):
+        """Centraliza o nó de um path de issue (ex: duplo clique na tabela de issues)."""
+        if self.layout is None or not path:
+            return
+        node_id = node_id_from_path(path, self.layout.graph.index)
+        if node_id is not None:
+            node = self.layout.graph.index[node_id]
+            self.select_node(node)
+            self.view.focus_node(node)
+
+    def select_node(self, node):
+        self.view.item.selected = node
+        self.view.item.update()
+        if node is None or self.layout is None:
+            self.details.clear()
+            return
+        self.details.setPlainText(self._describe(node))
+
+    def _list_nodes(self, nodes):
+        node_ids = self.layout.graph.node_ids
+        lines = [f"  • {node_ids[node]}" for node in nodes[:MAX_LISTED]]
+        if len(nodes) > MAX_LISTED:
+            lines.append(f"  ... e mais {len(nodes) - MAX_LISTED}")
+        return "\n".join(lines) or "  (nenhum)"
+
+    def _describe(self, node):
+        graph = self.layout.graph
+        node_id = graph.node_ids[node]
+        prefix = f"$.nodes.{node_id}"
+        lines = [f"Nó: {node_id}", ""]
+
+        node_issues = [
+            issue for issue in self.issues
+            if issue.get("path") and node_id_from_path(issue["path"], graph.index) == node_id
+        ]
+        lines.append(f"Issues ({len(node_issues)}):")
+        for issue in node_issues[:MAX_LISTED]:
+            where = issue["path"][len(prefix):] or "(nó)"
+            lines.append(f"  [{issue['level']}] {issue['code']} {where}")
+            lines.append(f"      {issue['message']}")
+        if not node_issues:
+            lines.append("  (nenhuma)")
+
+        incoming = sorted(set(self.data.reverse.successors(node)))
+        lines += ["", f"Chegam aqui ({len(incoming)}):", self._list_nodes(incoming)]
+        if self.data.reachable is not None and not self.data.reachable[node]:
+            if incoming:
+                lines.append("  Órfão: nenhum desses nós é alcançável a partir do start.")
+            else:
+                lines.append("  Órfão: nenhum nó aponta para este.")
+
+        outgoing = []
+        for e in range(graph.offsets[node], graph.offsets[node + 1]):
+            required = graph.flag_names_of(graph.edge_requires[e])
+            suffix = f"  (exige: {', '.join(required)})" if required else ""
+            outgoing.append(f"  • {graph.node_ids[graph.targets[e]]}{suffix}")
+        lines += ["", f"Vai para ({len(outgoing)}):"] + (outgoing[:MAX_LISTED] or ["  (nenhum)"])
+        if graph.exits[node]:
+            lines.append("  (fim do diálogo ou saída para outro arquivo)")
+
+        set_flags = graph.flag_names_of(graph.set_masks[node])
+        lines += ["", f"Seta as flags: {', '.join(set_flags) if set_flags else '(nenhuma)'}"]
+
+        members = self.layout.components[self.layout.comp_of[node]]
+        if len(members) > 1:
+            lines.append(f"Faz parte de um ciclo com {len(members)} nós.")
+        lines.append(f"Capítulo: {self.layout.chapter_of[node]}")
+        return "\n".join(lines)
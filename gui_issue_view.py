@@ -0,0 +1,302 @@
+"""
+Tabela de issues da GUI (substitui o relatório em texto corrido).
+
+- IssueTableModel: QAbstractTableModel sobre o IssueIndex (issue_index.py).
+  A tabela só pede os dados das linhas visíveis, e as linhas entram aos
+  poucos (canFetchMore/fetchMore), então abrir 50k issues custa o mesmo que 50.
+- IssuePanel: filtros (nível, code, texto), a tabela e, embaixo, o arquivo
+  aberto num visualizador; duplo clique numa issue vai para a linha dela.
+"""
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, Signal
+from PySide6.QtGui import QColor, QTextCursor, QTextFormat
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QComboBox,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QPlainTextEdit,
+    QSplitter,
+    QTableView,
+    QTextEdit,
+    QVBoxLayout,
+    QWidget,
+)
+
+from issue_index import COLUMNS, LEVEL_ORDER, IssueIndex
+
+
+# Linhas entregues à tabela por vez (ao rolar, chegam mais)
+FETCH_BATCH = 500
+
+# Espera parar de digitar antes de filtrar pelo texto
+TEXT_FILTER_DELAY_MS = 150
+
+HEADERS = {"level": "Nível", "code": "Código", "message": "Mensagem", "path": "Path", "line": "Linha"}
+LEVEL_ICONS = {"ERROR": "❌", "WARNING": "⚠️", "INFO": "ℹ️"}
+LEVEL_COLORS = {"ERROR": "#b00020", "WARNING": "#b36b00", "INFO": "#1565c0"}
+
+ALL = "Todos"
+
+
+class IssueTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index_ = IssueIndex([])
+        self.rows = self.index_.order("level")
+        self.loaded = 0
+        self.sort_column = "level"
+        self.descending = False
+        self.levels = None
+        self.codes = None
+        self.text = ""
+        self._colors = {level: QColor(color) for level, color in LEVEL_COLORS.items()}
+
+    # ---------------------------------------------------------
+    # Dados
+    # ---------------------------------------------------------
+    def set_issues(self, issues):
+        self.beginResetModel()
+        self.index_ = IssueIndex(issues)
+        self.levels = None
+        self.codes = None
+        self.text = ""
+        self._refresh_rows()
+        self.endResetModel()
+
+    def set_filter(self, levels=None, codes=None, text=""):
+        self.beginResetModel()
+        self.levels = levels
+        self.codes = codes
+        self.text = text
+        self._refresh_rows()
+        self.endResetModel()
+
+    def _refresh_rows(self):
+        self.rows = self.index_.rows(self.sort_column, self.descending, self.levels, self.codes, self.text)
+        self.loaded = min(FETCH_BATCH, len(self.rows))
+
+    def issue_at(self, row):
+        return self.index_.issues[self.rows[row]]
+
+    @property
+    def visible_count(self):
+        return len(self.rows)
+
+    # ---------------------------------------------------------
+    # QAbstractTableModel
+    # ---------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH, len(self.rows) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return HEADERS[COLUMNS[section]]
+        return section + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.loaded:
+            return None
+        issue = self.issue_at(index.row())
+        column = COLUMNS[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == "level":
+                return f"{LEVEL_ICONS.get(issue['level'], '•')} {issue['level']}"
+            value = issue.get(column)
+            return "" if value is None else str(value)
+        if role == Qt.ItemDataRole.ForegroundRole and column == "level":
+            return self._colors.get(issue["level"])
+        if role == Qt.ItemDataRole.ToolTipRole and column in ("message", "path"):
+            return issue.get(column)
+        if role == Qt.ItemDataRole.TextAlignmentRole and column == "line":
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.beginResetModel()
+        self.sort_column = COLUMNS[column]
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self._refresh_rows()
+        self.endResetModel()
+
+
+class IssuePanel(QWidget):
+    """Filtros + tabela + visualizador do arquivo."""
+
+    issue_activated = Signal(object)   # a issue (dict) do duplo clique
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.file_path = None
+        self._viewer_file = None
+
+        # ---------- Filtros ----------
+        self.level_box = QComboBox()
+        self.level_box.currentIndexChanged.connect(self.apply_filter)
+        self.code_box = QComboBox()
+        self.code_box.currentIndexChanged.connect(self.apply_filter)
+        self.text_box = QLineEdit()
+        self.text_box.setPlaceholderText("Filtrar por mensagem ou path...")
+        self.text_box.setClearButtonEnabled(True)
+        self.count_label = QLabel()
+
+        self.text_timer = QTimer(self)
+        self.text_timer.setSingleShot(True)
+        self.text_timer.setInterval(TEXT_FILTER_DELAY_MS)
+        self.text_timer.timeout.connect(self.apply_filter)
+        self.text_box.textChanged.connect(self.text_timer.start)
+
+        # ---------- Tabela ----------
+        self.model = IssueTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setWordWrap(False)
+        self.table.setAlternatingRowColors(True)
+        # Altura e largura fixas: a tabela não mede o conteúdo de cada linha
+        vertical = self.table.verticalHeader()
+        vertical.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical.setDefaultSectionSize(self.table.fontMetrics().height() + 6)
+        vertical.setVisible(False)
+        horizontal = self.table.horizontalHeader()
+        horizontal.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        horizontal.setStretchLastSection(False)
+        for column, width in zip(range(len(COLUMNS)), (110, 190, 380, 300, 60)):
+            self.table.setColumnWidth(column, width)
+        self.table.doubleClicked.connect(self.on_double_clicked)
+
+        # ---------- Visualizador ----------
+        self.viewer = QPlainTextEdit()
+        self.viewer.setReadOnly(True)
+        self.viewer.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.viewer.setPlaceholderText("Dê dois cliques numa issue para ver a linha no arquivo.")
+
+        # ---------- Layout ----------
+        filter_row = QHBoxLayout()
+        filter_row.addWidget(QLabel("Nível:"))
+        filter_row.addWidget(self.level_box)
+        filter_row.addWidget(QLabel("Código:"))
+        filter_row.addWidget(self.code_box)
+        filter_row.addWidget(self.text_box, 1)
+        filter_row.addWidget(self.count_label)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.viewer)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 2)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(filter_row)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+    def set_issues(self, issues, file_path):
+        self.file_path = file_path
+        self.model.set_issues(issues)
+
+        # Preenche os filtros sem disparar um filtro para cada item
+        for box in (self.level_box, self.code_box):
+            box.blockSignals(True)
+            box.clear()
+            box.addItem(ALL, None)
+        level_counts = self.model.index_.level_counts()
+        for level in sorted(level_counts, key=lambda level: LEVEL_ORDER.get(level, 99)):
+            count = level_counts[level]
+            self.level_box.addItem(f"{level} ({count})", level)
+        for code, count in self.model.index_.code_counts().items():
+            self.code_box.addItem(f"{code} ({count})", code)
+        for box in (self.level_box, self.code_box):
+            box.blockSignals(False)
+        self.text_box.blockSignals(True)
+        self.text_box.clear()
+        self.text_box.blockSignals(False)
+
+        self.update_count()
+
+    def apply_filter(self):
+        self.text_timer.stop()
+        level = self.level_box.currentData()
+        code = self.code_box.currentData()
+        self.model.set_filter(
+            levels=None if level is None else [level],
+            codes=None if code is None else [code],
+            text=self.text_box.text(),
+        )
+        self.update_count()
+
+    def update_count(self):
+        visible = self.model.visible_count
+        total = len(self.model.index_)
+        self.count_label.setText(f"{visible} de {total}" if visible != total else f"{total} issues")
+
+    # ---------------------------------------------------------
+    # Ir para a linha
+    # ---------------------------------------------------------
+    def on_double_clicked(self, index):
+        issue = self.model.issue_at(index.row())
+        self.issue_activated.emit(issue)
+        line = issue.get("line")
+        if line is not None:
+            self.show_line(line, issue.get("column") or 1)
+
+    def load_viewer(self):
+        """Carrega o arquivo no visualizador (só no primeiro duplo clique depois de cada validação)."""
+        if self.file_path is None:
+            return False
+        if self._viewer_file != self.file_path:
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as file:
+                    self.viewer.setPlainText(file.read())
+            except OSError as e:
+                self.viewer.setPlainText(f"Não foi possível abrir o arquivo:\n{e}")
+                self._viewer_file = None
+                return False
+            self._viewer_file = self.file_path
+        return True
+
+    def invalidate_viewer(self):
+        """O arquivo mudou: recarrega no próximo duplo clique."""
+        self._viewer_file = None
+
+    def show_line(self, line, column=1):
+        if not self.load_viewer():
+            return
+        block = self.viewer.document().findBlockByNumber(line - 1)
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.MoveOperation.Right, QTextCursor.MoveMode.MoveAnchor, min(column - 1, block.length() - 1))
+        self.viewer.setTextCursor(cursor)
+        self.viewer.centerCursor()
+
+        highlight = QTextEdit.ExtraSelection()
+        highlight.format.setBackground(QColor("#fff3c4"))
+        highlight.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
+        highlight.cursor = QTextCursor(block)
+        self.viewer.setExtraSelections([highlight])
@@ -0,0 +1,1223 @@
+"""
+Revalidação incremental de um arquivo (usada pelo --watch e pela GUI).
+
+O IncrementalValidator guarda o resultado da última validação de cada nó.
+Quando o arquivo muda, compara o texto novo com o anterior (prefixo e sufixo
+iguais) e só decodifica e checa de novo os nós que ficam no trecho alterado;
+os outros só têm a posição no arquivo deslocada.
+
+As checagens de grafo (órfãos, fluxo das flags, loops) só rodam de novo
+quando algum nó mudou de id ou de conexões/flags. Editar um texto ou um
+speaker, por exemplo, não refaz a DFS. Quando só as conexões mudaram (mesmos
+ids e flags), as arestas dos nós alterados são trocadas no grafo compilado e
+no invertido, e o alcance a partir do start é atualizado: aresta nova só
+expande a busca; ela só é refeita quando some uma aresta de um nó alcançável.
+
+Mudanças fora de "nodes" (start, flags...) fazem uma leitura completa, mas
+ainda aproveitam a checagem dos nós cujo texto não mudou.
+
+O DialogueValidator é a versão para editores: em vez do texto, recebe o
+documento já decodificado e depois patches de nó (add/update/remove),
+devolvendo só as issues que entraram e saíram.
+"""
+import json
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict, namedtuple
+from itertools import compress
+
+from compiled_graph import CompiledGraph, is_external_target
+from dialogue_validator import (
+    PROGRESS_INTERVAL,
+    ValidationState,
+    add_issue,
+    check_dead_ends,
+    check_declared_flags,
+    check_gated_choices,
+    check_graph,
+    check_node,
+    node_id_from_path,
+    resolve_pending,
+    validate_dialogue,
+)
+from json_positions import parent_path, parse_with_spans
+from line_mapping import attach_positions
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+# Só o necessário para o resolve_pending de um nó isolado
+_NodeLookup = namedtuple("_NodeLookup", "index node_ids")
+
+
+class _ScanError(Exception):
+    """Texto fora do formato esperado; o erro de verdade sai do json.loads."""
+
+
+def _skip(text, pos):
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _next_key(text, pos, first):
+    """
+    A partir do fim do membro anterior, acha a próxima chave do objeto.
+    Retorna (posição, fechou); com fechou=True a posição é a do "}".
+    """
+    pos = _skip(text, pos)
+    char = text[pos:pos + 1]
+    if char == "}":
+        return pos, True
+    if not first:
+        if char != ",":
+            raise _ScanError()
+        pos = _skip(text, pos + 1)
+    if text[pos:pos + 1] != '"':
+        raise _ScanError()
+    return pos, False
+
+
+def _read_key(text, key_start):
+    """Lê "chave": e retorna (chave, início_do_valor)."""
+    key, pos = _DECODER.raw_decode(text, key_start)
+    pos = _skip(text, pos)
+    if text[pos:pos + 1] != ":":
+        raise _ScanError()
+    return key, _skip(text, pos + 1)
+
+
+def _common_prefix(a, b):
+    """Tamanho do prefixo comum (busca binária comparando fatias, em C)."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a, b, limit):
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class _NodeRecorder:
+    """
+    Faz o papel do GraphBuilder no check_node de um nó isolado: só anota as
+    chamadas (com nomes de flag no lugar dos bits). Depois elas viram as
+    arestas do nó no grafo atual (_resolve_edges).
+    """
+
+    def __init__(self):
+        self.index = {}   # vazio: todo destino fica pendente
+        self.calls = []
+
+    def flag_mask(self, flags):
+        return tuple(flags)
+
+    def add_target(self, source, target_id, required=()):
+        self.calls.append(("target", target_id, required))
+
+    def add_gated_choice(self, source, choice_path, required):
+        if required:
+            self.calls.append(("gated", choice_path, required))
+
+    def add_set_flags(self, source, flags):
+        self.calls.append(("set", None, flags))
+
+    def mark_exit(self, node):
+        self.calls.append(("exit", None, ()))
+
+
+class _NodeEntry:
+    """Um nó (ou um campo da raiz) e onde ele está no texto atual."""
+
+    __slots__ = (
+        "key", "key_start", "value_start", "value_end", "text", "value",
+        "issues", "targets", "flags", "requires", "sets", "calls",
+        "edges", "resolved", "spans",
+    )
+
+    def __init__(self, key, key_start=0, value_start=0, value_end=0, text=None):
+        self.key = key
+        self.key_start = key_start
+        self.value_start = value_start
+        self.value_end = value_end
+        self.text = text
+        self.value = None      # valor decodificado (só nos campos da raiz)
+        self.edges = None      # destinos que existem + bitmasks, refeitos quando o índice muda
+        self.resolved = None   # issues de destino/flag, idem
+        self.spans = None      # parse_with_spans do trecho, só quando precisa
+
+    def check(self, node_data):
+        """Checagens locais do nó (o que não depende dos outros nós)."""
+        recorder = _NodeRecorder()
+        state = ValidationState(recorder, [], complete=False)
+        check_node(state, 0, self.key, node_data)
+
+        self.issues = state.issues
+        self.targets = state.pending_targets
+        self.flags = state.pending_flags
+        self.requires = state.requires_flags_used
+        self.sets = state.set_flags_used
+        self.calls = recorder.calls
+
+    def reuse(self, other):
+        """Mesmo texto de antes: aproveita a checagem do outro entry."""
+        self.issues = other.issues
+        self.targets = other.targets
+        self.flags = other.flags
+        self.requires = other.requires
+        self.sets = other.sets
+        self.calls = other.calls
+        self.edges = other.edges
+        self.resolved = other.resolved
+        self.spans = other.spans
+
+    def shift(self, delta):
+        self.key_start += delta
+        self.value_start += delta
+        self.value_end += delta
+
+
+def _flag_table(entries):
+    """Bits das flags na ordem em que aparecem no documento, como no GraphBuilder."""
+    flag_names = []
+    flag_bits = {}
+    for entry in entries:
+        for _, _, flags in entry.calls:
+            for flag in flags:
+                if flag not in flag_bits:
+                    flag_bits[flag] = len(flag_names)
+                    flag_names.append(flag)
+    return flag_names, flag_bits
+
+
+def _resolve_edges(entry, node_index, flag_bits):
+    """
+    Chamadas anotadas do nó -> (destinos, requires, set_mask, saída, choices com requires),
+    com as mesmas regras do GraphBuilder.add_target. Os destinos ficam como
+    ids (o índice de cada nó muda quando entra ou sai um nó antes dele).
+    """
+    targets = []
+    requires = []
+    set_mask = 0
+    is_exit = 0
+    gated = []
+
+    for kind, arg, flags in entry.calls:
+        mask = 0
+        for flag in flags:
+            mask |= 1 << flag_bits[flag]
+
+        if kind == "target":
+            if arg in node_index:
+                targets.append(arg)
+                requires.append(mask)
+            elif is_external_target(arg):
+                is_exit = 1
+        elif kind == "gated":
+            gated.append((arg, mask))
+        elif kind == "set":
+            set_mask |= mask
+        else:
+            is_exit = 1
+
+    entry.edges = (targets, requires, set_mask, is_exit, gated)
+
+
+def _call_flags(entry):
+    """Flags das conexões do nó, na ordem (a tabela de bits depende dela)."""
+    return [flag for _, _, flags in entry.calls for flag in flags]
+
+
+def _shift(offsets, start, delta):
+    """Soma delta em offsets[start:] (o trecho de um nó cresceu ou encolheu)."""
+    if delta:
+        offsets[start:] = array("i", map(delta.__add__, offsets[start:]))
+
+
+def _set_sources(offsets, targets, node, source, count):
+    """No grafo invertido, deixa 'count' arestas de source chegando em node (fontes em ordem crescente)."""
+    start, end = offsets[node], offsets[node + 1]
+    sources = [other for other in targets[start:end] if other != source]
+    at = bisect_left(sources, source)
+    sources[at:at] = [source] * count
+    targets[start:end] = array("i", sources)
+    _shift(offsets, node + 1, len(sources) - (end - start))
+
+
+def _compile_entries(entries, node_index, flag_names, flag_bits):
+    """CompiledGraph dos entries, na ordem deles (só resolve as arestas que faltam)."""
+    gated = []
+    for index, entry in enumerate(entries):
+        if entry.edges is None:
+            _resolve_edges(entry, node_index, flag_bits)
+        for choice_path, required in entry.edges[4]:
+            gated.append((index, choice_path, required))
+
+    return CompiledGraph.from_node_edges(
+        [entry.key for entry in entries],
+        node_index,
+        [map(node_index.__getitem__, entry.edges[0]) for entry in entries],
+        [entry.edges[1] for entry in entries],
+        [entry.edges[2] for entry in entries],
+        flag_names,
+        gated,
+        bytearray(entry.edges[3] for entry in entries),
+    )
+
+
+def _patch_edges(graph, reverse, changed, entries, node_index, flag_names, flag_bits):
+    """
+    Troca as arestas dos nós de changed = [(índice, entry)] no CSR e no grafo
+    invertido, sem remontar o resto (mesmos ids nos mesmos índices, mesma
+    tabela de flags). Índices a partir de graph.node_count são nós novos,
+    acrescentados no fim. Retorna (grafo, invertido, [(índice, destinos
+    antigos, destinos novos)]).
+    """
+    offsets = array("i", graph.offsets)
+    targets = array("i", graph.targets)
+    edge_requires = list(graph.edge_requires)
+    set_masks = list(graph.set_masks)
+    exits = bytearray(graph.exits)
+    reverse_offsets = array("i", reverse.offsets)
+    reverse_targets = array("i", reverse.targets)
+
+    node_ids = graph.node_ids
+    if len(entries) > len(node_ids):
+        added = len(entries) - len(node_ids)
+        node_ids = node_ids + [entry.key for entry in entries[len(node_ids):]]
+        offsets.extend([offsets[-1]] * added)
+        reverse_offsets.extend([reverse_offsets[-1]] * added)
+        set_masks.extend([0] * added)
+        exits.extend(bytes(added))
+
+    edits = []
+    for index, entry in changed:
+        if entry.edges is None:
+            _resolve_edges(entry, node_index, flag_bits)
+        node_targets, node_requires, set_mask, is_exit, _ = entry.edges
+
+        start, end = offsets[index], offsets[index + 1]
+        old_targets = set(targets[start:end])
+        new_targets = array("i", map(node_index.__getitem__, node_targets))
+        targets[start:end] = new_targets
+        edge_requires[start:end] = node_requires
+        _shift(offsets, index + 1, len(new_targets) - (end - start))
+        set_masks[index] = set_mask
+        exits[index] = is_exit
+
+        for target in old_targets | set(new_targets):
+            _set_sources(reverse_offsets, reverse_targets, target, index, new_targets.count(target))
+        edits.append((index, old_targets, new_targets))
+
+    for entry in entries:
+        if entry.edges is None:
+            _resolve_edges(entry, node_index, flag_bits)
+    gated = [
+        (index, choice_path, required)
+        for index, entry in enumerate(entries)
+        for choice_path, required in entry.edges[4]
+    ]
+
+    graph = CompiledGraph(
+        node_ids, node_index, offsets, targets, edge_requires, set_masks, flag_names, gated, exits,
+    )
+    reverse = CompiledGraph(
+        node_ids, node_index, reverse_offsets, reverse_targets,
+        [0] * len(reverse_targets), [0] * len(set_masks), flag_names, [], exits,
+    )
+    return graph, reverse, edits
+
+
+def _resolve_issues(entry, node_index, declared_flags):
+    """Issues de destino/flag do nó (TARGET_NOT_FOUND, FLAG_NOT_DECLARED...), com cache no entry."""
+    if not entry.targets and not entry.flags:
+        return []
+    if entry.resolved is None or entry.resolved[0] != declared_flags:
+        state = ValidationState(_NodeLookup(node_index, (entry.key,)), [], declared_flags)
+        state.pending_targets = list(entry.targets)
+        state.pending_flags = list(entry.flags)
+        resolve_pending(state)
+        entry.resolved = (declared_flags, state.issues)
+    return entry.resolved[1]
+
+
+class IncrementalValidator:
+    """
+    Valida sempre o mesmo arquivo, reaproveitando o resultado anterior.
+    validate_text retorna as issues já com line/column, como o validate_dialogue
+    com spans. Pode ser chamado de mais de uma thread (uma validação por vez).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.text = None
+        self.root_start = 0
+        self.fields = {}        # campo da raiz -> _NodeEntry
+        self.nodes_open = None  # posição logo depois do "{" de nodes
+        self.nodes_close = None  # posição do "}" de nodes
+        self.entries = []
+        self.node_index = {}
+        self.flag_bits = {}
+        self.flag_names = []
+        self.graph = None
+        self.reverse = None     # self.graph com as arestas invertidas
+        self.reachable = None   # bytearray: alcançáveis a partir do start (None sem start válido)
+        self.graph_issues = []
+        self.issues = []
+
+    # ---------------------------------------------------------
+    # Entrada
+    # ---------------------------------------------------------
+    def validate_file(self, file_path):
+        """Mesmo formato do dialogue_validator.validate_file: {"file", "issues", "error"}."""
+        result = {"file": str(file_path), "issues": [], "error": None}
+
+        try:
+            with open(file_path, "r", encoding="utf-8") as file:
+                text = file.read()
+            result["issues"] = self.validate_text(text)
+        except FileNotFoundError:
+            self.reset()
+            result["error"] = f"Arquivo não encontrado: {file_path}"
+        except json.JSONDecodeError as e:
+            result["error"] = f"JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}"
+        except (OSError, UnicodeDecodeError) as e:
+            self.reset()
+            result["error"] = f"Erro ao abrir o arquivo: {e}"
+        return result
+
+    def validate_text(self, text, progress=None):
+        """
+        Valida o texto e retorna as issues (cópias, com line/column).
+        Erros de sintaxe levantam json.JSONDecodeError e mantêm o estado
+        anterior. progress(feitos, total) funciona como no validate_dialogue.
+        """
+        with self.lock:
+            if text == self.text:
+                return [dict(issue) for issue in self.issues]
+
+            try:
+                done = self.text is not None and self._update(text)
+                if not done:
+                    done = self._scan(text, progress)
+                syntax_error = False
+            except (_ScanError, json.JSONDecodeError):
+                done = syntax_error = True
+
+            if syntax_error:
+                # Deixa o json apontar o erro com a mensagem de sempre
+                json.loads(text)
+                done = False
+
+            if not done:
+                # Documento fora do caso comum (raiz ou nodes não são objeto,
+                # ids repetidos...): validação completa, sem cache
+                data = json.loads(text)
+                self.reset()
+                self.issues = attach_positions(validate_dialogue(data, progress=progress), text)
+                return [dict(issue) for issue in self.issues]
+
+            self.issues = self._collect()
+            return [dict(issue) for issue in self.issues]
+
+    # ---------------------------------------------------------
+    # Leitura completa
+    # ---------------------------------------------------------
+    def _scan(self, text, progress=None):
+        """Lê o documento inteiro. Retorna False se precisar da validação completa."""
+        pos = _skip(text, 0)
+        if text[pos:pos + 1] != "{":
+            return False
+        root_start = pos
+
+        fields = {}
+        entries = []
+        nodes_open = nodes_close = None
+
+        # Checagens antigas por id, para reaproveitar nós que não mudaram
+        previous = {entry.key: entry for entry in self.entries}
+
+        pos, closed = _next_key(text, pos + 1, True)
+        while not closed:
+            key, value_start = _read_key(text, pos)
+            if key in fields:
+                return False
+
+            if key == "nodes" and text[value_start:value_start + 1] == "{":
+                nodes_open = value_start + 1
+
+                node_pos, node_closed = _next_key(text, nodes_open, True)
+                while not node_closed:
+                    entry, node_data = self._read_node(text, node_pos)
+                    old = previous.get(entry.key)
+                    if old is not None and old.text == entry.text:
+                        entry.reuse(old)
+                    else:
+                        entry.check(node_data)
+                    entries.append(entry)
+
+                    if progress is not None and len(entries) % PROGRESS_INTERVAL == 0:
+                        progress(entry.value_end, len(text))
+                    node_pos, node_closed = _next_key(text, entry.value_end, False)
+
+                nodes_close = node_pos
+                value_end = node_pos + 1
+                fields[key] = _NodeEntry(key, pos, value_start, value_end, None)
+            else:
+                value, value_end = _DECODER.raw_decode(text, value_start)
+                fields[key] = _NodeEntry(key, pos, value_start, value_end, text[value_start:value_end])
+                fields[key].value = value
+
+            pos, closed = _next_key(text, value_end, False)
+
+        if _skip(text, pos + 1) != len(text):
+            raise _ScanError()
+
+        if nodes_open is None or not entries:
+            return False
+
+        node_index = {entry.key: i for i, entry in enumerate(entries)}
+        if len(node_index) != len(entries):
+            return False
+
+        self._forget_targets(entries, set(node_index).symmetric_difference(self.node_index))
+
+        self.text = text
+        self.root_start = root_start
+        self.fields = fields
+        self.nodes_open = nodes_open
+        self.nodes_close = nodes_close
+        self.entries = entries
+        self.node_index = node_index
+        self._rebuild_graph()
+        return True
+
+    @staticmethod
+    def _read_node(text, key_start):
+        node_id, value_start = _read_key(text, key_start)
+        node_data, value_end = _DECODER.raw_decode(text, value_start)
+        entry = _NodeEntry(node_id, key_start, value_start, value_end, text[value_start:value_end])
+        return entry, node_data
+
+    # ---------------------------------------------------------
+    # Atualização incremental
+    # ---------------------------------------------------------
+    def _update(self, text):
+        """
+        Relê só o trecho alterado dentro de "nodes".
+        Retorna False se a mudança pegou outras partes (aí faz a leitura completa).
+        """
+        old_text = self.text
+        prefix = _common_prefix(old_text, text)
+        suffix = _common_suffix(old_text, text, min(len(old_text), len(text)) - prefix)
+        old_change_end = len(old_text) - suffix
+        new_change_end = len(text) - suffix
+        delta = len(text) - len(old_text)
+
+        if prefix < self.nodes_open or old_change_end > self.nodes_close:
+            return False
+
+        entries = self.entries
+        value_ends = [entry.value_end for entry in entries]
+
+        # Nós inteiros antes da mudança continuam iguais, no mesmo lugar
+        first = bisect_right(value_ends, prefix)
+        pos = entries[first - 1].value_end if first else self.nodes_open
+
+        scanned = []
+        resume = None   # índice do primeiro nó antigo reaproveitado depois do trecho
+        while True:
+            pos, closed = _next_key(text, pos, not first and not scanned)
+            if closed:
+                if pos < new_change_end or pos - delta != self.nodes_close:
+                    return False
+                resume = len(entries)
+                break
+
+            entry, node_data = self._read_node(text, pos)
+            scanned.append((entry, node_data))
+            pos = entry.value_end
+
+            # Já passou do trecho alterado e caiu no fim de um nó antigo: o resto é igual
+            if pos >= new_change_end:
+                old_end = pos - delta
+                j = bisect_left(value_ends, old_end)
+                if j < len(entries) and value_ends[j] == old_end:
+                    resume = j + 1
+                    break
+
+        replaced = entries[first:resume]
+        previous = {entry.key: entry for entry in replaced}
+        new_entries = []
+        for entry, node_data in scanned:
+            old = previous.get(entry.key)
+            if old is not None and old.text == entry.text:
+                entry.reuse(old)
+            else:
+                entry.check(node_data)
+            new_entries.append(entry)
+
+        tail = entries[resume:]
+        for entry in tail:
+            entry.shift(delta)
+        # Campos da raiz depois de "nodes" também andam
+        for field in self.fields.values():
+            if field.key_start > self.nodes_close:
+                field.shift(delta)
+        self.fields["nodes"].value_end += delta
+
+        ids_changed = [entry.key for entry in replaced] != [entry.key for entry, _ in scanned]
+        graph_changed = ids_changed or any(
+            old.calls != new.calls for old, new in zip(replaced, new_entries)
+        )
+
+        changed = [
+            (first + offset, new) for offset, (old, new) in enumerate(zip(replaced, new_entries))
+            if old.calls != new.calls
+        ]
+        same_flags = all(
+            _call_flags(old) == _call_flags(new) for old, new in zip(replaced, new_entries)
+        )
+
+        entries = entries[:first] + new_entries + tail
+        if ids_changed:
+            node_index = {entry.key: i for i, entry in enumerate(entries)}
+            if len(node_index) != len(entries):
+                return False
+            self.node_index = node_index
+            changed_ids = {entry.key for entry in replaced}.symmetric_difference(
+                entry.key for entry, _ in scanned
+            )
+            self._forget_targets(entries, changed_ids)
+
+        self.text = text
+        self.nodes_close += delta
+        self.entries = entries
+        if graph_changed:
+            if ids_changed or not same_flags or not self._patch_graph(changed):
+                self._rebuild_graph()
+        return True
+
+    # ---------------------------------------------------------
+    # Grafo e issues
+    # ---------------------------------------------------------
+    def _start(self):
+        field = self.fields.get("start")
+        return field.value if field is not None else None
+
+    @staticmethod
+    def _forget_targets(entries, changed_ids):
+        """Nós que apontam para ids que surgiram/sumiram precisam resolver os destinos de novo."""
+        if not changed_ids:
+            return
+        for entry in entries:
+            if any(target in changed_ids for _, _, target in entry.targets):
+                entry.edges = None
+                entry.resolved = None
+
+    def _rebuild_graph(self):
+        """Monta o CompiledGraph com as arestas de cada nó e roda as checagens de grafo."""
+        flag_names, flag_bits = _flag_table(self.entries)
+        if flag_names != self.flag_names:
+            self.flag_names = flag_names
+            self.flag_bits = flag_bits
+            for entry in self.entries:
+                entry.edges = None
+
+        self.graph = _compile_entries(self.entries, self.node_index, self.flag_names, self.flag_bits)
+        self.reverse = self.graph.reversed()
+        start_index = self._start_index()
+        self.reachable = self.graph.reachable_from([start_index]) if start_index is not None else None
+        self._check_graph()
+
+    def _start_index(self):
+        start = self._start()
+        return self.node_index.get(start) if isinstance(start, str) else None
+
+    def _check_graph(self):
+        state = ValidationState(None, [])
+        for entry in self.entries:
+            state.requires_flags_used |= entry.requires
+            state.set_flags_used |= entry.sets
+        check_graph(state, self.graph, self._start(), reachable=self.reachable, reverse=self.reverse)
+        self.graph_issues = state.issues
+
+    def _patch_graph(self, changed):
+        """
+        Só as conexões de alguns nós mudaram (mesmos ids, mesmas flags):
+        changed = [(índice, entry novo)]. Troca as arestas deles no grafo
+        (_patch_edges), atualiza o alcance e roda as checagens de grafo.
+        Retorna False se não tem grafo para atualizar (aí remonta tudo).
+        """
+        if self.graph is None or self.reverse is None:
+            return False
+
+        self.graph, self.reverse, edits = _patch_edges(
+            self.graph, self.reverse, changed, self.entries, self.node_index, self.flag_names, self.flag_bits
+        )
+
+        reachable = self.reachable
+        if reachable is not None:
+            lost_edge = False   # algum nó alcançável perdeu um destino
+            new_roots = []      # destinos novos de nós alcançáveis
+            for index, old_targets, new_targets in edits:
+                if reachable[index]:
+                    lost_edge = lost_edge or bool(old_targets.difference(new_targets))
+                    new_roots.extend(new_targets)
+            if lost_edge:
+                # Pode ter sido o único caminho até algum nó: busca de novo
+                self.reachable = self.graph.reachable_from([self._start_index()])
+            elif new_roots:
+                self.graph.reachable_from(new_roots, reachable)
+        self._check_graph()
+        return True
+
+    def _collect(self):
+        """Junta as issues (raiz, nós, grafo) na ordem do validate_dialogue e acha as linhas."""
+        issues = []
+
+        start = self._start()
+        if not isinstance(start, str) or not start.strip():
+            add_issue(issues, "ERROR", "MISSING_START", "Campo 'start' ausente ou inválido.", "$.start")
+
+        flags_field = self.fields.get("flags")
+        declared_flags = check_declared_flags(flags_field.value if flags_field else [], issues)
+
+        if isinstance(start, str) and start not in self.node_index:
+            add_issue(issues, "ERROR", "START_NOT_FOUND", f"O nó inicial '{start}' não existe.", "$.start")
+
+        for entry in self.entries:
+            issues.extend(entry.issues)
+            issues.extend(_resolve_issues(entry, self.node_index, declared_flags))
+
+        issues.extend(self.graph_issues)
+        return self._attach_positions(issues)
+
+    def _attach_positions(self, issues):
+        text = self.text
+        located = []
+        for issue in issues:
+            entry, base, span = self._locate(issue["path"])
+            located.append((issue, base, span))
+
+        # Linha de cada offset numa passada só pelo texto
+        line_of = {}
+        line = 1
+        last = 0
+        for offset in sorted({base for _, base, _ in located}):
+            line += text.count("\n", last, offset)
+            last = offset
+            line_of[offset] = (line, offset - text.rfind("\n", 0, offset))
+
+        positioned = []
+        for issue, base, span in located:
+            line, column = line_of[base]
+            if span is not None:
+                if span.line == 1:
+                    column += span.column - 1
+                else:
+                    column = span.column
+                line += span.line - 1
+            positioned.append(dict(issue, line=line, column=column))
+        return positioned
+
+    def _locate(self, path):
+        """
+        (entry, offset_base, span_relativo) de um path.
+        Sem span, a posição é a do offset_base (chave do campo/nó).
+        """
+        node_id = node_id_from_path(path, self.node_index)
+        if node_id is not None:
+            entry = self.entries[self.node_index[node_id]]
+            base_path = f"$.nodes.{node_id}"
+        else:
+            key = path[2:].split(".", 1)[0].split("[", 1)[0] if path.startswith("$.") else None
+            entry = self.fields.get(key)
+            if entry is None:
+                return None, self.root_start, None
+            base_path = f"$.{key}"
+
+        if path == base_path or entry.text is None:
+            return entry, entry.key_start, None
+
+        if entry.spans is None:
+            entry.spans = parse_with_spans(entry.text)[1]
+
+        relative = "$" + path[len(base_path):]
+        while relative != "$" and relative not in entry.spans:
+            relative = parent_path(relative)
+        if relative == "$":
+            return entry, entry.key_start, None
+
+        path_span = entry.spans[relative]
+        return entry, entry.value_start, path_span.key or path_span.value
+
+
+# ============================================================
+# Sessão de validação para editores (patches de nó)
+# ============================================================
+
+IssueDelta = namedtuple("IssueDelta", "added removed")
+
+
+def issue_key(issue):
+    return (issue["level"], issue["code"], issue["message"], issue["path"])
+
+
+def issue_delta(before, after):
+    """Issues que entraram e saíram (comparando como multiconjunto)."""
+    before_count = Counter(map(issue_key, before))
+    after_count = Counter(map(issue_key, after))
+    added = []
+    removed = []
+    for issue in after:
+        key = issue_key(issue)
+        if before_count[key] > 0:
+            before_count[key] -= 1
+        else:
+            added.append(issue)
+    for issue in before:
+        key = issue_key(issue)
+        if after_count[key] > 0:
+            after_count[key] -= 1
+        else:
+            removed.append(issue)
+    return IssueDelta(added, removed)
+
+
+def _changed_issues(before, after):
+    """
+    issue_delta de duas listas que costumam ser quase iguais e na mesma ordem
+    (as issues de grafo antes e depois de um patch): o começo e o fim iguais
+    ficam de fora e só o meio é comparado.
+    """
+    limit = min(len(before), len(after))
+    prefix = 0
+    while prefix < limit and before[prefix] == after[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and before[-1 - suffix] == after[-1 - suffix]:
+        suffix += 1
+    return issue_delta(before[prefix:len(before) - suffix], after[prefix:len(after) - suffix])
+
+
+class DialogueValidator:
+    """
+    Sessão de validação: recebe o documento uma vez e depois patches de nó
+    (add_node, update_node, remove_node). Cada patch retorna um IssueDelta
+    com as issues que apareceram e as que sumiram; issues() dá a lista
+    completa, igual à do validate_dialogue (sem line/column).
+
+    - Cada nó guarda as próprias issues; o patch só checa de novo o nó
+      alterado e, quando um id surge ou some, os nós que apontam para ele
+    - Flags requeridas e setadas têm contagem de referências, então
+      FLAG_REQUIRED_NEVER_SET sai direto dos contadores
+    - O conjunto de nós alcançáveis é atualizado pelo patch: aresta nova só
+      expande a busca a partir do destino; a busca a partir do start só é
+      refeita quando some uma aresta entre dois nós alcançáveis
+    - O CompiledGraph (e o invertido) é mantido entre os patches: quem muda
+      as conexões de um nó ou acrescenta um nó só troca as arestas dele (e
+      dos nós que apontavam para o id novo), como o _patch_graph do
+      IncrementalValidator. Remover um nó ou mudar a tabela de flags remonta
+    - Fluxo das flags e loops sem saída rodam de novo só quando o patch mexe
+      nas conexões/flags de um nó alcançável (editar texto não refaz nada disso),
+      e só as issues de grafo que mudaram de lugar na lista são comparadas
+    """
+
+    def __init__(self, data):
+        if not isinstance(data, dict):
+            raise TypeError("O JSON raiz precisa ser um objeto.")
+
+        self.start = data.get("start")
+        self.flags = data.get("flags", [])
+        self.flag_issues = []
+        self.declared_flags = check_declared_flags(self.flags, self.flag_issues)
+
+        self.entries = {}                    # id -> _NodeEntry, na ordem do documento
+        self.referrers = defaultdict(set)    # id de destino -> ids dos nós que apontam para ele
+        self.required_counts = Counter()     # flag -> nós com choice que a exige
+        self.set_counts = Counter()          # flag -> nós que a setam
+        self.exit_nodes = set()              # nós com "end: true" ou saída para outro arquivo
+        self.flag_names = []
+        self.flag_bits = {}
+        self.node_index = {}                 # id -> índice no grafo (ordem do documento)
+        self.graph = None                    # CompiledGraph atual (None = remontar)
+        self.reverse = None                  # self.graph com as arestas invertidas
+        self.reachable = set()
+        self.graph_issues = []               # fluxo das flags + loops sem saída
+
+        nodes = data.get("nodes")
+        if isinstance(nodes, dict):
+            for node_id, node_data in nodes.items():
+                entry = _NodeEntry(node_id)
+                entry.check(node_data)
+                self.entries[node_id] = entry
+        # Depois de ter todos os ids (saída para outro arquivo depende de o destino não ser nó daqui)
+        for entry in self.entries.values():
+            self._link(entry)
+
+        self.reachable = self._search()
+        self._check_graph()
+
+    # ---------------------------------------------------------
+    # Patches
+    # ---------------------------------------------------------
+    def add_node(self, node_id, node_data):
+        if node_id in self.entries:
+            raise ValueError(f"O nó '{node_id}' já existe.")
+        return self._patch(node_id, node_data)
+
+    def update_node(self, node_id, node_data):
+        if node_id not in self.entries:
+            raise KeyError(node_id)
+        return self._patch(node_id, node_data)
+
+    def remove_node(self, node_id):
+        if node_id not in self.entries:
+            raise KeyError(node_id)
+        return self._patch(node_id, None, remove=True)
+
+    def set_start(self, start):
+        """Troca o nó inicial (refaz tudo que depende do start)."""
+        before = self.issues()
+        self.start = start
+        self.reachable = self._search()
+        self._check_graph()
+        return issue_delta(before, self.issues())
+
+    def set_flags(self, flags):
+        """Troca a lista de flags declaradas (refaz os FLAG_NOT_DECLARED)."""
+        before = self.issues()
+        self.flags = flags
+        self.flag_issues = []
+        self.declared_flags = check_declared_flags(flags, self.flag_issues)
+        return issue_delta(before, self.issues())
+
+    # ---------------------------------------------------------
+    # Lista completa
+    # ---------------------------------------------------------
+    def issues(self):
+        """Todas as issues atuais, na ordem do validate_dialogue."""
+        issues = self._root_issues()
+        if not self.entries:
+            return issues
+
+        for entry in self.entries.values():
+            issues.extend(self._node_issues(entry))
+        if self._start_index_ok():
+            for node_id in self.entries:
+                if node_id not in self.reachable:
+                    issues.append(self._orphan_issue(node_id))
+        issues.extend(self._never_set_issues())
+        issues.extend(self.graph_issues)
+        return issues
+
+    def _start_index_ok(self):
+        return isinstance(self.start, str) and self.start in self.entries
+
+    def _root_issues(self):
+        issues = []
+        start = self.start
+        if not isinstance(start, str) or not start.strip():
+            add_issue(issues, "ERROR", "MISSING_START", "Campo 'start' ausente ou inválido.", "$.start")
+
+        if not self.entries:
+            add_issue(issues, "ERROR", "NODES_INVALID", "Campo 'nodes' ausente, vazio ou inválido.", "$.nodes")
+            return issues
+
+        issues.extend(self.flag_issues)
+        if isinstance(start, str) and start not in self.entries:
+            add_issue(issues, "ERROR", "START_NOT_FOUND", f"O nó inicial '{start}' não existe.", "$.start")
+        return issues
+
+    def _node_issues(self, entry):
+        return entry.issues + _resolve_issues(entry, self.entries, self.declared_flags)
+
+    def _orphan_issue(self, node_id):
+        issues = []
+        add_issue(
+            issues,
+            "WARNING",
+            "ORPHAN_NODE",
+            f"Nó órfão (não alcançável a partir de '{self.start}').",
+            f"$.nodes.{node_id}"
+        )
+        return issues[0]
+
+    def _never_set_issues(self):
+        issues = []
+        never_set = [flag for flag in self.required_counts if not self.set_counts[flag]]
+        for flag in sorted(never_set):
+            add_issue(
+                issues,
+                "WARNING",
+                "FLAG_REQUIRED_NEVER_SET",
+                f"A flag '{flag}' é requerida em uma choice, mas nunca é setada.",
+                "$.nodes"
+            )
+        return issues
+
+    # ---------------------------------------------------------
+    # Atualização
+    # ---------------------------------------------------------
+    def _patch(self, node_id, node_data, remove=False):
+        old = self.entries.get(node_id)
+        ids_changed = old is None or remove
+
+        # Casos que mexem no documento inteiro: o start surgindo/sumindo
+        # (liga/desliga todos os ORPHAN_NODE) e "nodes" ficando vazio ou deixando de ser
+        if ids_changed and (node_id == self.start or len(self.entries) <= 1):
+            before = self.issues()
+            self._apply(node_id, old, node_data, remove)
+            self.graph = None
+            self.reachable = self._search()
+            self._check_graph()
+            return issue_delta(before, self.issues())
+
+        # Quando o id surge ou some, quem aponta para ele troca TARGET_NOT_FOUND por aresta (ou o contrário)
+        sources = [source for source in self.referrers.get(node_id, ()) if source != node_id] if ids_changed else []
+
+        before = self._node_issues(old) if old is not None else []
+        for source in sources:
+            before.extend(self._node_issues(self.entries[source]))
+        before.extend(self._never_set_issues())
+        before_graph = self.graph_issues
+        had_exits = bool(self.exit_nodes)
+
+        new, flags_changed = self._apply(node_id, old, node_data, remove)
+
+        after = self._node_issues(new) if new is not None else []
+        for source in sources:
+            after.extend(self._node_issues(self.entries[source]))
+        after.extend(self._never_set_issues())
+
+        # Alcance e checagens de grafo só mudam se mudaram as conexões/flags do nó
+        flipped = set()
+        if ids_changed or old.calls != new.calls:
+            table_changed = self._sync_graph(node_id, old, new, sources, flags_changed)
+            was_reachable = node_id in self.reachable
+            flipped = self._update_reachable(node_id, old, new)
+            # Fora do alcance, o nó só conta para as flags usadas (e a ordem
+            # dos bits) e para "existe algum final no arquivo"
+            if (
+                was_reachable
+                or node_id in self.reachable
+                or flipped
+                or table_changed
+                or had_exits != bool(self.exit_nodes)
+            ):
+                self._check_graph()
+
+        # ORPHAN_NODE do próprio nó e dos que entraram/saíram do alcance
+        if self._start_index_ok():
+            for orphan_id in flipped | {node_id}:
+                reachable_now = orphan_id in self.reachable
+                existed = old is not None if orphan_id == node_id else orphan_id in self.entries
+                if existed and reachable_now == (orphan_id in flipped):
+                    before.append(self._orphan_issue(orphan_id))
+                if orphan_id in self.entries and not reachable_now:
+                    after.append(self._orphan_issue(orphan_id))
+
+        delta = issue_delta(before, after)
+        if self.graph_issues is not before_graph:
+            graph_delta = _changed_issues(before_graph, self.graph_issues)
+            delta = IssueDelta(delta.added + graph_delta.added, delta.removed + graph_delta.removed)
+        return delta
+
+    def _apply(self, node_id, old, node_data, remove):
+        """
+        Troca o entry do nó (e as contagens). Retorna (entry novo ou None se
+        removeu, se alguma flag passou a ser/deixou de ser usada).
+        """
+        flags_changed = False
+        if old is not None:
+            flags_changed = self._unlink(old)
+
+        if remove:
+            del self.entries[node_id]
+            entry = None
+        else:
+            entry = _NodeEntry(node_id)
+            entry.check(node_data)
+            if old is not None and old.calls == entry.calls:
+                # Mesmas conexões: as arestas já resolvidas continuam valendo
+                entry.edges = old.edges
+            self.entries[node_id] = entry
+            flags_changed = self._link(entry) or flags_changed
+
+        if old is None or remove:
+            for source in self.referrers.get(node_id, ()):
+                if source != node_id:
+                    source_entry = self.entries[source]
+                    source_entry.edges = None
+                    source_entry.resolved = None
+                    self._mark_exit(source_entry)
+        return entry, flags_changed
+
+    def _mark_exit(self, entry):
+        """Mesma regra do GraphBuilder: destino "arquivo.json#nó" que não é nó deste documento é saída."""
+        if any(
+            kind == "exit" or (kind == "target" and arg not in self.entries and is_external_target(arg))
+            for kind, arg, _ in entry.calls
+        ):
+            self.exit_nodes.add(entry.key)
+        else:
+            self.exit_nodes.discard(entry.key)
+
+    def _link(self, entry):
+        """Registra as referências do nó. Retorna True se apareceu flag nova."""
+        for _, _, target in entry.targets:
+            self.referrers[target].add(entry.key)
+        self._mark_exit(entry)
+
+        new_flag = False
+        for counts, flags in ((self.required_counts, entry.requires), (self.set_counts, entry.sets)):
+            for flag in flags:
+                new_flag = new_flag or not counts[flag]
+                counts[flag] += 1
+        return new_flag
+
+    def _unlink(self, entry):
+        """Desfaz o _link. Retorna True se alguma flag deixou de ser usada."""
+        for _, _, target in entry.targets:
+            sources = self.referrers[target]
+            sources.discard(entry.key)
+            if not sources:
+                del self.referrers[target]
+        self.exit_nodes.discard(entry.key)
+
+        flag_gone = False
+        for counts, flags in ((self.required_counts, entry.requires), (self.set_counts, entry.sets)):
+            for flag in flags:
+                counts[flag] -= 1
+                if not counts[flag]:
+                    del counts[flag]
+                    flag_gone = True
+        return flag_gone
+
+    # ---------------------------------------------------------
+    # Alcance e grafo
+    # ---------------------------------------------------------
+    def _search(self):
+        """Nós alcançáveis a partir do start (busca completa, no grafo compilado)."""
+        if not self._start_index_ok():
+            return set()
+        if self.graph is None:
+            self._compile()
+        found = self.graph.reachable_from([self.node_index[self.start]])
+        return set(compress(self.graph.node_ids, found))
+
+    def _expand(self, roots, reachable):
+        """DFS a partir de roots, marcando em reachable. Retorna os nós que entraram."""
+        entries = self.entries
+        added = set()
+        stack = [root for root in roots if root in entries and root not in reachable]
+        while stack:
+            current = stack.pop()
+            if current in reachable:
+                continue
+            reachable.add(current)
+            added.add(current)
+            for _, _, target in entries[current].targets:
+                if target in entries and target not in reachable:
+                    stack.append(target)
+        return added
+
+    def _update_reachable(self, node_id, old, new):
+        """Atualiza self.reachable depois do patch. Retorna os nós que entraram ou saíram."""
+        if not self._start_index_ok():
+            return set()
+
+        old_targets = {target for _, _, target in old.targets} if old is not None else set()
+        new_targets = {target for _, _, target in new.targets} if new is not None else set()
+
+        if node_id not in self.reachable:
+            # Nó novo que alguém alcançável já apontava (antes era TARGET_NOT_FOUND)
+            if old is None and any(source in self.reachable for source in self.referrers.get(node_id, ())):
+                return self._expand([node_id], self.reachable)
+            return set()
+
+        if new is None or any(target in self.reachable for target in old_targets - new_targets):
+            # Perdeu uma aresta para um nó alcançável: pode ter sido o único caminho
+            previous = self.reachable
+            self.reachable = self._search()
+            return previous ^ self.reachable
+
+        return self._expand(new_targets - old_targets, self.reachable)
+
+    def _sync_graph(self, node_id, old, new, sources, flags_changed):
+        """
+        Leva a mudança de conexões do nó para o grafo compilado: troca as
+        arestas dele (e dos nós em sources, que apontavam para o id que surgiu).
+        Nó removido ou tabela de flags diferente deixam o grafo para remontar.
+        Retorna True se a tabela de flags mudou.
+        """
+        table_changed = flags_changed or (
+            (_uses_flags(old) or _uses_flags(new))
+            and _flag_table(self.entries.values())[0] != self.flag_names
+        )
+        if self.graph is None:
+            return table_changed
+        if new is None or table_changed:
+            self.graph = self.reverse = None
+            return table_changed
+
+        if old is None:
+            self.node_index[node_id] = len(self.node_index)
+        changed = [(self.node_index[node_id], new)]
+        changed += [(self.node_index[source], self.entries[source]) for source in sources]
+        self.graph, self.reverse, _ = _patch_edges(
+            self.graph, self.reverse, changed, list(self.entries.values()),
+            self.node_index, self.flag_names, self.flag_bits,
+        )
+        return False
+
+    def _compile(self):
+        """Monta o CompiledGraph (e o invertido) dos nós atuais."""
+        entries = list(self.entries.values())
+        self.node_index = {entry.key: i for i, entry in enumerate(entries)}
+        flag_names, flag_bits = _flag_table(entries)
+        if flag_names != self.flag_names:
+            self.flag_names = flag_names
+            self.flag_bits = flag_bits
+            for entry in entries:
+                entry.edges = None
+
+        self.graph = _compile_entries(entries, self.node_index, self.flag_names, self.flag_bits)
+        self.reverse = self.graph.reversed()
+
+    def _check_graph(self):
+        """Fluxo das flags e loops sem saída sobre o CompiledGraph atual."""
+        self.graph_issues = []
+        if not self.entries or not self._start_index_ok():
+            return
+        if self.graph is None:
+            self._compile()
+
+        graph = self.graph
+        reachable = bytearray(map(self.reachable.__contains__, graph.node_ids))
+        start_index = self.node_index[self.start]
+
+        if self.required_counts:
+            check_gated_choices(graph, start_index, reachable, self.set_counts, self.graph_issues)
+        check_dead_ends(graph, reachable, self.graph_issues, self.reverse)
+
+
+def _uses_flags(entry):
+    return entry is not None and any(flags for _, _, flags in entry.calls)
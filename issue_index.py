@@ -0,0 +1,158 @@
+"""
+Índice das issues para a tabela da GUI (ordenar e filtrar sem refazer a lista).
+
+As linhas da tabela são só índices (array('i')) para a lista de issues:
+- by_level / by_code: índices de cada nível e de cada code, montados numa
+  passada (para as contagens dos filtros)
+- a ordem de cada coluna é calculada na primeira vez que ela é pedida e fica
+  guardada (ordem decrescente = a crescente de trás para frente), junto com
+  a mesma ordem separada por nível e por code: filtrar por um nível ou um
+  code devolve esse pedaço pronto, sem percorrer as outras issues. Vários
+  níveis/codes juntam os pedaços pela posição na ordem; só com os dois
+  filtros a lista menor é cruzada com o outro campo
+- o filtro de texto (mensagem e path) é a única coisa que olha issue por issue
+
+Nada aqui depende do Qt (o modelo fica em gui_issue_view.py).
+"""
+from array import array
+from itertools import chain
+
+
+LEVEL_ORDER = {"ERROR": 0, "WARNING": 1, "INFO": 2}
+
+# Colunas da tabela, na ordem em que aparecem
+COLUMNS = ("level", "code", "message", "path", "line")
+
+
+def _sort_key(column):
+    if column == "level":
+        return lambda issue: (LEVEL_ORDER.get(issue.get("level"), 99), issue.get("code") or "", issue.get("path") or "")
+    if column == "line":
+        # Sem linha vai para o fim
+        return lambda issue: (issue.get("line") is None, issue.get("line") or 0, issue.get("column") or 0)
+    return lambda issue: str(issue.get(column) or "")
+
+
+class IssueIndex:
+    def __init__(self, issues):
+        self.issues = issues
+        self.by_level = {}
+        self.by_code = {}
+        for i, issue in enumerate(issues):
+            self.by_level.setdefault(issue.get("level"), array("i")).append(i)
+            self.by_code.setdefault(issue.get("code"), array("i")).append(i)
+        self._orders = {}
+        self._ranks = {}
+        self._numbers = {}
+        self._group_orders = {}
+        self._search_text = None
+
+    def __len__(self):
+        return len(self.issues)
+
+    def level_counts(self):
+        return {level: len(rows) for level, rows in self.by_level.items()}
+
+    def code_counts(self):
+        """{code: quantidade}, do code mais frequente para o menos."""
+        return dict(sorted(
+            ((code, len(rows)) for code, rows in self.by_code.items()),
+            key=lambda item: (-item[1], str(item[0])),
+        ))
+
+    def order(self, column, descending=False):
+        """Índices das issues ordenados pela coluna (calculado uma vez por coluna)."""
+        rows = self._orders.get(column)
+        if rows is None:
+            key = _sort_key(column)
+            issues = self.issues
+            rows = self._orders[column] = array("i", sorted(range(len(issues)), key=lambda i: key(issues[i])))
+        if descending:
+            rows = array("i", reversed(rows))
+        return rows
+
+    def _rank(self, column):
+        """Posição de cada issue na ordem crescente da coluna."""
+        rank = self._ranks.get(column)
+        if rank is None:
+            rank = self._ranks[column] = array("i", bytes(4 * len(self.issues)))
+            for position, i in enumerate(self.order(column)):
+                rank[i] = position
+        return rank
+
+    def _by_field(self, field):
+        return self.by_level if field == "level" else self.by_code
+
+    def _number_of(self, field):
+        """Número do grupo (posição no by_level/by_code) de cada issue, num array compacto."""
+        numbers = self._numbers.get(field)
+        if numbers is None:
+            numbers = self._numbers[field] = array("i", bytes(4 * len(self.issues)))
+            for number, rows in enumerate(self._by_field(field).values()):
+                for i in rows:
+                    numbers[i] = number
+        return numbers
+
+    def _groups(self, column, field):
+        """{nível ou code: índices do grupo na ordem crescente da coluna}, numa passada pela ordem."""
+        groups = self._group_orders.get((column, field))
+        if groups is None:
+            keys = self._by_field(field)
+            number_of = self._number_of(field)
+            parts = [array("i") for _ in keys]
+            for i in self.order(column):
+                parts[number_of[i]].append(i)
+            groups = self._group_orders[(column, field)] = dict(zip(keys, parts))
+        return groups
+
+    def _selected(self, column, field, selected):
+        """Índices dos grupos escolhidos, na ordem crescente da coluna."""
+        groups = self._groups(column, field)
+        parts = [groups[key] for key in set(selected) if key in groups]
+        if not parts:
+            return array("i")
+        if len(parts) == 1:
+            return parts[0]
+        # Cada pedaço já está em ordem: o sort só intercala
+        return array("i", sorted(chain.from_iterable(parts), key=self._rank(column).__getitem__))
+
+    def rows(self, column="level", descending=False, levels=None, codes=None, text=""):
+        """
+        Linhas visíveis: índices das issues, na ordem da coluna, só dos
+        níveis/codes pedidos (None = todos) e com o texto na mensagem ou no path.
+        """
+        text = text.strip().lower()
+        if levels is None and codes is None:
+            if not text:
+                return self.order(column, descending)
+            rows = self.order(column)
+        elif codes is None:
+            rows = self._selected(column, "level", levels)
+        elif levels is None:
+            rows = self._selected(column, "code", codes)
+        else:
+            by_level = self._selected(column, "level", levels)
+            by_code = self._selected(column, "code", codes)
+            # Percorre a lista menor e confere o campo do outro filtro
+            if len(by_level) <= len(by_code):
+                rows, field, selected = by_level, "code", codes
+            else:
+                rows, field, selected = by_code, "level", levels
+            numbers = {key: number for number, key in enumerate(self._by_field(field))}
+            wanted = {numbers[key] for key in selected if key in numbers}
+            number_of = self._number_of(field)
+            rows = array("i", (i for i in rows if number_of[i] in wanted))
+
+        if text:
+            search_text = self._search()
+            rows = array("i", (i for i in rows if text in search_text[i]))
+        if descending:
+            rows = array("i", reversed(rows))
+        return rows
+
+    def _search(self):
+        if self._search_text is None:
+            self._search_text = [
+                f"{issue.get('message') or ''}\n{issue.get('path') or ''}".lower() for issue in self.issues
+            ]
+        return self._search_text
@@ -0,0 +1,310 @@
+"""
+Índice de posições do JSON (Path -> linha/coluna).
+
+Lê o texto uma vez só, quebra em tokens e monta um dicionário com o path
+lógico de cada chave/valor (ex: $.nodes.room.choices[0].next), no mesmo
+formato de path usado pelo validador.
+"""
+import json
+import re
+from collections import namedtuple
+
+
+# string JSON | pontuação estrutural | número/true/false/null
+_TOKEN_RX = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\],:]|[^\s{}\[\],:"]+')
+
+
+def _decode_key(token):
+    """Tira as aspas da chave (só usa json quando tem escape)."""
+    if "\\" not in token:
+        return token[1:-1]
+    return json.loads(token)
+
+
+def build_position_index(text):
+    """
+    Percorre o texto JSON uma única vez e devolve {path: (linha, coluna)}.
+
+    - Membro de objeto: posição da chave ("room": ...)
+    - Item de lista: posição do próprio valor
+    - Raiz ($): posição do primeiro valor
+    Linha e coluna começam em 1.
+    """
+    index = {}
+
+    # Cada frame: [é_objeto, path_do_container, path_do_membro_atual, índice_da_lista, esperando_chave]
+    stack = []
+
+    line = 1
+    line_start = 0
+    last_pos = 0
+
+    for match in _TOKEN_RX.finditer(text):
+        pos = match.start()
+
+        # Atualiza linha/coluna só contando o trecho entre o último token e este
+        newlines = text.count("\n", last_pos, pos)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", last_pos, pos) + 1
+        last_pos = pos
+
+        token = match.group()
+        first = token[0]
+
+        if first == ":":
+            continue
+
+        if first == ",":
+            if stack:
+                frame = stack[-1]
+                if frame[0]:
+                    frame[4] = True
+                else:
+                    frame[3] += 1
+            continue
+
+        if first == "}" or first == "]":
+            if stack:
+                stack.pop()
+            continue
+
+        # Chave de objeto
+        if stack and stack[-1][0] and stack[-1][4]:
+            frame = stack[-1]
+            if first != '"':
+                # JSON quebrado: ignora o token
+                continue
+            member_path = f"{frame[1]}.{_decode_key(token)}"
+            index[member_path] = (line, pos - line_start + 1)
+            frame[2] = member_path
+            frame[4] = False
+            continue
+
+        # Valor (string, número, literal, objeto ou lista)
+        if not stack:
+            value_path = "$"
+            index[value_path] = (line, pos - line_start + 1)
+        elif stack[-1][0]:
+            value_path = stack[-1][2]
+        else:
+            value_path = f"{stack[-1][1]}[{stack[-1][3]}]"
+            index[value_path] = (line, pos - line_start + 1)
+
+        if first == "{":
+            stack.append([True, value_path, None, 0, True])
+        elif first == "[":
+            stack.append([False, value_path, None, 0, False])
+
+    return index
+
+
+def parent_path(path):
+    """$.nodes.room.choices[0] -> $.nodes.room.choices -> $.nodes.room -> ..."""
+    if path.endswith("]"):
+        cut = path.rfind("[")
+    else:
+        cut = path.rfind(".")
+    if cut <= 0:
+        return None
+    return path[:cut]
+
+
+def lookup_position(index, path):
+    """
+    Procura o path no índice. Se ele não existir no arquivo (ex: campo
+    ausente), sobe para o pai mais próximo que existir.
+    """
+    while path:
+        position = index.get(path)
+        if position is not None:
+            return position
+        path = parent_path(path)
+    return None
+
+
+# ============================================================
+# Loader com posições (dados + tabela de spans numa passada só)
+# ============================================================
+
+# Span de um trecho do arquivo. Linhas/colunas começam em 1 e end_column é exclusiva.
+Span = namedtuple("Span", "line column end_line end_column")
+
+# Para cada path: span da chave (None em itens de lista e na raiz) e span do valor
+PathSpan = namedtuple("PathSpan", "key value")
+
+_STRICT_TOKEN_RX = re.compile(r'"(?:[^"\\\x00-\x1f]|\\.)*"|[{}\[\],:]|[^\s{}\[\],:"]+|\S')
+_NUMBER_RX = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+_CONSTANTS = {
+    "true": True,
+    "false": False,
+    "null": None,
+    "NaN": float("nan"),
+    "Infinity": float("inf"),
+    "-Infinity": float("-inf"),
+}
+
+# Estados do parser
+_VALUE = 0           # esperando um valor
+_VALUE_OR_END = 1    # logo depois de "["
+_KEY_OR_END = 2      # logo depois de "{"
+_KEY = 3             # depois de "," dentro de objeto
+_COLON = 4           # depois da chave
+_COMMA_OR_END = 5    # depois de um valor dentro de container
+_DONE = 6            # valor raiz completo
+
+
+def _decode_scalar(token, text, pos):
+    first = token[0]
+    if first == '"':
+        if len(token) == 1:
+            raise json.JSONDecodeError("Unterminated string starting at", text, pos)
+        if "\\" not in token:
+            return token[1:-1]
+        return json.loads(token)
+    if token in _CONSTANTS:
+        return _CONSTANTS[token]
+    number = _NUMBER_RX.fullmatch(token)
+    if number is None:
+        raise json.JSONDecodeError("Expecting value", text, pos)
+    if number.group(1) or number.group(2):
+        return float(token)
+    return int(token)
+
+
+def _expecting_message(state):
+    """Mensagem de erro no mesmo padrão do módulo json."""
+    if state == _KEY or state == _KEY_OR_END:
+        return "Expecting property name enclosed in double quotes"
+    if state == _COLON:
+        return "Expecting ':' delimiter"
+    if state == _COMMA_OR_END:
+        return "Expecting ',' delimiter"
+    return "Expecting value"
+
+
+def parse_with_spans(text):
+    """
+    Faz o parse do JSON e monta a tabela de spans na mesma passada.
+
+    Retorna (data, spans), onde spans = {path: PathSpan(key, value)}.
+    Erros de sintaxe levantam json.JSONDecodeError, igual ao json.loads.
+    """
+    spans = {}
+
+    # Cada frame: [é_objeto, container, path, chave_atual, span_da_chave, linha_inicio, coluna_inicio]
+    stack = []
+    root = None
+    state = _VALUE
+
+    line = 1
+    line_start = 0
+    last_pos = 0
+
+    for match in _STRICT_TOKEN_RX.finditer(text):
+        pos = match.start()
+
+        newlines = text.count("\n", last_pos, pos)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", last_pos, pos) + 1
+        last_pos = pos
+
+        token = match.group()
+        first = token[0]
+        column = pos - line_start + 1
+
+        if state == _DONE:
+            raise json.JSONDecodeError("Extra data", text, pos)
+
+        # --- pontuação ---
+        if first == ",":
+            if state != _COMMA_OR_END:
+                raise json.JSONDecodeError("Expecting value", text, pos)
+            state = _KEY if stack[-1][0] else _VALUE
+            continue
+
+        if first == ":":
+            if state != _COLON:
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+            state = _VALUE
+            continue
+
+        if first == "}" or first == "]":
+            frame = stack[-1] if stack else None
+            closes_object = first == "}"
+            if frame is None or frame[0] != closes_object or state not in (
+                _COMMA_OR_END, _KEY_OR_END if closes_object else _VALUE_OR_END
+            ):
+                raise json.JSONDecodeError(_expecting_message(state), text, pos)
+
+            stack.pop()
+            value = frame[1]
+            value_path = frame[2]
+            key_span = stack[-1][4] if stack and stack[-1][0] else None
+            spans[value_path] = PathSpan(key_span, Span(frame[5], frame[6], line, column + 1))
+        else:
+            # --- chave de objeto ---
+            if state == _KEY or state == _KEY_OR_END:
+                if first != '"' or len(token) < 2 or token[-1] != '"':
+                    raise json.JSONDecodeError(
+                        "Expecting property name enclosed in double quotes", text, pos
+                    )
+                frame = stack[-1]
+                frame[3] = _decode_key(token)
+                frame[4] = Span(line, column, line, column + len(token))
+                state = _COLON
+                continue
+
+            if state == _COLON:
+                raise json.JSONDecodeError("Expecting ':' delimiter", text, pos)
+            if state == _COMMA_OR_END:
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+
+            # --- início de valor ---
+            if not stack:
+                value_path = "$"
+            elif stack[-1][0]:
+                value_path = f"{stack[-1][2]}.{stack[-1][3]}"
+            else:
+                value_path = f"{stack[-1][2]}[{len(stack[-1][1])}]"
+
+            if first == "{":
+                stack.append([True, {}, value_path, None, None, line, column])
+                state = _KEY_OR_END
+                continue
+            if first == "[":
+                stack.append([False, [], value_path, None, None, line, column])
+                state = _VALUE_OR_END
+                continue
+
+            value = _decode_scalar(token, text, pos)
+            key_span = stack[-1][4] if stack and stack[-1][0] else None
+            spans[value_path] = PathSpan(key_span, Span(line, column, line, column + len(token)))
+
+        # --- guarda o valor pronto no container pai ---
+        if not stack:
+            root = value
+            state = _DONE
+        else:
+            parent = stack[-1]
+            if parent[0]:
+                parent[1][parent[3]] = value
+            else:
+                parent[1].append(value)
+            state = _COMMA_OR_END
+
+    if state != _DONE:
+        raise json.JSONDecodeError(_expecting_message(state), text, len(text))
+
+    return root, spans
+
+
+def lookup_span(spans, path):
+    """Igual ao lookup_position, mas na tabela de spans."""
+    while path:
+        span = spans.get(path)
+        if span is not None:
+            return span
+        path = parent_path(path)
+    return None
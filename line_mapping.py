@@ -0,0 +1,272 @@
+"""
+Linha/coluna das issues (attach_line_numbers_to_issues) sem indexar o
+arquivo inteiro.
+
+O build_position_index percorre todos os tokens do arquivo em Python, mesmo
+que só alguns nós tenham issues. Aqui:
+
+1) Uma varredura acha onde começa e termina cada bloco: cada campo da raiz e
+   cada nó de "nodes". Só as chaves são lidas em Python; o valor de cada bloco
+   é pulado pelo raw_decode do módulo json (em C).
+2) As issues são agrupadas pelo bloco do path delas.
+3) Só os blocos com issues são indexados (build_position_index no trecho),
+   e as posições são ajustadas para a linha/coluna do arquivo.
+4) Com muitos blocos, os grupos são divididos entre processos; cada worker
+   abre o arquivo com mmap e decodifica só os trechos dele. Para isso o texto
+   tem que ser exatamente o conteúdo do arquivo (lido com newline="", sem
+   trocar \r\n por \n); se não for, os blocos são resolvidos aqui mesmo.
+
+O resultado é o mesmo do índice do arquivo inteiro (lookup_position, subindo
+para o pai quando o path não existe). Se a varredura achar algo fora do
+comum (raiz que não é objeto, chave repetida, JSON quebrado), volta para o
+índice completo.
+"""
+import json
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from json_positions import build_position_index, lookup_position, parent_path
+
+
+# Abaixo disso o custo de subir processos é maior que o ganho
+PARALLEL_MIN_BLOCKS = 2048
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# "chave": (com os espaços até o valor) e o separador depois do valor
+_MEMBER = re.compile(r'("(?:[^"\\]|\\.)*")[ \t\n\r]*:[ \t\n\r]*')
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,}])")
+
+
+def _line_columns(text, offsets):
+    """{offset: (linha, coluna)} dos offsets pedidos, contando as quebras de linha uma vez só."""
+    result = {}
+    line = 1
+    line_start = 0
+    last = 0
+    for offset in sorted(set(offsets)):
+        newlines = text.count("\n", last, offset)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", last, offset) + 1
+        last = offset
+        result[offset] = (line, offset - line_start + 1)
+    return result
+
+
+def find_blocks(text):
+    """
+    Retorna (root_index, blocks) ou None se a varredura não servir para este texto.
+
+    root_index: {"$": início da raiz, "$.<campo>": chave, "$.nodes.<id>": chave}
+    blocks: {path: (início, fim) do valor}
+    Tudo em offsets de caracteres; a linha/coluna só é calculada (_line_columns)
+    para os offsets que alguma issue usar.
+    """
+    decoder = json.JSONDecoder()
+    root_index = {}
+    blocks = {}
+
+    def skip(pos):
+        return _WHITESPACE.match(text, pos).end()
+
+    def members(pos, prefix, on_member):
+        """Percorre os membros do objeto que começa em pos. Retorna a posição depois do "}"."""
+        pos = skip(pos + 1)
+        if text.startswith("}", pos):
+            return pos + 1
+        while True:
+            member = _MEMBER.match(text, pos)
+            if member is None:
+                raise ValueError("chave inválida")
+            key_token = member.group(1)
+            key = key_token[1:-1] if "\\" not in key_token else json.loads(key_token)
+            path = f"{prefix}.{key}"
+            if path in root_index:
+                raise ValueError("chave repetida")
+            root_index[path] = pos
+
+            separator = _SEPARATOR.match(text, on_member(path, key, member.end()))
+            if separator is None:
+                raise ValueError("',' esperado")
+            if separator.group(1) == "}":
+                return separator.end()
+            pos = skip(separator.end())
+
+    def value_block(path, key, start):
+        end = decoder.raw_decode(text, start)[1]
+        blocks[path] = (start, end)
+        return end
+
+    def root_member(path, key, start):
+        if key == "nodes" and text.startswith("{", start):
+            return members(start, path, value_block)
+        return value_block(path, key, start)
+
+    try:
+        start = skip(0)
+        if not text.startswith("{", start):
+            return None
+        root_index["$"] = start
+        end = members(start, "$", root_member)
+        if skip(end) != len(text):
+            return None
+    except ValueError:   # inclui o json.JSONDecodeError do raw_decode
+        return None
+
+    return root_index, blocks
+
+
+def _block_of(path, blocks):
+    """Bloco que contém o path (o prefixo mais longo que é um bloco) ou None."""
+    cut = len(path)
+    while cut > 1:
+        if path[:cut] in blocks and (cut == len(path) or path[cut] in ".["):
+            return path[:cut]
+        cut = max(path.rfind(".", 0, cut), path.rfind("[", 0, cut))
+    return None
+
+
+def resolve_block(block_text, value_position, key_position, local_paths):
+    """
+    Posições (absolutas) dos paths locais ("$", "$.choices[0].next"...) de um bloco.
+    O "$" do bloco é a chave dele, como no índice do arquivo inteiro.
+    """
+    value_line, value_column = value_position
+    if all(local_path == "$" for local_path in local_paths):
+        # Só a chave do bloco (ex: "$.nodes.<id>"): nem precisa indexar o trecho
+        return [key_position] * len(local_paths)
+    index = build_position_index(block_text) if block_text[:1] in "{[" else {}
+
+    positions = []
+    for local_path in local_paths:
+        path = local_path
+        position = key_position
+        while path and path != "$":
+            local = index.get(path)
+            if local is not None:
+                line, column = local
+                position = (value_line + line - 1, value_column + column - 1 if line == 1 else column)
+                break
+            path = parent_path(path)
+        positions.append(position)
+    return positions
+
+
+def _resolve_shard(file_path, shard):
+    """Worker: abre o arquivo com mmap e resolve os blocos do shard (offsets em bytes)."""
+    results = []
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for byte_start, byte_end, value_position, key_position, issue_indexes, local_paths in shard:
+            block_text = data[byte_start:byte_end].decode("utf-8")
+            positions = resolve_block(block_text, value_position, key_position, local_paths)
+            results.extend(zip(issue_indexes, positions))
+    return results
+
+
+def _matches_file(text, file_path):
+    """True se o texto codificado tem o tamanho do arquivo (os workers leem os trechos do arquivo)."""
+    try:
+        return len(text.encode("utf-8")) == os.path.getsize(file_path)
+    except OSError:
+        return False
+
+
+def _byte_offsets(text, char_offsets):
+    """Offsets em caracteres -> bytes UTF-8 (em ordem crescente, codificando só os trechos entre eles)."""
+    result = {}
+    byte_pos = 0
+    char_pos = 0
+    for offset in sorted(char_offsets):
+        byte_pos += len(text[char_pos:offset].encode("utf-8"))
+        char_pos = offset
+        result[offset] = byte_pos
+    return result
+
+
+def attach_positions(issues, text, file_path=None, jobs=1):
+    """
+    Escreve issue["line"]/issue["column"] usando o texto do arquivo.
+    Com file_path e jobs > 1 (ou None = núcleos disponíveis), muitos blocos
+    são resolvidos em processos separados.
+    """
+    scan = find_blocks(text)
+    if scan is None:
+        position_index = build_position_index(text)
+        for issue in issues:
+            if issue.get("path"):
+                _set_position(issue, lookup_position(position_index, issue["path"]))
+        return issues
+
+    root_index, blocks = scan
+
+    # Issues de cada bloco: {path do bloco: ([índices das issues], [paths locais])}
+    groups = {}
+    outside = []   # issues fora dos blocos: só as chaves da raiz/dos nós servem
+    for i, issue in enumerate(issues):
+        path = issue.get("path")
+        if not path:
+            continue
+        block = _block_of(path, blocks)
+        if block is None:
+            outside.append((i, lookup_position(root_index, path)))
+            continue
+        group = groups.setdefault(block, ([], []))
+        group[0].append(i)
+        group[1].append("$" + path[len(block):])
+
+    needed = [offset for _, offset in outside if offset is not None]
+    for block in groups:
+        needed += (blocks[block][0], root_index[block])
+    line_columns = _line_columns(text, needed)
+    for i, offset in outside:
+        if offset is not None:
+            _set_position(issues[i], line_columns[offset])
+
+    if jobs is None:
+        from batch_validation import available_cpus
+        jobs = available_cpus()
+
+    if (
+        file_path is None or jobs <= 1 or len(groups) < PARALLEL_MIN_BLOCKS
+        or not _matches_file(text, file_path)
+    ):
+        for block, (issue_indexes, local_paths) in groups.items():
+            start, end = blocks[block]
+            positions = resolve_block(
+                text[start:end], line_columns[start], line_columns[root_index[block]], local_paths
+            )
+            for i, position in zip(issue_indexes, positions):
+                _set_position(issues[i], position)
+        return issues
+
+    # Em paralelo: cada worker recebe offsets em bytes e lê o próprio trecho do mmap
+    byte_offsets = _byte_offsets(text, [offset for block in groups for offset in blocks[block]])
+    work = []
+    for block, (issue_indexes, local_paths) in groups.items():
+        start, end = blocks[block]
+        value_position = line_columns[start]
+        start, end = byte_offsets[start], byte_offsets[end]
+        work.append((start, end, value_position, line_columns[root_index[block]], issue_indexes, local_paths))
+
+    shard_size = -(-len(work) // (jobs * 4))
+    shards = [work[i:i + shard_size] for i in range(0, len(work), shard_size)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for results in executor.map(_resolve_shard, [file_path] * len(shards), shards):
+            for i, position in results:
+                _set_position(issues[i], position)
+    return issues
+
+
+def positions_of(paths, text):
+    """(linha, coluna) de cada path (None se não der para mapear), como no attach_positions."""
+    probes = [{"path": path} for path in paths]
+    attach_positions(probes, text)
+    return [(probe["line"], probe["column"]) if "line" in probe else None for probe in probes]
+
+
+def _set_position(issue, position):
+    if position is not None:
+        issue["line"] = position[0]
+        issue["column"] = position[1]
@@ -0,0 +1,485 @@
+"""
+Servidor LSP (stdio) para os arquivos de diálogo: diagnósticos direto no
+editor (VS Code e afins), em vez do relatório no terminal ou na GUI.
+
+- Diagnósticos: cada documento aberto tem o seu IncrementalValidator, então
+  digitar só revalida os nós alterados; texto igual ao anterior sai do cache
+- Ranges exatos: a issue aponta para a chave do path (como no relatório);
+  quando o valor é simples (ex: "next": "cena_02") o range cobre chave e valor
+- Go-to-definition: em um "next", vai para a chave do nó de destino
+- Find-references: em uma flag, lista onde ela é declarada, exigida e setada
+
+Só usa a biblioteca padrão. O protocolo é JSON-RPC com cabeçalho
+Content-Length, mensagens lidas uma por vez do stdin.
+"""
+import json
+import re
+import sys
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+
+from dialogue_validator import node_id_from_path
+from incremental_validation import IncrementalValidator
+from json_positions import parse_with_spans
+
+
+SERVER_NAME = "narrative-flow-checker"
+
+# Documentos fechados que ficam em memória (reabrir sem mudar o texto não revalida)
+CLOSED_CACHE_SIZE = 32
+
+_SEVERITY = {"ERROR": 1, "WARNING": 2, "INFO": 3}
+
+# Sincronização de texto: o cliente manda sempre o documento inteiro
+_SYNC_FULL = 1
+
+# Códigos de erro do JSON-RPC
+_METHOD_NOT_FOUND = -32601
+_INTERNAL_ERROR = -32603
+_SERVER_NOT_INITIALIZED = -32002
+
+# string JSON | número/literal | qualquer outro caractere
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[^\s{}\[\],:"]+|\S')
+_COLON = re.compile(r"\s*:\s*")
+
+_NEXT_REST = re.compile(r"(?:\.choices\[\d+\])?\.next")
+_FLAG_REST = re.compile(r"\.choices\[\d+\]\.requires\[\d+\]|\.set_flags\[\d+\]")
+_DECLARED_FLAG = re.compile(r"\$\.flags\[\d+\]")
+
+
+# ============================================================
+# Posições (offset <-> linha/coluna do LSP)
+# ============================================================
+
+class _LineIndex:
+    """
+    Offset do começo de cada linha. As colunas do LSP são em unidades UTF-16;
+    as do validador, em caracteres (só difere em linhas com emoji e afins).
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.starts = [0]
+        self.starts.extend(accumulate(len(line) + 1 for line in text.split("\n")[:-1]))
+
+    def offset(self, line, column):
+        """Linha/coluna do validador (começam em 1) -> offset."""
+        return self.starts[line - 1] + column - 1
+
+    def position(self, offset):
+        """Offset -> {"line", "character"} do LSP (começam em 0)."""
+        line = bisect_right(self.starts, offset) - 1
+        prefix = self.text[self.starts[line]:offset]
+        if prefix.isascii():
+            return {"line": line, "character": len(prefix)}
+        return {"line": line, "character": len(prefix.encode("utf-16-le")) // 2}
+
+    def from_position(self, position):
+        """{"line", "character"} do LSP -> offset."""
+        line = min(max(position["line"], 0), len(self.starts) - 1)
+        start = self.starts[line]
+        end = self.starts[line + 1] - 1 if line + 1 < len(self.starts) else len(self.text)
+        character = position["character"]
+
+        line_text = self.text[start:end]
+        if line_text.isascii():
+            return start + min(character, len(line_text))
+        units = 0
+        for i, char in enumerate(line_text):
+            if units >= character:
+                return start + i
+            units += 2 if ord(char) > 0xFFFF else 1
+        return end
+
+    def range(self, start, end):
+        return {"start": self.position(start), "end": self.position(end)}
+
+
+def _token_end(text, offset):
+    """Fim do token JSON que começa em offset (string, número, pontuação...)."""
+    match = _TOKEN.match(text, offset)
+    return match.end() if match else offset
+
+
+def _issue_range(lines, issue):
+    """
+    Range da issue: a chave (ou o valor, em itens de lista). Se o path é
+    exatamente essa chave e o valor é uma string/número, vai até o fim do valor.
+    """
+    text = lines.text
+    start = lines.offset(issue["line"], issue["column"])
+    end = _token_end(text, start)
+
+    if text[start:start + 1] == '"':
+        match = _COLON.match(text, end)
+        if match:
+            value_start = match.end()
+            if text[value_start:value_start + 1] not in ("{", "[", ""):
+                try:
+                    key = json.loads(text[start:end])
+                except json.JSONDecodeError:
+                    key = None
+                if key is not None and issue["path"].endswith(f".{key}"):
+                    end = _token_end(text, value_start)
+    return lines.range(start, end)
+
+
+# ============================================================
+# Documento aberto
+# ============================================================
+
+class _Document:
+    """Texto atual, validador incremental, diagnósticos e o índice de navegação."""
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.version = None
+        self.text = None
+        self.validator = IncrementalValidator()
+        self.lines = None
+        self.diagnostics = []
+        self.navigation = None   # montado só no primeiro definition/references depois de mudar
+
+    def update(self, text, version):
+        """Revalida se o texto mudou. Retorna False se deu para responder do cache."""
+        self.version = version
+        if text == self.text:
+            return False
+
+        self.text = text
+        self.lines = _LineIndex(text)
+        self.navigation = None
+
+        try:
+            issues = self.validator.validate_text(text)
+        except json.JSONDecodeError as e:
+            start = min(e.pos, len(text))
+            self.diagnostics = [{
+                "range": self.lines.range(start, min(start + 1, len(text))),
+                "severity": _SEVERITY["ERROR"],
+                "source": SERVER_NAME,
+                "code": "JSON_SYNTAX",
+                "message": f"JSON inválido: {e.msg}",
+            }]
+            return True
+
+        self.diagnostics = [self._diagnostic(issue) for issue in issues]
+        return True
+
+    def _diagnostic(self, issue):
+        if "line" in issue:
+            issue_range = _issue_range(self.lines, issue)
+        else:
+            issue_range = self.lines.range(0, 0)
+        return {
+            "range": issue_range,
+            "severity": _SEVERITY.get(issue["level"], 3),
+            "source": SERVER_NAME,
+            "code": issue["code"],
+            "message": issue["message"],
+        }
+
+    def get_navigation(self):
+        if self.navigation is None and self.text is not None:
+            try:
+                self.navigation = _Navigation(self.text, self.lines)
+            except json.JSONDecodeError:
+                return None
+        return self.navigation
+
+
+class _Navigation:
+    """
+    Onde está cada nó, cada "next" e cada uso de flag, em offsets do texto.
+    Montado a partir dos spans do parse_with_spans (o mesmo mapeamento
+    path -> posição do relatório).
+    """
+
+    def __init__(self, text, lines):
+        data, spans = parse_with_spans(text)
+        nodes = data.get("nodes") if isinstance(data, dict) else None
+        if not isinstance(nodes, dict):
+            nodes = {}
+
+        self.node_keys = {}   # id do nó -> (início, fim) da chave
+        self.targets = []     # (início, fim, destino) de cada "next" string, em ordem
+        self.flags = []       # (início, fim, flag, é_declaração), em ordem
+
+        for path, path_span in spans.items():
+            value_span = path_span.value
+            start = lines.offset(value_span.line, value_span.column)
+            end = lines.offset(value_span.end_line, value_span.end_column)
+
+            if _DECLARED_FLAG.fullmatch(path):
+                self._add_flag(text, start, end, True)
+                continue
+
+            node_id = node_id_from_path(path, nodes)
+            if node_id is None:
+                continue
+            rest = path[len("$.nodes.") + len(node_id):]
+
+            if not rest:
+                key_span = path_span.key
+                key_start = lines.offset(key_span.line, key_span.column)
+                self.node_keys[node_id] = (key_start, key_start + (key_span.end_column - key_span.column))
+            elif _NEXT_REST.fullmatch(rest):
+                if text[start] == '"':
+                    self.targets.append((start, end, json.loads(text[start:end])))
+            elif _FLAG_REST.fullmatch(rest):
+                self._add_flag(text, start, end, False)
+
+        self.targets.sort()
+        self.flags.sort()
+
+    def _add_flag(self, text, start, end, declaration):
+        if text[start] != '"':
+            return
+        flag = json.loads(text[start:end])
+        if isinstance(flag, str) and flag.strip():
+            self.flags.append((start, end, flag.strip(), declaration))
+
+    @staticmethod
+    def _at(items, offset):
+        """Item (início, fim, ...) que contém o offset."""
+        i = bisect_right(items, (offset, float("inf"))) - 1
+        if i >= 0 and items[i][0] <= offset <= items[i][1]:
+            return items[i]
+        return None
+
+    def definition(self, offset):
+        """(início, fim) da chave do nó de destino do "next" no offset."""
+        target = self._at(self.targets, offset)
+        if target is None:
+            return None
+        return self.node_keys.get(target[2])
+
+    def references(self, offset, include_declaration=True):
+        """(início, fim) de todos os usos da flag no offset."""
+        found = self._at(self.flags, offset)
+        if found is None:
+            return []
+        flag = found[2]
+        return [
+            (start, end)
+            for start, end, name, declaration in self.flags
+            if name == flag and (include_declaration or not declaration)
+        ]
+
+
+# ============================================================
+# Servidor
+# ============================================================
+
+class LanguageServer:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.documents = {}
+        self.closed = OrderedDict()   # uri -> _Document, os fechados mais recentes por último
+        self.initialized = False
+        self.shutdown = False
+
+    # ---------------------------------------------------------
+    # Transporte
+    # ---------------------------------------------------------
+    def read_message(self):
+        """Próxima mensagem do cliente (None no fim da entrada)."""
+        length = None
+        while True:
+            header = self.reader.readline()
+            if not header:
+                return None
+            header = header.strip()
+            if not header:
+                if length is not None:
+                    break
+                continue
+            name, _, value = header.decode("ascii").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+
+        return json.loads(self.reader.read(length).decode("utf-8"))
+
+    def send(self, message):
+        message["jsonrpc"] = "2.0"
+        body = json.dumps(message, ensure_ascii=False).encode("utf-8")
+        self.writer.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+        self.writer.flush()
+
+    def respond(self, request_id, result=None, error=None):
+        message = {"id": request_id}
+        if error is not None:
+            message["error"] = error
+        else:
+            message["result"] = result
+        self.send(message)
+
+    def notify(self, method, params):
+        self.send({"method": method, "params": params})
+
+    # ---------------------------------------------------------
+    # Loop principal
+    # ---------------------------------------------------------
+    def serve(self):
+        """Atende até o "exit". Retorna o exit code (0 se veio "shutdown" antes)."""
+        while True:
+            message = self.read_message()
+            if message is None:
+                return 1
+            if message.get("method") == "exit":
+                return 0 if self.shutdown else 1
+            self.handle(message)
+
+    def handle(self, message):
+        method = message.get("method")
+        request_id = message.get("id")
+        params = message.get("params") or {}
+
+        if method is None:
+            return   # resposta do cliente a algo que não pedimos
+
+        if not self.initialized and method != "initialize":
+            if request_id is not None:
+                self.respond(request_id, error={
+                    "code": _SERVER_NOT_INITIALIZED, "message": "Servidor ainda não inicializado.",
+                })
+            return
+
+        handler = self._handlers.get(method)
+        if handler is None:
+            if request_id is not None:
+                self.respond(request_id, error={
+                    "code": _METHOD_NOT_FOUND, "message": f"Método não suportado: {method}",
+                })
+            return
+
+        try:
+            result = handler(self, params)
+        except Exception as e:
+            # Um documento estranho não pode derrubar o servidor do editor
+            if request_id is not None:
+                self.respond(request_id, error={"code": _INTERNAL_ERROR, "message": str(e)})
+            return
+        if request_id is not None:
+            self.respond(request_id, result)
+
+    # ---------------------------------------------------------
+    # Ciclo de vida
+    # ---------------------------------------------------------
+    def on_initialize(self, params):
+        self.initialized = True
+        return {
+            "capabilities": {
+                "positionEncoding": "utf-16",
+                "textDocumentSync": {
+                    "openClose": True,
+                    "change": _SYNC_FULL,
+                    "save": {"includeText": False},
+                },
+                "definitionProvider": True,
+                "referencesProvider": True,
+            },
+            "serverInfo": {"name": SERVER_NAME},
+        }
+
+    def on_initialized(self, params):
+        return None
+
+    def on_shutdown(self, params):
+        self.shutdown = True
+        return None
+
+    # ---------------------------------------------------------
+    # Sincronização dos documentos
+    # ---------------------------------------------------------
+    def on_did_open(self, params):
+        item = params["textDocument"]
+        uri = item["uri"]
+        document = self.closed.pop(uri, None) or self.documents.get(uri) or _Document(uri)
+        self.documents[uri] = document
+        document.update(item["text"], item.get("version"))
+        self.publish(document)
+
+    def on_did_change(self, params):
+        uri = params["textDocument"]["uri"]
+        document = self.documents.get(uri)
+        changes = params.get("contentChanges") or []
+        if document is None or not changes:
+            return
+        # Sincronização completa: a última mudança tem o texto inteiro
+        if document.update(changes[-1]["text"], params["textDocument"].get("version")):
+            self.publish(document)
+
+    def on_did_save(self, params):
+        return None
+
+    def on_did_close(self, params):
+        uri = params["textDocument"]["uri"]
+        document = self.documents.pop(uri, None)
+        if document is None:
+            return
+        self.closed[uri] = document
+        while len(self.closed) > CLOSED_CACHE_SIZE:
+            self.closed.popitem(last=False)
+        self.notify("textDocument/publishDiagnostics", {"uri": uri, "diagnostics": []})
+
+    def publish(self, document):
+        params = {"uri": document.uri, "diagnostics": document.diagnostics}
+        if document.version is not None:
+            params["version"] = document.version
+        self.notify("textDocument/publishDiagnostics", params)
+
+    # ---------------------------------------------------------
+    # Navegação
+    # ---------------------------------------------------------
+    def _navigation_at(self, params):
+        document = self.documents.get(params["textDocument"]["uri"])
+        if document is None or document.text is None:
+            return None, None, None
+        navigation = document.get_navigation()
+        if navigation is None:
+            return None, None, None
+        return document, navigation, document.lines.from_position(params["position"])
+
+    def on_definition(self, params):
+        document, navigation, offset = self._navigation_at(params)
+        if navigation is None:
+            return None
+        found = navigation.definition(offset)
+        if found is None:
+            return None
+        return {"uri": document.uri, "range": document.lines.range(*found)}
+
+    def on_references(self, params):
+        document, navigation, offset = self._navigation_at(params)
+        if navigation is None:
+            return []
+        include_declaration = (params.get("context") or {}).get("includeDeclaration", True)
+        return [
+            {"uri": document.uri, "range": document.lines.range(start, end)}
+            for start, end in navigation.references(offset, include_declaration)
+        ]
+
+    _handlers = {
+        "initialize": on_initialize,
+        "initialized": on_initialized,
+        "shutdown": on_shutdown,
+        "textDocument/didOpen": on_did_open,
+        "textDocument/didChange": on_did_change,
+        "textDocument/didSave": on_did_save,
+        "textDocument/didClose": on_did_close,
+        "textDocument/definition": on_definition,
+        "textDocument/references": on_references,
+    }
+
+
+def run_lsp():
+    """Versão de linha de comando (--lsp): fala LSP pelo stdin/stdout."""
+    server = LanguageServer(sys.stdin.buffer, sys.stdout.buffer)
+    return server.serve()
+
+
+if __name__ == "__main__":
+    sys.exit(run_lsp())
@@ -0,0 +1,463 @@
+"""
+Simulador de playthroughs: quais finais dá para alcançar, por qual caminho,
+quantos playthroughs diferentes existem e qual é o mais longo.
+
+O jogo é visto como estados (nó, flags setadas). Ao entrar num nó as
+set_flags dele são somadas; uma aresta (next ou choice) só pode ser usada
+se as flags do "requires" estiverem todas setadas. Só as flags que aparecem
+que ainda podem ser exigidas dali para a frente entram no estado (as outras
+não mudam mais nada no caminho).
+
+Duas buscas:
+
+1) Finais (find_endings): BFS com poda por dominância. Como flags só são
+   somadas e requires só exige flags, um estado (n, F) não alcança nada que
+   (n, G) com G ⊇ F não alcance. Então, para cada nó, só ficam os conjuntos
+   de flags maximais já vistos e o resto é descartado. Continua escalando
+   com 10^5 nós e dezenas de flags. Como é BFS, a testemunha de cada final
+   é um dos caminhos mais curtos até ele.
+
+2) Contagem (count_playthroughs): todos os estados, sem poda (até max_states).
+   Loops viram componentes fortemente conexas e o grafo de componentes é um
+   DAG; a quantidade de caminhos é calculada nele com inteiros do Python
+   (sem limite de tamanho). Com loops, cada loop conta como um passo só:
+   entrar, sair por uma das saídas. O caminho mais longo segue a mesma regra.
+
+Final = nó com "end: true" ou com saída para outro arquivo. O playthrough
+pode terminar ali (e, se o nó tiver outras saídas, também seguir por elas).
+"""
+import json
+import math
+import sys
+from array import array
+from collections import deque
+
+from compiled_graph import CompiledGraph, compile_dialogue
+
+
+DEFAULT_MAX_STATES = 2_000_000
+
+# Tamanho máximo de caminho mostrado no relatório de texto (o JSON tem tudo)
+PATH_PREVIEW = 12
+
+
+class StateLimitExceeded(Exception):
+    pass
+
+
+def needed_flags(graph):
+    """
+    Para cada nó, as flags que ainda podem ser exigidas daqui para a frente
+    (requires de alguma aresta alcançável a partir dele). Flag fora disso não
+    muda mais nada no caminho, então sai do estado. Ponto fixo de trás para frente.
+    """
+    node_count = graph.node_count
+    offsets = graph.offsets
+    targets = graph.targets
+    edge_requires = graph.edge_requires
+    reverse = graph.reversed()
+
+    need = [0] * node_count
+    for node in range(node_count):
+        for e in range(offsets[node], offsets[node + 1]):
+            need[node] |= edge_requires[e]
+
+    worklist = [node for node in range(node_count) if need[node]]
+    queued = bytearray(node_count)
+    for node in worklist:
+        queued[node] = 1
+    while worklist:
+        node = worklist.pop()
+        queued[node] = 0
+        mask = need[node]
+        for e in range(reverse.offsets[node], reverse.offsets[node + 1]):
+            source = reverse.targets[e]
+            if mask & ~need[source]:
+                need[source] |= mask
+                if not queued[source]:
+                    queued[source] = 1
+                    worklist.append(source)
+    return need
+
+
+def _path_of(state, parents, state_node, node_ids, limit=None):
+    """Caminho até o estado (ou só os últimos limit nós dele)."""
+    path = []
+    while state != -1 and (limit is None or len(path) < limit):
+        path.append(node_ids[state_node[state]])
+        state = parents[state]
+    path.reverse()
+    return path
+
+
+def find_endings(graph, start_index, max_states=DEFAULT_MAX_STATES, path_limit=None):
+    """
+    Retorna {índice do nó final: (passos, flags no final, caminho)}, só com os
+    finais alcançáveis. As flags são todas as setadas no caminho (a poda usa
+    só as que ainda podem ser exigidas, e num final nenhuma pode). Com path_limit, o caminho traz só os últimos nós (em
+    histórias longas, montar o caminho inteiro de cada final custa mais que a busca).
+    Levanta StateLimitExceeded se passar de max_states.
+    """
+    need = needed_flags(graph)
+    offsets = graph.offsets
+    targets = graph.targets
+    edge_requires = graph.edge_requires
+    set_masks = graph.set_masks
+    exits = graph.exits
+
+    maximal = [None] * graph.node_count   # (flags, estado) maximais já vistos em cada nó
+    state_node = array("i")
+    state_flags = []                      # flags que ainda importam (as da poda)
+    state_set = []                        # todas as flags setadas no caminho (as do relatório)
+    parents = array("i")
+    depth = array("i")
+    dominated = bytearray()               # estado na fila que outro já cobriu depois
+    endings = {}
+
+    def push(node, flags, set_flags, parent):
+        known = maximal[node]
+        if known is None:
+            maximal[node] = [(flags, len(state_node))]
+        else:
+            for other, _ in known:
+                if not flags & ~other:
+                    return                # dominado: nada de novo a partir daqui
+            kept = []
+            for other, other_state in known:
+                if other & ~flags:
+                    kept.append((other, other_state))
+                else:
+                    dominated[other_state] = 1
+            kept.append((flags, len(state_node)))
+            maximal[node] = kept
+
+        if len(state_node) >= max_states:
+            raise StateLimitExceeded(max_states)
+        state_node.append(node)
+        state_flags.append(flags)
+        state_set.append(set_flags)
+        parents.append(parent)
+        depth.append(depth[parent] + 1 if parent != -1 else 0)
+        dominated.append(0)
+        queue.append(len(state_node) - 1)
+
+    queue = deque()
+    push(start_index, set_masks[start_index] & need[start_index], set_masks[start_index], -1)
+
+    while queue:
+        state = queue.popleft()
+        node = state_node[state]
+
+        if exits[node] and node not in endings:
+            path = _path_of(state, parents, state_node, graph.node_ids, path_limit)
+            endings[node] = (depth[state], state_set[state], path)
+
+        if dominated[state]:
+            continue
+        flags = state_flags[state]
+        set_flags = state_set[state]
+        for e in range(offsets[node], offsets[node + 1]):
+            if edge_requires[e] & ~flags:
+                continue
+            target = targets[e]
+            push(target, (flags | set_masks[target]) & need[target], set_flags | set_masks[target], state)
+
+    return endings
+
+
+def explore_states(graph, start_index, max_states=DEFAULT_MAX_STATES):
+    """
+    Todos os estados alcançáveis (sem poda), em ordem de BFS.
+    Retorna (state_node, state_flags, offsets, targets): as transições em CSR.
+    """
+    need = needed_flags(graph)
+    node_count = graph.node_count
+    offsets = graph.offsets
+    targets = graph.targets
+    edge_requires = graph.edge_requires
+    set_masks = graph.set_masks
+
+    state_ids = {}
+    state_node = array("i")
+    state_flags = []
+    state_offsets = array("i", [0])
+    state_targets = array("i")
+
+    def state_id(node, flags):
+        key = flags * node_count + node
+        existing = state_ids.get(key)
+        if existing is not None:
+            return existing
+        if len(state_node) >= max_states:
+            raise StateLimitExceeded(max_states)
+        state_ids[key] = new_id = len(state_node)
+        state_node.append(node)
+        state_flags.append(flags)
+        return new_id
+
+    state_id(start_index, set_masks[start_index] & need[start_index])
+
+    # Os ids saem em ordem de BFS, então as arestas já ficam agrupadas por origem
+    state = 0
+    while state < len(state_node):
+        node = state_node[state]
+        flags = state_flags[state]
+        for e in range(offsets[node], offsets[node + 1]):
+            if edge_requires[e] & ~flags:
+                continue
+            target = targets[e]
+            state_targets.append(state_id(target, (flags | set_masks[target]) & need[target]))
+        state_offsets.append(len(state_targets))
+        state += 1
+
+    return state_node, state_flags, state_offsets, state_targets
+
+
+def _walk_inside(start, goal_test, offsets, targets, component_of, component):
+    """Caminho mais curto (BFS) de start até um estado que passa em goal_test, sem sair da componente."""
+    parents = {start: -1}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        if goal_test(state):
+            walk = []
+            while state != -1:
+                walk.append(state)
+                state = parents[state]
+            walk.reverse()
+            return walk
+        for e in range(offsets[state], offsets[state + 1]):
+            target = targets[e]
+            if component_of[target] == component and target not in parents:
+                parents[target] = state
+                queue.append(target)
+    return None
+
+
+def count_playthroughs(graph, start_index, max_states=DEFAULT_MAX_STATES):
+    """
+    Retorna {"states", "playthroughs", "has_loops", "longest"}.
+    "longest" é a lista de ids do caminho mais longo até um final (None se
+    nenhum final é alcançável). Levanta StateLimitExceeded se passar de max_states.
+    """
+    state_node, state_flags, offsets, targets = explore_states(graph, start_index, max_states)
+    state_count = len(state_node)
+    exits = graph.exits
+
+    # Reaproveita o Tarjan do CompiledGraph sobre o grafo de estados
+    state_graph = CompiledGraph(state_node, None, offsets, targets, [], [], [], [], None)
+    components = state_graph.strongly_connected_components()
+    components.reverse()   # ordem topológica: de onde vem para onde vai
+
+    component_of = array("i", bytes(4 * state_count))
+    for c, members in enumerate(components):
+        for state in members:
+            component_of[state] = c
+
+    has_loops = any(
+        len(members) > 1 or state_graph.has_self_loop(members[0]) for members in components
+    )
+
+    paths = [0] * len(components)
+    longest = [-1] * len(components)          # passos no DAG de componentes (-1 = não alcançado)
+    came_from = [None] * len(components)      # (estado de saída, estado de entrada) da melhor aresta
+    start_component = component_of[0]
+    paths[start_component] = 1
+    longest[start_component] = 0
+
+    playthroughs = 0
+    best_end = None
+    for c, members in enumerate(components):
+        if not paths[c]:
+            continue
+        ending_states = sum(1 for state in members if exits[state_node[state]])
+        playthroughs += paths[c] * ending_states
+        if ending_states and (best_end is None or longest[c] > longest[best_end]):
+            best_end = c
+
+        for state in members:
+            for e in range(offsets[state], offsets[state + 1]):
+                target_component = component_of[targets[e]]
+                if target_component == c:
+                    continue
+                paths[target_component] += paths[c]
+                if longest[c] + 1 > longest[target_component]:
+                    longest[target_component] = longest[c] + 1
+                    came_from[target_component] = (state, targets[e])
+
+    longest_path = None
+    if best_end is not None:
+        # Arestas entre componentes, do final para o começo
+        hops = []
+        c = best_end
+        while c != start_component:
+            hops.append(came_from[c])
+            c = component_of[came_from[c][0]]
+        hops.reverse()
+
+        walk = []
+        entry = 0
+        for exit_state, next_entry in hops:
+            walk += _walk_inside(
+                entry, lambda state, goal=exit_state: state == goal, offsets, targets, component_of, component_of[entry]
+            )
+            entry = next_entry
+        walk += _walk_inside(
+            entry, lambda state: exits[state_node[state]], offsets, targets, component_of, best_end
+        )
+        longest_path = [graph.node_ids[state_node[state]] for state in walk]
+
+    return {
+        "states": state_count,
+        "playthroughs": playthroughs,
+        "has_loops": has_loops,
+        "longest": longest_path,
+    }
+
+
+def simulate(nodes, start, max_states=DEFAULT_MAX_STATES, path_limit=None):
+    """
+    Relatório completo do dict "nodes" a partir de start:
+    {
+      "endings": {id do final: {"reachable", "steps", "flags", "path"}},
+      "unreachable_endings": [ids],
+      "playthroughs": int ou None (None = passou de max_states),
+      "has_loops", "longest": [ids] ou None, "states": estados explorados,
+      "truncated": True se alguma das buscas passou de max_states
+    }
+    Com path_limit, o "path" de cada final traz só os últimos path_limit nós.
+    """
+    graph = compile_dialogue(nodes)
+    start_index = graph.index.get(start) if isinstance(start, str) else None
+    if start_index is None:
+        raise ValueError(f"O nó inicial '{start}' não existe.")
+
+    report = {
+        "endings": {},
+        "unreachable_endings": [],
+        "playthroughs": None,
+        "has_loops": None,
+        "longest": None,
+        "states": None,
+        "truncated": False,
+    }
+
+    try:
+        found = find_endings(graph, start_index, max_states, path_limit)
+    except StateLimitExceeded:
+        found = None
+        report["truncated"] = True
+
+    if found is not None:
+        for node in range(graph.node_count):
+            if not graph.exits[node]:
+                continue
+            node_id = graph.node_ids[node]
+            if node in found:
+                steps, flags, path = found[node]
+                report["endings"][node_id] = {
+                    "reachable": True,
+                    "steps": steps,
+                    "flags": graph.flag_names_of(flags),
+                    "path": path,
+                }
+            else:
+                report["endings"][node_id] = {"reachable": False, "steps": None, "flags": [], "path": None}
+                report["unreachable_endings"].append(node_id)
+
+    try:
+        report.update(count_playthroughs(graph, start_index, max_states))
+    except StateLimitExceeded:
+        report["truncated"] = True
+
+    return report
+
+
+# ============================================================
+# Linha de comando (--simulate)
+# ============================================================
+
+def format_count(count):
+    """
+    Inteiro para mostrar: com separador até 10^15, senão em notação científica
+    (a contagem pode ter milhares de dígitos, acima do limite do str() de int).
+    """
+    if count < 10 ** 15:
+        return f"{count:,}".replace(",", ".")
+    exponent = math.log10(count)
+    return f"{10 ** (exponent % 1):.2f}e{int(exponent)}"
+
+
+def _preview(path, steps=None):
+    """Começo e fim do caminho; com steps maior que o caminho, ele é só o final."""
+    if steps is not None and steps + 1 > len(path):
+        return f"... ({steps + 1 - len(path)} nós) ... -> " + " -> ".join(path)
+    if len(path) <= PATH_PREVIEW:
+        return " -> ".join(path)
+    half = PATH_PREVIEW // 2
+    return " -> ".join(path[:half]) + f" -> ... ({len(path) - PATH_PREVIEW} nós) ... -> " + " -> ".join(path[-half:])
+
+
+def print_simulation(report):
+    print("\n=== SIMULAÇÃO DE PLAYTHROUGHS ===")
+    if report["states"] is not None:
+        print(f"Estados (nó + flags) explorados: {report['states']}")
+    if report["truncated"]:
+        print("⚠️ Passou do limite de estados (--max-states): parte do relatório não foi calculada.")
+
+    if report["playthroughs"] is not None:
+        loops = " (cada loop contado como um passo só)" if report["has_loops"] else ""
+        print(f"Playthroughs distintos: {format_count(report['playthroughs'])}{loops}")
+    if report["longest"]:
+        print(f"Mais longo: {len(report['longest'])} nós")
+        print(f"   {_preview(report['longest'])}")
+
+    endings = report["endings"]
+    if endings:
+        reachable = sum(1 for ending in endings.values() if ending["reachable"])
+        print(f"\nFinais alcançáveis: {reachable} de {len(endings)}")
+        for node_id, ending in endings.items():
+            if ending["reachable"]:
+                flags = f" [flags: {', '.join(ending['flags'])}]" if ending["flags"] else ""
+                print(f"✅ {node_id} em {ending['steps']} passos{flags}")
+                print(f"   {_preview(ending['path'], ending['steps'])}")
+            else:
+                print(f"❌ {node_id}: nenhuma sequência de escolhas chega aqui")
+    elif not report["truncated"]:
+        print("\n❌ O arquivo não tem nenhum final (end: true).")
+
+
+def run_simulation(file_path, max_states=DEFAULT_MAX_STATES, output_path=None):
+    """Versão de linha de comando. Retorna o exit code (1 se algum final é inalcançável)."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {file_path}")
+        return 1
+    except json.JSONDecodeError as e:
+        print(f"❌ JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}")
+        return 1
+
+    nodes = data.get("nodes") if isinstance(data, dict) else None
+    if not isinstance(nodes, dict) or not nodes:
+        print("❌ Campo 'nodes' ausente, vazio ou inválido.")
+        return 1
+
+    try:
+        # Caminhos completos só quando vão para o arquivo; na tela basta o final deles
+        report = simulate(nodes, data.get("start"), max_states, None if output_path else PATH_PREVIEW)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_simulation(report)
+    if output_path:
+        count = report["playthroughs"]
+        if count is not None and count >= 10 ** 4000:
+            report = dict(report, playthroughs=format_count(count))
+        with open(output_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f"\nRelatório gravado em {output_path}", file=sys.stderr)
+
+    return 1 if report["unreachable_endings"] else 0
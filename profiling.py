@@ -0,0 +1,174 @@
+"""
+Medição por fase da validação (--profile).
+
+O validate_dialogue, o finish_validation e o attach_line_numbers_to_issues
+recebem um profiler=None opcional; com um PhaseProfiler cada fase numerada
+vira um registro com:
+- tempo de parede (wall_ms) e início relativo ao começo da medição (start_ms)
+- pico de memória acima do que já estava alocado no começo da fase
+  (peak_kib, via tracemalloc; só com memory=True)
+- quantas issues a fase adicionou e as contagens que ela informar (nós, arestas...)
+
+Fases podem ser aninhadas (o registro guarda a profundidade). on_phase(registro)
+é chamado a cada fase que termina, para quem quiser acompanhar ao vivo.
+
+Saídas: JSON (to_dict), speedscope (to_speedscope, abre em speedscope.app) e,
+com cprofile=True, o .prof do cProfile (dump_cprofile, abre no snakeviz/pstats).
+"""
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class PhaseProfiler:
+    def __init__(self, memory=True, cprofile=False, on_phase=None):
+        self.memory = memory
+        self.on_phase = on_phase
+        self.records = []
+        self._stack = []       # registros das fases abertas
+        self._started = time.perf_counter()
+        self._started_tracemalloc = False
+        self._cprofile = cProfile.Profile() if cprofile else None
+
+    @contextmanager
+    def phase(self, name, issues=None):
+        """
+        Mede o bloco como uma fase. Se receber a lista de issues, conta
+        quantas foram adicionadas. O registro (dict) é devolvido no "as"
+        para o bloco acrescentar contagens: record["nodes"] = ...
+        """
+        record = {"name": name, "depth": len(self._stack)}
+        self._open(record)
+        issue_count = len(issues) if issues is not None else 0
+        try:
+            yield record
+        finally:
+            if issues is not None:
+                record["issues"] = len(issues) - issue_count
+            self._close(record)
+
+    def _open(self, record):
+        if not self._stack:
+            if self.memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            if self._cprofile is not None:
+                self._cprofile.enable()
+
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # O pico até aqui pertence à fase de fora; guarda antes de zerar
+            if self._stack:
+                parent = self._stack[-1]
+                parent["_peak"] = max(parent["_peak"], peak)
+            tracemalloc.reset_peak()
+            record["_base"] = current
+            record["_peak"] = current
+
+        self._stack.append(record)
+        record["start_ms"] = (time.perf_counter() - self._started) * 1000
+
+    def _close(self, record):
+        record["wall_ms"] = (time.perf_counter() - self._started) * 1000 - record["start_ms"]
+        self._stack.pop()
+
+        if self.memory:
+            peak = max(record.pop("_peak"), tracemalloc.get_traced_memory()[1])
+            record["peak_kib"] = round((peak - record.pop("_base")) / 1024, 1)
+            if self._stack:
+                parent = self._stack[-1]
+                parent["_peak"] = max(parent["_peak"], peak)
+            tracemalloc.reset_peak()
+
+        if not self._stack:
+            if self._cprofile is not None:
+                self._cprofile.disable()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+        self.records.append(record)
+        if self.on_phase is not None:
+            self.on_phase(record)
+
+    # ============================================================
+    # Saídas
+    # ============================================================
+
+    def ordered_records(self):
+        """Registros na ordem em que as fases começaram (pai antes dos filhos)."""
+        return sorted(self.records, key=lambda record: (record["start_ms"], record["depth"]))
+
+    def to_dict(self):
+        return {"memory": self.memory, "phases": self.ordered_records()}
+
+    def to_speedscope(self, name="validacao"):
+        """Perfil "evented" do speedscope: cada fase é um frame aberto e fechado."""
+        frames = []
+        frame_index = {}
+        events = []
+        for record in self.records:
+            if record["name"] not in frame_index:
+                frame_index[record["name"]] = len(frames)
+                frames.append({"name": record["name"]})
+            frame = frame_index[record["name"]]
+            events.append((record["start_ms"], 1, record["depth"], {"type": "O", "frame": frame, "at": record["start_ms"]}))
+            end = record["start_ms"] + record["wall_ms"]
+            events.append((end, 0, -record["depth"], {"type": "C", "frame": frame, "at": end}))
+        # No mesmo instante: fecha antes de abrir, o de fora abre antes e fecha depois do de dentro
+        events.sort(key=lambda event: event[:3])
+        end_value = max((event[0] for event in events), default=0)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "evented",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": end_value,
+                "events": [event[3] for event in events],
+            }],
+        }
+
+    def dump_cprofile(self, file_path):
+        if self._cprofile is None:
+            raise ValueError("PhaseProfiler criado sem cprofile=True")
+        self._cprofile.dump_stats(file_path)
+
+    def write(self, file_path):
+        """
+        Grava pelo nome do arquivo: .prof/.pstats = cProfile,
+        .speedscope.json = speedscope, qualquer outro = JSON dos registros.
+        """
+        if file_path.endswith((".prof", ".pstats")):
+            self.dump_cprofile(file_path)
+            return
+        document = self.to_speedscope() if file_path.endswith(".speedscope.json") else self.to_dict()
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(document, file, ensure_ascii=False, indent=2)
+
+    def format_table(self):
+        lines = [f"{'fase':<34} {'tempo':>10} {'memória':>12} {'issues':>7}  contagens"]
+        for record in self.ordered_records():
+            name = "  " * record["depth"] + record["name"]
+            memory = f"{record['peak_kib']:.0f} KiB" if "peak_kib" in record else "-"
+            counts = ", ".join(
+                f"{key}={value}" for key, value in record.items()
+                if key not in ("name", "depth", "start_ms", "wall_ms", "peak_kib", "issues")
+            )
+            lines.append(
+                f"{name:<34} {record['wall_ms']:>7.1f} ms {memory:>12} {record.get('issues', ''):>7}  {counts}"
+            )
+        return "\n".join(lines)
+
+
+def profile_phase(profiler, name, issues=None):
+    """profiler.phase(...) ou um contexto vazio quando não tem profiler (o caso normal)."""
+    if profiler is None:
+        return nullcontext({})
+    return profiler.phase(name, issues)
@@ -0,0 +1,343 @@
+"""
+Modo projeto: valida vários arquivos como um grafo de diálogo só.
+
+Cada arquivo é lido e validado isoladamente (em paralelo) e devolve só um
+resumo compacto: ids dos nós, conexões, referências para outros arquivos
+("capitulo2.json#mercado_01") e flags. O texto e o JSON completo são
+descartados logo em seguida, então a memória cresce com o número de nós,
+não com o tamanho dos arquivos.
+
+Com todos os resumos em mãos, monta um índice global de nós e refaz as
+checagens que dependem do grafo inteiro: destinos entre arquivos, nós
+órfãos e flags requeridas que nunca são setadas em nenhum arquivo.
+"""
+import json
+import os
+import sys
+from functools import partial
+
+from batch_validation import expand_targets, map_files, open_output, report_no_files
+from dialogue_validator import (
+    add_issue,
+    is_external_target,
+    load_json_text,
+    validate_json_text,
+)
+from line_mapping import positions_of
+
+
+# Issues locais que só fazem sentido olhando o projeto inteiro.
+# A análise de fluxo das flags (CHOICE_*_AVAILABLE) supõe que o arquivo só é
+# percorrido a partir do próprio start, e a de loops (TRAPPED_LOOP,
+# NO_PATH_TO_END) trata saídas para outro arquivo como final; nenhuma das duas
+# vale entre arquivos.
+_GLOBAL_CODES = {
+    "ORPHAN_NODE",
+    "FLAG_REQUIRED_NEVER_SET",
+    "EXTERNAL_TARGET",
+    "CHOICE_NEVER_AVAILABLE",
+    "CHOICE_ALWAYS_AVAILABLE",
+    "TRAPPED_LOOP",
+    "NO_PATH_TO_END",
+}
+
+
+def _clean_flags(flags):
+    if not isinstance(flags, list):
+        return set()
+    return {flag.strip() for flag in flags if isinstance(flag, str) and flag.strip()}
+
+
+def summarize_dialogue(data, text):
+    """
+    Extrai do documento só o que o modo projeto precisa.
+    Supõe que validate_dialogue já reportou os problemas de tipo.
+    text é o conteúdo do arquivo: as posições (chave de cada nó, "nodes" e
+    referências externas) são calculadas de uma vez no final (line_mapping).
+    """
+    nodes = data.get("nodes") if isinstance(data, dict) else None
+    if not isinstance(nodes, dict):
+        nodes = {}
+
+    start = data.get("start") if isinstance(data, dict) else None
+    node_ids = list(nodes)
+
+    summary = {
+        "start": start if isinstance(start, str) and start in nodes else None,
+        "nodes": node_ids,
+        "positions": None,
+        "nodes_position": None,
+        "edges": [],      # (índice_do_nó, id_do_destino) dentro do arquivo
+        "external": [],   # (índice_do_nó, "arquivo#nó", path, posição)
+        "set_flags": set(),
+        "required_flags": set(),
+    }
+
+    def add_target(index, target, path):
+        if target in nodes:
+            summary["edges"].append((index, target))
+        elif is_external_target(target):
+            summary["external"].append((index, target, path, None))
+
+    for index, node_id in enumerate(node_ids):
+        node_data = nodes[node_id]
+        if not isinstance(node_data, dict):
+            continue
+        path = f"$.nodes.{node_id}"
+
+        next_node = node_data.get("next")
+        if isinstance(next_node, str):
+            add_target(index, next_node, f"{path}.next")
+
+        choices = node_data.get("choices")
+        if isinstance(choices, list):
+            for i, choice in enumerate(choices):
+                if not isinstance(choice, dict):
+                    continue
+                choice_next = choice.get("next")
+                if isinstance(choice_next, str):
+                    add_target(index, choice_next, f"{path}.choices[{i}].next")
+                summary["required_flags"] |= _clean_flags(choice.get("requires", []))
+
+        summary["set_flags"] |= _clean_flags(node_data.get("set_flags", []))
+
+    external = summary["external"]
+    paths = [f"$.nodes.{node_id}" for node_id in node_ids]
+    paths.append("$.nodes")
+    paths += [path for _, _, path, _ in external]
+    positions = positions_of(paths, text)
+    summary["positions"] = positions[:len(node_ids)]
+    summary["nodes_position"] = positions[len(node_ids)]
+    summary["external"] = [
+        (index, target, path, position)
+        for (index, target, path, _), position in zip(external, positions[len(node_ids) + 1:])
+    ]
+    return summary
+
+
+def summarize_file(file_path, rules=None):
+    """
+    Worker do pool: valida o arquivo sozinho e devolve as issues locais
+    (sem as que dependem do projeto) + o resumo do grafo.
+    """
+    result = {"file": str(file_path), "issues": [], "error": None, "summary": None}
+
+    try:
+        data, text = load_json_text(file_path)
+    except FileNotFoundError:
+        result["error"] = f"Arquivo não encontrado: {file_path}"
+        return result
+    except json.JSONDecodeError as e:
+        result["error"] = f"JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}"
+        return result
+    except (OSError, UnicodeDecodeError) as e:
+        result["error"] = f"Erro ao abrir o arquivo: {e}"
+        return result
+
+    issues = validate_json_text(data, text, rules=rules)
+    result["issues"] = [issue for issue in issues if issue["code"] not in _GLOBAL_CODES]
+    result["summary"] = summarize_dialogue(data, text)
+    return result
+
+
+def _add_positioned_issue(issues, level, code, message, path, position):
+    add_issue(issues, level, code, message, path)
+    if position is not None:
+        issues[-1]["line"], issues[-1]["column"] = position
+
+
+class ProjectGraph:
+    """
+    Índice global: cada nó do projeto vira um inteiro
+    (offset do arquivo + posição do nó dentro do arquivo).
+    """
+
+    def __init__(self):
+        self.files = []          # paths normalizados, na ordem da entrada
+        self.file_index = {}     # path normalizado -> índice
+        self.offsets = []        # primeiro id global de cada arquivo
+        self.local_ids = []      # por arquivo: id do nó -> índice local
+        self.adjacency = []      # id global -> lista de ids globais
+        self.starts = []         # id global do start de cada arquivo (ou None)
+
+    def add_file(self, file_path, summary):
+        key = os.path.normpath(os.path.abspath(file_path))
+        self.file_index[key] = len(self.files)
+        self.files.append(key)
+
+        offset = len(self.adjacency)
+        self.offsets.append(offset)
+
+        local = {node_id: i for i, node_id in enumerate(summary["nodes"])}
+        self.local_ids.append(local)
+        self.adjacency.extend([] for _ in summary["nodes"])
+
+        for index, target in summary["edges"]:
+            self.adjacency[offset + index].append(offset + local[target])
+
+        start = summary["start"]
+        self.starts.append(offset + local[start] if start is not None else None)
+
+    def resolve(self, from_file_index, target):
+        """
+        "capitulo2.json#mercado_01" -> (id global ou None, motivo).
+        O arquivo é relativo à pasta de quem faz a referência.
+        """
+        file_part, _, node_id = target.partition("#")
+        base_dir = os.path.dirname(self.files[from_file_index])
+        key = os.path.normpath(os.path.join(base_dir, file_part))
+
+        file_index = self.file_index.get(key)
+        if file_index is None:
+            return None, f"o arquivo '{file_part}' não faz parte do projeto"
+
+        local = self.local_ids[file_index].get(node_id)
+        if local is None:
+            return None, f"o nó '{node_id}' não existe em '{file_part}'"
+
+        return self.offsets[file_index] + local, None
+
+    def reachable_from(self, roots):
+        visited = bytearray(len(self.adjacency))
+        stack = list(roots)
+
+        while stack:
+            current = stack.pop()
+            if visited[current]:
+                continue
+            visited[current] = 1
+            for neighbor in self.adjacency[current]:
+                if not visited[neighbor]:
+                    stack.append(neighbor)
+
+        return visited
+
+
+def validate_project(file_paths, jobs=None, entry_points=None, rules=None):
+    """
+    Valida os arquivos como um projeto só e retorna a lista de resultados
+    ({"file", "issues", "error"}) na ordem da entrada.
+
+    entry_points: lista de "arquivo.json#nó" que iniciam o jogo. Sem isso,
+    o start de cada arquivo conta como ponto de entrada.
+    rules: RuleSelection (rules.py); desligar uma regra também tira as
+    issues de projeto com os codes dela.
+    """
+    graph = ProjectGraph()
+    results = []
+    summaries = []
+
+    # 1) Resumo de cada arquivo (em paralelo); só o resumo fica na memória
+    for result in map_files(partial(summarize_file, rules=rules), file_paths, jobs):
+        summary = result.pop("summary")
+        results.append(result)
+        summaries.append(summary)
+        if summary is not None:
+            graph.add_file(result["file"], summary)
+
+    file_of_result = {}
+    for i, result in enumerate(results):
+        if summaries[i] is not None:
+            file_of_result[i] = graph.file_index[os.path.normpath(os.path.abspath(result["file"]))]
+
+    # 2) Referências entre arquivos
+    for i, summary in enumerate(summaries):
+        if summary is None:
+            continue
+        file_index = file_of_result[i]
+        offset = graph.offsets[file_index]
+
+        for index, target, path, position in summary["external"]:
+            target_id, reason = graph.resolve(file_index, target)
+            if target_id is None:
+                _add_positioned_issue(
+                    results[i]["issues"],
+                    "ERROR",
+                    "TARGET_NOT_FOUND",
+                    f"Destino '{target}' não encontrado: {reason}.",
+                    path,
+                    position,
+                )
+            else:
+                graph.adjacency[offset + index].append(target_id)
+
+        # Libera o que não vai mais ser usado
+        summary["edges"] = summary["external"] = None
+
+    # 3) Nós órfãos no grafo combinado
+    roots = []
+    if entry_points:
+        for entry in entry_points:
+            file_part, _, node_id = entry.partition("#")
+            key = os.path.normpath(os.path.abspath(file_part))
+            file_index = graph.file_index.get(key)
+            local = graph.local_ids[file_index].get(node_id) if file_index is not None else None
+            if local is None:
+                raise ValueError(f"Ponto de entrada não encontrado: {entry}")
+            roots.append(graph.offsets[file_index] + local)
+    else:
+        roots = [start for start in graph.starts if start is not None]
+
+    reachable = graph.reachable_from(roots)
+
+    for i, summary in enumerate(summaries):
+        if summary is None:
+            continue
+        file_index = file_of_result[i]
+        offset = graph.offsets[file_index]
+
+        for index, node_id in enumerate(summary["nodes"]):
+            if not reachable[offset + index]:
+                _add_positioned_issue(
+                    results[i]["issues"],
+                    "WARNING",
+                    "ORPHAN_NODE",
+                    "Nó órfão (não alcançável a partir dos pontos de entrada do projeto).",
+                    f"$.nodes.{node_id}",
+                    summary["positions"][index],
+                )
+
+    # 4) Flags requeridas que nenhum arquivo seta
+    set_anywhere = set()
+    for summary in summaries:
+        if summary is not None:
+            set_anywhere |= summary["set_flags"]
+
+    for i, summary in enumerate(summaries):
+        if summary is None:
+            continue
+        for flag in sorted(summary["required_flags"] - set_anywhere):
+            _add_positioned_issue(
+                results[i]["issues"],
+                "WARNING",
+                "FLAG_REQUIRED_NEVER_SET",
+                f"A flag '{flag}' é requerida em uma choice, mas nunca é setada em nenhum arquivo do projeto.",
+                "$.nodes",
+                summary["nodes_position"],
+            )
+
+    disabled_codes = rules.enabled().disabled_codes if rules is not None else None
+    if disabled_codes:
+        for result in results:
+            result["issues"] = [issue for issue in result["issues"] if issue["code"] not in disabled_codes]
+
+    return results
+
+
+def run_project(targets, jobs=None, entry_points=None, output_format="text", rules=None):
+    """Versão de linha de comando do modo projeto. Retorna o exit code."""
+    file_paths = expand_targets(targets)
+    if not file_paths:
+        return report_no_files(output_format)
+
+    try:
+        results = validate_project(file_paths, jobs=jobs, entry_points=entry_points, rules=rules)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr if output_format != "text" else sys.stdout)
+        return 1
+
+    output = open_output(output_format)
+    for result in results:
+        output.add(result)
+
+    return output.close()
@@ -0,0 +1,173 @@
+"""
+Saídas para máquina (--format jsonl|sarif|junit), para CI e outras ferramentas.
+
+Cada writer recebe os resultados arquivo por arquivo ({"file", "issues",
+"error"}, os mesmos do modo lote) e escreve na hora: o relatório inteiro
+nunca fica na memória e as issues não são reordenadas.
+
+Ordem (a mesma nos três formatos):
+- arquivos na ordem da entrada (pastas em ordem alfabética, como no modo lote)
+- dentro de um arquivo, na ordem em que o validador encontra: campos da
+  raiz, nós na ordem do documento e por último as checagens de grafo
+  (órfãos, flags, loops)
+A mesma entrada gera sempre a mesma saída (não tem data nem tempo no meio).
+
+jsonl
+    Uma linha JSON por issue: {"file", "level", "code", "message", "path",
+    "line", "column"} (line/column só quando conhecidas). Arquivo que não deu
+    para ler vira uma linha com code FILE_ERROR e path "$".
+sarif
+    SARIF 2.1.0 com um run. Cada issue é um result: ruleId = code, level
+    error/warning/note, região com linha/coluna e o path em logicalLocations.
+junit
+    Um <testsuite> por arquivo e um <testcase> por issue (name = "CODE path").
+    Só ERROR vira <failure> (mesma regra do exit code); WARNING e INFO passam
+    e levam a mensagem em <system-out>. Arquivo ilegível vira <error>.
+    Arquivo sem issues tem um testcase só, que passa.
+"""
+import json
+import sys
+from pathlib import PurePath
+from xml.sax.saxutils import escape, quoteattr
+
+from dialogue_validator import VALIDATOR_VERSION
+
+
+TOOL_NAME = "narrative-flow-checker"
+
+FILE_ERROR = "FILE_ERROR"
+
+_SARIF_LEVELS = {"ERROR": "error", "WARNING": "warning", "INFO": "note"}
+
+
+def _file_error_issue(result):
+    return {"level": "ERROR", "code": FILE_ERROR, "message": result["error"], "path": "$"}
+
+
+class JsonLinesWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def add(self, result):
+        issues = [_file_error_issue(result)] if result["error"] else result["issues"]
+        for issue in issues:
+            record = {
+                "file": result["file"],
+                "level": issue["level"],
+                "code": issue["code"],
+                "message": issue["message"],
+                "path": issue["path"],
+            }
+            if "line" in issue:
+                record["line"] = issue["line"]
+                record["column"] = issue.get("column")
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.stream.flush()
+
+
+class SarifWriter:
+    """
+    O documento é aberto no começo e cada result é escrito assim que chega
+    (um por linha dentro do array "results"); close() fecha o JSON.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.first = True
+        tool = {"driver": {"name": TOOL_NAME, "version": VALIDATOR_VERSION}}
+        stream.write(
+            '{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", "version": "2.1.0", '
+            f'"runs": [{{"tool": {json.dumps(tool)}, "results": [\n'
+        )
+
+    def add(self, result):
+        uri = PurePath(result["file"]).as_posix()
+        issues = [_file_error_issue(result)] if result["error"] else result["issues"]
+        for issue in issues:
+            location = {"physicalLocation": {"artifactLocation": {"uri": uri}}}
+            if "line" in issue:
+                region = {"startLine": issue["line"]}
+                if issue.get("column"):
+                    region["startColumn"] = issue["column"]
+                location["physicalLocation"]["region"] = region
+            location["logicalLocations"] = [{"fullyQualifiedName": issue["path"]}]
+
+            sarif_result = {
+                "ruleId": issue["code"],
+                "level": _SARIF_LEVELS.get(issue["level"], "note"),
+                "message": {"text": issue["message"]},
+                "locations": [location],
+            }
+            if not self.first:
+                self.stream.write(",\n")
+            self.first = False
+            self.stream.write(json.dumps(sarif_result, ensure_ascii=False))
+
+    def close(self):
+        self.stream.write("\n]}]}\n")
+        self.stream.flush()
+
+
+class JUnitWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        stream.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        stream.write(f"<testsuites name={quoteattr(TOOL_NAME)}>\n")
+
+    def add(self, result):
+        file_name = quoteattr(result["file"])
+        write = self.stream.write
+
+        if result["error"]:
+            write(f'  <testsuite name={file_name} tests="1" failures="0" errors="1">\n')
+            write(f'    <testcase classname={file_name} name="{FILE_ERROR}">\n')
+            write(f'      <error message={quoteattr(result["error"])} type="{FILE_ERROR}"/>\n')
+            write("    </testcase>\n")
+            write("  </testsuite>\n")
+            return
+
+        issues = result["issues"]
+        failures = sum(1 for issue in issues if issue["level"] == "ERROR")
+        write(
+            f"  <testsuite name={file_name} tests=\"{max(len(issues), 1)}\" "
+            f"failures=\"{failures}\" errors=\"0\">\n"
+        )
+        if not issues:
+            write(f'    <testcase classname={file_name} name="validacao"/>\n')
+
+        for issue in issues:
+            name = quoteattr(f"{issue['code']} {issue['path']}")
+            detail = issue["message"]
+            if "line" in issue:
+                detail += f" (Linha {issue['line']}, Coluna {issue.get('column')})"
+
+            write(f"    <testcase classname={file_name} name={name}>\n")
+            if issue["level"] == "ERROR":
+                write(
+                    f"      <failure message={quoteattr(issue['message'])} type={quoteattr(issue['code'])}>"
+                    f"{escape(detail)}</failure>\n"
+                )
+            else:
+                output = escape(f"[{issue['level']}] {detail}")
+                write(f"      <system-out>{output}</system-out>\n")
+            write("    </testcase>\n")
+
+        write("  </testsuite>\n")
+
+    def close(self):
+        self.stream.write("</testsuites>\n")
+        self.stream.flush()
+
+
+FORMATS = {
+    "jsonl": JsonLinesWriter,
+    "sarif": SarifWriter,
+    "junit": JUnitWriter,
+}
+
+
+def open_writer(output_format, stream=None):
+    """Writer do formato pedido, escrevendo no stdout por padrão."""
+    return FORMATS[output_format](stream if stream is not None else sys.stdout)
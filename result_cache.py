@@ -0,0 +1,164 @@
+"""
+Cache em disco dos resultados de validação (SQLite em .nfc_cache/).
+
+A chave é o hash do conteúdo do arquivo + VALIDATOR_VERSION, então arquivo
+que não mudou nem é lido de novo pelo validador. Para não ter que ler e
+hashear tudo a cada execução, guardamos também (path, mtime, tamanho) -> hash.
+O tamanho total é limitado: quando passa do limite, os resultados usados há
+mais tempo são removidos primeiro (LRU).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from dialogue_validator import VALIDATOR_VERSION
+
+
+DEFAULT_CACHE_DIR = ".nfc_cache"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    content_hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (content_hash, version)
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+"""
+
+
+def hash_file(file_path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, version=VALIDATOR_VERSION):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.version = version
+        self.db = sqlite3.connect(os.path.join(cache_dir, "results.sqlite3"), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+        # Atualizações acumuladas e gravadas de uma vez no flush()
+        self._touched = []
+        self._file_rows = []
+
+    # ---------------------------------------------------------
+    # Leitura
+    # ---------------------------------------------------------
+    def content_hash(self, file_path):
+        """
+        Hash do conteúdo. Se mtime e tamanho não mudaram desde a última vez,
+        reaproveita o hash salvo sem abrir o arquivo.
+        """
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+
+        row = self.db.execute(
+            "SELECT mtime_ns, size, content_hash FROM files WHERE path = ?", (key,)
+        ).fetchone()
+        if row is not None and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+            return row[2]
+
+        content_hash = hash_file(file_path)
+        self._file_rows.append((key, stat.st_mtime_ns, stat.st_size, content_hash))
+        return content_hash
+
+    def get(self, content_hash):
+        """Retorna {"issues", "error"} salvo para esse conteúdo, ou None."""
+        row = self.db.execute(
+            "SELECT payload FROM results WHERE content_hash = ? AND version = ?",
+            (content_hash, self.version),
+        ).fetchone()
+        if row is None:
+            return None
+        self._touched.append((time.time(), content_hash, self.version))
+        return json.loads(row[0])
+
+    def lookup(self, file_path):
+        """
+        Retorna (content_hash, resultado_ou_None).
+        Arquivo inexistente/ilegível volta (None, None): deixa o validador reportar o erro.
+        """
+        try:
+            content_hash = self.content_hash(file_path)
+        except OSError:
+            return None, None
+        return content_hash, self.get(content_hash)
+
+    # ---------------------------------------------------------
+    # Escrita
+    # ---------------------------------------------------------
+    def put(self, content_hash, result):
+        payload = json.dumps(
+            {"issues": result["issues"], "error": result["error"]},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        self.db.execute(
+            "INSERT OR REPLACE INTO results (content_hash, version, payload, size, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (content_hash, self.version, payload, len(payload), time.time()),
+        )
+
+    def flush(self):
+        """Grava hashes/uso pendentes, aplica o limite de tamanho e faz commit."""
+        if self._file_rows:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, content_hash) VALUES (?, ?, ?, ?)",
+                self._file_rows,
+            )
+            self._file_rows = []
+        if self._touched:
+            self.db.executemany(
+                "UPDATE results SET last_used = ? WHERE content_hash = ? AND version = ?",
+                self._touched,
+            )
+            self._touched = []
+        self.evict()
+        self.db.commit()
+
+    def evict(self):
+        """Remove os resultados menos usados até o total ficar abaixo de max_bytes."""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Libera um pouco além do limite para não evictar a cada execução
+        target = int(self.max_bytes * 0.9)
+        doomed = []
+        for content_hash, version, size in self.db.execute(
+            "SELECT content_hash, version, size FROM results ORDER BY last_used"
+        ).fetchall():
+            if total <= target:
+                break
+            doomed.append((content_hash, version))
+            total -= size
+
+        self.db.executemany(
+            "DELETE FROM results WHERE content_hash = ? AND version = ?", doomed
+        )
+        self.db.execute(
+            "DELETE FROM files WHERE content_hash NOT IN (SELECT content_hash FROM results)"
+        )
+
+    def close(self):
+        self.flush()
+        self.db.close()
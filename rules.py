@@ -0,0 +1,248 @@
+"""
+Registro das regras de validação (--rules / --skip-rules / --plugin).
+
+Cada regra tem um nome, um escopo e a lista de campos que ela lê:
+
+- "node": roda para cada nó, dentro da mesma passada do check_node
+  (uma passada só sobre os nós para todas as regras ligadas).
+  check(state, node_id, node_data, path) adiciona em state.issues.
+  reads = campos do nó; nó sem nenhum desses campos nem chama a regra.
+- "graph": roda uma vez, sobre o CompiledGraph já montado.
+  check(context, issues) recebe um GraphContext e a lista onde escrever.
+  reads = o que ela usa do contexto ("reachable" é calculado uma vez antes,
+  se alguma regra ligada precisar).
+
+As regras embutidas de nó (estrutura, destinos, flags...) continuam dentro do
+check_node, porque o grafo é montado na mesma passada; desligar uma delas só
+descarta as issues com os codes dela. As regras de grafo são funções de verdade
+e desligar uma evita o trabalho todo (é onde está o custo).
+
+Regras de grafo são independentes entre si (cada uma escreve na própria lista,
+e as listas são juntadas na ordem do registro, então a saída é a mesma com ou
+sem threads). Com threads > 1 elas rodam num ThreadPoolExecutor; por padrão
+isso só acontece no Python sem GIL, onde elas realmente rodam ao mesmo tempo.
+
+Tags agrupam regras para a linha de comando: "fast" (barata, roda no
+pre-commit) e "slow" (análise de fluxo, para o CI completo).
+
+Regra de um projeto (ex: speaker precisa existir no elenco) fica num arquivo
+.py carregado com --plugin, que registra com os decorators daqui:
+
+    from dialogue_validator import add_issue
+    from rules import node_rule
+
+    @node_rule("cast", codes=["UNKNOWN_SPEAKER"], reads=["speaker"])
+    def check_cast(state, node_id, node_data, path):
+        ...
+"""
+import hashlib
+import importlib.util
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from profiling import profile_phase
+
+
+NODE = "node"
+GRAPH = "graph"
+
+
+class Rule:
+    def __init__(self, name, scope, check=None, codes=(), reads=(), tags=(), description=""):
+        self.name = name
+        self.scope = scope
+        self.check = check            # None = embutida no check_node (só filtra pelos codes)
+        self.codes = tuple(codes)
+        self.reads = tuple(reads)
+        self.tags = tuple(tags)
+        self.description = description
+
+
+# nome -> Rule, na ordem de registro (a ordem em que as issues saem)
+REGISTRY = {}
+
+# Arquivos de plugin já carregados (caminho absoluto -> hash do conteúdo)
+_loaded_plugins = {}
+
+
+def register(rule):
+    if rule.scope not in (NODE, GRAPH):
+        raise ValueError(f"Escopo inválido para a regra '{rule.name}': {rule.scope}")
+    if rule.name in REGISTRY:
+        raise ValueError(f"Regra registrada duas vezes: '{rule.name}'")
+    REGISTRY[rule.name] = rule
+    return rule
+
+
+def node_rule(name, codes=(), reads=(), tags=(), description=""):
+    """Decorator: registra check(state, node_id, node_data, path) como regra de nó."""
+    def decorator(check):
+        register(Rule(name, NODE, check, codes, reads, tags, description or (check.__doc__ or "").strip()))
+        return check
+    return decorator
+
+
+def graph_rule(name, codes=(), reads=(), tags=(), description=""):
+    """Decorator: registra check(context, issues) como regra de grafo."""
+    def decorator(check):
+        register(Rule(name, GRAPH, check, codes, reads, tags, description or (check.__doc__ or "").strip()))
+        return check
+    return decorator
+
+
+def load_plugins(paths):
+    """Importa os arquivos .py de regras (cada um só uma vez por processo)."""
+    for path in paths:
+        key = os.path.abspath(path)
+        if key in _loaded_plugins:
+            continue
+        with open(key, "rb") as file:
+            content_hash = hashlib.blake2b(file.read(), digest_size=10).hexdigest()
+
+        module_name = f"nfc_plugin_{content_hash}"
+        spec = importlib.util.spec_from_file_location(module_name, key)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        _loaded_plugins[key] = content_hash
+
+
+class EnabledRules:
+    """O resultado de uma RuleSelection: o que roda e o que é filtrado."""
+
+    def __init__(self, rules, threads):
+        self.node_rules = [rule for rule in rules if rule.scope == NODE and rule.check is not None]
+        self.graph_rules = [rule for rule in rules if rule.scope == GRAPH]
+        enabled_codes = {code for rule in rules for code in rule.codes}
+        # Code de regra desligada só some se nenhuma regra ligada também o usa
+        self.disabled_codes = {
+            code
+            for rule in REGISTRY.values() if rule not in rules
+            for code in rule.codes
+        } - enabled_codes
+        self.threads = threads
+
+
+class RuleSelection:
+    """
+    Quais regras rodam. only/skip aceitam nomes de regra ou tags; sem only,
+    todas as registradas (inclusive as dos plugins). Pode ir para os workers
+    do modo lote: só os nomes e caminhos são copiados, e cada processo
+    carrega os plugins de novo.
+    """
+
+    def __init__(self, only=None, skip=None, plugins=None, threads=None):
+        self.only = list(only or [])
+        self.skip = list(skip or [])
+        self.plugins = list(plugins or [])
+        self.threads = threads
+        self._enabled = None
+        self._registry_size = 0
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_enabled"] = None   # funções de plugin não são picláveis
+        return state
+
+    @property
+    def is_default(self):
+        return not (self.only or self.skip or self.plugins)
+
+    def _match(self, tokens):
+        names = set()
+        unknown = []
+        for token in tokens:
+            matched = [rule.name for rule in REGISTRY.values() if token == rule.name or token in rule.tags]
+            if not matched:
+                unknown.append(token)
+            names.update(matched)
+        if unknown:
+            known = ", ".join(REGISTRY)
+            raise ValueError(f"Regra ou tag desconhecida: {', '.join(unknown)} (regras: {known})")
+        return names
+
+    def enabled(self):
+        # Recalcula se alguma regra foi registrada depois (plugin importado por fora)
+        if self._enabled is None or self._registry_size != len(REGISTRY):
+            load_plugins(self.plugins)
+            selected = self._match(self.only) if self.only else set(REGISTRY)
+            selected -= self._match(self.skip)
+            rules = [rule for rule in REGISTRY.values() if rule.name in selected]
+
+            threads = self.threads
+            if threads is None:
+                gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+                threads = 1 if gil_enabled else len(rules)
+            self._enabled = EnabledRules(rules, threads)
+            self._registry_size = len(REGISTRY)
+        return self._enabled
+
+    def fingerprint(self):
+        """Identifica a seleção no cache em disco (regras ligadas + conteúdo dos plugins)."""
+        enabled = self.enabled()
+        names = sorted(rule.name for rule in enabled.node_rules + enabled.graph_rules)
+        names += sorted(enabled.disabled_codes)
+        plugins = sorted(_loaded_plugins[os.path.abspath(path)] for path in self.plugins)
+        text = "|".join(names + plugins)
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+ALL_RULES = RuleSelection()
+
+
+class GraphContext:
+    """O que as regras de grafo recebem (só leitura)."""
+
+    def __init__(self, state, graph, start, reachable=None, reverse=None):
+        self.state = state
+        self.graph = graph
+        self.start = start
+        self.start_index = graph.index.get(start) if isinstance(start, str) else None
+        # Quem já tem o alcance/o grafo invertido (validação incremental) passa pronto
+        self._reachable = reachable
+        self._reverse = reverse
+
+    @property
+    def reachable(self):
+        """bytearray: 1 = alcançável a partir do start (None sem start válido)."""
+        if self._reachable is None and self.start_index is not None:
+            self._reachable = self.graph.reachable_from([self.start_index])
+        return self._reachable
+
+    @property
+    def reverse(self):
+        """O grafo com as arestas invertidas (CompiledGraph.reversed)."""
+        if self._reverse is None:
+            self._reverse = self.graph.reversed()
+        return self._reverse
+
+
+def run_node_rules(state, node_rules, node_id, node_data, path):
+    for rule in node_rules:
+        if rule.reads and not any(field in node_data for field in rule.reads):
+            continue
+        rule.check(state, node_id, node_data, path)
+
+
+def run_graph_rules(context, enabled, issues, profiler=None):
+    """Roda as regras de grafo ligadas e junta as issues de cada uma, na ordem do registro."""
+    rules = enabled.graph_rules
+    if any("reachable" in rule.reads for rule in rules):
+        context.reachable   # calculado antes, para as threads não disputarem
+
+    def run(rule):
+        rule_issues = []
+        with profile_phase(profiler, rule.name, rule_issues):
+            rule.check(context, rule_issues)
+        return rule_issues
+
+    if enabled.threads > 1 and len(rules) > 1 and profiler is None:
+        with ThreadPoolExecutor(max_workers=min(enabled.threads, len(rules))) as executor:
+            results = list(executor.map(run, rules))
+    else:
+        # Com profiler as fases precisam abrir e fechar em ordem
+        results = [run(rule) for rule in rules]
+
+    for rule_issues in results:
+        issues.extend(rule_issues)
@@ -0,0 +1,354 @@
+"""
+Validação em streaming para arquivos de diálogo muito grandes.
+
+Em vez de carregar o documento inteiro (json.load) e depois o texto de novo
+para achar as linhas, o arquivo é lido em blocos e os nós de "nodes" são
+decodificados um por vez. Cada nó passa pelas mesmas checagens do
+validate_dialogue (check_node) assim que chega e depois é descartado.
+Só ficam na memória as tabelas compactas do grafo (ids, arestas em CSR,
+bitmasks de flags) e a linha/coluna de cada nó, usadas nas checagens finais
+(órfãos, flags, loops).
+
+Linhas e colunas:
+- issues de um nó saem exatas (o trecho do nó é reprocessado com spans só
+  quando ele gerou alguma issue)
+- issues que só são resolvidas no final (destino que aparece depois, flag
+  declarada depois dos nós) apontam para a linha do nó
+- issues da raiz saem na mesma ordem e com as mesmas posições do
+  validate_json_text: as de "flags" ficam guardadas até se saber se "nodes"
+  é válido, e campo ausente aponta para o começo do documento
+"""
+import json
+import re
+from array import array
+
+from compiled_graph import GraphBuilder
+from dialogue_validator import (
+    ValidationState,
+    add_issue,
+    check_declared_flags,
+    check_node,
+    drop_disabled_issues,
+    finish_validation,
+    node_id_from_path,
+)
+from json_positions import lookup_span, parse_with_spans
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+
+class _StreamReader:
+    """Buffer de texto que vai sendo lido do arquivo conforme precisa."""
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+        # Offset absoluto do buf[0] e um cursor de linha que só anda para frente,
+        # para não recontar as quebras de linha do buffer inteiro a cada consulta.
+        self.offset = 0
+        self.cursor = 0
+        self.cursor_line = 1
+        self.cursor_line_start = 0
+
+    def _fill(self, size=None):
+        """Descarta o que já foi consumido e lê mais um bloco. False no fim do arquivo."""
+        if self.eof:
+            return False
+
+        self.position(self.pos)
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+
+        chunk = self.file.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def position(self, pos):
+        """(linha, coluna) de uma posição do buffer atual."""
+        absolute = self.offset + pos
+        cursor_pos = self.cursor - self.offset
+
+        if absolute >= self.cursor:
+            newlines = self.buf.count("\n", cursor_pos, pos)
+            if newlines:
+                self.cursor_line += newlines
+                self.cursor_line_start = self.offset + self.buf.rfind("\n", cursor_pos, pos) + 1
+            self.cursor = absolute
+            return (self.cursor_line, absolute - self.cursor_line_start + 1)
+
+        # Para trás (só acontece em mensagens de erro): não mexe no cursor
+        newlines = self.buf.count("\n", pos, cursor_pos)
+        line_start = self.buf.rfind("\n", 0, pos)
+        if line_start >= 0:
+            return (self.cursor_line - newlines, pos - line_start)
+        return (self.cursor_line - newlines, absolute - self.cursor_line_start + 1)
+
+    def error(self, message, pos=None):
+        pos = self.pos if pos is None else pos
+        e = json.JSONDecodeError(message, self.buf, pos)
+        e.lineno, e.colno = self.position(pos)
+        return e
+
+    def peek(self):
+        """Pula espaços e retorna o próximo caractere ("" no fim do arquivo)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char, message):
+        if self.peek() != char:
+            raise self.error(message)
+        self.pos += 1
+
+    def read_value(self):
+        """
+        Decodifica o próximo valor JSON. Retorna (valor, início, fim) no buffer.
+        Lê mais blocos (cada vez maiores) enquanto o valor estiver incompleto.
+
+        Um erro do decoder pode ser só falta de texto: a posição dele não diz
+        nada (string cortada aponta para o começo da string). Então sempre lê
+        mais e tenta de novo; o erro só vale no fim do arquivo ou quando se
+        repete igual (mesma mensagem e posição) com o buffer maior. String sem
+        fim só se confirma no fim do arquivo.
+        """
+        self.peek()
+        read_size = self.chunk_size
+        last_error = None
+
+        while True:
+            start = self.pos
+            try:
+                value, end = self.decoder.raw_decode(self.buf, start)
+            except json.JSONDecodeError as e:
+                error = (e.msg, self.offset + e.pos)
+                if self.eof or (error == last_error and not e.msg.startswith("Unterminated string")):
+                    raise self.error(e.msg, e.pos)
+                last_error = error
+            else:
+                # Número/literal colado no fim do buffer pode continuar no próximo bloco
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value, start, end
+
+            if not self._fill(read_size):
+                continue
+            read_size *= 2
+
+
+def _attach_node_positions(issues, first_issue, node_path, key_position, node_text, value_position):
+    """
+    Linhas/colunas das issues geradas por um nó: reprocessa só o trecho dele.
+    value_position é onde o valor do nó começa no arquivo.
+    """
+    _, spans = parse_with_spans(node_text)
+    value_line, value_column = value_position
+
+    for issue in issues[first_issue:]:
+        path = issue["path"]
+        if path == node_path or not path.startswith(node_path):
+            issue["line"], issue["column"] = key_position
+            continue
+
+        path_span = lookup_span(spans, "$" + path[len(node_path):])
+        if path_span is None:
+            issue["line"], issue["column"] = key_position
+            continue
+
+        span = path_span.key or path_span.value
+        issue["line"] = value_line + span.line - 1
+        issue["column"] = value_column + span.column - 1 if span.line == 1 else span.column
+
+
+def validate_stream(file, chunk_size=DEFAULT_CHUNK_SIZE, rules=None):
+    """
+    Valida um arquivo aberto (modo texto) sem carregar o documento inteiro.
+    Retorna a lista de issues, já com line/column.
+    Erros de sintaxe levantam json.JSONDecodeError, como no load_json_file.
+    rules: RuleSelection (rules.py); None = todas as regras.
+    """
+    reader = _StreamReader(file, chunk_size)
+    issues = []
+    positions = {}           # path de campo da raiz -> (linha, coluna)
+    node_lines = array("i")  # linha/coluna da chave de cada nó, por índice
+    node_columns = array("i")
+
+    start = None
+    nodes_seen = False
+    node_count = 0
+    declared_flags = None
+    flag_issues = []         # só entram se "nodes" for válido, como no validate_dialogue
+
+    state = ValidationState(GraphBuilder(deferred=True), issues, complete=False, rules=rules)
+
+    # Raiz
+    is_object = reader.peek() == "{"
+    positions["$"] = reader.position(reader.pos)
+    if not is_object:
+        reader.read_value()
+        if reader.peek():
+            raise reader.error("Extra data")
+        add_issue(issues, "ERROR", "ROOT_TYPE", "O JSON raiz precisa ser um objeto.", "$")
+        issues[-1]["line"], issues[-1]["column"] = positions["$"]
+        return issues
+    reader.pos += 1
+
+    first_member = True
+    while True:
+        char = reader.peek()
+        if char == "}":
+            reader.pos += 1
+            break
+        if not first_member:
+            reader.expect(",", "Expecting ',' delimiter")
+            reader.peek()
+        first_member = False
+
+        if reader.peek() != '"':
+            raise reader.error("Expecting property name enclosed in double quotes")
+        key_position = reader.position(reader.pos)
+        key, _, _ = reader.read_value()
+        reader.expect(":", "Expecting ':' delimiter")
+        positions[f"$.{key}"] = key_position
+
+        if key == "nodes" and reader.peek() == "{":
+            nodes_seen = True
+            reader.pos += 1
+
+            # --- nós, um por vez ---
+            first_node = True
+            while True:
+                if reader.peek() == "}":
+                    reader.pos += 1
+                    break
+                if not first_node:
+                    reader.expect(",", "Expecting ',' delimiter")
+                    reader.peek()
+                first_node = False
+
+                if reader.peek() != '"':
+                    raise reader.error("Expecting property name enclosed in double quotes")
+                node_key_position = reader.position(reader.pos)
+                node_id, _, _ = reader.read_value()
+                reader.expect(":", "Expecting ':' delimiter")
+                reader.peek()
+                value_position = reader.position(reader.pos)
+                node_data, value_start, value_end = reader.read_value()
+
+                node_index = state.graph_builder.add_node(node_id)
+                if node_index == len(node_lines):
+                    node_lines.append(node_key_position[0])
+                    node_columns.append(node_key_position[1])
+                node_count += 1
+
+                first_issue = len(issues)
+                state.declared_flags = declared_flags
+                check_node(state, node_index, node_id, node_data)
+                if len(issues) > first_issue:
+                    _attach_node_positions(
+                        issues,
+                        first_issue,
+                        f"$.nodes.{node_id}",
+                        node_key_position,
+                        reader.buf[value_start:value_end],
+                        value_position,
+                    )
+            continue
+
+        reader.peek()
+        value_position = reader.position(reader.pos)
+        value, value_start, value_end = reader.read_value()
+
+        if key == "start":
+            start = value
+        elif key == "flags":
+            flag_issues = []
+            declared_flags = check_declared_flags(value, flag_issues)
+            if flag_issues:
+                _attach_node_positions(
+                    flag_issues, 0, "$.flags", key_position,
+                    reader.buf[value_start:value_end], value_position,
+                )
+        elif key == "nodes":
+            # "nodes" que não é objeto: cai no NODES_INVALID lá embaixo
+            nodes_seen = False
+
+    if reader.peek():
+        raise reader.error("Extra data")
+
+    # Checagens da raiz (que só dá para fazer com o arquivo inteiro lido).
+    # Saem na frente das issues dos nós, na ordem do validate_dialogue.
+    root_issues = []
+
+    if not isinstance(start, str) or not start.strip():
+        add_issue(root_issues, "ERROR", "MISSING_START", "Campo 'start' ausente ou inválido.", "$.start")
+
+    if not nodes_seen or node_count == 0:
+        # Como no validate_dialogue, só estas (nem flags nem um "nodes" anterior contam)
+        add_issue(root_issues, "ERROR", "NODES_INVALID", "Campo 'nodes' ausente, vazio ou inválido.", "$.nodes")
+        _attach_root_positions(root_issues, 0, positions)
+        return root_issues
+
+    root_issues.extend(flag_issues)
+    if isinstance(start, str) and start not in state.graph_builder.index:
+        add_issue(root_issues, "ERROR", "START_NOT_FOUND", f"O nó inicial '{start}' não existe.", "$.start")
+    _attach_root_positions(root_issues, 0, positions)
+
+    first_issue = len(issues)
+    state.declared_flags = declared_flags
+    finish_validation(state, start)
+
+    node_index = state.graph_builder.index
+    for issue in issues[first_issue:]:
+        if "line" in issue:
+            continue
+        # $.nodes.<id> ou $.nodes.<id>.campo -> linha do nó
+        node_id = node_id_from_path(issue["path"], node_index)
+        if node_id is not None:
+            index = node_index[node_id]
+            issue["line"], issue["column"] = node_lines[index], node_columns[index]
+
+    _attach_root_positions(issues, first_issue, positions)
+    issues[:0] = root_issues
+    drop_disabled_issues(state)
+    return issues
+
+
+_ROOT_KEY = re.compile(r"\$\.[^.\[]+")
+
+
+def _attach_root_positions(issues, first_issue, positions):
+    """
+    Issues ainda sem linha: usa a posição do campo da raiz ($.start, $.flags,
+    $.nodes) ou, se o campo não existe no arquivo, a do começo do documento.
+    """
+    for issue in issues[first_issue:]:
+        if "line" in issue:
+            continue
+        root_key = _ROOT_KEY.match(issue["path"])
+        position = positions.get(root_key.group()) if root_key else None
+        if position is None:
+            position = positions.get("$")
+        if position is not None:
+            issue["line"], issue["column"] = position
+
+
+def validate_file_streaming(file_path, chunk_size=DEFAULT_CHUNK_SIZE, rules=None):
+    """Abre o arquivo e valida em streaming. Retorna a lista de issues."""
+    with open(file_path, "r", encoding="utf-8") as file:
+        return validate_stream(file, chunk_size, rules)
@@ -0,0 +1,26 @@
+import unittest
+
+from benchmarks.generator import STYLES, dump_dialogue, generate_dialogue
+from dialogue_validator import validate_dialogue
+
+
+class GenerateDialogueTests(unittest.TestCase):
+    def test_any_seed_and_ratio(self):
+        for orphan_ratio in (0.0, 0.01, 0.3, 0.9):
+            for node_count in (1, 2, 3, 50, 300):
+                for seed in range(40):
+                    with self.subTest(orphan_ratio=orphan_ratio, node_count=node_count, seed=seed):
+                        data = generate_dialogue(node_count, seed=seed, orphan_ratio=orphan_ratio)
+                        self.assertEqual(len(data["nodes"]), node_count)
+                        orphans = [issue for issue in validate_dialogue(data) if issue["code"] == "ORPHAN_NODE"]
+                        self.assertEqual(len(orphans), int(max(node_count - 1, 0) * orphan_ratio))
+
+    def test_same_seed_same_document(self):
+        first = generate_dialogue(200, seed=24)
+        self.assertEqual(first, generate_dialogue(200, seed=24))
+        for style in STYLES:
+            self.assertTrue(dump_dialogue(first, style))
+
+
+if __name__ == "__main__":
+    unittest.main()
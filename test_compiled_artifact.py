@@ -0,0 +1,220 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from compiled_artifact import DialogueArtifact, StaleArtifact, compile_file, load_compiled
+from compiled_graph import compile_dialogue
+from dialogue_validator import load_json_with_spans, validate_file
+from rules import RuleSelection
+
+
+DIALOGUE = {
+    "start": "início",
+    "flags": ["chave", "ouro"],
+    "nodes": {
+        "início": {
+            "speaker": "Ana",
+            "text": "Olá… tudo bem?",
+            "choices": [
+                {"text": "pegar", "next": "sala"},
+                {"text": "abrir", "next": "porta", "requires": ["chave"]},
+            ],
+        },
+        "sala": {"speaker": "Ana", "text": "Uma chave.", "set_flags": ["chave"], "next": "início"},
+        "porta": {"text": "Aberta.", "set_flags": ["ouro"], "next": "fim"},
+        "fim": {"end": True},
+        "perdido": {"text": "Ninguém chega aqui.", "next": "sumido"},
+        "b": {"next": "fim"},
+        "a": {"next": "b"},
+    },
+}
+
+
+class ArtifactTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.source = os.path.join(self.folder, "dialogo.json")
+        self.write_source(DIALOGUE)
+
+    def write_source(self, data):
+        with open(self.source, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
+
+    def open(self, rules=None):
+        artifact = DialogueArtifact(compile_file(self.source, rules=rules))
+        self.addCleanup(artifact.close)
+        return artifact
+
+
+class RoundTripTests(ArtifactTestCase):
+    def test_nodes_and_header_survive_the_round_trip(self):
+        artifact = self.open()
+        self.assertEqual(artifact.node_count, len(DIALOGUE["nodes"]))
+        self.assertEqual(artifact.node_id(artifact.start), "início")
+        record = artifact.node(artifact.find_node("início"))
+        self.assertEqual(record, {
+            "id": "início", "speaker": "Ana", "text": "Olá… tudo bem?",
+            "end": False, "invalid": False, "choices": 2,
+        })
+        self.assertTrue(artifact.node(artifact.find_node("fim"))["end"])
+        self.assertIsNone(artifact.node(artifact.find_node("b"))["choices"])
+        self.assertEqual(sorted(artifact.flag_names), ["chave", "ouro"])
+
+    def test_issues_match_validate_file(self):
+        artifact = self.open()
+        self.assertEqual(artifact.issues(), validate_file(self.source)["issues"])
+
+    def test_graph_reachability_matches_compile_dialogue(self):
+        artifact = self.open()
+        expected = compile_dialogue(DIALOGUE["nodes"])
+        graph = artifact.graph()
+        self.assertEqual(list(graph.node_ids), expected.node_ids)
+        for node_id in expected.node_ids:
+            with self.subTest(node=node_id):
+                self.assertEqual(
+                    bytes(graph.reachable_from([graph.index[node_id]])),
+                    bytes(expected.reachable_from([expected.index[node_id]])),
+                )
+        self.assertEqual(list(graph.set_masks), list(expected.set_masks))
+        self.assertEqual(list(graph.edge_requires), list(expected.edge_requires))
+        self.assertEqual(graph.gated, expected.gated)
+
+
+class FindNodeTests(ArtifactTestCase):
+    def test_every_id_is_found_and_missing_ids_are_not(self):
+        nodes = {f"n{i:03d}": {"next": f"n{i + 1:03d}"} for i in range(200)}
+        nodes["n200"] = {"end": True}
+        self.write_source({"start": "n000", "nodes": nodes})
+        artifact = self.open()
+        for node_id in nodes:
+            with self.subTest(node=node_id):
+                self.assertEqual(artifact.node_id(artifact.find_node(node_id)), node_id)
+        # Antes do primeiro, entre dois e depois do último
+        for node_id in ("a", "n0005", "n100x", "z", ""):
+            with self.subTest(node=node_id):
+                self.assertIsNone(artifact.find_node(node_id))
+
+    def test_ids_are_compared_as_utf8_bytes(self):
+        artifact = self.open()
+        for node_id in DIALOGUE["nodes"]:
+            self.assertEqual(artifact.node_id(artifact.find_node(node_id)), node_id)
+        self.assertIsNone(artifact.find_node("inicio"))
+
+
+class LookupPositionTests(ArtifactTestCase):
+    def test_known_paths_use_the_spans_of_the_source(self):
+        artifact = self.open()
+        _, spans = load_json_with_spans(self.source)
+        for path, span in spans.items():
+            position = span.key or span.value
+            with self.subTest(path=path):
+                self.assertEqual(artifact.lookup_position(path), (position.line, position.column))
+
+    def test_unknown_paths_fall_back_to_the_parent(self):
+        artifact = self.open()
+        _, spans = load_json_with_spans(self.source)
+
+        def position(path):
+            span = spans[path].key or spans[path].value
+            return (span.line, span.column)
+
+        cases = {
+            "$.nodes.início.choices[7]": "$.nodes.início.choices",
+            "$.nodes.início.choices[1].requires[3]": "$.nodes.início.choices[1].requires",
+            "$.nodes.fim.next": "$.nodes.fim",
+            "$.nodes.nao_existe.text": "$.nodes",
+            "$.flags[9]": "$.flags",
+        }
+        for path, parent in cases.items():
+            with self.subTest(path=path):
+                self.assertEqual(artifact.lookup_position(path), position(parent))
+
+
+class FreshnessTests(ArtifactTestCase):
+    def test_untouched_source_is_fresh(self):
+        self.assertTrue(self.open().is_fresh(self.source))
+
+    def test_new_mtime_with_the_same_content_is_still_fresh(self):
+        artifact = self.open()
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        self.assertTrue(artifact.is_fresh(self.source))
+
+    def test_changed_content_of_the_same_size_is_stale(self):
+        artifact = self.open()
+        stat = os.stat(self.source)
+        changed = json.loads(json.dumps(DIALOGUE))
+        changed["nodes"]["fim"]["end"] = False
+        changed["nodes"]["sala"]["text"] = "Uma chave"   # compensa o byte a mais do "false"
+        self.write_source(changed)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        self.assertEqual(os.stat(self.source).st_size, stat.st_size)
+        self.assertFalse(artifact.is_fresh(self.source))
+
+    def test_other_rules_make_it_stale(self):
+        default = self.open()
+        self.assertFalse(default.is_fresh(self.source, RuleSelection(skip=["slow"])))
+        fast = self.open(RuleSelection(skip=["slow"]))
+        self.assertTrue(fast.is_fresh(self.source, RuleSelection(skip=["slow"])))
+        self.assertFalse(fast.is_fresh(self.source))
+
+    def test_missing_source_is_stale(self):
+        artifact = self.open()
+        os.remove(self.source)
+        self.assertFalse(artifact.is_fresh(self.source))
+
+    def test_load_compiled_rebuilds_only_when_stale(self):
+        compile_file(self.source)
+        artifact, rebuilt = load_compiled(self.source)
+        artifact.close()
+        self.assertFalse(rebuilt)
+
+        changed = json.loads(json.dumps(DIALOGUE))
+        changed["nodes"]["perdido"]["next"] = "fim"
+        self.write_source(changed)
+        artifact, rebuilt = load_compiled(self.source)
+        with artifact:
+            self.assertTrue(rebuilt)
+            self.assertEqual(artifact.issues(), validate_file(self.source)["issues"])
+
+
+class CorruptArtifactTests(ArtifactTestCase):
+    def rewrite(self, transform):
+        artifact_path = compile_file(self.source)
+        with open(artifact_path, "rb") as file:
+            data = file.read()
+        with open(artifact_path, "wb") as file:
+            file.write(transform(data))
+        return artifact_path
+
+    def test_truncated_files_raise_stale_artifact(self):
+        size = os.path.getsize(compile_file(self.source))
+        for length in (0, 10, 200, size // 2, size - 1):
+            with self.subTest(length=length):
+                artifact_path = self.rewrite(lambda data: data[:length])
+                with self.assertRaises(StaleArtifact):
+                    DialogueArtifact(artifact_path)
+
+    def test_wrong_magic_or_format_raises_stale_artifact(self):
+        for transform in (
+            lambda data: b"JSON" + data[4:],
+            lambda data: data[:4] + b"\x63\x00" + data[6:],
+            lambda data: data[:6] + b"\x07\x00" + data[8:],
+        ):
+            with self.subTest():
+                with self.assertRaises(StaleArtifact):
+                    DialogueArtifact(self.rewrite(transform))
+
+    def test_load_compiled_recompiles_a_corrupt_artifact(self):
+        self.rewrite(lambda data: data[:100])
+        artifact, rebuilt = load_compiled(self.source)
+        with artifact:
+            self.assertTrue(rebuilt)
+            self.assertEqual(artifact.node_count, len(DIALOGUE["nodes"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from dialogue_validator import validate_dialogue
+
+
+def codes(issues, *wanted):
+    return sorted((issue["code"], issue["path"]) for issue in issues if issue["code"] in wanted)
+
+
+class DeadEndTests(unittest.TestCase):
+    def test_closed_cycle_without_any_end(self):
+        data = {"start": "a", "nodes": {"a": {"next": "b"}, "b": {"choices": [{"text": "volta", "next": "a"}]}}}
+        issues = validate_dialogue(data)
+        self.assertEqual(codes(issues, "TRAPPED_LOOP", "NO_PATH_TO_END"), [("TRAPPED_LOOP", "$.nodes.a")])
+
+    def test_self_loop_without_any_end(self):
+        data = {"start": "a", "nodes": {"a": {"next": "a"}}}
+        self.assertEqual(codes(validate_dialogue(data), "TRAPPED_LOOP"), [("TRAPPED_LOOP", "$.nodes.a")])
+
+    def test_trapped_loop_next_to_an_ending(self):
+        data = {
+            "start": "a",
+            "nodes": {
+                "a": {"choices": [{"text": "fim", "next": "fim"}, {"text": "loop", "next": "b"}]},
+                "b": {"next": "c"},
+                "c": {"next": "d"},
+                "d": {"next": "c"},
+                "fim": {"end": True},
+            },
+        }
+        self.assertEqual(
+            codes(validate_dialogue(data), "TRAPPED_LOOP", "NO_PATH_TO_END"),
+            [("NO_PATH_TO_END", "$.nodes.b"), ("TRAPPED_LOOP", "$.nodes.c")],
+        )
+
+    def test_ending_reachable_from_every_node(self):
+        data = {"start": "a", "nodes": {"a": {"next": "b"}, "b": {"next": "a", "end": True}}}
+        self.assertEqual(codes(validate_dialogue(data), "TRAPPED_LOOP", "NO_PATH_TO_END"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import json
+import unittest
+
+from diff_validation import diff_file
+from dialogue_validator import validate_dialogue
+from incremental_validation import issue_key
+
+
+BROKEN = {"start": "a", "nodes": {"a": {"next": "x"}, "b": {"end": True}}}
+
+
+class DiffFileTests(unittest.TestCase):
+    def test_deleted_file_reports_its_issues_as_fixed(self):
+        result = diff_file("d.json", json.dumps(BROKEN), None)
+        self.assertEqual(result["status"], "deleted")
+        self.assertEqual(result["issues"], [])
+        self.assertEqual(sorted(map(issue_key, result["fixed"])), sorted(map(issue_key, validate_dialogue(BROKEN))))
+
+    def test_deleted_invalid_file_has_nothing_to_fix(self):
+        self.assertEqual(diff_file("d.json", "{", None)["fixed"], [])
+
+    def test_modified_file_reports_only_the_delta(self):
+        fixed = json.loads(json.dumps(BROKEN))
+        fixed["nodes"]["a"]["next"] = "b"
+        result = diff_file("d.json", json.dumps(BROKEN), json.dumps(fixed, indent=2))
+        self.assertEqual(result["issues"], [])
+        self.assertEqual(sorted(issue["code"] for issue in result["fixed"]), ["ORPHAN_NODE", "TARGET_NOT_FOUND"])
+
+
+if __name__ == "__main__":
+    unittest.main()
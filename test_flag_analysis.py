@@ -0,0 +1,111 @@
+import unittest
+
+from compiled_graph import compile_dialogue
+from dialogue_validator import validate_dialogue
+from flag_analysis import ALWAYS, CONDITIONAL, UNREACHABLE, analyze_compiled_flags, analyze_flag_reachability
+
+
+def analyze(nodes, start="a"):
+    graph = compile_dialogue(nodes)
+    return analyze_compiled_flags(graph, graph.index.get(start))
+
+
+class GatedChoiceTests(unittest.TestCase):
+    def test_flag_set_on_every_path_is_always(self):
+        nodes = {
+            "a": {"choices": [{"text": "x", "next": "b"}, {"text": "y", "next": "c"}]},
+            "b": {"set_flags": ["key"], "next": "d"},
+            "c": {"set_flags": ["key"], "next": "d"},
+            "d": {"choices": [{"text": "abrir", "next": "fim", "requires": ["key"]}]},
+            "fim": {"end": True},
+        }
+        info = analyze(nodes)["$.nodes.d.choices[0]"]
+        self.assertEqual(info, {"node": "d", "status": ALWAYS, "missing": []})
+
+    def test_flag_set_on_the_node_itself_is_always(self):
+        nodes = {
+            "a": {"set_flags": ["key"], "choices": [{"text": "x", "next": "fim", "requires": ["key"]}]},
+            "fim": {"end": True},
+        }
+        self.assertEqual(analyze(nodes)["$.nodes.a.choices[0]"]["status"], ALWAYS)
+
+    def test_flag_set_on_one_branch_is_conditional(self):
+        nodes = {
+            "a": {"choices": [{"text": "x", "next": "b"}, {"text": "y", "next": "d"}]},
+            "b": {"set_flags": ["key"], "next": "d"},
+            "d": {"choices": [{"text": "abrir", "next": "fim", "requires": ["key"]}, {"text": "sair", "next": "fim"}]},
+            "fim": {"end": True},
+        }
+        info = analyze(nodes)["$.nodes.d.choices[0]"]
+        self.assertEqual(info, {"node": "d", "status": CONDITIONAL, "missing": []})
+
+    def test_flag_set_only_on_a_branch_that_cannot_reach_the_choice_is_unreachable(self):
+        nodes = {
+            "a": {"choices": [{"text": "x", "next": "b"}, {"text": "y", "next": "d"}]},
+            "b": {"set_flags": ["key"], "next": "fim"},
+            "d": {"choices": [{"text": "abrir", "next": "fim", "requires": ["key", "map"]}, {"text": "sair", "next": "fim"}]},
+            "fim": {"set_flags": ["map"], "end": True},
+        }
+        info = analyze(nodes)["$.nodes.d.choices[0]"]
+        self.assertEqual(info["status"], UNREACHABLE)
+        self.assertEqual(sorted(info["missing"]), ["key", "map"])
+
+        # Setada em algum lugar (sem FLAG_REQUIRED_NEVER_SET), mas nunca antes da choice
+        codes = [issue["code"] for issue in validate_dialogue({"start": "a", "nodes": nodes})]
+        self.assertIn("CHOICE_NEVER_AVAILABLE", codes)
+        self.assertNotIn("FLAG_REQUIRED_NEVER_SET", codes)
+
+    def test_flag_set_after_the_choice_in_a_loop_is_conditional(self):
+        nodes = {
+            "a": {"choices": [{"text": "porta", "next": "fim", "requires": ["key"]}, {"text": "voltar", "next": "b"}]},
+            "b": {"set_flags": ["key"], "next": "a"},
+            "fim": {"end": True},
+        }
+        self.assertEqual(analyze(nodes)["$.nodes.a.choices[0]"]["status"], CONDITIONAL)
+
+    def test_passing_a_gated_choice_guarantees_its_flags(self):
+        nodes = {
+            "a": {"choices": [{"text": "x", "next": "b"}, {"text": "y", "next": "c"}]},
+            "b": {"set_flags": ["key"], "next": "c"},
+            "c": {"choices": [{"text": "abrir", "next": "d", "requires": ["key"]}]},
+            "d": {"choices": [{"text": "de novo", "next": "fim", "requires": ["key"]}]},
+            "fim": {"end": True},
+        }
+        result = analyze(nodes)
+        self.assertEqual(result["$.nodes.c.choices[0]"]["status"], CONDITIONAL)
+        self.assertEqual(result["$.nodes.d.choices[0]"]["status"], ALWAYS)
+
+    def test_impossible_choice_does_not_propagate_flags(self):
+        nodes = {
+            "a": {"choices": [{"text": "x", "next": "b", "requires": ["never"]}, {"text": "y", "next": "c"}]},
+            "b": {"set_flags": ["key"], "next": "c"},
+            "c": {"choices": [{"text": "abrir", "next": "fim", "requires": ["key"]}]},
+            "fim": {"set_flags": ["never"], "end": True},
+        }
+        result = analyze(nodes)
+        self.assertEqual(result["$.nodes.a.choices[0]"]["status"], UNREACHABLE)
+        self.assertEqual(result["$.nodes.c.choices[0]"], {"node": "c", "status": UNREACHABLE, "missing": ["key"]})
+
+    def test_choice_on_an_unreached_node_is_unreachable_without_missing(self):
+        nodes = {
+            "a": {"next": "fim"},
+            "solto": {"choices": [{"text": "x", "next": "fim", "requires": ["key"]}]},
+            "fim": {"set_flags": ["key"], "end": True},
+        }
+        info = analyze(nodes)["$.nodes.solto.choices[0]"]
+        self.assertEqual(info, {"node": "solto", "status": UNREACHABLE, "missing": []})
+
+    def test_missing_start_marks_everything_unreachable(self):
+        nodes = {"a": {"set_flags": ["key"], "choices": [{"text": "x", "next": "a", "requires": ["key"]}]}}
+        self.assertEqual(analyze(nodes, start="nao_existe")["$.nodes.a.choices[0]"]["status"], UNREACHABLE)
+
+    def test_analyze_flag_reachability_compiles_the_nodes(self):
+        nodes = {
+            "a": {"set_flags": ["key"], "next": "b"},
+            "b": {"choices": [{"text": "x", "next": "b", "requires": ["key"]}]},
+        }
+        self.assertEqual(analyze_flag_reachability(nodes, "a"), analyze(nodes))
+
+
+if __name__ == "__main__":
+    unittest.main()
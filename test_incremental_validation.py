@@ -0,0 +1,153 @@
+import json
+import random
+import re
+import unittest
+
+from benchmarks.generator import dump_dialogue, generate_dialogue
+from dialogue_validator import validate_dialogue
+from incremental_validation import DialogueValidator, IncrementalValidator, issue_key
+from line_mapping import attach_positions
+
+
+def full(text):
+    issues = attach_positions(validate_dialogue(json.loads(text)), text)
+    return [(issue["level"], issue["code"], issue["message"], issue["path"], issue.get("line"), issue.get("column"))
+            for issue in issues]
+
+
+def incremental(validator, text):
+    return [(issue["level"], issue["code"], issue["message"], issue["path"], issue.get("line"), issue.get("column"))
+            for issue in validator.validate_text(text)]
+
+
+_NEXT = re.compile(r'"next": "([^"]*)"')
+
+
+class TextEdits:
+    """Edições no texto do arquivo, como um editor salvaria."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def retarget(self, text, node_ids):
+        matches = list(_NEXT.finditer(text))
+        match = self.rng.choice(matches)
+        target = self.rng.choice(node_ids + ["nao_existe", "outro.json#no"])
+        return text[:match.start(1)] + target + text[match.end(1):]
+
+    def edit_text(self, text, node_ids):
+        at = text.find('"text": "', self.rng.randrange(len(text)))
+        if at < 0:
+            return text
+        at += len('"text": "')
+        return text[:at] + "editado " + text[at:]
+
+    def toggle_end(self, text, node_ids):
+        data = json.loads(text)
+        node = data["nodes"][self.rng.choice(node_ids)]
+        if node.get("end"):
+            del node["end"]
+        else:
+            node["end"] = True
+        return dump_dialogue(data, "pretty")
+
+    def add_node(self, text, node_ids):
+        data = json.loads(text)
+        new_id = f"novo_{self.rng.randrange(10 ** 6)}"
+        data["nodes"][new_id] = {"speaker": "Ana", "text": "oi", "next": self.rng.choice(node_ids)}
+        source = data["nodes"][self.rng.choice(node_ids)]
+        source.setdefault("choices", []).append({"text": "ir", "next": new_id})
+        return dump_dialogue(data, "pretty")
+
+    def remove_node(self, text, node_ids):
+        data = json.loads(text)
+        if len(data["nodes"]) > 2:
+            victim = self.rng.choice([node_id for node_id in node_ids if node_id != data["start"]])
+            del data["nodes"][victim]
+        return dump_dialogue(data, "pretty")
+
+    def change_flags(self, text, node_ids):
+        data = json.loads(text)
+        node = data["nodes"][self.rng.choice(node_ids)]
+        node["set_flags"] = [f"flag_{self.rng.randrange(12):02d}"]
+        return dump_dialogue(data, "pretty")
+
+    def change_start(self, text, node_ids):
+        data = json.loads(text)
+        data["start"] = self.rng.choice(node_ids)
+        return dump_dialogue(data, "pretty")
+
+    def all(self):
+        return [self.retarget, self.retarget, self.edit_text, self.toggle_end,
+                self.add_node, self.remove_node, self.change_flags, self.change_start]
+
+
+class IncrementalValidatorTests(unittest.TestCase):
+    def test_random_edits_match_full_validation(self):
+        for seed in range(4):
+            data = generate_dialogue(150, seed=seed, cycle_ratio=0.2, end_ratio=0.05, broken_ratio=0.02)
+            text = dump_dialogue(data, "pretty")
+            validator = IncrementalValidator()
+            self.assertEqual(incremental(validator, text), full(text))
+
+            edits = TextEdits(seed)
+            for step in range(60):
+                node_ids = list(json.loads(text)["nodes"])
+                edit = edits.rng.choice(edits.all())
+                text = edit(text, node_ids)
+                with self.subTest(seed=seed, step=step, edit=edit.__name__):
+                    self.assertEqual(incremental(validator, text), full(text))
+
+    def test_closed_cycle_without_ending(self):
+        text = json.dumps({"start": "a", "nodes": {"a": {"next": "b"}, "b": {"next": "a"}}}, indent=2)
+        validator = IncrementalValidator()
+        self.assertEqual(incremental(validator, text), full(text))
+        edited = text.replace('"next": "a"', '"next": "b"')
+        self.assertEqual(incremental(validator, edited), full(edited))
+
+
+class DialogueValidatorTests(unittest.TestCase):
+    def test_patches_match_full_validation(self):
+        rng = random.Random(7)
+        data = generate_dialogue(120, seed=7, cycle_ratio=0.2, end_ratio=0.05)
+        session = DialogueValidator(data)
+        for step in range(120):
+            nodes = data["nodes"]
+            node_id = rng.choice(list(nodes))
+            roll = rng.random()
+            if roll < 0.15 and node_id != data["start"]:
+                del nodes[node_id]
+                session.remove_node(node_id)
+            elif roll < 0.3:
+                # Nó novo; "nao_existe" é o destino quebrado que os outros nós já usam
+                new_id = "nao_existe" if "nao_existe" not in nodes else f"novo_{step}"
+                node = {"next": rng.choice(list(nodes) + ["nao_existe"])}
+                if rng.random() < 0.5:
+                    node["choices"] = [{"text": "ir", "next": node_id, "requires": [f"flag_{rng.randrange(3):02d}"]}]
+                nodes[new_id] = node
+                session.add_node(new_id, node)
+            else:
+                node = dict(nodes[node_id])
+                node["next"] = rng.choice(list(nodes) + ["nao_existe"])
+                node.pop("end", None) if rng.random() < 0.5 else node.update(end=True)
+                nodes[node_id] = node
+                session.update_node(node_id, node)
+            with self.subTest(step=step):
+                self.assertEqual(
+                    sorted(map(issue_key, session.issues())),
+                    sorted(map(issue_key, validate_dialogue(data))),
+                )
+
+    def test_added_node_gets_the_edges_that_pointed_to_it(self):
+        data = {"start": "a", "nodes": {"a": {"choices": [{"text": "b", "next": "b"}, {"text": "x", "next": "x"}]},
+                                        "b": {"next": "a"}}}
+        session = DialogueValidator(data)
+        data["nodes"]["x"] = {"end": True}
+        session.add_node("x", data["nodes"]["x"])
+        data["nodes"]["b"] = {"next": "b"}
+        session.update_node("b", data["nodes"]["b"])
+        self.assertEqual(sorted(map(issue_key, session.issues())), sorted(map(issue_key, validate_dialogue(data))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from issue_index import COLUMNS, IssueIndex
+
+
+LEVELS = ["ERROR", "WARNING", "INFO"]
+CODES = ["TARGET_NOT_FOUND", "ORPHAN_NODE", "TERMINAL_NO_END", "FLAG_INVALID", "TRAPPED_LOOP"]
+
+
+def random_issues(rng, count):
+    issues = []
+    for i in range(count):
+        issue = {
+            "level": rng.choice(LEVELS),
+            "code": rng.choice(CODES),
+            "message": rng.choice(["Destino não existe", "Nó órfão", "Flag inválida", "Loop sem saída"]),
+            "path": f"$.nodes.n{rng.randrange(count)}",
+        }
+        if rng.random() < 0.8:
+            issue["line"] = rng.randrange(1, 50)
+            issue["column"] = rng.randrange(1, 10)
+        issues.append(issue)
+    return issues
+
+
+def expected_rows(index, column, descending, levels, codes, text):
+    text = text.strip().lower()
+    issues = index.issues
+    return [
+        i for i in index.order(column, descending)
+        if (levels is None or issues[i]["level"] in levels)
+        and (codes is None or issues[i]["code"] in codes)
+        and text in f"{issues[i]['message']}\n{issues[i]['path']}".lower()
+    ]
+
+
+class RowsTests(unittest.TestCase):
+    def test_filters_match_a_plain_scan_of_the_order(self):
+        rng = random.Random(7)
+        index = IssueIndex(random_issues(rng, 300))
+        filters = [None, ["ERROR"], ["WARNING", "INFO"], ["INFO", "ERROR", "INFO"], [], ["NOPE"]]
+        code_filters = [None, ["ORPHAN_NODE"], ["TARGET_NOT_FOUND", "TRAPPED_LOOP"], [], ["NOPE"]]
+        for column in COLUMNS:
+            for descending in (False, True):
+                for levels in filters:
+                    for codes in code_filters:
+                        for text in ("", "órfão", " N1 "):
+                            with self.subTest(column=column, descending=descending, levels=levels, codes=codes, text=text):
+                                rows = index.rows(column, descending, levels, codes, text)
+                                self.assertEqual(list(rows), expected_rows(index, column, descending, levels, codes, text))
+
+    def test_single_level_returns_the_precomputed_slice(self):
+        index = IssueIndex(random_issues(random.Random(3), 50))
+        self.assertIs(index.rows("code", levels=["ERROR"]), index.rows("code", levels=["ERROR"]))
+        self.assertIs(index.rows("line", codes=["ORPHAN_NODE"]), index.rows("line", codes=["ORPHAN_NODE"]))
+
+    def test_empty_index(self):
+        index = IssueIndex([])
+        self.assertEqual(list(index.rows(levels=["ERROR"], codes=["ORPHAN_NODE"], text="x")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import line_mapping
+from benchmarks.generator import dump_dialogue, generate_dialogue
+from dialogue_validator import attach_line_numbers_to_issues, validate_dialogue
+from json_positions import parse_with_spans
+
+
+def positions(issues):
+    return [(issue["code"], issue["path"], issue.get("line"), issue.get("column")) for issue in issues]
+
+
+class SerialParallelTests(unittest.TestCase):
+    """O caminho em processos tem que dar as mesmas posições do serial (e dos spans)."""
+
+    def setUp(self):
+        data = generate_dialogue(300, seed=5, broken_ratio=0.2, orphan_ratio=0.2)
+        for node in data["nodes"].values():
+            node["text"] = "Ação — “diálogo” com acentuação: " + node.get("text", "")
+        self.text = dump_dialogue(data, "pretty").replace("\n", "\r\n")
+        self.issues = validate_dialogue(data)
+        self.assertGreater(len(self.issues), 20)
+
+        handle, self.path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w", encoding="utf-8", newline="") as file:
+            file.write(self.text)
+        self.addCleanup(os.unlink, self.path)
+
+    def expected(self):
+        data, spans = parse_with_spans(self.text)
+        return positions(validate_dialogue(data, spans=spans))
+
+    def test_serial_matches_spans(self):
+        issues = [dict(issue) for issue in self.issues]
+        attach_line_numbers_to_issues(issues, self.path, jobs=1)
+        self.assertEqual(positions(issues), self.expected())
+
+    def test_parallel_matches_serial_on_crlf_and_non_ascii(self):
+        issues = [dict(issue) for issue in self.issues]
+        with mock.patch.object(line_mapping, "PARALLEL_MIN_BLOCKS", 1):
+            attach_line_numbers_to_issues(issues, self.path, jobs=2)
+        self.assertEqual(positions(issues), self.expected())
+
+    def test_text_that_differs_from_the_file_falls_back_to_serial(self):
+        # Texto com \r\n já traduzido: os offsets não valem para o arquivo
+        text = self.text.replace("\r\n", "\n")
+        issues = [dict(issue) for issue in self.issues]
+        with mock.patch.object(line_mapping, "PARALLEL_MIN_BLOCKS", 1):
+            line_mapping.attach_positions(issues, text, self.path, jobs=2)
+        serial = line_mapping.attach_positions([dict(issue) for issue in self.issues], text)
+        self.assertEqual(positions(issues), positions(serial))
+
+
+class PositionsOfTests(unittest.TestCase):
+    def test_node_keys_and_nested_paths(self):
+        text = json.dumps({"start": "a", "nodes": {"a": {"choices": [{"next": "b"}]}, "b": {"end": True}}}, indent=2)
+        _, spans = parse_with_spans(text)
+        paths = ["$.nodes", "$.nodes.a", "$.nodes.b", "$.nodes.a.choices[0].next", "$.nodes.a.nao_existe"]
+        expected = []
+        for path in paths:
+            span = None
+            while span is None:
+                span = spans.get(path)
+                path = path.rsplit(".", 1)[0] if span is None else path
+            expected.append(((span.key or span.value).line, (span.key or span.value).column))
+        self.assertEqual(line_mapping.positions_of(paths, text), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from compiled_graph import compile_dialogue
+from playthrough import StateLimitExceeded, count_playthroughs, explore_states, find_endings, simulate
+
+
+def diamonds(count):
+    """count losangos seguidos; cada um tem um ramo que seta uma flag, e o final exige todas."""
+    nodes = {}
+    for i in range(count):
+        nodes[f"n{i}"] = {"choices": [{"text": "com", "next": f"f{i}"}, {"text": "sem", "next": f"s{i}"}]}
+        nodes[f"f{i}"] = {"set_flags": [f"flag{i}"], "next": f"n{i + 1}"}
+        nodes[f"s{i}"] = {"next": f"n{i + 1}"}
+    required = [f"flag{i}" for i in range(count)]
+    nodes[f"n{count}"] = {"choices": [{"text": "fim", "next": "fim", "requires": required}]}
+    nodes["fim"] = {"end": True}
+    return nodes
+
+
+class FindEndingsTests(unittest.TestCase):
+    def test_ending_reports_every_flag_set_on_the_way(self):
+        nodes = {
+            "a": {"set_flags": ["key"], "choices": [{"text": "x", "next": "b", "requires": ["key"]}]},
+            "b": {"set_flags": ["gold"], "end": True},
+        }
+        ending = simulate(nodes, "a")["endings"]["b"]
+        self.assertEqual(ending["flags"], ["key", "gold"])
+        self.assertEqual(ending["path"], ["a", "b"])
+
+    def test_dominance_pruning_keeps_only_maximal_flag_sets(self):
+        graph = compile_dialogue(diamonds(12))
+        start = graph.index["n0"]
+        # Sem poda são 2^12 combinações de flags chegando no último nó
+        with self.assertRaises(StateLimitExceeded):
+            explore_states(graph, start, max_states=200)
+        endings = find_endings(graph, start, max_states=200)
+        steps, flags, path = endings[graph.index["fim"]]
+        self.assertEqual(steps, 12 * 2 + 1)
+        self.assertEqual(graph.flag_names_of(flags), [f"flag{i}" for i in range(12)])
+        self.assertEqual(path[1::2][:12], [f"f{i}" for i in range(12)])
+
+    def test_weaker_state_found_first_does_not_hide_the_ending(self):
+        nodes = {
+            "a": {"choices": [{"text": "curto", "next": "c"}, {"text": "longo", "next": "k"}]},
+            "k": {"set_flags": ["key"], "next": "c"},
+            "c": {"choices": [{"text": "porta", "next": "fim", "requires": ["key"]}]},
+            "fim": {"end": True},
+        }
+        ending = simulate(nodes, "a")["endings"]["fim"]
+        self.assertEqual(ending["path"], ["a", "k", "c", "fim"])
+
+
+class CountPlaythroughsTests(unittest.TestCase):
+    def test_small_cyclic_graph(self):
+        nodes = {
+            "a": {"choices": [{"text": "ir", "next": "b"}, {"text": "sair", "next": "e1"}]},
+            "b": {"choices": [{"text": "voltar", "next": "a"}, {"text": "sair", "next": "e2"}]},
+            "e1": {"end": True},
+            "e2": {"end": True},
+        }
+        graph = compile_dialogue(nodes)
+        result = count_playthroughs(graph, graph.index["a"])
+        self.assertEqual(result["states"], 4)
+        self.assertTrue(result["has_loops"])
+        # O loop a <-> b conta como um passo só: sai por e1 ou por e2
+        self.assertEqual(result["playthroughs"], 2)
+        self.assertIn(result["longest"], (["a", "e1"], ["a", "b", "e2"]))
+
+    def test_acyclic_paths_are_counted(self):
+        nodes = {
+            "a": {"choices": [{"text": "1", "next": "b"}, {"text": "2", "next": "c"}]},
+            "b": {"next": "d"},
+            "c": {"next": "d"},
+            "d": {"end": True, "choices": [{"text": "mais", "next": "e"}]},
+            "e": {"end": True},
+        }
+        graph = compile_dialogue(nodes)
+        result = count_playthroughs(graph, graph.index["a"])
+        self.assertFalse(result["has_loops"])
+        self.assertEqual(result["playthroughs"], 4)
+        self.assertEqual(result["longest"][-1], "e")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import os
+import pickle
+import shutil
+import tempfile
+import textwrap
+import unittest
+
+import rules
+from batch_validation import validate_files
+from dialogue_validator import add_issue, validate_dialogue
+from rules import NODE, Rule, RuleSelection, register
+
+
+DIALOGUE = {
+    "start": "a",
+    "nodes": {
+        "a": {"speaker": "Ana", "next": "x"},
+        "b": {"speaker": "Zé", "end": True},
+    },
+}
+
+CAST_PLUGIN = textwrap.dedent('''
+    from dialogue_validator import add_issue
+    from rules import node_rule
+
+    CAST = {"Ana"}
+
+
+    @node_rule("cast", codes=["UNKNOWN_SPEAKER"], reads=["speaker"], tags=["projeto"])
+    def check_cast(state, node_id, node_data, path):
+        if node_data["speaker"] not in CAST:
+            add_issue(state.issues, "WARNING", "UNKNOWN_SPEAKER", "Speaker fora do elenco.", f"{path}.speaker")
+''')
+
+
+def codes(data, selection):
+    return sorted(issue["code"] for issue in validate_dialogue(data, rules=selection))
+
+
+class RegistryTestCase(unittest.TestCase):
+    """Regras registradas aqui (e plugins carregados) somem no fim de cada teste."""
+
+    def setUp(self):
+        registry = dict(rules.REGISTRY)
+        loaded = dict(rules._loaded_plugins)
+
+        def restore():
+            rules.REGISTRY.clear()
+            rules.REGISTRY.update(registry)
+            rules._loaded_plugins.clear()
+            rules._loaded_plugins.update(loaded)
+            rules.ALL_RULES._enabled = None
+
+        self.addCleanup(restore)
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def write_plugin(self, source=CAST_PLUGIN):
+        path = os.path.join(self.folder, "elenco.py")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source)
+        return path
+
+
+class SelectionTests(RegistryTestCase):
+    def test_default_runs_every_rule(self):
+        self.assertTrue(RuleSelection().is_default)
+        self.assertEqual(codes(DIALOGUE, None), ["ORPHAN_NODE", "TARGET_NOT_FOUND"])
+
+    def test_only_keeps_the_named_rules(self):
+        self.assertEqual(codes(DIALOGUE, RuleSelection(only=["targets"])), ["TARGET_NOT_FOUND"])
+        self.assertEqual(codes(DIALOGUE, RuleSelection(only=["orphans"])), ["ORPHAN_NODE"])
+
+    def test_skip_removes_the_named_rules(self):
+        self.assertEqual(codes(DIALOGUE, RuleSelection(skip=["orphans"])), ["TARGET_NOT_FOUND"])
+
+    def test_tags_select_every_rule_with_the_tag(self):
+        enabled = RuleSelection(only=["slow"]).enabled()
+        self.assertEqual([rule.name for rule in enabled.graph_rules], ["gated-choices", "dead-ends"])
+        self.assertEqual(enabled.node_rules, [])
+
+        enabled = RuleSelection(skip=["slow"]).enabled()
+        names = [rule.name for rule in enabled.graph_rules]
+        self.assertEqual(names, ["orphans", "flags-never-set"])
+        self.assertIn("TRAPPED_LOOP", enabled.disabled_codes)
+        self.assertNotIn("ORPHAN_NODE", enabled.disabled_codes)
+
+    def test_only_and_skip_combine(self):
+        enabled = RuleSelection(only=["fast"], skip=["orphans"]).enabled()
+        self.assertEqual([rule.name for rule in enabled.graph_rules], ["flags-never-set"])
+        self.assertIn("ORPHAN_NODE", enabled.disabled_codes)
+
+    def test_unknown_rule_or_tag_is_an_error(self):
+        with self.assertRaisesRegex(ValueError, "nao_existe"):
+            RuleSelection(only=["nao_existe"]).enabled()
+        with self.assertRaisesRegex(ValueError, "nao_existe"):
+            RuleSelection(skip=["fast", "nao_existe"]).enabled()
+
+    def test_fingerprint_depends_on_the_selection(self):
+        self.assertEqual(RuleSelection(skip=["slow"]).fingerprint(), RuleSelection(only=["fast"]).fingerprint())
+        self.assertNotEqual(RuleSelection(skip=["slow"]).fingerprint(), RuleSelection().fingerprint())
+
+
+class SharedCodeTests(RegistryTestCase):
+    def setUp(self):
+        super().setUp()
+
+        def check(name):
+            def run(state, node_id, node_data, path):
+                add_issue(state.issues, "INFO", "SHARED", name, path)
+            return run
+
+        register(Rule("first", NODE, check("first"), codes=["SHARED"], reads=["speaker"]))
+        register(Rule("second", NODE, check("second"), codes=["SHARED"], reads=["speaker"]))
+
+    def messages(self, selection):
+        return sorted(
+            issue["message"] for issue in validate_dialogue(DIALOGUE, rules=selection) if issue["code"] == "SHARED"
+        )
+
+    def test_code_stays_enabled_while_one_rule_uses_it(self):
+        enabled = RuleSelection(skip=["first"]).enabled()
+        self.assertNotIn("SHARED", enabled.disabled_codes)
+        self.assertEqual(self.messages(RuleSelection(skip=["first"])), ["second", "second"])
+
+    def test_code_is_disabled_when_every_rule_is_off(self):
+        enabled = RuleSelection(skip=["first", "second"]).enabled()
+        self.assertIn("SHARED", enabled.disabled_codes)
+        self.assertEqual(self.messages(RuleSelection(skip=["first", "second"])), [])
+
+
+class PluginTests(RegistryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.files = []
+        for i in range(4):
+            path = os.path.join(self.folder, f"dialogo{i}.json")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write('{"start": "a", "nodes": {"a": {"speaker": "Zé", "end": true}}}')
+            self.files.append(path)
+
+    def test_plugin_rule_runs_and_is_selectable_by_tag(self):
+        plugin = self.write_plugin()
+        self.assertEqual(codes(DIALOGUE, RuleSelection(plugins=[plugin])), ["ORPHAN_NODE", "TARGET_NOT_FOUND", "UNKNOWN_SPEAKER"])
+        self.assertEqual(codes(DIALOGUE, RuleSelection(only=["projeto"], plugins=[plugin])), ["UNKNOWN_SPEAKER"])
+        self.assertEqual(codes(DIALOGUE, RuleSelection(skip=["cast"], plugins=[plugin])), ["ORPHAN_NODE", "TARGET_NOT_FOUND"])
+
+    def test_selection_pickles_without_the_plugin_functions(self):
+        selection = RuleSelection(plugins=[self.write_plugin()])
+        selection.enabled()
+        copy = pickle.loads(pickle.dumps(selection))
+        self.assertIsNone(copy._enabled)
+        self.assertEqual(copy.fingerprint(), selection.fingerprint())
+
+    def test_plugin_rule_round_trips_through_the_process_pool(self):
+        # Seleção nova: os workers é que carregam o plugin
+        selection = RuleSelection(plugins=[self.write_plugin()])
+        pooled = list(validate_files(self.files, jobs=2, rules=selection))
+        local = list(validate_files(self.files, jobs=1, rules=selection))
+        self.assertEqual(pooled, local)
+        for result in pooled:
+            self.assertEqual([issue["code"] for issue in result["issues"]], ["UNKNOWN_SPEAKER"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import json
+import unittest
+
+from benchmarks.generator import STYLES, dump_dialogue, generate_dialogue
+from dialogue_validator import validate_dialogue, validate_json_text
+from streaming_validation import validate_stream
+
+
+def issue_set(issues):
+    return sorted((issue["level"], issue["code"], issue["message"], issue["path"]) for issue in issues)
+
+
+class ChunkBoundaryTests(unittest.TestCase):
+    """Blocos pequenos cortam strings, números e nós no meio: o resultado tem que ser o mesmo."""
+
+    def assert_same_as_full(self, text, chunk_size):
+        expected = issue_set(validate_dialogue(json.loads(text)))
+        streamed = validate_stream(io.StringIO(text), chunk_size=chunk_size)
+        self.assertEqual(issue_set(streamed), expected)
+        self.assertTrue(all("line" in issue for issue in streamed))
+
+    def test_generated_dialogues_with_small_chunks(self):
+        data = generate_dialogue(400, seed=3, broken_ratio=0.02, orphan_ratio=0.02)
+        for style in STYLES:
+            text = dump_dialogue(data, style)
+            for chunk_size in (4096, 17):
+                with self.subTest(style=style, chunk_size=chunk_size):
+                    self.assert_same_as_full(text, chunk_size)
+
+    def test_string_longer_than_the_chunk(self):
+        long_text = "palavra " * 2000
+        data = {"start": "a", "nodes": {"a": {"text": long_text, "next": "b"}, "b": {"text": "fim", "end": True}}}
+        for chunk_size in (4096, 17):
+            with self.subTest(chunk_size=chunk_size):
+                self.assert_same_as_full(json.dumps(data), chunk_size)
+
+    def test_syntax_error_is_still_reported(self):
+        text = '{"start": "a", "nodes": {"a": {"text": "oi", "end": true,, }}}'
+        for chunk_size in (4096, 17):
+            with self.subTest(chunk_size=chunk_size):
+                with self.assertRaises(json.JSONDecodeError) as caught:
+                    validate_stream(io.StringIO(text), chunk_size=chunk_size)
+                self.assertEqual(caught.exception.lineno, 1)
+
+    def test_unterminated_string_at_end_of_file(self):
+        text = '{"start": "a", "nodes": {"a": {"text": "' + "x" * 500
+        with self.assertRaises(json.JSONDecodeError):
+            validate_stream(io.StringIO(text), chunk_size=17)
+
+
+class RootIssueTests(unittest.TestCase):
+    """Issues da raiz: mesmas issues, ordem e posições do validate_json_text."""
+
+    CASES = [
+        '{"start": "a", "flags": "x"}',
+        '{"flags": [1], "nodes": []}',
+        '{"start": "a", "flags": [1], "nodes": {}}',
+        '{"nodes": {"a": {"end": true}}}',
+        '\n\n  {"start": "a"}',
+        '{"start": "a", "flags": [1, "ok"],\n "nodes": {"a": {"next": "zz"}, "b": {"end": true}}}',
+        '{"nodes": {"a": {"choices": [{"text": "x", "next": "a", "requires": ["ok"]}]}}, "flags": ["ok", ""]}',
+        '{"start": "b", "nodes": {"a": {"end": true}}}',
+        '  [1, 2]',
+    ]
+
+    @staticmethod
+    def summary(issues):
+        # Destino resolvido só no final aponta para a linha do nó (a coluna é a da chave dele)
+        return [
+            (issue["code"], issue["path"], issue.get("line"),
+             issue.get("column") if not issue["path"].startswith("$.nodes.") else None)
+            for issue in issues
+        ]
+
+    def test_same_as_normal_mode(self):
+        for text in self.CASES:
+            expected = self.summary(validate_json_text(json.loads(text), text))
+            for chunk_size in (4096, 5):
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    streamed = validate_stream(io.StringIO(text), chunk_size=chunk_size)
+                    self.assertEqual(self.summary(streamed), expected)
+
+if __name__ == "__main__":
+    unittest.main()
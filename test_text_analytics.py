@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from text_analytics import CHOICE_SPEAKER, TextStats, _near_keys, load_columns
+
+
+class TextStatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def stats(self, *files, max_length=None):
+        paths = []
+        for i, nodes in enumerate(files):
+            path = os.path.join(self.folder, f"dialogo{i}.json")
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump({"start": "a", "nodes": nodes}, file, ensure_ascii=False)
+            paths.append(path)
+        return TextStats(load_columns(paths, jobs=1), max_length)
+
+    def duplicate_texts(self, stats):
+        texts = stats.columns.texts
+        return [(sorted(texts[line] for line in lines), near) for lines, near in stats.duplicates]
+
+
+class NearKeyTests(unittest.TestCase):
+    def test_unicode_punctuation_is_stripped(self):
+        keys = list(_near_keys(["Olá… tudo — bem?", "olá, tudo bem", "«Sim», disse ¿ele?", "sim disse ele"]))
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(keys[2], keys[3])
+        self.assertEqual(keys[0], "olá tudo bem".encode("utf-8"))
+
+    def test_keys_follow_the_input_order_across_chunks(self):
+        texts = [f"Linha {i} número {i % 7}!" if i % 2 else f"texto\t\tpar  {i}" for i in range(10000)]
+        keys = list(_near_keys(texts))
+        self.assertEqual(len(keys), len(texts))
+        self.assertEqual(keys[1], "linha número".encode("utf-8"))
+        self.assertEqual(keys[9998], b"texto par")
+
+    def test_nul_inside_a_text_does_not_split_it(self):
+        self.assertEqual(list(_near_keys(["a\0b c", "d e"])), [b"a b c", b"d e"])
+
+
+class DuplicateTests(TextStatsTestCase):
+    def test_exact_and_near_groups(self):
+        stats = self.stats({
+            "a": {"text": "Vamos para a taverna", "next": "b"},
+            "b": {"text": "Vamos para a taverna", "next": "c"},
+            "c": {"text": "Olá… quem está aí?", "next": "d"},
+            "d": {"text": "olá — quem está aí", "next": "e"},
+            "e": {"text": "Uma linha sozinha aqui", "end": True},
+        })
+        self.assertEqual(self.duplicate_texts(stats), [
+            (["Vamos para a taverna", "Vamos para a taverna"], False),
+            (["Olá… quem está aí?", "olá — quem está aí"], True),
+        ])
+
+    def test_near_variant_joins_an_exact_group(self):
+        stats = self.stats({
+            "a": {"text": "Abra a porta agora", "next": "b"},
+            "b": {"text": "Abra a porta agora", "next": "c"},
+            "c": {"text": "ABRA A PORTA AGORA!", "end": True},
+        })
+        self.assertEqual(self.duplicate_texts(stats), [
+            (["ABRA A PORTA AGORA!", "Abra a porta agora", "Abra a porta agora"], True),
+        ])
+
+    def test_locales_are_compared_separately(self):
+        stats = self.stats({
+            "a": {"text": {"pt": "the same words here", "en": "the same words here"}, "next": "b"},
+            "b": {"text": {"pt": "Outra fala bem repetida", "en": "Another line"}, "next": "c"},
+            "c": {"text": {"pt": "outra fala bem repetida.", "en": "Another line"}, "end": True},
+        })
+        self.assertEqual(self.duplicate_texts(stats), [
+            (["Outra fala bem repetida", "outra fala bem repetida."], True),
+        ])
+
+    def test_short_lines_are_ignored(self):
+        stats = self.stats({"a": {"text": "Sim.", "next": "b"}, "b": {"text": "Sim.", "end": True}})
+        self.assertEqual(stats.duplicates, [])
+
+
+class SpeakerTests(TextStatsTestCase):
+    def test_words_and_lines_per_speaker_across_files(self):
+        stats = self.stats(
+            {
+                "a": {"speaker": "Ana", "text": "um dois três", "choices": [{"text": "sim", "next": "b"}]},
+                "b": {"speaker": "Zé", "text": {"pt": "quatro cinco", "en": "four five"}, "end": True},
+            },
+            {"a": {"speaker": "Ana", "text": "seis", "end": True}},
+        )
+        speakers = stats.columns.speakers
+        words = {speakers[code]: count for code, count in stats.speaker_words.items()}
+        lines = {speakers[code]: count for code, count in stats.speaker_lines.items()}
+        self.assertEqual(words, {"Ana": 4, "Zé": 4, CHOICE_SPEAKER: 1})
+        self.assertEqual(lines, {"Ana": 2, "Zé": 1, CHOICE_SPEAKER: 1})
+        self.assertEqual(stats.total_words, 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+import validator_client
+from dialogue_validator import VALIDATOR_VERSION
+from dialogue_validator import main as validate_main
+from validation_daemon import ValidationDaemon, _Server
+
+
+BROKEN = {"start": "a", "nodes": {"a": {"next": "x"}}}
+
+
+def cli_output(argv):
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        exit_code = validate_main(argv)
+    return buffer.getvalue(), exit_code or 0
+
+
+class DaemonOutputTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        with open(os.path.join(self.folder.name, "f.json"), "w", encoding="utf-8") as file:
+            json.dump(BROKEN, file)
+        cwd = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_same_file_listed_twice_is_validated_once(self):
+        for files in (["f.json"], ["f.json", "f.json"], ["f.json", "./f.json"]):
+            with self.subTest(files=files):
+                response = ValidationDaemon().handle(
+                    {"method": "validate", "files": files, "cwd": self.folder.name, "report": "text"}
+                )
+                self.assertEqual((response["output"], response["exit_code"]), cli_output(files))
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "sem sockets Unix")
+class ClientVersionTests(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.socket_path = os.path.join(folder.name, "d.sock")
+        self.daemon = ValidationDaemon()
+        server = _Server(self.socket_path, self.daemon)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+    def test_same_version_is_answered_by_the_daemon(self):
+        response = validator_client.ask_daemon({"method": "stats"}, self.socket_path, VALIDATOR_VERSION)
+        self.assertEqual(response["documents"], 0)
+
+    def test_outdated_daemon_is_refused(self):
+        with self.assertRaises(validator_client.OutdatedDaemon) as caught:
+            validator_client.ask_daemon({"method": "stats"}, self.socket_path, VALIDATOR_VERSION + "-novo")
+        self.assertEqual(caught.exception.daemon_version, VALIDATOR_VERSION)
+
+    def test_client_reads_the_installed_version(self):
+        self.assertEqual(validator_client.installed_version(), VALIDATOR_VERSION)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,474 @@
+"""
+Modo --text-stats: estatísticas do texto dos diálogos, para a localização.
+
+O validador só olha a estrutura e o fluxo; aqui entram "speaker" e "text"
+de todos os arquivos de uma vez:
+
+- palavras e falas por speaker (as choices contam como "(escolhas)")
+- tamanho das linhas; com --max-text-length N, cada linha maior que N vira
+  um WARNING TEXT_TOO_LONG no path dela ($.nodes.<id>.text, ou
+  .choices[i].text)
+- linhas repetidas: iguais, ou quase iguais (só mudam maiúsculas,
+  pontuação - inclusive a Unicode, como "…" e "—" -, números ou espaços),
+  com pelo menos MIN_DUPLICATE_WORDS palavras
+- traduções faltando: quando o "text" é um objeto por idioma
+  ({"pt": "...", "en": "..."}), ele precisa ter todos os idiomas que
+  aparecem no corpus (idioma vazio conta como faltando). "text" como string
+  simples é tratado como texto ainda não localizado e não entra na conta
+
+Os textos viram colunas (TextColumns): uma lista com os textos e arrays com
+a unidade (nó ou choice) e o idioma de cada linha; cada unidade guarda
+arquivo, nó, choice e speaker. As métricas são passadas sobre as colunas
+inteiras com map/compress/Counter, que rodam em C; fora a extração do JSON,
+os laços em Python por linha são só a soma das palavras por speaker (uma
+passada, sem ordenar as linhas) e o agrupamento das linhas que se repetem.
+Os arquivos são lidos em paralelo (map_files, como no modo lote).
+"""
+import json
+import re
+import string
+import unicodedata
+from array import array
+from collections import Counter
+from functools import lru_cache
+from itertools import compress
+from operator import and_, or_
+
+from batch_validation import expand_targets, map_files, print_file_result, report_no_files
+
+
+MIN_DUPLICATE_WORDS = 3
+TOP = 10                      # speakers, grupos e exemplos listados no relatório de texto
+CHOICE_SPEAKER = "(escolhas)"
+NO_SPEAKER = "(sem speaker)"
+DEFAULT_LOCALE = ""           # "text" como string simples
+
+# Pontuação ASCII, dígitos e espaços que não são " " viram espaço na comparação de quase iguais
+# (bytes.translate, em C); a pontuação fora do ASCII é tratada em _near_keys
+_NEAR_STRIP = string.punctuation + string.digits + "\t\n\r\v\f"
+_NEAR_TABLE = bytes.maketrans(_NEAR_STRIP.encode("ascii"), b" " * len(_NEAR_STRIP))
+_ASCII_BYTES = bytes(range(128))
+_NEAR_CHUNK = 4096            # textos por bloco no cálculo das chaves de quase iguais
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=None)
+def _is_punctuation(char):
+    """Pontuação Unicode (categoria P*: …, —, «, ¿...)."""
+    return unicodedata.category(char).startswith("P")
+
+
+def _near_keys(texts):
+    """
+    Chave de comparação de cada texto (lista): minúsculas, sem pontuação/dígitos,
+    espaços colapsados (bytes). Os textos são processados em blocos unidos por
+    NUL: casefold, encode, translate e o colapso dos espaços rodam uma vez por
+    bloco, e a pontuação fora do ASCII é trocada só para os caracteres que
+    aparecem no bloco.
+    """
+    for start in range(0, len(texts), _NEAR_CHUNK):
+        chunk = texts[start:start + _NEAR_CHUNK]
+        joined = "\0".join(chunk)
+        if joined.count("\0") != len(chunk) - 1:
+            # NUL dentro de algum texto: vira espaço, para não se confundir com o separador
+            joined = "\0".join(text.replace("\0", " ") for text in chunk)
+        data = joined.casefold().encode("utf-8")
+        for char in set(data.translate(None, _ASCII_BYTES).decode("utf-8")):
+            if _is_punctuation(char):
+                data = data.replace(char.encode("utf-8"), b" ")
+        data = data.translate(_NEAR_TABLE)
+        while b"  " in data:
+            data = data.replace(b"  ", b" ")
+        yield from map(bytes.strip, data.split(b"\0"))
+
+
+def _short(text, limit=70):
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+# ============================================================
+# Extração (um arquivo por worker)
+# ============================================================
+
+def extract_file(file_path):
+    """
+    Colunas de um arquivo: {"file", "error", "texts", "unit_of", "locale_of",
+    "locales", "unit_node", "unit_choice", "unit_speaker", "speakers"}.
+    Os códigos de speaker/idioma são locais; TextColumns.add junta tudo.
+    """
+    chunk = {
+        "file": str(file_path), "error": None,
+        "texts": [], "unit_of": array("i"), "locale_of": array("i"), "locales": [DEFAULT_LOCALE],
+        "unit_node": [], "unit_choice": array("i"), "unit_speaker": array("i"), "speakers": [],
+    }
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        chunk["error"] = f"Arquivo não encontrado: {file_path}"
+        return chunk
+    except json.JSONDecodeError as e:
+        chunk["error"] = f"JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}"
+        return chunk
+    except (OSError, UnicodeDecodeError) as e:
+        chunk["error"] = f"Erro ao abrir o arquivo: {e}"
+        return chunk
+
+    nodes = data.get("nodes") if isinstance(data, dict) else None
+    if not isinstance(nodes, dict):
+        return chunk
+
+    texts = chunk["texts"]
+    unit_of = chunk["unit_of"]
+    locale_of = chunk["locale_of"]
+    unit_node = chunk["unit_node"]
+    unit_choice = chunk["unit_choice"]
+    unit_speaker = chunk["unit_speaker"]
+    locale_codes = {DEFAULT_LOCALE: 0}
+    speaker_codes = {}
+
+    def intern(codes, names, name):
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    def add_unit(value, node_id, choice, speaker):
+        if isinstance(value, str):
+            unit_of.append(len(unit_node))
+            locale_of.append(0)
+            texts.append(value)
+        elif isinstance(value, dict):
+            for locale, text in value.items():
+                if isinstance(text, str):
+                    unit_of.append(len(unit_node))
+                    locale_of.append(intern(locale_codes, chunk["locales"], locale))
+                    texts.append(text)
+        else:
+            return
+        unit_node.append(node_id)
+        unit_choice.append(choice)
+        unit_speaker.append(speaker)
+
+    choice_speaker = intern(speaker_codes, chunk["speakers"], CHOICE_SPEAKER)
+    for node_id, node in nodes.items():
+        if not isinstance(node, dict):
+            continue
+        speaker = node.get("speaker")
+        speaker = speaker if isinstance(speaker, str) and speaker.strip() else NO_SPEAKER
+        add_unit(node.get("text"), node_id, -1, intern(speaker_codes, chunk["speakers"], speaker))
+        choices = node.get("choices")
+        if isinstance(choices, list):
+            for index, choice in enumerate(choices):
+                if isinstance(choice, dict):
+                    add_unit(choice.get("text"), node_id, index, choice_speaker)
+    return chunk
+
+
+class TextColumns:
+    """Todas as linhas do corpus em colunas (uma linha = um texto em um idioma)."""
+
+    def __init__(self):
+        self.files = []
+        self.errors = []              # (arquivo, mensagem)
+        self.texts = []
+        self.unit_of = array("i")     # linha -> unidade (o "text" de um nó ou de uma choice)
+        self.locale_of = array("i")   # linha -> idioma (0 = texto simples, sem idioma)
+        self.locales = [DEFAULT_LOCALE]
+        self.unit_file = array("i")
+        self.unit_node = []
+        self.unit_choice = array("i")  # -1 = text do próprio nó
+        self.unit_speaker = array("i")
+        self.speakers = []
+        self._locale_codes = {DEFAULT_LOCALE: 0}
+        self._speaker_codes = {}
+
+    def __len__(self):
+        return len(self.texts)
+
+    @staticmethod
+    def _remap(codes, names, local_names):
+        remap = array("i")
+        for name in local_names:
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(names)
+                names.append(name)
+            remap.append(code)
+        return remap
+
+    def add(self, chunk):
+        file_index = len(self.files)
+        self.files.append(chunk["file"])
+        if chunk["error"]:
+            self.errors.append((chunk["file"], chunk["error"]))
+            return
+
+        unit_offset = len(self.unit_node)
+        locales = self._remap(self._locale_codes, self.locales, chunk["locales"])
+        speakers = self._remap(self._speaker_codes, self.speakers, chunk["speakers"])
+
+        self.texts.extend(chunk["texts"])
+        self.unit_of.extend(map(unit_offset.__add__, chunk["unit_of"]))
+        self.locale_of.extend(map(locales.__getitem__, chunk["locale_of"]))
+        self.unit_file.extend([file_index] * len(chunk["unit_node"]))
+        self.unit_node.extend(chunk["unit_node"])
+        self.unit_choice.extend(chunk["unit_choice"])
+        self.unit_speaker.extend(map(speakers.__getitem__, chunk["unit_speaker"]))
+
+    def unit_path(self, unit):
+        choice = self.unit_choice[unit]
+        prefix = f"$.nodes.{self.unit_node[unit]}"
+        return f"{prefix}.text" if choice < 0 else f"{prefix}.choices[{choice}].text"
+
+    def line_path(self, line):
+        """Path da linha no JSON: o text, ou text.<idioma> quando ele é por idioma."""
+        path = self.unit_path(self.unit_of[line])
+        locale = self.locale_of[line]
+        return path if locale == 0 else f"{path}.{self.locales[locale]}"
+
+    def line_file(self, line):
+        return self.files[self.unit_file[self.unit_of[line]]]
+
+
+def load_columns(file_paths, jobs=None):
+    columns = TextColumns()
+    for chunk in map_files(extract_file, file_paths, jobs):
+        columns.add(chunk)
+    return columns
+
+
+# ============================================================
+# Métricas
+# ============================================================
+
+class TextStats:
+    """Métricas de um TextColumns. over_limit, duplicates e missing guardam índices de linhas/unidades."""
+
+    def __init__(self, columns, max_length=None):
+        self.columns = columns
+        self.max_length = max_length
+        texts = columns.texts
+        line_count = len(texts)
+
+        self.lengths = array("i", map(len, texts))
+        self.words = array("i", map(len, map(str.split, texts)))
+        self.total_words = sum(self.words)
+
+        # Falas (unidades) e palavras (de todos os idiomas) por speaker, numa passada só
+        self.speaker_lines = Counter(columns.unit_speaker)
+        self.speaker_words = speaker_words = {}
+        for speaker, words in zip(map(columns.unit_speaker.__getitem__, columns.unit_of), self.words):
+            speaker_words[speaker] = speaker_words.get(speaker, 0) + words
+
+        self.over_limit = []
+        if max_length is not None:
+            self.over_limit = list(compress(range(line_count), map(max_length.__lt__, self.lengths)))
+
+        self.duplicates = self._duplicates()
+        self.missing = self._missing_translations()
+
+    def length_percentile(self, fraction):
+        if not self.lengths:
+            return 0
+        ordered = sorted(self.lengths)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def _duplicates(self):
+        """
+        Grupos de linhas repetidas, do maior para o menor: (linhas, quase_iguais).
+        quase_iguais = True quando o grupo tem mais de uma grafia.
+        """
+        columns = self.columns
+        candidates = list(compress(range(len(columns.texts)), map(MIN_DUPLICATE_WORDS.__le__, self.words)))
+        if not candidates:
+            return []
+        if len(columns.locales) > 1:
+            # Só compara dentro do mesmo idioma
+            line_locales = list(map(columns.locale_of.__getitem__, candidates))
+            by_locale = [
+                list(compress(candidates, map(locale.__eq__, line_locales))) for locale in set(line_locales)
+            ]
+        else:
+            by_locale = [candidates]
+
+        result = []
+        for lines in by_locale:
+            result.extend(_duplicate_groups(columns.texts, lines))
+        result.sort(key=lambda group: (-len(group[0]), group[0][0]))
+        return result
+
+    def _missing_translations(self):
+        """{unidade: [idiomas faltando]} dos textos por idioma que não têm todos os idiomas do corpus."""
+        columns = self.columns
+        named = len(columns.locales) - 1
+        if not named:
+            return {}
+
+        # Unidades localizadas (text por idioma) e quantos idiomas não vazios cada uma tem
+        localized = Counter(compress(columns.unit_of, columns.locale_of))
+        translated = map(and_, map(bool, columns.texts), map(bool, columns.locale_of))
+        present = Counter(compress(columns.unit_of, translated))
+        have = {unit: set() for unit in localized if present[unit] < named}
+        if not have:
+            return {}
+
+        for line in compress(range(len(columns.texts)), map(have.__contains__, columns.unit_of)):
+            if columns.texts[line] and columns.locale_of[line]:
+                have[columns.unit_of[line]].add(columns.locale_of[line])
+        all_locales = range(1, named + 1)
+        return {
+            unit: [columns.locales[code] for code in all_locales if code not in locales]
+            for unit, locales in have.items()
+        }
+
+    def issue_results(self, jobs=1):
+        """{"file", "issues", "error"} de cada arquivo, com um TEXT_TOO_LONG por linha acima do limite."""
+        columns = self.columns
+        by_file = {}
+        for line in self.over_limit:
+            by_file.setdefault(columns.unit_file[columns.unit_of[line]], []).append({
+                "level": "WARNING",
+                "code": "TEXT_TOO_LONG",
+                "message": f"Texto com {self.lengths[line]} caracteres (limite: {self.max_length}).",
+                "path": columns.line_path(line),
+            })
+        errors = dict(columns.errors)
+        results = []
+        for index, file_path in enumerate(columns.files):
+            issues = by_file.get(index, [])
+            if issues:
+                _attach_lines(issues, file_path, jobs)
+            results.append({"file": file_path, "issues": issues, "error": errors.get(file_path)})
+        return results
+
+
+def _duplicate_groups(texts, lines):
+    """
+    Grupos (linhas, quase_iguais) entre as linhas dadas (todas do mesmo idioma).
+    Primeiro junta os textos iguais (Counter, em C); a chave de quase iguais é
+    calculada uma vez por texto distinto, ou seja, só para os textos que
+    aparecem uma vez e para um representante de cada grupo de iguais. As
+    linhas só são percorridas uma a uma para os textos que se repetem.
+    """
+    line_texts = list(map(texts.__getitem__, lines))
+    exact = Counter(line_texts)
+    distinct = list(exact)
+    near = dict(zip(distinct, _near_keys(distinct)))
+    spellings = Counter(near.values())
+    # Repete se o próprio texto aparece mais de uma vez ou se outra grafia tem a mesma chave
+    repeats = map(or_, map((1).__lt__, exact.values()), map((1).__lt__, map(spellings.__getitem__, near.values())))
+    repeated = set(compress(distinct, repeats))
+    if not repeated:
+        return []
+
+    groups = {}
+    for line, text in compress(zip(lines, line_texts), map(repeated.__contains__, line_texts)):
+        key = near[text]
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [line]
+        else:
+            group.append(line)
+    return [(group, spellings[key] > 1) for key, group in groups.items()]
+
+
+def _attach_lines(issues, file_path, jobs=1):
+    from line_mapping import attach_positions
+    try:
+        with open(file_path, "r", encoding="utf-8", newline="") as file:
+            text = file.read()
+    except OSError:
+        return
+    attach_positions(issues, text, file_path, jobs)
+
+
+# ============================================================
+# Relatório
+# ============================================================
+
+def _location(columns, line):
+    return f"{columns.line_file(line)} {columns.line_path(line)}"
+
+
+def print_stats(stats):
+    columns = stats.columns
+    line_count = len(columns)
+    print("\n=== TEXTO DOS DIÁLOGOS ===")
+    print(
+        f"Arquivos: {len(columns.files)} | Ilegíveis: {len(columns.errors)} | "
+        f"Linhas: {line_count} | Palavras: {stats.total_words}"
+    )
+    if columns.locales[1:]:
+        print(f"Idiomas: {', '.join(columns.locales[1:])}")
+
+    if line_count:
+        print(
+            f"Tamanho das linhas (caracteres): média {sum(stats.lengths) / line_count:.0f} | "
+            f"95% até {stats.length_percentile(0.95)} | máximo {max(stats.lengths)}"
+        )
+
+    print("\n--- Por speaker (palavras | falas) ---")
+    ranked = sorted(stats.speaker_words.items(), key=lambda item: (-item[1], columns.speakers[item[0]]))
+    for speaker, words in ranked[:TOP]:
+        print(f"   {columns.speakers[speaker]:<24} {words:>9} | {stats.speaker_lines[speaker]}")
+    if len(ranked) > TOP:
+        print(f"   ... e mais {len(ranked) - TOP} speakers")
+
+    if stats.max_length is not None:
+        print(f"\n--- Acima de {stats.max_length} caracteres: {len(stats.over_limit)} ---")
+        worst = sorted(stats.over_limit, key=lambda line: -stats.lengths[line])
+        for line in worst[:TOP]:
+            print(f"   ⚠️ {stats.lengths[line]:>5} {_location(columns, line)}")
+        if len(worst) > TOP:
+            print(f"   ... e mais {len(worst) - TOP} (todas como TEXT_TOO_LONG no --format)")
+
+    exact = sum(1 for _, near in stats.duplicates if not near)
+    print(
+        f"\n--- Linhas repetidas ({MIN_DUPLICATE_WORDS}+ palavras): {exact} iguais, "
+        f"{len(stats.duplicates) - exact} quase iguais ---"
+    )
+    for lines, near in stats.duplicates[:TOP]:
+        kind = "quase iguais" if near else "iguais"
+        print(f"   {len(lines)}x ({kind}) \"{_short(columns.texts[lines[0]])}\"")
+        for line in lines[:3]:
+            print(f"      {_location(columns, line)}")
+        if len(lines) > 3:
+            print(f"      ... e mais {len(lines) - 3}")
+
+    if columns.locales[1:]:
+        per_locale = Counter(locale for locales in stats.missing.values() for locale in locales)
+        summary = ", ".join(f"{locale}: {count}" for locale, count in sorted(per_locale.items()))
+        print(f"\n--- Traduções faltando: {len(stats.missing)} textos ({summary or 'nenhuma'}) ---")
+        for unit in sorted(stats.missing)[:TOP]:
+            print(f"   {columns.files[columns.unit_file[unit]]} {columns.unit_path(unit)}: {', '.join(stats.missing[unit])}")
+        if len(stats.missing) > TOP:
+            print(f"   ... e mais {len(stats.missing) - TOP}")
+
+
+def run_text_stats(targets, max_length=None, output_format="text", jobs=None):
+    """
+    Versão de linha de comando (--text-stats). No texto: relatório + as
+    issues de tamanho por arquivo; nos outros formatos, só as issues.
+    Exit code 1 só se algum arquivo não deu para ler.
+    """
+    file_paths = expand_targets(targets)
+    if not file_paths:
+        return report_no_files(output_format)
+
+    stats = TextStats(load_columns(file_paths, jobs), max_length)
+
+    if output_format != "text":
+        from batch_validation import open_output
+        output = open_output(output_format)
+        for result in stats.issue_results(jobs):
+            output.add(result)
+        output.close()
+    else:
+        for result in stats.issue_results(jobs):
+            if result["issues"] or result["error"]:
+                print_file_result(result)
+        print_stats(stats)
+    return 1 if stats.columns.errors else 0
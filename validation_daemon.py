@@ -0,0 +1,322 @@
+"""
+Modo --daemon: o validador fica rodando e atende por um socket Unix.
+
+Hooks de pre-commit e plugins de editor chamam o validador dezenas de vezes
+por minuto; quase todo o tempo vai em subir o Python, importar os módulos e
+ler de novo os mesmos arquivos. O daemon faz isso uma vez só:
+
+- cada arquivo tem um _Document com o seu IncrementalValidator (texto, nós
+  e posições já lidos): arquivo que mudou só tem os nós alterados checados
+- o resultado fica guardado por (mtime, tamanho); se eles não mudaram, nem
+  abre o arquivo. Se mudaram mas o conteúdo é igual (hash), também reaproveita
+- no máximo MAX_DOCUMENTS arquivos em memória; o usado há mais tempo sai (LRU)
+
+O cliente é o validator_client.py (só biblioteca padrão, cai para a
+validação no próprio processo quando não tem daemon).
+
+Protocolo: uma requisição JSON por linha, uma resposta JSON por linha.
+- {"method": "validate", "files": [...], "cwd": "...", "rules": [...],
+   "skip_rules": [...], "report": "text"}
+  -> {"output": "...", "exit_code": 0}; a saída é a mesma do
+  dialogue_validator.py com esses argumentos. Sem "report" volta
+  {"results": [{"file", "issues", "error"}, ...]}
+- {"method": "validate", "text": "...", "file": "nome.json"} valida o JSON
+  enviado (ex: buffer ainda não salvo do editor) -> {"results": [...]}
+- {"method": "ping"}, {"method": "stats"}, {"method": "shutdown"}
+- erro: {"error": "mensagem"}
+
+As requisições são atendidas uma por vez (validar é CPU; threads não
+ajudariam com o GIL). Depois de atualizar o validador, reinicie o daemon.
+"""
+import contextlib
+import hashlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+from collections import OrderedDict
+
+from dialogue_validator import VALIDATOR_VERSION, print_report, validate_json_text
+from incremental_validation import IncrementalValidator
+from rules import RuleSelection
+
+
+DEFAULT_SOCKET = os.path.join(".nfc_cache", "daemon.sock")
+MAX_DOCUMENTS = 64
+REPORT_FORMATS = ("text", "jsonl", "sarif", "junit")
+
+_DEFAULT_RULES = "default"
+
+
+def _signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=20).digest()
+
+
+class _Cached:
+    __slots__ = ("signature", "digest", "issues", "error")
+
+    def __init__(self, signature, digest, issues, error):
+        self.signature = signature
+        self.digest = digest
+        self.issues = issues
+        self.error = error
+
+
+class _Document:
+    """Um arquivo em memória: o validador incremental e o último resultado de cada seleção de regras."""
+
+    def __init__(self):
+        self.validator = IncrementalValidator()
+        self.results = {}   # "default" ou fingerprint das regras -> _Cached
+
+
+class DocumentCache:
+    def __init__(self, max_documents=MAX_DOCUMENTS):
+        self.max_documents = max_documents
+        self.documents = OrderedDict()   # path absoluto (ou nome do texto enviado) -> _Document
+        self.hits = 0
+        self.misses = 0
+
+    def _document(self, key):
+        document = self.documents.get(key)
+        if document is None:
+            document = self.documents[key] = _Document()
+            while len(self.documents) > self.max_documents:
+                self.documents.popitem(last=False)
+        else:
+            self.documents.move_to_end(key)
+        return document
+
+    def validate_file(self, file_path, display=None, rules=None):
+        """Mesmo formato do dialogue_validator.validate_file; "file" é o nome como foi pedido."""
+        display = str(file_path) if display is None else display
+        key = os.path.abspath(file_path)
+        rules_key = _DEFAULT_RULES if rules is None else rules.fingerprint()
+        document = self._document(key)
+        signature = _signature(key)
+
+        cached = document.results.get(rules_key)
+        if signature is not None and cached is not None and cached.signature == signature:
+            self.hits += 1
+            return self._result(display, cached)
+
+        try:
+            with open(key, "r", encoding="utf-8") as file:
+                text = file.read()
+        except FileNotFoundError:
+            document.results.pop(rules_key, None)
+            return {"file": display, "issues": [], "error": f"Arquivo não encontrado: {display}"}
+        except (OSError, UnicodeDecodeError) as e:
+            document.results.pop(rules_key, None)
+            return {"file": display, "issues": [], "error": f"Erro ao abrir o arquivo: {e}"}
+        return self._validate(document, rules_key, rules, text, signature, display)
+
+    def validate_text(self, text, name=None, rules=None):
+        """Valida o JSON recebido (sem ler o disco). Com name, reaproveita o documento desse arquivo."""
+        key = os.path.abspath(name) if name else "<texto>"
+        rules_key = _DEFAULT_RULES if rules is None else rules.fingerprint()
+        return self._validate(self._document(key), rules_key, rules, text, None, name or "<texto>")
+
+    def _validate(self, document, rules_key, rules, text, signature, display):
+        digest = _digest(text)
+        cached = document.results.get(rules_key)
+        if cached is not None and cached.digest == digest:
+            # mtime mudou, conteúdo não (ex: git checkout, touch)
+            self.hits += 1
+            cached.signature = signature
+            return self._result(display, cached)
+
+        self.misses += 1
+        error = None
+        issues = []
+        try:
+            if rules is None:
+                issues = document.validator.validate_text(text)
+            else:
+                issues = validate_json_text(json.loads(text), text, rules=rules)
+        except json.JSONDecodeError as e:
+            error = f"JSON inválido: {e.msg} | Linha {e.lineno}, Coluna {e.colno}"
+
+        cached = document.results[rules_key] = _Cached(signature, digest, issues, error)
+        return self._result(display, cached)
+
+    @staticmethod
+    def _result(display, cached):
+        # Cópias: o relatório ordena a lista e quem chama pode mexer nas issues
+        return {"file": display, "issues": [dict(issue) for issue in cached.issues], "error": cached.error}
+
+    def stats(self):
+        return {"documents": len(self.documents), "hits": self.hits, "misses": self.misses}
+
+
+# ============================================================
+# Servidor
+# ============================================================
+
+def render_report(results, report, single=False):
+    """A saída que o dialogue_validator.py imprimiria: (texto, exit code)."""
+    from batch_validation import open_output
+
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        if single and report == "text":
+            # Um arquivo, formato texto: o relatório completo (como o main)
+            result = results[0]
+            if result["error"]:
+                print(f"❌ {result['error']}")
+            else:
+                print_report(result["issues"])
+            exit_code = 0
+        else:
+            output = open_output(report)
+            for result in results:
+                output.add(result)
+            exit_code = output.close()
+    return buffer.getvalue(), exit_code
+
+
+class ValidationDaemon:
+    def __init__(self, max_documents=MAX_DOCUMENTS):
+        self.cache = DocumentCache(max_documents)
+        self.selections = {}   # (regras, regras puladas) -> RuleSelection
+        self.running = True
+
+    def _rules(self, request):
+        only = tuple(request.get("rules") or ())
+        skip = tuple(request.get("skip_rules") or ())
+        if not only and not skip:
+            return None
+        selection = self.selections.get((only, skip))
+        if selection is None:
+            selection = RuleSelection(only=only, skip=skip)
+            selection.enabled()   # ValueError com regra desconhecida
+            self.selections[(only, skip)] = selection
+        return selection
+
+    def handle(self, request):
+        method = request.get("method")
+        if method == "ping":
+            return {"version": VALIDATOR_VERSION, "pid": os.getpid()}
+        if method == "stats":
+            return self.cache.stats()
+        if method == "shutdown":
+            self.running = False
+            return {"ok": True}
+        if method != "validate":
+            return {"error": f"Método desconhecido: {method}"}
+
+        try:
+            rules = self._rules(request)
+        except ValueError as e:
+            return {"error": str(e)}
+
+        if "text" in request:
+            results = [self.cache.validate_text(request["text"], request.get("file"), rules)]
+        else:
+            cwd = request.get("cwd") or os.getcwd()
+            files = request.get("files") or []
+            if not files:
+                return {"error": "Nenhum arquivo informado."}
+            # Como no expand_targets: o mesmo arquivo listado duas vezes é validado uma vez só
+            unique = {}
+            for file_path in files:
+                unique.setdefault(os.path.normpath(file_path), file_path)
+            results = [
+                self.cache.validate_file(os.path.join(cwd, file_path), file_path, rules)
+                for file_path in unique.values()
+            ]
+
+        report = request.get("report")
+        if report is None:
+            return {"results": results}
+        if report not in REPORT_FORMATS:
+            return {"error": f"Formato desconhecido: {report}"}
+        # Mais de um alvo é modo lote no dialogue_validator, mesmo que sejam o mesmo arquivo
+        single = "text" not in request and len(request["files"]) == 1
+        output, exit_code = render_report(results, report, single=single)
+        return {"output": output, "exit_code": exit_code}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.daemon
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("a requisição precisa ser um objeto JSON")
+            except ValueError as e:
+                response = {"error": f"Requisição inválida: {e}"}
+            else:
+                try:
+                    response = daemon.handle(request)
+                except Exception as e:   # uma requisição ruim não derruba o daemon
+                    response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+            if not daemon.running:
+                return
+
+
+class _Server(socketserver.UnixStreamServer):
+    def __init__(self, socket_path, daemon):
+        self.daemon = daemon
+        super().__init__(socket_path, _Handler)
+
+
+def _socket_in_use(socket_path):
+    """True se já tem um daemon respondendo nesse socket (senão é resto de um daemon que caiu)."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def run_daemon(socket_path=DEFAULT_SOCKET, max_documents=MAX_DOCUMENTS):
+    """Versão de linha de comando (--daemon). Roda até Ctrl+C ou "shutdown" e retorna o exit code."""
+    if not hasattr(socket, "AF_UNIX"):
+        print("❌ Este sistema não tem sockets Unix; use o validador direto.")
+        return 1
+
+    if os.path.exists(socket_path):
+        if _socket_in_use(socket_path):
+            print(f"❌ Já tem um daemon rodando em {socket_path}")
+            return 1
+        os.unlink(socket_path)
+    directory = os.path.dirname(socket_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    daemon = ValidationDaemon(max_documents)
+    try:
+        server = _Server(socket_path, daemon)
+    except OSError as e:
+        print(f"❌ Não foi possível abrir o socket {socket_path}: {e}")
+        return 1
+
+    print(f"🛰️ Daemon ouvindo em {socket_path} (pid {os.getpid()}). Ctrl+C para sair.")
+    sys.stdout.flush()
+    try:
+        with server:
+            while daemon.running:
+                server.handle_request()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(socket_path)
+    return 0
@@ -0,0 +1,182 @@
+"""
+Cliente do daemon (validation_daemon.py), para hooks e plugins de editor.
+
+Aceita os mesmos argumentos do dialogue_validator.py e imprime a mesma saída
+(com o mesmo exit code). Se tem um daemon ouvindo no socket, só manda o
+pedido e mostra a resposta; senão, valida aqui mesmo chamando o
+dialogue_validator.main.
+
+Para ficar leve, só importa a biblioteca padrão antes de falar com o
+daemon. Antes de cada pedido confere (ping) se o daemon roda a mesma
+VALIDATOR_VERSION deste validador; um daemon desatualizado é ignorado e a
+validação roda aqui, com um aviso para reiniciar o daemon. O daemon atende os casos comuns (arquivos listados um a um, --rules,
+--skip-rules, --format); o resto (pastas, globs, --stream, --project,
+--plugin...) roda direto aqui.
+
+    python dialogue_validator.py --daemon &      # uma vez
+    python validator_client.py dialogos/cap1.json dialogos/cap2.json
+"""
+import json
+import os
+import re
+import socket
+import sys
+
+
+DEFAULT_SOCKET = os.path.join(".nfc_cache", "daemon.sock")
+CONNECT_TIMEOUT = 1.0
+
+# Opções com valor que o daemon entende
+_VALUE_OPTIONS = {"--rules": "rules", "--skip-rules": "skip_rules", "--format": "report", "--socket": "socket"}
+# Opções que não mudam o resultado de arquivos listados um a um (cache em disco e processos do lote)
+_IGNORED_FLAGS = {"--no-cache"}
+_IGNORED_VALUE_OPTIONS = {"--cache-dir", "-j", "--jobs"}
+
+
+_VERSION_LINE = re.compile(r'^VALIDATOR_VERSION = "([^"]*)"', re.MULTILINE)
+
+
+def installed_version():
+    """
+    VALIDATOR_VERSION do dialogue_validator.py ao lado deste arquivo. Lido do
+    texto para não importar o validador (é o que o cliente quer evitar).
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dialogue_validator.py")
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            match = _VERSION_LINE.search(file.read())
+    except OSError:
+        match = None
+    if match is None:
+        from dialogue_validator import VALIDATOR_VERSION
+        return VALIDATOR_VERSION
+    return match.group(1)
+
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_request(argv):
+    """
+    Monta a requisição para o daemon a partir dos argumentos, ou None quando
+    eles precisam do validador completo. Retorna (requisição, socket).
+    """
+    request = {"method": "validate", "files": [], "report": "text", "cwd": os.getcwd()}
+    socket_path = DEFAULT_SOCKET
+    args = iter(argv)
+    for arg in args:
+        name, has_value, value = arg.partition("=")
+        if name in _VALUE_OPTIONS or name in _IGNORED_VALUE_OPTIONS:
+            if not has_value:
+                value = next(args, None)
+                if value is None:
+                    return None, socket_path
+            field = _VALUE_OPTIONS.get(name)
+            if field == "socket":
+                socket_path = value
+            elif field in ("rules", "skip_rules"):
+                request[field] = _split(value)
+            elif field == "report":
+                request[field] = value
+        elif arg in _IGNORED_FLAGS:
+            continue
+        elif arg.startswith("-") and arg != "-":
+            return None, socket_path
+        elif any(ch in arg for ch in "*?[") or os.path.isdir(arg):
+            return None, socket_path
+        else:
+            request["files"].append(arg)
+
+    if not request["files"]:
+        request["files"] = ["dialogues.json"]
+    return request, socket_path
+
+
+def _without_socket(argv):
+    """Os argumentos sem o --socket (que o dialogue_validator não conhece)."""
+    result = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == "--socket":
+            skip = True
+        elif not arg.startswith("--socket="):
+            result.append(arg)
+    return result
+
+
+class OutdatedDaemon(Exception):
+    """O daemon roda outra VALIDATOR_VERSION (foi iniciado antes de atualizar o validador)."""
+
+    def __init__(self, daemon_version, version):
+        super().__init__(daemon_version, version)
+        self.daemon_version = daemon_version
+        self.version = version
+
+
+def _exchange(client, stream, request):
+    client.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+    line = stream.readline()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def ask_daemon(request, socket_path=DEFAULT_SOCKET, version=None):
+    """
+    Manda uma requisição e devolve a resposta, ou None se não tem daemon (ou
+    ele caiu no meio). Com version, antes pergunta a versão do daemon (ping,
+    na mesma conexão) e levanta OutdatedDaemon se for outra.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(CONNECT_TIMEOUT)
+        client.connect(socket_path)
+        with client.makefile("rb") as stream:
+            if version is not None:
+                pong = _exchange(client, stream, {"method": "ping"})
+                if not isinstance(pong, dict):
+                    return None
+                if pong.get("version") != version:
+                    raise OutdatedDaemon(pong.get("version"), version)
+            # Validar um arquivo grande pela primeira vez pode demorar
+            client.settimeout(None)
+            return _exchange(client, stream, request)
+    except OSError:
+        return None
+    finally:
+        client.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    request, socket_path = parse_request(argv)
+    if request is not None:
+        try:
+            response = ask_daemon(request, socket_path, installed_version())
+        except OutdatedDaemon as e:
+            print(
+                f"⚠️ O daemon em {socket_path} está desatualizado (versão {e.daemon_version}, "
+                f"validador {e.version}): validando aqui. Reinicie o daemon.",
+                file=sys.stderr,
+            )
+            response = None
+        # Com erro (ex: regra desconhecida) o validador completo mostra a mensagem de sempre
+        if response is not None and "output" in response:
+            sys.stdout.write(response["output"])
+            sys.stdout.flush()
+            return response["exit_code"]
+
+    from dialogue_validator import main as validate_main
+    return validate_main(_without_socket(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Modo --watch: revalida cada arquivo assim que ele é salvo.
+
+No Linux usa o inotify (via ctypes, sem dependência extra): as pastas dos
+arquivos são observadas e o arquivo é revalidado no IN_CLOSE_WRITE ou no
+IN_MOVED_TO (editor que grava um temporário e renomeia), ou seja, quando o
+editor já terminou de gravar - sem esperar intervalo nenhum.
+
+Onde não há inotify, cai para polling: a cada POLL_INTERVAL confere o
+mtime/tamanho dos arquivos (os.stat). Editores costumam salvar em mais de
+uma escrita, então nesse caso o arquivo só é revalidado depois de ficar
+DEBOUNCE segundos sem mudar. O polling continua rodando junto com o
+inotify, como rede de segurança (pastas de rede, eventos perdidos).
+
+Cada arquivo tem o seu IncrementalValidator: só o arquivo salvo é lido de
+novo, e dentro dele só os nós alterados são checados outra vez.
+
+O tempo mostrado é do salvamento (mtime do arquivo) até o relatório
+pronto, não só o da validação.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from batch_validation import expand_targets, print_file_result
+from incremental_validation import IncrementalValidator
+
+
+POLL_INTERVAL = 0.05
+DEBOUNCE = 0.05
+RESCAN_INTERVAL = 1.0   # de quanto em quanto tempo procura arquivos novos nas pastas/globs
+
+# Constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# Só "terminou de gravar": no IN_CREATE o arquivo ainda está vazio, e o
+# IN_DELETE/IN_MOVED_FROM do meio de um salvamento (backup do editor) daria
+# um erro falso. Arquivos apagados ficam com o polling (com debounce).
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+_EVENT_HEADER = struct.Struct("iIII")   # wd, mask, cookie, len
+
+
+def _signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class Inotify:
+    """
+    Observa pastas com o inotify. Só existe no Linux: use Inotify.create(),
+    que retorna None quando não dá (outro sistema, libc sem inotify, limite
+    de watches estourado).
+    """
+
+    def __init__(self, libc, fd):
+        self.libc = libc
+        self.fd = fd
+        self.folders = {}   # wd -> pasta
+
+    @classmethod
+    def create(cls):
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        return cls(libc, fd)
+
+    def add_folder(self, folder):
+        """Observa uma pasta (de novo é inofensivo: o kernel devolve o mesmo wd)."""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+        if wd < 0:
+            return False
+        self.folders[wd] = folder
+        return True
+
+    def read(self, timeout):
+        """
+        Espera até 'timeout' segundos. Retorna os caminhos gravados, ou
+        None se o kernel perdeu eventos (fila cheia) e é preciso conferir tudo.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        paths = []
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif wd in self.folders and name:
+                    paths.append(os.path.join(self.folders[wd], os.fsdecode(name)))
+        return None if overflow else paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Guarda um validador e a última assinatura (mtime, tamanho) de cada arquivo."""
+
+    def __init__(self, targets, debounce=DEBOUNCE):
+        self.targets = targets
+        self.debounce = debounce
+        self.validators = {}   # arquivo -> IncrementalValidator
+        self.signatures = {}   # arquivo -> assinatura da última validação
+        self.changed = {}      # arquivo -> (assinatura nova, quando foi vista)
+        self.keys = {}         # caminho normalizado -> arquivo (para casar os eventos)
+
+    def refresh(self):
+        """Expande pastas/globs de novo. Retorna os arquivos que apareceram agora."""
+        new_files = []
+        for file_path in expand_targets(self.targets):
+            if file_path not in self.validators:
+                self.validators[file_path] = IncrementalValidator()
+                self.signatures[file_path] = None
+                self.keys[os.path.abspath(file_path)] = file_path
+                new_files.append(file_path)
+        return new_files
+
+    def folders(self):
+        """Pastas a observar: a de cada arquivo e as pastas passadas (com subpastas)."""
+        folders = {os.path.dirname(os.path.abspath(file_path)) for file_path in self.validators}
+        for target in self.targets:
+            if os.path.isdir(target):
+                folders.update(os.path.abspath(root) for root, _, _ in os.walk(target))
+        return sorted(folder for folder in folders if os.path.isdir(folder))
+
+    def validate(self, file_path):
+        """Revalida um arquivo. Retorna (resultado, segundos desde o salvamento)."""
+        signature = _signature(file_path)
+        self.signatures[file_path] = signature
+        started = time.time_ns()
+        result = self.validators[file_path].validate_file(file_path)
+        finished = time.time_ns()
+        saved = signature[0] if signature is not None and signature[0] <= started else started
+        return result, (finished - saved) / 1e9
+
+    def saved(self, paths):
+        """
+        Arquivos conhecidos que o inotify diz que acabaram de ser gravados
+        e que mudaram desde a última validação. Não precisam de debounce:
+        o evento só chega quando o editor fechou ou renomeou o arquivo.
+        """
+        ready = []
+        for path in paths:
+            file_path = self.keys.get(os.path.abspath(path))
+            if file_path is not None and file_path not in ready:
+                if _signature(file_path) != self.signatures[file_path]:
+                    self.changed.pop(file_path, None)
+                    ready.append(file_path)
+        return ready
+
+    def poll(self, now):
+        """Arquivos que mudaram e já estão estáveis há 'debounce' segundos."""
+        ready = []
+        for file_path in self.validators:
+            signature = _signature(file_path)
+            if signature == self.signatures[file_path]:
+                self.changed.pop(file_path, None)
+                continue
+
+            seen = self.changed.get(file_path)
+            if seen is None or seen[0] != signature:
+                # Mudou (de novo): espera parar de mudar
+                self.changed[file_path] = (signature, now)
+            elif now - seen[1] >= self.debounce:
+                del self.changed[file_path]
+                ready.append(file_path)
+        return ready
+
+
+def _report(result, elapsed):
+    print(f"\n🔄 {time.strftime('%H:%M:%S')} relatório {elapsed * 1000:.0f} ms depois de salvar")
+    print_file_result(result)
+    sys.stdout.flush()
+
+
+def run_watch(targets, poll_interval=POLL_INTERVAL, debounce=DEBOUNCE):
+    """Versão de linha de comando. Roda até Ctrl+C e retorna o exit code."""
+    watcher = FileWatcher(targets, debounce)
+    file_paths = watcher.refresh()
+    if not file_paths:
+        print("❌ Nenhum arquivo .json encontrado.")
+        return 1
+
+    for file_path in file_paths:
+        result, _ = watcher.validate(file_path)
+        print_file_result(result)
+
+    events = Inotify.create()
+    if events is not None:
+        for folder in watcher.folders():
+            events.add_folder(folder)
+    source = "inotify" if events is not None else f"polling a cada {poll_interval * 1000:.0f} ms"
+    print(f"\n👀 Observando {len(file_paths)} arquivo(s) ({source}). Ctrl+C para sair.")
+    sys.stdout.flush()
+
+    last_refresh = time.monotonic()
+    try:
+        while True:
+            if events is None:
+                time.sleep(poll_interval)
+                changed_paths = []
+            else:
+                changed_paths = events.read(poll_interval)
+                if changed_paths is None:
+                    # Fila do kernel estourou: o polling abaixo confere tudo
+                    changed_paths = []
+                    last_refresh = 0.0
+            now = time.monotonic()
+
+            for file_path in watcher.saved(changed_paths):
+                result, elapsed = watcher.validate(file_path)
+                _report(result, elapsed)
+
+            created = any(path.endswith(".json") and os.path.abspath(path) not in watcher.keys
+                          for path in changed_paths)
+            if created or now - last_refresh >= RESCAN_INTERVAL:
+                last_refresh = now
+                new_files = watcher.refresh()
+                if events is not None:
+                    for folder in watcher.folders():
+                        events.add_folder(folder)
+                for file_path in new_files:
+                    result, _ = watcher.validate(file_path)
+                    print(f"\n🆕 {time.strftime('%H:%M:%S')} novo arquivo")
+                    print_file_result(result)
+                    sys.stdout.flush()
+
+            for file_path in watcher.poll(now):
+                result, elapsed = watcher.validate(file_path)
+                _report(result, elapsed)
+    except KeyboardInterrupt:
+        print()
+        return 0
+    finally:
+        if events is not None:
+            events.close()